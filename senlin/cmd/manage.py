@@ -20,9 +20,12 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import timeutils
 
+from senlin.common import consts
 from senlin.common import context
 from senlin.common.i18n import _
 from senlin.db import api
+from senlin.engine import retention
+from senlin.objects import health_registry as registry_obj
 from senlin.objects import service as service_obj
 from senlin import version
 
@@ -107,6 +110,136 @@ class ServiceManageCommand(object):
         remove_parser.set_defaults(func=ServiceManageCommand().service_clean)
 
 
+class HealthManageCommand(object):
+    def __init__(self):
+        self.ctx = context.get_admin_context()
+
+    def health_list(self):
+        """Print the number of clusters checked by each engine."""
+        counts = registry_obj.HealthRegistry.count_by_engine(self.ctx)
+        services = [ServiceManageCommand()._format_service(service)
+                    for service in service_obj.Service.get_all(self.ctx)]
+
+        print_format = "%-36s %-24s %-10s %-10s"
+        print(print_format % (_('Engine ID'),
+                              _('Host'),
+                              _('Status'),
+                              _('Clusters')))
+
+        for svc in services:
+            print(print_format % (svc['service_id'],
+                                  svc['host'],
+                                  svc['status'],
+                                  counts.pop(svc['service_id'], 0)))
+
+        # Clusters of engines removed from the service table, waiting to be
+        # claimed by the live engines
+        for engine_id, count in sorted(counts.items()):
+            print(print_format % (engine_id, '-', 'down', count))
+
+    @staticmethod
+    def add_health_parsers(subparsers):
+        health_parser = subparsers.add_parser('health')
+        health_parser.set_defaults(command_object=HealthManageCommand)
+        health_subparsers = health_parser.add_subparsers(dest='action')
+        list_parser = health_subparsers.add_parser(
+            'list', help=_('List the number of clusters checked by each '
+                           'engine.'))
+        list_parser.set_defaults(func=HealthManageCommand().health_list)
+
+
+class EventManageCommand(object):
+    def __init__(self):
+        self.ctx = context.get_admin_context()
+
+    def event_purge(self):
+        args = CONF.command
+        if args.level and args.age is None:
+            raise ValueError(_('The --age option is required when --level '
+                               'is specified.'))
+
+        if args.age is None and args.max_per_cluster is None:
+            # Purge according to the configured policies
+            max_age = level_max_age = max_per_cluster = None
+        else:
+            max_age = args.age or 0
+            level_max_age = {}
+            if args.level:
+                level_max_age = dict((level, max_age) for level in args.level)
+                max_age = 0
+            max_per_cluster = args.max_per_cluster or 0
+
+        count = retention.purge_events(self.ctx, max_age=max_age,
+                                       level_max_age=level_max_age,
+                                       max_per_cluster=max_per_cluster,
+                                       dry_run=args.dry_run)
+        if args.dry_run:
+            print(_('%s events would be purged.') % count)
+        else:
+            print(_('%s events purged.') % count)
+
+    @staticmethod
+    def add_event_parsers(subparsers):
+        event_parser = subparsers.add_parser('event')
+        event_parser.set_defaults(command_object=EventManageCommand)
+        event_subparsers = event_parser.add_subparsers(dest='action')
+        purge_parser = event_subparsers.add_parser(
+            'purge', help=_('Purge events. Without any of --age and '
+                            '--max-per-cluster, the policies configured in '
+                            'the [retention] group are applied.'))
+        purge_parser.add_argument(
+            '--age', type=int, metavar='DAYS',
+            help=_('Purge events older than the number of days.'))
+        purge_parser.add_argument(
+            '--level', action='append',
+            choices=sorted(consts.EVENT_LEVELS.keys()),
+            help=_('Restrict the purge by age to events of the level. It '
+                   'can be specified more than once.'))
+        purge_parser.add_argument(
+            '--max-per-cluster', type=int, metavar='N',
+            help=_('Purge the oldest events of clusters having more than N '
+                   'events.'))
+        purge_parser.add_argument(
+            '--dry-run', action='store_true',
+            help=_('Count the events to be purged without deleting them.'))
+        purge_parser.set_defaults(func=EventManageCommand().event_purge)
+
+
+class ActionManageCommand(object):
+    def __init__(self):
+        self.ctx = context.get_admin_context()
+
+    def action_purge(self):
+        args = CONF.command
+        actions, dependencies = retention.purge_actions(
+            self.ctx, max_age=args.age, dry_run=args.dry_run)
+        values = {'a': actions, 'd': dependencies}
+        if args.dry_run:
+            print(_('%(a)s actions and %(d)s action dependencies would be '
+                    'purged.') % values)
+        else:
+            print(_('%(a)s actions and %(d)s action dependencies '
+                    'purged.') % values)
+
+    @staticmethod
+    def add_action_parsers(subparsers):
+        action_parser = subparsers.add_parser('action')
+        action_parser.set_defaults(command_object=ActionManageCommand)
+        action_subparsers = action_parser.add_subparsers(dest='action')
+        purge_parser = action_subparsers.add_parser(
+            'purge', help=_('Purge completed actions and the action '
+                            'dependencies no longer used.'))
+        purge_parser.add_argument(
+            '--age', type=int, metavar='DAYS',
+            help=_('Purge actions completed more than the number of days '
+                   'ago. Defaults to the action_max_age option in the '
+                   '[retention] group.'))
+        purge_parser.add_argument(
+            '--dry-run', action='store_true',
+            help=_('Count the rows to be purged without deleting them.'))
+        purge_parser.set_defaults(func=ActionManageCommand().action_purge)
+
+
 def add_command_parsers(subparsers):
     parser = subparsers.add_parser('db_version')
     parser.set_defaults(func=do_db_version)
@@ -114,6 +247,9 @@ def add_command_parsers(subparsers):
     parser = subparsers.add_parser('db_sync')
     parser.set_defaults(func=do_db_sync)
     ServiceManageCommand.add_service_parsers(subparsers)
+    HealthManageCommand.add_health_parsers(subparsers)
+    EventManageCommand.add_event_parsers(subparsers)
+    ActionManageCommand.add_action_parsers(subparsers)
     parser.add_argument('version', nargs='?')
     parser.add_argument('current_version', nargs='?')
 
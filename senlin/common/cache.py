@@ -0,0 +1,354 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+In-process caches for objects that are expensive to reconstruct.
+"""
+
+import collections
+import copy
+import threading
+import time
+
+from oslo_config import cfg
+import six
+
+cfg.CONF.import_opt('object_cache_size', 'senlin.common.config')
+cfg.CONF.import_opt('placement_cache_size', 'senlin.common.config')
+cfg.CONF.import_opt('details_cache_ttl', 'senlin.common.config')
+
+
+class ObjectCache(object):
+    """A bounded LRU cache of objects keyed by ID and version.
+
+    The version of an entry is typically the 'updated_at' timestamp of the
+    corresponding DB record, so an entry becomes stale as soon as the record
+    is updated, no matter which engine updated it. Objects are shallow copied
+    when retrieved from the cache so that per-instance states, such as
+    cached clients, are never shared between callers.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Get a copy of the cached object.
+
+        :param key: ID of the object.
+        :param version: Version of the object expected.
+        :returns: A copy of the cached object or None if the object is not
+                  cached or the cached version doesn't match.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+
+            # Move the entry to the most recently used end
+            self._entries[key] = entry
+            self.hits += 1
+
+        return copy.copy(entry[1])
+
+    def put(self, key, version, obj):
+        """Add an object into the cache, evicting the least recently used.
+
+        :param key: ID of the object.
+        :param version: Version of the object.
+        :param obj: The object to be cached.
+        """
+        size = cfg.CONF.object_cache_size
+        if size <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (version, obj)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Remove an object from the cache.
+
+        :param key: ID of the object.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get statistics of the cache.
+
+        :returns: A dict containing the number of hits, misses and entries.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+class ExpiringCache(object):
+    """A cache of values that expire after a short period of time.
+
+    It is used for data fetched from backend services, e.g. node details,
+    which can be slightly stale but are costly to retrieve. Values are
+    shallow copied when retrieved from the cache.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._next_purge = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a copy of a cached value.
+
+        :param key: Key of the value.
+        :returns: A copy of the value or None if not cached or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return copy.copy(entry[1])
+
+    def put(self, key, value):
+        """Add a value into the cache.
+
+        Expired entries are purged at most once per TTL period when new
+        values are added.
+
+        :param key: Key of the value.
+        :param value: The value to be cached.
+        """
+        ttl = cfg.CONF.details_cache_ttl
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        with self._lock:
+            if now >= self._next_purge:
+                expired = [k for k, v in self._entries.items() if v[0] <= now]
+                for k in expired:
+                    del self._entries[k]
+                self._next_purge = now + ttl
+            self._entries[key] = (now + ttl, value)
+
+    def invalidate(self, key):
+        """Remove a value from the cache.
+
+        :param key: Key of the value.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get statistics of the cache.
+
+        :returns: A dict containing the number of hits, misses and entries.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+class PlacementCache(object):
+    """Counters of the placement of cluster members.
+
+    For each cluster, the placement values of its members, such as the
+    availability zone or the region of the nodes, are counted so that the
+    distribution of the nodes can be computed without checking every node.
+    The counters are updated incrementally as nodes are added to or removed
+    from a cluster. Because nodes can be created, deleted or moved by other
+    engines, they are also reconciled against the member list of the cluster
+    each time they are used, by node ID, the values of a node being counted
+    again only when its placement data differ from the data recorded.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_entry(self, cluster_id):
+        entry = self._entries.pop(cluster_id, None)
+        if entry is None:
+            entry = {'nodes': {}, 'counts': {}}
+
+        size = cfg.CONF.placement_cache_size
+        if cluster_id is not None and size > 0:
+            self._entries[cluster_id] = entry
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _add(self, entry, node_id, values):
+        # A record holds the placement data the values of a node were read
+        # from, None until they are read, and the values counted.
+        record = entry['nodes'].setdefault(node_id,
+                                           {'placement': None, 'values': {}})
+        counted = record['values']
+        for key, value in values.items():
+            if not value or not isinstance(value, six.string_types):
+                continue
+            old = counted.get(key)
+            if old == value:
+                continue
+            counts = entry['counts'].setdefault(key, {})
+            if old is not None:
+                counts[old] -= 1
+            counts[value] = counts.get(value, 0) + 1
+            counted[key] = value
+        return record
+
+    def _remove(self, entry, node_id):
+        record = entry['nodes'].pop(node_id, None)
+        if record is None:
+            return
+        for key, value in record['values'].items():
+            entry['counts'][key][value] -= 1
+
+    def _update(self, entry, node_id, placement):
+        record = entry['nodes'].get(node_id)
+        if record is not None and record['placement'] == placement:
+            return record
+
+        if record is not None and record['placement'] is not None:
+            # The node was moved, the values read before are all dropped
+            self._remove(entry, node_id)
+        record = self._add(entry, node_id, placement)
+        record['placement'] = copy.deepcopy(placement)
+        return record
+
+    def add(self, cluster_id, node_id, values):
+        """Record the placement of a cluster member.
+
+        Values are merged with the placement already recorded for the node,
+        until the placement data of the node are found changed by `count`.
+
+        :param cluster_id: ID of the cluster.
+        :param node_id: ID of the node.
+        :param values: A dict containing the placement of the node.
+        """
+        with self._lock:
+            entry = self._get_entry(cluster_id)
+            self._add(entry, node_id, values)
+
+    def remove(self, cluster_id, node_id):
+        """Forget the placement of a node leaving a cluster.
+
+        :param cluster_id: ID of the cluster.
+        :param node_id: ID of the node.
+        """
+        with self._lock:
+            entry = self._entries.get(cluster_id)
+            if entry is not None:
+                self._remove(entry, node_id)
+
+    def count(self, cluster_id, nodes, key):
+        """Count the members of a cluster by a placement value.
+
+        :param cluster_id: ID of the cluster, None if not stored yet.
+        :param nodes: The current members of the cluster, the placement data
+                      of which are compared with the data recorded.
+        :param key: The placement key to count the nodes by, e.g. 'zone'.
+        :returns: A tuple containing a dict of the number of nodes by value
+                  of the key and a list of the nodes without such a value.
+        """
+        with self._lock:
+            if cluster_id in self._entries:
+                self.hits += 1
+            else:
+                self.misses += 1
+            entry = self._get_entry(cluster_id)
+            records = entry['nodes']
+
+            missing = []
+            members = set()
+            for node in nodes:
+                members.add(node.id)
+                placement = node.data.get('placement') or {}
+                record = self._update(entry, node.id, placement)
+                if key not in record['values']:
+                    missing.append(node)
+
+            if len(records) > len(members):
+                for node_id in set(records) - members:
+                    self._remove(entry, node_id)
+
+            counts = dict((v, c) for v, c in entry['counts'].get(key, {})
+                          .items() if c > 0)
+
+        return counts, missing
+
+    def invalidate(self, cluster_id):
+        """Drop the counters of a cluster.
+
+        :param cluster_id: ID of the cluster.
+        """
+        with self._lock:
+            self._entries.pop(cluster_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get statistics of the cache.
+
+        :returns: A dict containing the number of hits, misses and entries.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+profiles = ObjectCache('profile')
+policies = ObjectCache('policy')
+details = ExpiringCache('details')
+placements = PlacementCache('placement')
@@ -28,7 +28,12 @@ service_opts = [
                help=_('Default region name used to get services endpoints.')),
     cfg.IntOpt('max_response_size',
                default=524288,
-               help=_('Maximum raw byte size of data from web response.'))
+               help=_('Maximum raw byte size of data from web response.')),
+    cfg.IntOpt('max_cached_connections',
+               default=128,
+               help=_('Maximum number of authenticated connections to backend '
+                      'services each process keeps for reuse. 0 disables '
+                      'connection reuse.'))
 ]
 
 cfg.CONF.register_opts(service_opts)
@@ -71,12 +76,94 @@ engine_opts = [
                default=3,
                help=_('Seconds to pause between scheduling two consecutive '
                       'batches of node actions.')),
+    cfg.IntOpt('max_actions_per_acquire',
+               default=10,
+               help=_('Maximum number of ready actions that each engine '
+                      'worker acquires from database in one transaction.')),
+    cfg.IntOpt('dependency_check_interval',
+               default=30,
+               help=_('Maximum number of seconds an action waits before '
+                      'checking the status of its dependent actions. An '
+                      'action is normally woken up as soon as all its '
+                      'dependent actions have finished.')),
+    cfg.IntOpt('dependency_batch_size',
+               default=100,
+               help=_('Maximum number of completed actions whose dependency '
+                      'records each engine worker deletes from database in '
+                      'one batch. 0 means the records are deleted as soon as '
+                      'the actions complete.')),
+    cfg.StrOpt('node_operation_mode',
+               default='actions',
+               choices=['actions', 'inline'],
+               help=_('How a cluster action operates on its nodes. With '
+                      '"actions", a node action is created and scheduled for '
+                      'each node. With "inline", the node operations are run '
+                      'by the cluster action itself and node actions are only '
+                      'recorded for the failed operations.')),
+    cfg.IntOpt('inline_pool_size',
+               default=10,
+               help=_('Maximum number of node operations each cluster action '
+                      'runs concurrently in the "inline" node operation '
+                      'mode.')),
+    cfg.IntOpt('object_cache_size',
+               default=256,
+               help=_('Maximum number of profiles and of policies each engine '
+                      'process keeps in its in-memory cache. 0 disables the '
+                      'cache.')),
+    cfg.IntOpt('placement_cache_size',
+               default=256,
+               help=_('Maximum number of clusters each engine process keeps '
+                      'the placement counters of in its in-memory cache. 0 '
+                      'disables the cache.')),
+    cfg.IntOpt('details_cache_ttl',
+               default=10,
+               help=_('Number of seconds node details retrieved from backend '
+                      'services are cached when collected in bulk. 0 '
+                      'disables the cache.')),
+    cfg.IntOpt('max_details_fetches',
+               default=10,
+               help=_('Maximum number of node details an engine worker '
+                      'retrieves concurrently when the profile type has no '
+                      'bulk retrieval support.')),
+    cfg.StrOpt('dispatch_strategy',
+               default='fanout',
+               choices=['fanout', 'round_robin', 'least_loaded',
+                        'cluster_hash'],
+               help=_('How the engine workers to start ready actions are '
+                      'chosen. With "fanout", all the engine workers are '
+                      'notified and compete for the actions. The others '
+                      'notify one live engine worker: in turn with '
+                      '"round_robin", the one reporting the fewest running '
+                      'actions with "least_loaded", or the one the cluster '
+                      'of the actions hashes to with "cluster_hash".')),
+    cfg.FloatOpt('dispatch_coalesce_window',
+                 default=0,
+                 help=_('Number of seconds during which the notifications '
+                        'to start the ready actions sent to the same engine '
+                        'workers are merged into one. 0 disables the '
+                        'merging.')),
     cfg.IntOpt('lock_retry_times',
                default=3,
                help=_('Number of times trying to grab a lock.')),
     cfg.IntOpt('lock_retry_interval',
                default=10,
-               help=_('Number of seconds between lock retries.')),
+               help=_('Number of seconds to wait before the first lock retry. '
+                      'The wait time doubles, with some random jitter, '
+                      'after each retry. An action waiting for a lock is '
+                      'normally woken up as soon as the lock is released, '
+                      'and gives up after lock_retry_times times this '
+                      'number of seconds.')),
+    cfg.BoolOpt('lock_wait_fair',
+                default=True,
+                help=_('Flag to indicate whether actions waiting for the '
+                       'same lock in an engine worker are served in the order '
+                       'they started waiting.')),
+    cfg.IntOpt('engine_membership_ttl',
+               default=0,
+               help=_('Maximum number of seconds the engines alive are known '
+                      'from memory before the service table is read again, '
+                      'which is also done each time an engine reports. 0 '
+                      'means the periodic_interval.')),
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
@@ -129,10 +216,86 @@ healthmgr_opts = [
     cfg.StrOpt('nova_control_exchange',
                default='nova',
                help="Exchange name for nova notifications"),
+    cfg.FloatOpt('polling_jitter',
+                 default=1.0,
+                 help=_('Fraction of the polling interval by which the first '
+                        'poll of a cluster is randomly delayed, so that the '
+                        'clusters polled by an engine are not all polled at '
+                        'the same time. (Disable by setting to 0)')),
 ]
 cfg.CONF.register_group(healthmgr_group)
 cfg.CONF.register_opts(healthmgr_opts, group=healthmgr_group)
 
+# Event group
+event_group = cfg.OptGroup('event')
+event_opts = [
+    cfg.ListOpt('sinks',
+                default=['database'],
+                help=_('Sinks to which events are written. Supported sinks '
+                       'are "database", "message", which sends events as '
+                       'notifications, and "file", which appends events to '
+                       'a JSON lines file.')),
+    cfg.IntOpt('queue_size',
+               default=1000,
+               help=_('Maximum number of events an engine worker queues '
+                      'before they are written to the sinks in background. '
+                      '0 means events are written synchronously.')),
+    cfg.IntOpt('batch_size',
+               default=100,
+               help=_('Maximum number of events written to the sinks in one '
+                      'batch.')),
+    cfg.IntOpt('flush_interval',
+               default=1,
+               help=_('Maximum number of seconds an event is queued before '
+                      'it is written to the sinks.')),
+    cfg.StrOpt('overflow_policy',
+               default='block',
+               choices=['block', 'drop_debug'],
+               help=_('What to do with a new event when the event queue is '
+                      'full. "block" makes the caller wait for the queue to '
+                      'be flushed; "drop_debug" discards DEBUG events, '
+                      'logging a warning with the number of events dropped, '
+                      'and blocks for other events.')),
+    cfg.StrOpt('log_file',
+               help=_('Path of the file to which the "file" sink appends '
+                      'events.')),
+]
+cfg.CONF.register_group(event_group)
+cfg.CONF.register_opts(event_opts, group=event_group)
+
+# Retention group
+retention_group = cfg.OptGroup('retention')
+retention_opts = [
+    cfg.IntOpt('interval',
+               default=3600,
+               help=_('Seconds between two runs of the periodic task that '
+                      'purges expired events and actions. 0 disables the '
+                      'task.')),
+    cfg.IntOpt('event_max_age',
+               default=0,
+               help=_('Number of days events are kept. 0 means events are '
+                      'kept forever.')),
+    cfg.DictOpt('event_level_max_age',
+                default={},
+                help=_('Number of days events of specific levels are kept, '
+                       'overriding "event_max_age", e.g. "DEBUG:1,ERROR:90". '
+                       '0 means events of the level are kept forever.')),
+    cfg.IntOpt('event_max_per_cluster',
+               default=0,
+               help=_('Maximum number of events kept for each cluster, the '
+                      'oldest ones are purged first. 0 means no limit.')),
+    cfg.IntOpt('action_max_age',
+               default=0,
+               help=_('Number of days completed actions are kept. 0 means '
+                      'actions are kept forever.')),
+    cfg.IntOpt('chunk_size',
+               default=1000,
+               help=_('Maximum number of rows deleted in one transaction '
+                      'when purging.')),
+]
+cfg.CONF.register_group(retention_group)
+cfg.CONF.register_opts(retention_opts, group=retention_group)
+
 # Revision group
 revision_group = cfg.OptGroup('revision')
 revision_opts = [
@@ -204,6 +367,8 @@ def list_opts():
     yield None, engine_opts
     yield None, service_opts
     yield authentication_group.name, authentication_opts
+    yield event_group.name, event_opts
+    yield retention_group.name, retention_opts
     yield revision_group.name, revision_opts
     yield receiver_group.name, receiver_opts
     yield zaqar_group.name, zaqar_opts
@@ -0,0 +1,69 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Consistent hashing of keys over a set of members.
+
+Each member is placed at a number of points of a ring of hash values, and a
+key belongs to the member of the first point following the hash of the key.
+When a member joins or leaves, only the keys of the points it takes over or
+gives up change hands, about 1/N of the keys for N members.
+"""
+
+import bisect
+import hashlib
+
+
+def _hash(value):
+    return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:16], 16)
+
+
+class HashRing(object):
+    """A ring of hash values mapping keys to members.
+
+    :param members: An iterable of member IDs, as strings.
+    :param replicas: The number of points of the ring per member. More
+                     points spread the keys more evenly over the members.
+    """
+
+    def __init__(self, members, replicas=100):
+        self.members = frozenset(members)
+        points = sorted((_hash('%s-%s' % (member, i)), member)
+                        for member in self.members
+                        for i in range(replicas))
+        self._hashes = [p[0] for p in points]
+        self._members = [p[1] for p in points]
+
+    def get_member(self, key):
+        """Get the member a key belongs to.
+
+        :param key: The key, as a string.
+        :returns: The ID of the member, or None if the ring is empty.
+        """
+        if not self._hashes:
+            return None
+
+        index = bisect.bisect(self._hashes, _hash(key))
+        return self._members[index % len(self._members)]
+
+    def distribute(self, keys):
+        """Group keys by the member they belong to.
+
+        :param keys: An iterable of keys.
+        :returns: A dict containing the list of keys of each member.
+        """
+        result = dict((member, []) for member in self.members)
+        for key in keys:
+            member = self.get_member(key)
+            if member is not None:
+                result[member].append(key)
+        return result
@@ -0,0 +1,131 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+In-process view of the engines alive.
+
+The engines report to the service table every 'periodic_interval' seconds.
+Instead of querying the table each time the liveness of an engine matters,
+the engines alive are read with a single query, refreshed when the engine
+reports and whenever the view is older than 'engine_membership_ttl'. The
+functions interested in engines joining or leaving can subscribe to the
+changes of the view.
+"""
+
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from senlin.common import context
+from senlin.common.i18n import _LE, _LI
+from senlin.objects import service as service_obj
+
+LOG = logging.getLogger(__name__)
+
+
+class MembershipView(object):
+    """The engines alive, as last read from the service table."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget the engines and the subscribers."""
+        self._engines = {}
+        self._refreshed_at = None
+        self._listeners = []
+        # Increased at each refresh, for the users deriving data from the
+        # engines to know when to derive it again
+        self.version = 0
+
+    def _ttl(self):
+        return (cfg.CONF.engine_membership_ttl or
+                cfg.CONF.periodic_interval)
+
+    def refresh(self, ctx=None):
+        """Read the engines alive, notifying the subscribers of changes.
+
+        :param ctx: An admin context, created if not provided.
+        :returns: Nothing.
+        """
+        ctx = ctx or context.get_admin_context()
+        max_elapse = 2 * cfg.CONF.periodic_interval
+        engines = dict((svc.id, svc)
+                       for svc in service_obj.Service.get_all(ctx)
+                       if not timeutils.is_older_than(svc.updated_at,
+                                                      max_elapse))
+
+        initial = self._refreshed_at is None
+        joined = set(engines) - set(self._engines)
+        left = set(self._engines) - set(engines)
+        self._engines = engines
+        self._refreshed_at = time.time()
+        self.version += 1
+
+        if initial or not (joined or left):
+            return
+
+        LOG.info(_LI("Engines joined: %(j)s, engines left: %(l)s"),
+                 {'j': sorted(joined), 'l': sorted(left)})
+        for callback in list(self._listeners):
+            try:
+                callback(joined, left)
+            except Exception as ex:
+                LOG.error(_LE('Failed in notifying membership change: '
+                              '%s'), ex)
+
+    def _check(self, ctx=None):
+        if (self._refreshed_at is None or
+                time.time() - self._refreshed_at >= self._ttl()):
+            self.refresh(ctx)
+
+    def get_engines(self, ctx=None):
+        """Get the service records of the engines alive, sorted by ID."""
+        self._check(ctx)
+        return [self._engines[k] for k in sorted(self._engines)]
+
+    def get_engine_ids(self, ctx=None):
+        """Get the IDs of the engines alive, as a set."""
+        self._check(ctx)
+        return set(self._engines)
+
+    def is_alive(self, ctx, engine_id, duration):
+        """Check from memory whether an engine is alive.
+
+        The engine is alive if its service record, as read in the view, was
+        updated within the given duration. An engine not known as alive may
+        have joined or reported since the view was read, so only a True
+        result is final.
+
+        :param duration: The time duration in seconds.
+        """
+        self._check(ctx)
+        svc = self._engines.get(engine_id)
+        return (svc is not None and
+                not timeutils.is_older_than(svc.updated_at, duration))
+
+    def subscribe(self, callback):
+        """Be notified of the engines joining or leaving.
+
+        :param callback: A callable called with the set of the IDs of the
+                         engines joined and the set of those left.
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+
+view = MembershipView()
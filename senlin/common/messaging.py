@@ -21,6 +21,8 @@ JsonPayloadSerializer = messaging.JsonPayloadSerializer
 
 TRANSPORT = None
 NOTIFIER = None
+# RPC clients by target, reused for the casts sent over and over
+_CLIENTS = {}
 
 
 class RequestContextSerializer(messaging.Serializer):
@@ -81,6 +83,7 @@ def cleanup():
         TRANSPORT.cleanup()
         TRANSPORT = None
     NOTIFIER = None
+    _CLIENTS.clear()
 
 
 def get_rpc_server(target, endpoint):
@@ -98,6 +101,20 @@ def get_rpc_client(**kwargs):
     return messaging.RPCClient(TRANSPORT, target, serializer=serializer)
 
 
+def get_cached_rpc_client(**kwargs):
+    """Return an RPCClient shared by the callers of the same target.
+
+    The clients are thread safe, and are dropped when the messaging layer
+    is cleaned up.
+    """
+    key = tuple(sorted(kwargs.items()))
+    client = _CLIENTS.get(key)
+    if client is None:
+        client = get_rpc_client(**kwargs)
+        _CLIENTS[key] = client
+    return client
+
+
 def get_notifier(publisher_id):
     """Return a configured oslo_messaging notifier."""
     global NOTIFIER
@@ -14,7 +14,9 @@
 Utilities for scaling actions and related policies.
 '''
 
+import heapq
 import math
+import operator
 import random
 
 from oslo_log import log as logging
@@ -260,16 +262,8 @@ def nodes_by_random(nodes, count):
     if count <= len(selected):
         return selected[:count]
 
-    count -= len(selected)
-    random.seed()
-
-    i = count
-    while i > 0:
-        rand = random.randrange(len(candidates))
-        selected.append(candidates[rand].id)
-        candidates.remove(candidates[rand])
-        i = i - 1
-
+    count = min(count - len(selected), len(candidates))
+    selected.extend(n.id for n in random.sample(candidates, count))
     return selected
 
 
@@ -286,12 +280,15 @@ def nodes_by_age(nodes, count, old_first):
         return selected[:count]
 
     count -= len(selected)
-    sorted_list = sorted(candidates, key=lambda r: r.created_at)
-    for i in range(count):
-        if old_first:
-            selected.append(sorted_list[i].id)
-        else:  # YOUNGEST_FIRST
-            selected.append(sorted_list[-1 - i].id)
+    if old_first:
+        chosen = heapq.nsmallest(count, candidates,
+                                 key=lambda n: n.created_at)
+    else:  # YOUNGEST_FIRST
+        # Nodes created at the same time are taken in reverse order
+        chosen = heapq.nlargest(count, enumerate(candidates),
+                                key=lambda x: (x[1].created_at, x[0]))
+        chosen = [n for i, n in chosen]
+    selected.extend(n.id for n in chosen)
     return selected
 
 
@@ -309,16 +306,58 @@ def nodes_by_profile_age(nodes, count):
         return selected[:count]
 
     count -= len(selected)
-    node_map = []
-    for node in nodes:
-        entry = {
-            'id': node.id,
-            'created_at': node.rt['profile'].created_at
-        }
-        node_map.append(entry)
-
-    sorted_map = sorted(node_map, key=lambda m: m['created_at'])
-    for i in range(count):
-        selected.append(sorted_map[i]['id'])
-
+    chosen = heapq.nsmallest(count, nodes,
+                             key=lambda n: n.rt['profile'].created_at)
+    selected.extend(n.id for n in chosen)
     return selected
+
+
+def weighted_plan(current, weights, count, expand, caps=None):
+    """Compute a plan to place or remove nodes across weighted candidates.
+
+    The quota of each candidate is its share of the final number of nodes
+    by weight, rounded up when expanding and down when shrinking. Candidates
+    are considered by weight, heaviest first when expanding, and take as
+    many nodes as their headroom allows until all nodes are handled.
+
+    :param current: A dict containing the number of nodes by candidate.
+    :param weights: A dict containing the weight of each candidate.
+    :param count: Number of nodes to place or to remove.
+    :param expand: True when placing new nodes, False when removing nodes.
+    :param caps: An optional dict containing the maximum number of nodes by
+                 candidate, a negative value meaning no limit.
+    :returns: A dict containing the number of nodes by candidate, or None if
+              not all nodes could be handled.
+    """
+    candidates = sorted(weights.items(), key=operator.itemgetter(1),
+                        reverse=expand)
+    sum_weight = float(sum(weights.values()))
+    if expand:
+        total = sum(current.values()) + count
+    else:
+        total = sum(current.values()) - count
+
+    plan = {}
+    remain = count
+    for name, weight in candidates:
+        if remain <= 0:
+            break
+
+        q = total * weight / sum_weight
+        if expand:
+            quota = int(math.ceil(q))
+            cap = caps.get(name, -1) if caps else -1
+            if cap >= 0:
+                quota = min(quota, cap)
+            headroom = quota - current[name]
+        else:
+            headroom = current[name] - int(math.floor(q))
+
+        if headroom > 0:
+            plan[name] = min(headroom, remain)
+            remain -= plan[name]
+
+    if remain > 0:
+        return None
+
+    return plan
@@ -30,6 +30,7 @@ from senlin.common import consts
 from senlin.common import exception
 from senlin.common.i18n import _
 from senlin.common.i18n import _LI
+from senlin.common import membership
 from senlin.objects import service as service_obj
 
 cfg.CONF.import_opt('max_response_size', 'senlin.common.config')
@@ -186,6 +187,37 @@ def isotime(at):
     return st
 
 
+class LazyDict(dict):
+    """A dict whose values are loaded when first accessed.
+
+    A value is loaded by calling the loader function registered for its key
+    and it is memoized until it is deleted or the dict is cleared. Values can
+    be assigned as usual, which overrides the loader until the next clear.
+    """
+
+    def __init__(self, loaders):
+        """Initialize the dict.
+
+        :param loaders: A dict mapping keys to functions that take no
+                        arguments and return the values of the keys.
+        """
+        super(LazyDict, self).__init__()
+        self._loaders = loaders
+
+    def __missing__(self, key):
+        if key not in self._loaders:
+            raise KeyError(key)
+
+        value = self._loaders[key]()
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        if key in self or key in self._loaders:
+            return self[key]
+        return default
+
+
 def get_path_parser(path):
     """Get a JsonPath parser based on a path string.
 
@@ -208,7 +240,9 @@ def is_engine_dead(ctx, engine_id, duration=None):
     """Check if an engine is dead.
 
     If engine hasn't reported its status for the given duration, it is treated
-    as a dead engine.
+    as a dead engine. Without a duration, the engines the in-process
+    membership view has seen reporting recently enough are answered from
+    memory, and only the others are looked up in the service table.
 
     :param ctx: A request context.
     :param engine_id: The ID of the engine to test.
@@ -216,6 +250,8 @@ def is_engine_dead(ctx, engine_id, duration=None):
     """
     if not duration:
         duration = 2 * cfg.CONF.periodic_interval
+        if membership.view.is_alive(ctx, engine_id, duration):
+            return False
 
     eng = service_obj.Service.get(ctx, engine_id)
     if not eng:
@@ -60,8 +60,8 @@ def cluster_get_all(context, limit=None, marker=None, sort=None, filters=None,
                                 filters=filters, project_safe=project_safe)
 
 
-def cluster_next_index(context, cluster_id):
-    return IMPL.cluster_next_index(context, cluster_id)
+def cluster_next_index(context, cluster_id, count=1):
+    return IMPL.cluster_next_index(context, cluster_id, count=count)
 
 
 def cluster_count_all(context, filters=None, project_safe=True):
@@ -82,6 +82,10 @@ def node_create(context, values):
     return IMPL.node_create(context, values)
 
 
+def node_create_all(context, values_list):
+    return IMPL.node_create_all(context, values_list)
+
+
 def node_get(context, node_id, project_safe=True):
     return IMPL.node_get(context, node_id, project_safe=project_safe)
 
@@ -107,6 +111,16 @@ def node_get_all_by_cluster(context, cluster_id, project_safe=True):
                                         project_safe=project_safe)
 
 
+def node_ids_by_cluster(context, cluster_ids):
+    return IMPL.node_ids_by_cluster(context, cluster_ids)
+
+
+def node_ids_for_deletion(context, cluster_id, count, order,
+                          project_safe=True):
+    return IMPL.node_ids_for_deletion(context, cluster_id, count, order,
+                                      project_safe=project_safe)
+
+
 def node_count_by_cluster(context, cluster_id, **kwargs):
     return IMPL.node_count_by_cluster(context, cluster_id, **kwargs)
 
@@ -115,6 +129,10 @@ def node_update(context, node_id, values):
     return IMPL.node_update(context, node_id, values)
 
 
+def node_update_all(context, values_list):
+    return IMPL.node_update_all(context, values_list)
+
+
 def node_migrate(context, node_id, to_cluster, timestamp, role=None):
     return IMPL.node_migrate(context, node_id, to_cluster, timestamp, role)
 
@@ -190,6 +208,10 @@ def cluster_policy_get_all(context, cluster_id, filters=None, sort=None):
                                        sort=sort)
 
 
+def cluster_policy_ids_by_cluster(context, cluster_ids):
+    return IMPL.cluster_policy_ids_by_cluster(context, cluster_ids)
+
+
 def cluster_policy_get_by_type(context, cluster_id, policy_type, filters=None):
     return IMPL.cluster_policy_get_by_type(context, cluster_id, policy_type,
                                            filters=filters)
@@ -216,6 +238,10 @@ def profile_get(context, profile_id, project_safe=True):
     return IMPL.profile_get(context, profile_id, project_safe=project_safe)
 
 
+def profile_get_names(context, profile_ids):
+    return IMPL.profile_get_names(context, profile_ids)
+
+
 def profile_get_by_name(context, name, project_safe=True):
     return IMPL.profile_get_by_name(context, name, project_safe=project_safe)
 
@@ -266,6 +292,10 @@ def event_create(context, values):
     return IMPL.event_create(context, values)
 
 
+def event_create_all(context, values_list):
+    return IMPL.event_create_all(context, values_list)
+
+
 def event_get(context, event_id, project_safe=True):
     return IMPL.event_get(context, event_id, project_safe=project_safe)
 
@@ -297,11 +327,28 @@ def event_prune(context, cluster_id, project_safe=True):
     return IMPL.event_prune(context, cluster_id, project_safe=project_safe)
 
 
+def event_purge(context, older_than, levels=None, chunk_size=1000,
+                dry_run=False):
+    return IMPL.event_purge(context, older_than, levels=levels,
+                            chunk_size=chunk_size, dry_run=dry_run)
+
+
+def event_purge_by_cluster(context, max_events, chunk_size=1000,
+                           dry_run=False):
+    return IMPL.event_purge_by_cluster(context, max_events,
+                                       chunk_size=chunk_size, dry_run=dry_run)
+
+
 # Actions
 def action_create(context, values):
     return IMPL.action_create(context, values)
 
 
+def action_create_all(context, values_list, dependencies=None):
+    return IMPL.action_create_all(context, values_list,
+                                  dependencies=dependencies)
+
+
 def action_update(context, action_id, values):
     return IMPL.action_update(context, action_id, values)
 
@@ -351,6 +398,19 @@ def dependency_get_dependents(context, action_id):
     return IMPL.dependency_get_dependents(context, action_id)
 
 
+def dependency_get_pending(context, action_id):
+    return IMPL.dependency_get_pending(context, action_id)
+
+
+def dependency_delete(context, depended_ids):
+    return IMPL.dependency_delete(context, depended_ids)
+
+
+def dependency_purge(context, chunk_size=1000, dry_run=False):
+    return IMPL.dependency_purge(context, chunk_size=chunk_size,
+                                 dry_run=dry_run)
+
+
 def action_mark_succeeded(context, action_id, timestamp):
     return IMPL.action_mark_succeeded(context, action_id, timestamp)
 
@@ -371,6 +431,10 @@ def action_acquire_1st_ready(context, owner, timestamp):
     return IMPL.action_acquire_1st_ready(context, owner, timestamp)
 
 
+def action_acquire_batch(context, owner, timestamp, limit):
+    return IMPL.action_acquire_batch(context, owner, timestamp, limit)
+
+
 def action_abandon(context, action_id):
     return IMPL.action_abandon(context, action_id)
 
@@ -394,6 +458,11 @@ def action_delete(context, action_id):
     return IMPL.action_delete(context, action_id)
 
 
+def action_purge(context, older_than, chunk_size=1000, dry_run=False):
+    return IMPL.action_purge(context, older_than, chunk_size=chunk_size,
+                             dry_run=dry_run)
+
+
 def receiver_create(context, values):
     return IMPL.receiver_create(context, values)
 
@@ -454,8 +523,21 @@ def registry_delete(context, cluster_id):
     return IMPL.registry_delete(context, cluster_id)
 
 
-def registry_claim(context, engine_id):
-    return IMPL.registry_claim(context, engine_id)
+def registry_claim(context, engine_id, engine_ids=None):
+    return IMPL.registry_claim(context, engine_id, engine_ids=engine_ids)
+
+
+def registry_get_by_engine(context, engine_id):
+    return IMPL.registry_get_by_engine(context, engine_id)
+
+
+def registry_handoff(context, cluster_id, engine_id, new_engine_id):
+    return IMPL.registry_handoff(context, cluster_id, engine_id,
+                                 new_engine_id)
+
+
+def registry_count_by_engine(context):
+    return IMPL.registry_count_by_engine(context)
 
 
 def db_sync(engine, version=None):
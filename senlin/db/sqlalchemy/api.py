@@ -14,6 +14,7 @@
 Implementation of SQLAlchemy backend.
 """
 
+import random
 import six
 import sys
 import threading
@@ -24,10 +25,13 @@ from oslo_db.sqlalchemy import enginefacade
 from oslo_db.sqlalchemy import utils as sa_utils
 from oslo_log import log as logging
 from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import sqlalchemy
 from sqlalchemy.orm import joinedload_all
 
 from senlin.common import consts
 from senlin.common import exception
+from senlin.common import hash_ring
 from senlin.common.i18n import _
 from senlin.db.sqlalchemy import migration
 from senlin.db.sqlalchemy import models
@@ -35,6 +39,10 @@ from senlin.db.sqlalchemy import utils
 
 LOG = logging.getLogger(__name__)
 
+# Maximum number of values in the IN clause of a statement, which is kept
+# well below the limit of bound parameters of SQLite
+IN_LIST_LIMIT = 500
+
 _main_context_manager = None
 _CONTEXT = threading.local()
 
@@ -156,7 +164,13 @@ def cluster_get_all(context, limit=None, marker=None, sort=None, filters=None,
                                    marker=marker, sort_dirs=dirs).all()
 
 
-def cluster_next_index(context, cluster_id):
+def cluster_next_index(context, cluster_id, count=1):
+    """Reserve a block of consecutive node indexes from a cluster.
+
+    :param cluster_id: ID of the cluster.
+    :param count: Number of indexes to reserve.
+    :returns: The first index reserved.
+    """
     with session_for_write() as session:
         cluster = session.query(models.Cluster).with_for_update().get(
             cluster_id)
@@ -164,7 +178,7 @@ def cluster_next_index(context, cluster_id):
             return 0
 
         next_index = cluster.next_index
-        cluster.next_index = cluster.next_index + 1
+        cluster.next_index = cluster.next_index + count
         cluster.save(session)
         return next_index
 
@@ -217,6 +231,25 @@ def node_create(context, values):
         return node
 
 
+def node_create_all(context, values_list):
+    """Create a batch of nodes with a single INSERT statement.
+
+    :param values_list: A list of dicts containing the node properties.
+    :returns: A list of IDs of the nodes created, in the same order.
+    """
+    # This operation is always called with cluster locked
+    rows = []
+    for values in values_list:
+        row = dict(values)
+        row.setdefault('id', uuidutils.generate_uuid())
+        rows.append(row)
+
+    with session_for_write() as session:
+        session.bulk_insert_mappings(models.Node, rows)
+
+    return [r['id'] for r in rows]
+
+
 def node_get(context, node_id, project_safe=True):
     node = model_query(context, models.Node).get(node_id)
     if not node:
@@ -270,6 +303,81 @@ def node_get_all_by_cluster(context, cluster_id, project_safe=True):
                                project_safe=project_safe).all()
 
 
+def node_ids_by_cluster(context, cluster_ids):
+    """Get the IDs of the nodes in the given clusters with one query.
+
+    :param cluster_ids: A list of cluster IDs.
+    :returns: A dict mapping each cluster ID to a list of node IDs, ordered
+              the same way as nodes are listed by default.
+    """
+    result = dict((cluster_id, []) for cluster_id in cluster_ids)
+    if not cluster_ids:
+        return result
+
+    with session_for_read() as session:
+        query = session.query(models.Node.cluster_id, models.Node.id)
+        query = query.filter(models.Node.cluster_id.in_(cluster_ids))
+        query = query.order_by(models.Node.init_at, models.Node.id)
+        for cluster_id, node_id in query:
+            result[cluster_id].append(node_id)
+
+    return result
+
+
+def node_ids_for_deletion(context, cluster_id, count, order,
+                          project_safe=True):
+    """Get the IDs of the nodes to be deleted first from a cluster.
+
+    Nodes in ERROR status come first, followed by the nodes not created yet,
+    both in the order nodes are listed by default. The other nodes follow in
+    the given order. Only the IDs of the nodes are retrieved.
+
+    :param cluster_id: ID of the cluster.
+    :param count: Number of node IDs to get.
+    :param order: 'created_at' to get the oldest nodes first, '-created_at'
+                  to get the youngest nodes first, 'profile_created_at' to
+                  get the nodes with the oldest profile first, or 'random'.
+    :returns: A list of node IDs.
+    """
+    default = [models.Node.init_at, models.Node.id]
+    with session_for_read() as session:
+        query = session.query(models.Node.id).filter_by(cluster_id=cluster_id)
+        if project_safe:
+            query = query.filter_by(project=context.project)
+
+        failed = query.filter(models.Node.status == 'ERROR')
+        ids = [r[0] for r in failed.order_by(*default).limit(count)]
+        if len(ids) < count:
+            pending = query.filter(models.Node.status != 'ERROR',
+                                   models.Node.created_at.is_(None))
+            pending = pending.order_by(*default).limit(count - len(ids))
+            ids.extend(r[0] for r in pending)
+        if len(ids) >= count:
+            return ids
+
+        others = query.filter(models.Node.status != 'ERROR',
+                              models.Node.created_at.isnot(None))
+        if order == 'random':
+            others = [r[0] for r in others]
+            ids.extend(random.sample(others,
+                                     min(count - len(ids), len(others))))
+            return ids
+
+        if order == 'profile_created_at':
+            others = others.join(
+                models.Profile, models.Profile.id == models.Node.profile_id)
+            keys = [models.Profile.created_at] + default
+        elif order == '-created_at':
+            # Nodes created at the same time are in reverse default order
+            keys = [k.desc() for k in [models.Node.created_at] + default]
+        else:
+            keys = [models.Node.created_at] + default
+        others = others.order_by(*keys).limit(count - len(ids))
+        ids.extend(r[0] for r in others)
+
+    return ids
+
+
 def node_count_by_cluster(context, cluster_id, **kwargs):
     project_safe = kwargs.pop('project_safe', True)
     query = model_query(context, models.Node)
@@ -306,6 +414,22 @@ def node_update(context, node_id, values):
                 cluster.save(session)
 
 
+def node_update_all(context, values_list):
+    """Update a batch of nodes with a single UPDATE statement.
+
+    Unlike `node_update`, this doesn't propagate node status changes to the
+    owning cluster, so it is meant for updating properties such as `data`.
+
+    :param values_list: A list of dicts containing the ID of a node under the
+                        key 'id' and the node properties to update.
+    """
+    if not values_list:
+        return
+
+    with session_for_write() as session:
+        session.bulk_update_mappings(models.Node, values_list)
+
+
 def node_migrate(context, node_id, to_cluster, timestamp, role=None):
     with session_for_write() as session:
         node = session.query(models.Node).get(node_id)
@@ -534,6 +658,28 @@ def cluster_policy_get_all(context, cluster_id, filters=None, sort=None):
                                    sort_dirs=dirs).all()
 
 
+def cluster_policy_ids_by_cluster(context, cluster_ids):
+    """Get the IDs of the policies attached to the given clusters.
+
+    :param cluster_ids: A list of cluster IDs.
+    :returns: A dict mapping each cluster ID to a list of policy IDs.
+    """
+    result = dict((cluster_id, []) for cluster_id in cluster_ids)
+    if not cluster_ids:
+        return result
+
+    with session_for_read() as session:
+        query = session.query(models.ClusterPolicies.cluster_id,
+                              models.ClusterPolicies.policy_id)
+        query = query.filter(
+            models.ClusterPolicies.cluster_id.in_(cluster_ids))
+        query = query.order_by(models.ClusterPolicies.id)
+        for cluster_id, policy_id in query:
+            result[cluster_id].append(policy_id)
+
+    return result
+
+
 def cluster_policy_get_by_type(context, cluster_id, policy_type, filters=None):
 
     query = model_query(context, models.ClusterPolicies)
@@ -605,6 +751,22 @@ def profile_get(context, profile_id, project_safe=True):
     return profile
 
 
+def profile_get_names(context, profile_ids):
+    """Get the names of the given profiles with one query.
+
+    :param profile_ids: A list of profile IDs.
+    :returns: A dict mapping profile IDs to profile names. Profiles not
+              found are not included.
+    """
+    if not profile_ids:
+        return {}
+
+    with session_for_read() as session:
+        query = session.query(models.Profile.id, models.Profile.name)
+        query = query.filter(models.Profile.id.in_(profile_ids))
+        return dict(query.all())
+
+
 def profile_get_by_name(context, name, project_safe=True):
     return query_by_name(context, models.Profile, name,
                          project_safe=project_safe)
@@ -709,6 +871,24 @@ def event_create(context, values):
         return event
 
 
+def event_create_all(context, values_list):
+    """Create a batch of events with a single INSERT statement.
+
+    :param values_list: A list of dicts containing the event properties.
+    :returns: A list of IDs of the events created, in the same order.
+    """
+    rows = []
+    for values in values_list:
+        row = dict(values)
+        row.setdefault('id', uuidutils.generate_uuid())
+        rows.append(row)
+
+    with session_for_write() as session:
+        session.bulk_insert_mappings(models.Event, rows)
+
+    return [r['id'] for r in rows]
+
+
 def event_get(context, event_id, project_safe=True):
     event = model_query(context, models.Event).get(event_id)
     if not context.is_admin and project_safe and event is not None:
@@ -777,6 +957,92 @@ def event_prune(context, cluster_id, project_safe=True):
         return query.delete(synchronize_session='fetch')
 
 
+def _purge_in_chunks(model, query_ids, chunk_size, dry_run=False,
+                     before_delete=None):
+    """Delete rows in chunks, each in a separate short transaction.
+
+    :param model: The model of the rows to delete.
+    :param query_ids: A function that takes a session and returns a query of
+                      the IDs of the rows to delete.
+    :param chunk_size: Maximum number of rows deleted in a transaction.
+    :param dry_run: If True, rows are counted rather than deleted.
+    :param before_delete: An optional function called with the session and
+                          the IDs of a chunk before the chunk is deleted.
+    :returns: Number of rows deleted or to be deleted.
+    """
+    if dry_run:
+        with session_for_read() as session:
+            return query_ids(session).count()
+
+    total = 0
+    while True:
+        with session_for_write() as session:
+            ids = [r[0] for r in query_ids(session).limit(chunk_size)]
+            if not ids:
+                break
+            if before_delete is not None:
+                before_delete(session, ids)
+            session.query(model).filter(model.id.in_(ids)).delete(
+                synchronize_session=False)
+
+        total += len(ids)
+        if len(ids) < chunk_size:
+            break
+
+    return total
+
+
+def event_purge(context, older_than, levels=None, chunk_size=1000,
+                dry_run=False):
+    """Delete events older than the given time.
+
+    :param older_than: A datetime before which events are deleted.
+    :param levels: An optional list of integer levels to which the deletion
+                   is restricted.
+    """
+    def query_ids(session):
+        query = session.query(models.Event.id).filter(
+            models.Event.timestamp < older_than)
+        if levels is not None:
+            query = query.filter(
+                models.Event.level.in_([str(lvl) for lvl in levels]))
+        return query
+
+    return _purge_in_chunks(models.Event, query_ids, chunk_size, dry_run)
+
+
+def event_purge_by_cluster(context, max_events, chunk_size=1000,
+                           dry_run=False):
+    """Delete the oldest events of clusters having more than max_events.
+
+    Events with the same timestamp as the oldest one kept are kept as well.
+    """
+    with session_for_read() as session:
+        count = sqlalchemy.func.count(models.Event.id)
+        query = session.query(models.Event.cluster_id, count)
+        query = query.filter(models.Event.cluster_id != '')
+        query = query.group_by(models.Event.cluster_id)
+        clusters = query.having(count > max_events).all()
+
+    total = 0
+    for cluster_id, count in clusters:
+        with session_for_read() as session:
+            query = session.query(models.Event.timestamp)
+            query = query.filter_by(cluster_id=cluster_id)
+            query = query.order_by(models.Event.timestamp.desc())
+            oldest = query.offset(max_events - 1).limit(1).scalar()
+
+        def query_ids(session):
+            query = session.query(models.Event.id)
+            query = query.filter_by(cluster_id=cluster_id)
+            return query.filter(models.Event.timestamp < oldest)
+
+        total += _purge_in_chunks(models.Event, query_ids, chunk_size,
+                                  dry_run)
+
+    return total
+
+
 # Actions
 def action_create(context, values):
     with session_for_write() as session:
@@ -786,6 +1052,42 @@ def action_create(context, values):
         return action
 
 
+def action_create_all(context, values_list, dependencies=None):
+    """Create a batch of actions and their dependencies in one transaction.
+
+    :param values_list: A list of dicts containing the action properties.
+    :param dependencies: An optional list of (depended, dependent) tuples of
+                         action IDs. Dependents not created in this batch
+                         are set to WAITING status.
+    :returns: A list of IDs of the actions created, in the same order.
+    """
+    rows = []
+    for values in values_list:
+        row = dict(values)
+        row.setdefault('id', uuidutils.generate_uuid())
+        rows.append(row)
+
+    with session_for_write() as session:
+        session.bulk_insert_mappings(models.Action, rows)
+        if not dependencies:
+            return [r['id'] for r in rows]
+
+        session.bulk_insert_mappings(
+            models.ActionDependency,
+            [{'depended': d, 'dependent': t} for (d, t) in dependencies])
+
+        created = set(r['id'] for r in rows)
+        waiting = set(t for (d, t) in dependencies if t not in created)
+        if waiting:
+            q = session.query(models.Action).filter(
+                models.Action.id.in_(waiting))
+            q.update({'status': consts.ACTION_WAITING,
+                      'status_reason': _('Waiting for depended actions.')},
+                     synchronize_session=False)
+
+    return [r['id'] for r in rows]
+
+
 def action_update(context, action_id, values):
     with session_for_write() as session:
         action = session.query(models.Action).get(action_id)
@@ -844,10 +1146,28 @@ def action_get_all(context, filters=None, limit=None, marker=None, sort=None,
                                    marker=marker, sort_dirs=dirs).all()
 
 
+def _in_chunks(ids, size=IN_LIST_LIMIT):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _query_pending_dependencies(session, action_id):
+    """Query the dependencies of an action on actions not succeeded yet.
+
+    The dependencies on actions that succeeded are not deleted right away,
+    so they are filtered out by the status of the depended actions.
+    """
+    query = session.query(models.ActionDependency.depended)
+    query = query.join(models.Action,
+                       models.Action.id == models.ActionDependency.depended)
+    query = query.filter(models.ActionDependency.dependent == action_id)
+    return query.filter(models.Action.status != consts.ACTION_SUCCEEDED)
+
+
 def action_check_status(context, action_id, timestamp):
     with session_for_write() as session:
-        q = session.query(models.ActionDependency)
-        count = q.filter_by(dependent=action_id).count()
+        count = _query_pending_dependencies(session, action_id).count()
         if count > 0:
             return consts.ACTION_WAITING
 
@@ -884,6 +1204,28 @@ def dependency_get_dependents(context, action_id):
         return [d.dependent for d in q.all()]
 
 
+def dependency_get_pending(context, action_id):
+    """Get the IDs of the actions an action depends on not succeeded yet."""
+    with session_for_read() as session:
+        query = _query_pending_dependencies(session, action_id)
+        return [d.depended for d in query.all()]
+
+
+def dependency_delete(context, depended_ids):
+    """Delete the dependencies on the given actions.
+
+    :param depended_ids: A list of IDs of actions that completed.
+    :returns: Number of dependencies deleted.
+    """
+    count = 0
+    with session_for_write() as session:
+        for ids in _in_chunks(depended_ids):
+            query = session.query(models.ActionDependency)
+            query = query.filter(models.ActionDependency.depended.in_(ids))
+            count += query.delete(synchronize_session=False)
+    return count
+
+
 @oslo_db_api.wrap_db_retry(max_retries=3, retry_on_deadlock=True,
                            retry_interval=0.5, inc_retry_interval=True)
 def dependency_add(context, depended, dependent):
@@ -921,7 +1263,26 @@ def dependency_add(context, depended, dependent):
                  synchronize_session='fetch')
 
 
+def _action_owners(session, action_ids):
+    if not action_ids:
+        return {}
+
+    query = session.query(models.Action.id, models.Action.owner)
+    query = query.filter(models.Action.id.in_(action_ids))
+    return dict((a.id, a.owner) for a in query.all())
+
+
 def action_mark_succeeded(context, action_id, timestamp):
+    """Mark an action as succeeded.
+
+    The dependencies on the action are not deleted, they no longer count
+    as pending and are deleted later in batches with `dependency_delete`.
+
+    :param action_id: ID of the action that succeeded.
+    :param timestamp: Time when the action ended.
+    :returns: A dict mapping the IDs of the dependent actions to the engines
+              owning them.
+    """
     with session_for_write() as session:
 
         query = session.query(models.Action).filter_by(id=action_id)
@@ -933,60 +1294,85 @@ def action_mark_succeeded(context, action_id, timestamp):
         }
         query.update(values, synchronize_session=False)
 
-        subquery = session.query(models.ActionDependency).filter_by(
-            depended=action_id)
-        subquery.delete(synchronize_session='fetch')
-
-
-def _mark_failed(session, action_id, timestamp, reason=None):
-    # mark myself as failed
-    query = session.query(models.Action).filter_by(id=action_id)
+        query = session.query(models.Action.id, models.Action.owner)
+        query = query.join(
+            models.ActionDependency,
+            models.ActionDependency.dependent == models.Action.id)
+        query = query.filter(models.ActionDependency.depended == action_id)
+        return dict((a.id, a.owner) for a in query.all())
+
+
+def _mark_cascade(session, action_id, timestamp, status, reason):
+    """Mark an action and all its dependents, direct or not, as completed.
+
+    The dependency graph is walked breadth-first, one level at a time, and
+    each level is processed with a bounded number of set-based statements,
+    whatever the number of actions in it.
+
+    :param action_id: ID of the action that completed.
+    :param timestamp: Time when the actions ended.
+    :param status: Status of the actions, FAILED or CANCELLED.
+    :param reason: Status reason of the action completed. The dependents get
+                   a generic reason.
+    :returns: A dict mapping the IDs of the dependent actions affected to
+              the engines owning them.
+    """
     values = {
         'owner': None,
-        'status': consts.ACTION_FAILED,
+        'status': status,
         'status_reason': (six.text_type(reason) if reason else
                           _('Action execution failed')),
         'end_time': timestamp,
     }
+    query = session.query(models.Action).filter_by(id=action_id)
     query.update(values, synchronize_session=False)
 
-    query = session.query(models.ActionDependency)
-    query = query.filter_by(depended=action_id)
-    dependents = [d.dependent for d in query.all()]
-    query.delete(synchronize_session=False)
-
-    for d in dependents:
-        _mark_failed(session, d, timestamp)
+    values['status_reason'] = _('Action execution failed')
+    owners = {}
+    visited = set([action_id])
+    level = [action_id]
+    while level:
+        dependents = set()
+        for ids in _in_chunks(level):
+            query = session.query(models.ActionDependency)
+            query = query.filter(models.ActionDependency.depended.in_(ids))
+            dependents.update(d.dependent for d in query.all())
+            query.delete(synchronize_session=False)
+
+        # an action depending on more than one action of the graph is
+        # processed only once
+        level = list(dependents - visited)
+        visited.update(level)
+        for ids in _in_chunks(level):
+            # remember the owners before they are reset
+            owners.update(_action_owners(session, ids))
+            query = session.query(models.Action)
+            query = query.filter(models.Action.id.in_(ids))
+            query.update(values, synchronize_session=False)
+
+    return owners
 
 
 def action_mark_failed(context, action_id, timestamp, reason=None):
-    with session_for_write() as session:
-        _mark_failed(session, action_id, timestamp, reason)
+    """Mark an action and all its dependents as failed.
 
-
-def _mark_cancelled(session, action_id, timestamp, reason=None):
-    query = session.query(models.Action).filter_by(id=action_id)
-    values = {
-        'owner': None,
-        'status': consts.ACTION_CANCELLED,
-        'status_reason': (six.text_type(reason) if reason else
-                          _('Action execution failed')),
-        'end_time': timestamp,
-    }
-    query.update(values, synchronize_session=False)
-
-    query = session.query(models.ActionDependency)
-    query = query.filter_by(depended=action_id)
-    dependents = [d.dependent for d in query.all()]
-    query.delete(synchronize_session=False)
-
-    for d in dependents:
-        _mark_cancelled(session, d, timestamp)
+    :returns: A dict mapping the IDs of the dependent actions affected to
+              the engines owning them.
+    """
+    with session_for_write() as session:
+        return _mark_cascade(session, action_id, timestamp,
+                             consts.ACTION_FAILED, reason)
 
 
 def action_mark_cancelled(context, action_id, timestamp, reason=None):
+    """Mark an action and all its dependents as cancelled.
+
+    :returns: A dict mapping the IDs of the dependent actions affected to
+              the engines owning them.
+    """
     with session_for_write() as session:
-        _mark_cancelled(session, action_id, timestamp, reason)
+        return _mark_cascade(session, action_id, timestamp,
+                             consts.ACTION_CANCELLED, reason)
 
 
 @oslo_db_api.wrap_db_retry(max_retries=3, retry_on_deadlock=True,
@@ -1034,6 +1420,38 @@ def action_acquire_1st_ready(context, owner, timestamp):
             return action
 
 
+@oslo_db_api.wrap_db_retry(max_retries=3, retry_on_deadlock=True,
+                           retry_interval=0.5, inc_retry_interval=True)
+def action_acquire_batch(context, owner, timestamp, limit):
+    """Acquire a batch of ready actions in a single transaction.
+
+    :param owner: ID of the worker acquiring the actions.
+    :param timestamp: Time when the actions are acquired.
+    :param limit: Maximum number of actions to acquire.
+    :returns: A list of actions acquired, which may be empty.
+    """
+    with session_for_write() as session:
+        query = session.query(models.Action).\
+            filter_by(status=consts.ACTION_READY).\
+            filter_by(owner=None)
+        try:
+            # Rows locked by other workers are skipped rather than waited for
+            query = query.with_for_update(skip_locked=True)
+        except TypeError:
+            # SKIP LOCKED is not supported by this version of SQLAlchemy
+            query = query.with_for_update()
+
+        actions = query.limit(limit).all()
+        for action in actions:
+            action.owner = owner
+            action.start_time = timestamp
+            action.status = consts.ACTION_RUNNING
+            action.status_reason = _('The action is being processed.')
+            action.save(session)
+
+        return actions
+
+
 def action_abandon(context, action_id):
     '''Abandon an action for other workers to execute again.
 
@@ -1092,6 +1510,53 @@ def action_delete(context, action_id):
         session.delete(action)
 
 
+def _delete_dependencies(session, action_ids):
+    query = session.query(models.ActionDependency)
+    query = query.filter(sqlalchemy.or_(
+        models.ActionDependency.depended.in_(action_ids),
+        models.ActionDependency.dependent.in_(action_ids)))
+    query.delete(synchronize_session=False)
+
+
+def action_purge(context, older_than, chunk_size=1000, dry_run=False):
+    """Delete completed actions that ended before the given time.
+
+    The dependency rows referencing the actions are deleted as well.
+
+    :param older_than: A timestamp before which actions ended.
+    """
+    completed = [consts.ACTION_SUCCEEDED, consts.ACTION_FAILED,
+                 consts.ACTION_CANCELLED]
+
+    def query_ids(session):
+        query = session.query(models.Action.id)
+        query = query.filter(models.Action.status.in_(completed))
+        return query.filter(models.Action.end_time < older_than)
+
+    return _purge_in_chunks(models.Action, query_ids, chunk_size, dry_run,
+                            before_delete=_delete_dependencies)
+
+
+def dependency_purge(context, chunk_size=1000, dry_run=False):
+    """Delete dependency rows whose dependent actions are not pending.
+
+    Such rows are left behind when the dependent action has completed or
+    when it has been deleted, and they are never used again.
+    """
+    pending = [consts.ACTION_INIT, consts.ACTION_WAITING,
+               consts.ACTION_READY, consts.ACTION_RUNNING]
+
+    def query_ids(session):
+        live = session.query(models.Action.id).filter(
+            models.Action.id == models.ActionDependency.dependent,
+            models.Action.status.in_(pending))
+        return session.query(models.ActionDependency.id).filter(
+            ~live.exists())
+
+    return _purge_in_chunks(models.ActionDependency, query_ids, chunk_size,
+                            dry_run)
+
+
 # Receivers
 def receiver_create(context, values):
     with session_for_write() as session:
@@ -1188,17 +1653,80 @@ def service_get_all(context):
 
 
 # HealthRegistry
-def registry_claim(context, engine_id):
+def registry_claim(context, engine_id, engine_ids=None):
+    """Claim the registries of dead engines falling to an engine.
+
+    The registries are sharded over the live engines by consistent hashing
+    of the cluster IDs, an engine only claims the orphaned registries it is
+    the owner of. A registry is moved only if it is still owned by a dead
+    engine, so that it is never claimed by two engines.
+
+    :param engine_ids: The IDs of the live engines if known, otherwise they
+                       are read from the service table.
+    """
     with session_for_write() as session:
-        engines = session.query(models.Service).all()
-        svc_ids = [e.id for e in engines if not utils.is_service_dead(e)]
+        if engine_ids is None:
+            engines = session.query(models.Service).all()
+            svc_ids = [e.id for e in engines
+                       if not utils.is_service_dead(e)]
+        else:
+            svc_ids = list(engine_ids)
+        ring = hash_ring.HashRing(set(svc_ids) | set([engine_id]))
         q_reg = session.query(models.HealthRegistry)
         if svc_ids:
+            # Find the dead engines from the index on engine_id and select
+            # their registries, rather than scanning the whole table with a
+            # 'NOT IN' clause.
+            q_eng = session.query(models.HealthRegistry.engine_id).distinct()
+            dead_ids = [r[0] for r in q_eng
+                        if r[0] is not None and r[0] not in svc_ids]
+            if not dead_ids:
+                return []
             q_reg = q_reg.filter(
-                models.HealthRegistry.engine_id.notin_(svc_ids))
-        q_reg.update({'engine_id': engine_id}, synchronize_session=False)
-        result = q_reg.all()
-        return result
+                models.HealthRegistry.engine_id.in_(dead_ids))
+
+        reg_ids = [r.id for r in q_reg
+                   if ring.get_member(r.cluster_id) == engine_id]
+        if not reg_ids:
+            return []
+
+        query = session.query(models.HealthRegistry).filter(
+            models.HealthRegistry.id.in_(reg_ids))
+        if svc_ids:
+            query = query.filter(
+                models.HealthRegistry.engine_id.in_(dead_ids))
+        query.update({'engine_id': engine_id}, synchronize_session=False)
+
+        return session.query(models.HealthRegistry).filter(
+            models.HealthRegistry.id.in_(reg_ids)).filter_by(
+            engine_id=engine_id).all()
+
+
+def registry_get_by_engine(context, engine_id):
+    with session_for_read() as session:
+        return session.query(models.HealthRegistry).filter_by(
+            engine_id=engine_id).all()
+
+
+def registry_handoff(context, cluster_id, engine_id, new_engine_id):
+    """Hand the registry of a cluster over to another engine.
+
+    :returns: True if the registry is handed over, False if it is not owned
+              by the engine any more.
+    """
+    with session_for_write() as session:
+        query = session.query(models.HealthRegistry).filter_by(
+            cluster_id=cluster_id, engine_id=engine_id)
+        count = query.update({'engine_id': new_engine_id},
+                             synchronize_session=False)
+        return count > 0
+
+
+def registry_count_by_engine(context):
+    with session_for_read() as session:
+        count = sqlalchemy.func.count(models.HealthRegistry.id)
+        query = session.query(models.HealthRegistry.engine_id, count)
+        return dict(query.group_by(models.HealthRegistry.engine_id).all())
 
 
 def registry_delete(context, cluster_id):
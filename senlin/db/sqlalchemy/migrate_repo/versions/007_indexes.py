@@ -0,0 +1,45 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from sqlalchemy import Index, MetaData, Table
+
+INDEXES = {
+    'action': [
+        ('ix_action_status_owner', ['status', 'owner']),
+        ('ix_action_target', ['target']),
+    ],
+    'dependency': [
+        ('ix_dependency_depended', ['depended']),
+        ('ix_dependency_dependent', ['dependent']),
+    ],
+    'event': [
+        ('ix_event_cluster_id_timestamp', ['cluster_id', 'timestamp']),
+        ('ix_event_timestamp', ['timestamp']),
+    ],
+    'health_registry': [
+        ('ix_health_registry_engine_id', ['engine_id']),
+    ],
+    'node': [
+        ('ix_node_cluster_id', ['cluster_id']),
+    ],
+}
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    for table_name, indexes in INDEXES.items():
+        table = Table(table_name, meta, autoload=True)
+        for name, columns in indexes:
+            index = Index(name, *[table.c[c] for c in columns])
+            index.create(migrate_engine)
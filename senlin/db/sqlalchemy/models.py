@@ -16,7 +16,7 @@ SQLAlchemy models for Senlin data.
 
 from oslo_db.sqlalchemy import models
 from oslo_utils import uuidutils
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer
+from sqlalchemy import Boolean, Column, Float, ForeignKey, Index, Integer
 from sqlalchemy import String, Text
 from sqlalchemy.ext import declarative
 from sqlalchemy.orm import backref
@@ -98,7 +98,12 @@ class Cluster(BASE, TimestampMixin, models.ModelBase):
 class Node(BASE, TimestampMixin, models.ModelBase):
     """Node objects."""
 
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        Index('ix_node_cluster_id', 'cluster_id'),
+        Index('ix_node_cluster_id_status', 'cluster_id', 'status'),
+        Index('ix_node_cluster_id_created_at', 'cluster_id', 'created_at'),
+        {'mysql_engine': 'InnoDB'}
+    )
     __tablename__ = 'node'
 
     id = Column('id', String(36), primary_key=True, default=lambda: UUID4())
@@ -159,7 +164,10 @@ class ClusterPolicies(BASE, models.ModelBase):
 class HealthRegistry(BASE, models.ModelBase):
     """Clusters registered for health management."""
 
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        Index('ix_health_registry_engine_id', 'engine_id'),
+        {'mysql_engine': 'InnoDB'}
+    )
     __tablename__ = 'health_registry'
 
     id = Column('id', String(36), primary_key=True, default=lambda: UUID4())
@@ -202,7 +210,11 @@ class Credential(BASE, models.ModelBase):
 
 class ActionDependency(BASE, models.ModelBase):
     """Action dependencies."""
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        Index('ix_dependency_depended', 'depended'),
+        Index('ix_dependency_dependent', 'dependent'),
+        {'mysql_engine': 'InnoDB'}
+    )
     __tablename__ = 'dependency'
 
     id = Column('id', String(36), primary_key=True, default=lambda: UUID4())
@@ -214,7 +226,11 @@ class ActionDependency(BASE, models.ModelBase):
 
 class Action(BASE, TimestampMixin, models.ModelBase):
     """Action objects."""
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        Index('ix_action_status_owner', 'status', 'owner'),
+        Index('ix_action_target', 'target'),
+        {'mysql_engine': 'InnoDB'}
+    )
     __tablename__ = 'action'
 
     id = Column('id', String(36), primary_key=True, default=lambda: UUID4())
@@ -242,7 +258,11 @@ class Action(BASE, TimestampMixin, models.ModelBase):
 
 class Event(BASE, models.ModelBase):
     """Events generated by the Senin engine."""
-    __table_args__ = {'mysql_engine': 'InnoDB'}
+    __table_args__ = (
+        Index('ix_event_cluster_id_timestamp', 'cluster_id', 'timestamp'),
+        Index('ix_event_timestamp', 'timestamp'),
+        {'mysql_engine': 'InnoDB'}
+    )
     __tablename__ = 'event'
 
     id = Column('id', String(36), primary_key=True, default=lambda: UUID4())
@@ -278,3 +298,5 @@ class Service(BASE, TimestampMixin, models.ModelBase):
     topic = Column(String(255))
     disabled = Column(Boolean, default=False)
     disabled_reason = Column(String(255))
+    # Number of actions running, as last reported by the engine
+    workers = Column(Integer, default=0)
@@ -10,10 +10,42 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from openstack import exceptions as sdk_exc
+from openstack.orchestration.v1 import stack as sdk_stack
+from openstack import resource2
 from oslo_config import cfg
 
 from senlin.drivers import base
 from senlin.drivers.openstack import sdk
+from senlin.drivers.openstack import watcher
+
+
+class _Stack(sdk_stack.Stack):
+    # The stack index of Heat can filter the stacks by ID
+    _query_mapping = resource2.QueryParameters('id')
+
+
+class StackWatcher(watcher.StatusWatcher):
+    """Watcher of the status of stacks.
+
+    The stacks are polled by listing the stacks watched by ID, the stacks
+    deleted are not listed.
+    """
+
+    def _poll(self, resource_ids, since):
+        statuses = dict((stack_id, None) for stack_id in resource_ids)
+        for stack in _Stack.list(self.conn.session, id=resource_ids):
+            if stack.id in statuses:
+                statuses[stack.id] = stack.status
+        return statuses
+
+    def _get(self, resource_id):
+        try:
+            stack = self.conn.orchestration.get_stack(resource_id)
+        except sdk_exc.ResourceNotFound:
+            return None
+        # Deleted stacks can still be shown by ID
+        return None if stack.status == 'DELETE_COMPLETE' else stack.status
 
 
 class HeatClient(base.DriverBase):
@@ -63,8 +95,10 @@ class HeatClient(base.DriverBase):
 
         stack_obj = self.conn.orchestration.find_stack(stack_id, False)
         if stack_obj:
-            self.conn.orchestration.wait_for_status(
-                stack_obj, status, failures, interval, timeout)
+            StackWatcher.get(self.conn).wait(stack_obj.id, status,
+                                             failures=failures,
+                                             interval=interval,
+                                             timeout=timeout)
 
     @sdk.translate_exception
     def wait_for_stack_delete(self, stack_id, timeout=None):
@@ -74,6 +108,7 @@ class HeatClient(base.DriverBase):
 
         server_obj = self.conn.orchestration.find_stack(stack_id, True)
         if server_obj:
-            self.conn.orchestration.wait_for_delete(server_obj, wait=timeout)
+            StackWatcher.get(self.conn).wait(server_obj.id, None,
+                                             timeout=timeout)
 
         return
@@ -31,6 +31,8 @@ class LoadBalancerDriver(base.DriverBase):
     def __init__(self, params):
         super(LoadBalancerDriver, self).__init__(params)
         self.lb_status_timeout = 600
+        self.lb_status_min_interval = 1
+        self.lb_status_max_interval = 10
         self._nc = None
 
     def nc(self):
@@ -51,6 +53,9 @@ class LoadBalancerDriver(base.DriverBase):
         :param ignore_not_found: if set to True, nonexistent loadbalancer
             resource is also an acceptable result.
         """
+        # Most status transitions complete within a few seconds, so poll
+        # often first and back off to the maximum interval afterwards.
+        interval = self.lb_status_min_interval
         waited = 0
         while waited < self.lb_status_timeout:
             try:
@@ -72,8 +77,9 @@ class LoadBalancerDriver(base.DriverBase):
             LOG.debug(_('Waiting for loadbalancer %(lb)s to become ready'),
                       {'lb': lb_id})
 
-            eventlet.sleep(10)
-            waited += 10
+            eventlet.sleep(interval)
+            waited += interval
+            interval = min(interval * 2, self.lb_status_max_interval)
 
         return False
 
@@ -332,3 +338,107 @@ class LoadBalancerDriver(base.DriverBase):
             return None
 
         return True
+
+    def members_add(self, nodes, lb_id, pool_id, port, subnet):
+        """Add a batch of members to Neutron lbaas pool.
+
+        The subnet and network are looked up only once for the batch and the
+        loadbalancer is checked once before the first member is created.
+        Since Neutron lbaasv2 rejects member operations while another one is
+        in progress, the loadbalancer still has to become ready after each
+        member creation before the next one is sent out.
+
+        :param nodes: A list of node objects to be added to the pool.
+        :param lb_id: The ID of the loadbalancer.
+        :param pool_id: The ID of the pool for receiving the nodes.
+        :param port: The port for the new LB members to be created.
+        :param subnet: The subnet to be used by the new LB members.
+        :returns: A dict containing the ID of the new LB member by node ID,
+                  or None for the nodes failed to be added.
+        """
+        result = dict((node.id, None) for node in nodes)
+        if not nodes:
+            return result
+
+        try:
+            subnet_obj = self.nc().subnet_get(subnet)
+            net = self.nc().network_get(subnet_obj.network_id)
+        except exception.InternalError as ex:
+            resource = 'subnet' if subnet in ex.message else 'network'
+            msg = _LE('Failed in getting %(resource)s: %(msg)s.'
+                      ) % {'resource': resource, 'msg': six.text_type(ex)}
+            LOG.exception(msg)
+            return result
+
+        if not self._wait_for_lb_ready(lb_id):
+            LOG.error(_LE('Loadbalancer %s is not ready.'), lb_id)
+            return result
+
+        ctx = oslo_context.get_current()
+        for node in nodes:
+            addresses = node.get_details(ctx).get('addresses', {})
+            if net.name not in addresses:
+                LOG.error(_LE('Node %(node)s is not in subnet %(subnet)s'),
+                          {'node': node.id, 'subnet': subnet})
+                continue
+
+            # Use the first IP address if more than one are found in target
+            # network
+            address = addresses[net.name][0]['addr']
+            try:
+                member = self.nc().pool_member_create(pool_id, address, port,
+                                                      subnet_obj.id)
+            except exception.InternalError as ex:
+                msg = _LE('Failed in creating lb pool member: %s.'
+                          ) % six.text_type(ex)
+                LOG.exception(msg)
+                continue
+
+            if not self._wait_for_lb_ready(lb_id):
+                LOG.error(_LE('Failed in creating pool member (%s).'),
+                          member.id)
+                # No further member operation would be accepted
+                break
+
+            result[node.id] = member.id
+
+        return result
+
+    def members_remove(self, lb_id, pool_id, member_ids):
+        """Delete a batch of members from Neutron lbaas pool.
+
+        The loadbalancer is checked once before the first member is deleted,
+        then waited for after each member deletion.
+
+        :param lb_id: The ID of the loadbalancer the operation is targeted at;
+        :param pool_id: The ID of the pool from which the members are deleted;
+        :param member_ids: A list of IDs of the LB members.
+        :returns: A dict containing True by member ID if the member was
+                  deleted or None if errors occurred.
+        """
+        result = dict((member_id, None) for member_id in member_ids)
+        if not member_ids:
+            return result
+
+        if not self._wait_for_lb_ready(lb_id):
+            LOG.error(_LE('Loadbalancer %s is not ready.'), lb_id)
+            return result
+
+        for member_id in member_ids:
+            try:
+                self.nc().pool_member_delete(pool_id, member_id)
+            except exception.InternalError as ex:
+                msg = _LE('Failed in removing member %(m)s from pool %(p)s: '
+                          '%(ex)s') % {'m': member_id, 'p': pool_id,
+                                       'ex': six.text_type(ex)}
+                LOG.exception(msg)
+                continue
+
+            if not self._wait_for_lb_ready(lb_id):
+                LOG.error(_LE('Failed in deleting pool member (%s).'),
+                          member_id)
+                break
+
+            result[member_id] = True
+
+        return result
@@ -10,15 +10,51 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
+from openstack import exceptions as sdk_exc
 from oslo_config import cfg
 from oslo_log import log
 
 from senlin.common.i18n import _LW
 from senlin.drivers import base
 from senlin.drivers.openstack import sdk
+from senlin.drivers.openstack import watcher
 
 LOG = log.getLogger(__name__)
 
+# Seconds subtracted from the time of the earliest wait when listing the
+# servers changed since then, to make up for a clock skew with Nova
+CHANGES_SINCE_MARGIN = 60
+
+
+class ServerWatcher(watcher.StatusWatcher):
+    """Watcher of the status of servers.
+
+    The servers are polled by listing the servers changed since the earliest
+    wait, which includes the servers deleted since then.
+    """
+
+    def _poll(self, resource_ids, since):
+        since -= datetime.timedelta(seconds=CHANGES_SINCE_MARGIN)
+        servers = self.conn.compute.servers(
+            True, changes_since=since.isoformat())
+
+        watched = set(resource_ids)
+        statuses = {}
+        for server in servers:
+            if server.id in watched:
+                status = server.status
+                statuses[server.id] = None if status == 'DELETED' else status
+        return statuses
+
+    def _get(self, resource_id):
+        try:
+            server = self.conn.compute.get_server(resource_id)
+        except sdk_exc.ResourceNotFound:
+            return None
+        return None if server.status == 'DELETED' else server.status
+
 
 class NovaClient(base.DriverBase):
     '''Nova V2 driver.'''
@@ -49,6 +85,11 @@ class NovaClient(base.DriverBase):
     def server_get(self, server):
         return self.conn.compute.get_server(server)
 
+    @sdk.translate_exception
+    def server_list(self, details=True, **query):
+        # Consume the paginated results here so that errors are translated
+        return list(self.conn.compute.servers(details, **query))
+
     @sdk.translate_exception
     def server_update(self, server, **attrs):
         return self.conn.compute.update_server(server, **attrs)
@@ -97,11 +138,8 @@ class NovaClient(base.DriverBase):
         if timeout is None:
             timeout = cfg.CONF.default_action_timeout
 
-        server_obj = self.conn.compute.find_server(server, False)
-        self.conn.compute.wait_for_server(server_obj, status=status,
-                                          failures=failures,
-                                          interval=interval,
-                                          wait=timeout)
+        ServerWatcher.get(self.conn).wait(server, status, failures=failures,
+                                          interval=interval, timeout=timeout)
         return
 
     @sdk.translate_exception
@@ -112,7 +150,8 @@ class NovaClient(base.DriverBase):
 
         server_obj = self.conn.compute.find_server(server, True)
         if server_obj:
-            self.conn.compute.wait_for_delete(server_obj, wait=timeout)
+            ServerWatcher.get(self.conn).wait(server_obj.id, None,
+                                              timeout=timeout)
 
         return
 
@@ -13,7 +13,9 @@
 '''
 SDK Client
 '''
+import collections
 import sys
+import threading
 
 import functools
 from oslo_config import cfg
@@ -101,13 +103,87 @@ def translate_exception(func):
     return invoke_with_catch
 
 
+class ConnectionPool(object):
+    """A bounded LRU pool of authenticated connections.
+
+    A connection is keyed by all the parameters used to create it, which
+    include the trust ID and the region name, and it can be used for any
+    service in the cloud. A connection reused keeps its authenticated
+    session, which re-authenticates by itself only when its token is about
+    to expire.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._conns = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            conn = self._conns.pop(key, None)
+            if conn is None:
+                self.misses += 1
+                return None
+
+            self._conns[key] = conn
+            self.hits += 1
+            return conn
+
+    def put(self, key, conn):
+        size = cfg.CONF.max_cached_connections
+        if size <= 0:
+            return
+
+        with self._lock:
+            self._conns[key] = conn
+            while len(self._conns) > size:
+                self._conns.popitem(last=False)
+
+        LOG.debug('Connection pool: %s', self.stats())
+
+    def clear(self):
+        with self._lock:
+            self._conns.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get statistics of the pool.
+
+        :returns: A dict containing the number of hits, i.e. authentications
+                  saved, misses and connections pooled.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._conns),
+            }
+
+
+connections = ConnectionPool()
+
+
+def _connection_key(params):
+    key = dict(params)
+    key.setdefault('region_name', cfg.CONF.default_region_name)
+    return jsonutils.dumps(key, sort_keys=True)
+
+
 def create_connection(params=None):
     if params is None:
         params = {}
 
     if params.get('token', None):
+        # Tokens cannot be renewed, so don't share the connection
+        key = None
         auth_plugin = 'token'
     else:
+        key = _connection_key(params)
+        conn = connections.get(key)
+        if conn is not None:
+            return conn
         auth_plugin = 'password'
 
     prof = profile.Profile()
@@ -124,6 +200,8 @@ def create_connection(params=None):
     except Exception as ex:
         raise parse_exception(ex)
 
+    if key is not None:
+        connections.put(key, conn)
     return conn
 
 
@@ -0,0 +1,205 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Shared polling of the status of cloud resources.
+
+Instead of each thread waiting for a resource polling the resource on its
+own, the threads waiting for resources reached through the same connection
+register with a watcher. Each resource is read once when the wait starts,
+then the watcher gets the status of all the resources watched periodically,
+in as few list calls as possible, and wakes up the threads whose resources
+have reached the status they wait for.
+"""
+
+import eventlet
+from eventlet import event as eventlet_event
+from openstack import exceptions as sdk_exc
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from senlin.common.i18n import _LW
+
+LOG = logging.getLogger(__name__)
+
+# Watchers with resources to watch, by watcher class and connection
+_watchers = {}
+
+
+class _Waiter(object):
+    """A thread waiting for a resource."""
+
+    def __init__(self, status, failures, interval):
+        self.status = status
+        self.failures = failures
+        self.interval = interval
+        self.since = timeutils.utcnow()
+        self.event = eventlet_event.Event()
+
+    def check(self, resource_id, status):
+        """Check the status of the resource waited for.
+
+        :param resource_id: ID of the resource.
+        :param status: Status of the resource, None if it doesn't exist.
+        :returns: True if the thread is woken up, False otherwise.
+        """
+        if self.status is None:
+            # Waiting for the resource to be deleted
+            if status is not None:
+                return False
+            self.event.send(None)
+        elif status == self.status:
+            self.event.send(None)
+        elif status is None:
+            msg = 'Resource %s not found' % resource_id
+            self.event.send_exception(sdk_exc.ResourceNotFound(
+                msg, http_status=404))
+        elif status in self.failures:
+            msg = 'Resource %s transitioned to failure state %s' % (
+                resource_id, status)
+            self.event.send_exception(sdk_exc.ResourceFailure(msg))
+        else:
+            return False
+
+        return True
+
+
+class StatusWatcher(object):
+    """Base class of the watchers of a type of resources."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.key = (self.__class__.__name__, id(conn))
+        # Waiters by ID of the resource they wait for
+        self._waiters = {}
+        self._thread = None
+
+    @classmethod
+    def get(cls, conn):
+        """Get the watcher of the resources reached through a connection.
+
+        :param conn: The connection to the cloud.
+        :returns: A watcher object.
+        """
+        key = (cls.__name__, id(conn))
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = cls(conn)
+            _watchers[key] = watcher
+        return watcher
+
+    def _poll(self, resource_ids, since):
+        """Get the status of resources.
+
+        :param resource_ids: IDs of the resources watched.
+        :param since: The time of the earliest wait, as a naive UTC datetime.
+                      Resources not changed since then can be skipped.
+        :returns: A dict containing the status of resources by ID, None if
+                  a resource doesn't exist. Resources not in the dict are
+                  considered unchanged.
+        """
+        raise NotImplementedError
+
+    def _get(self, resource_id):
+        """Get the status of a single resource.
+
+        :param resource_id: ID of the resource.
+        :returns: The status of the resource, None if it doesn't exist.
+        """
+        raise NotImplementedError
+
+    def _check(self):
+        resource_ids = list(self._waiters.keys())
+        since = min(w.since for ws in self._waiters.values() for w in ws)
+        try:
+            statuses = self._poll(resource_ids, since)
+        except Exception as ex:
+            # A failed list is about none of the resources in particular,
+            # each resource is checked on its own instead and only the
+            # threads waiting for a resource that can't be read fail.
+            LOG.warning(_LW('Failed listing %(num)s resources, getting them '
+                            'one by one: %(ex)s'),
+                        {'num': len(resource_ids), 'ex': ex})
+            statuses = {}
+            for resource_id in resource_ids:
+                try:
+                    statuses[resource_id] = self._get(resource_id)
+                except Exception as ex:
+                    for waiter in self._waiters.pop(resource_id, []):
+                        waiter.event.send_exception(ex)
+
+        for resource_id, status in statuses.items():
+            waiting = self._waiters.get(resource_id, [])
+            waiting[:] = [w for w in waiting
+                          if not w.check(resource_id, status)]
+            if not waiting:
+                self._waiters.pop(resource_id, None)
+
+    def _release(self):
+        # The watcher is dropped once it has nothing left to watch
+        if (not self._waiters and self._thread is None and
+                _watchers.get(self.key) is self):
+            del _watchers[self.key]
+
+    def _run(self):
+        try:
+            while self._waiters:
+                interval = min(w.interval for ws in self._waiters.values()
+                               for w in ws)
+                eventlet.sleep(interval)
+                if self._waiters:
+                    self._check()
+        finally:
+            self._thread = None
+            self._release()
+
+    def wait(self, resource_id, status, failures=None, interval=2,
+             timeout=None):
+        """Wait for a resource to reach a status.
+
+        :param resource_id: ID of the resource.
+        :param status: The status to wait for, None to wait for the resource
+                       to be deleted.
+        :param failures: A list of statuses meaning the resource will never
+                         reach the status waited for.
+        :param interval: Maximum number of seconds between two polls.
+        :param timeout: Maximum number of seconds to wait.
+        :raises: `ResourceFailure` if the resource reaches a failure status,
+                 `ResourceNotFound` if it is deleted, or `ResourceTimeout`.
+        """
+        waiter = _Waiter(status, failures or [], interval)
+        # The resource is read once on its own first, it may have reached
+        # the status already, before the window of the listings.
+        try:
+            status_now = self._get(resource_id)
+        except Exception:
+            self._release()
+            raise
+        if waiter.check(resource_id, status_now):
+            self._release()
+            return waiter.event.wait()
+
+        self._waiters.setdefault(resource_id, []).append(waiter)
+        if self._thread is None:
+            self._thread = eventlet.spawn(self._run)
+
+        with eventlet.Timeout(timeout, False):
+            return waiter.event.wait()
+
+        waiting = self._waiters.get(resource_id, [])
+        if waiter in waiting:
+            waiting.remove(waiter)
+            if not waiting:
+                self._waiters.pop(resource_id, None)
+        msg = 'Timeout waiting for resource %s to transition to %s' % (
+            resource_id, status)
+        raise sdk_exc.ResourceTimeout(msg)
@@ -0,0 +1,159 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+In-memory mirror of the dependencies of the actions waiting in an engine.
+
+An action waiting for the actions it depends on, e.g. a cluster action
+waiting for its node actions, is tracked with the IDs of the actions not
+completed yet. When one of them completes, the waiting action is updated in
+constant time instead of counting rows in the 'dependency' table. The rows
+of the dependencies on completed actions are deleted later, in batches.
+
+The 'dependency' table remains the reference. An action that is not tracked,
+e.g. an action resumed after an engine restart, is tracked again from the
+rows of its pending dependencies when it checks its status.
+"""
+
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+import six
+
+from senlin.common.i18n import _LE
+from senlin.objects import dependency as dobj
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.import_opt('dependency_batch_size', 'senlin.common.config')
+
+
+class ActionGraph(object):
+    """Dependencies of the actions waiting in the current process."""
+
+    def __init__(self):
+        # IDs of the depended actions not completed, by waiting action ID
+        self._pending = {}
+        # Number of depended actions a waiting action can proceed with not
+        # completed, by waiting action ID
+        self._allowed = {}
+        # IDs of the completed actions whose dependency rows are not deleted
+        self._completed = []
+        self._lock = threading.Lock()
+
+    def track(self, action_id, depended):
+        """Start tracking an action waiting for other actions.
+
+        If the action is tracked already, the actions are added to the ones
+        it is waiting for.
+
+        :param action_id: ID of the waiting action.
+        :param depended: IDs of the actions it depends on not completed yet.
+        """
+        with self._lock:
+            self._pending.setdefault(action_id, set()).update(depended)
+
+    def untrack(self, action_id):
+        """Stop tracking an action.
+
+        :param action_id: ID of the action done with waiting, or whose status
+                          has to be checked from the database.
+        """
+        with self._lock:
+            self._pending.pop(action_id, None)
+
+    def pending(self, action_id):
+        """Get the number of actions an action is still waiting for.
+
+        :param action_id: ID of the waiting action.
+        :returns: The number of actions or None if the action is not tracked.
+        """
+        with self._lock:
+            depended = self._pending.get(action_id)
+            return None if depended is None else len(depended)
+
+    def allow(self, action_id, count):
+        """Let a waiting action proceed before all its dependents complete.
+
+        :param action_id: ID of the waiting action.
+        :param count: Number of actions the waiting action can proceed with
+                      not completed. 0 means it waits for all of them.
+        """
+        with self._lock:
+            if count > 0:
+                self._allowed[action_id] = count
+            else:
+                self._allowed.pop(action_id, None)
+
+    def resolve(self, action_id, depended):
+        """Record that an action depended on has completed.
+
+        :param action_id: ID of the waiting action.
+        :param depended: ID of the action completed.
+        :returns: True if the waiting action can proceed, i.e. it is not
+                  waiting for more actions than allowed, or is not tracked,
+                  False otherwise.
+        """
+        with self._lock:
+            pending = self._pending.get(action_id)
+            if pending is None:
+                return True
+
+            pending.discard(depended)
+            return len(pending) <= self._allowed.get(action_id, 0)
+
+    def complete(self, context, action_id):
+        """Schedule the deletion of the dependencies on a completed action.
+
+        The dependencies are deleted when 'dependency_batch_size' completed
+        actions have accumulated, or when the graph is flushed.
+
+        :param context: The context used for DB operations.
+        :param action_id: ID of the action completed.
+        """
+        with self._lock:
+            self._completed.append(action_id)
+            if len(self._completed) < cfg.CONF.dependency_batch_size:
+                return
+
+        self.flush(context)
+
+    def flush(self, context):
+        """Delete the dependencies on the completed actions.
+
+        :param context: The context used for DB operations.
+        """
+        with self._lock:
+            completed, self._completed = self._completed, []
+
+        if not completed:
+            return
+
+        try:
+            dobj.Dependency.delete(context, completed)
+        except Exception as ex:
+            LOG.error(_LE('Failed in deleting action dependencies: %s'),
+                      six.text_type(ex))
+            # The dependencies on completed actions are harmless, they will
+            # be deleted with the next batch
+            with self._lock:
+                self._completed.extend(completed)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._allowed.clear()
+            self._completed = []
+
+
+graph = ActionGraph()
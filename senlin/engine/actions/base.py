@@ -22,7 +22,9 @@ from senlin.common import exception
 from senlin.common.i18n import _
 from senlin.common.i18n import _LE
 from senlin.common import utils
+from senlin.engine import action_graph
 from senlin.engine import cluster_policy as cp_mod
+from senlin.engine import dispatcher
 from senlin.engine import event as EVENT
 from senlin.objects import action as ao
 from senlin.objects import dependency as dobj
@@ -278,6 +280,65 @@ class Action(object):
         obj = cls(target, action, ctx, **kwargs)
         return obj.store(context)
 
+    @classmethod
+    def create_all(cls, context, specs, dependencies=None):
+        """Create a batch of actions in one database transaction.
+
+        Unlike `create`, this method doesn't instantiate the actions, which
+        would otherwise load their targets from the database one by one.
+
+        :param context: The requesting context.
+        :param specs: A list of (target, action, kwargs) tuples, one for each
+                      action to be created. An 'id' can be specified in the
+                      kwargs if it has to be known in advance.
+        :param dependencies: An optional list of (depended, dependent) tuples
+                             of action IDs to be recorded along with the
+                             actions.
+        :return: A list of IDs of the actions created, in the same order.
+        """
+        params = {
+            'user': context.user,
+            'project': context.project,
+            'domain': context.domain,
+            'is_admin': context.is_admin,
+            'request_id': context.request_id,
+            'trusts': context.trusts,
+        }
+        ctx = req_context.RequestContext.from_dict(params)
+        timestamp = timeutils.utcnow(True)
+
+        values_list = []
+        for (target, action, kwargs) in specs:
+            values = {
+                'name': kwargs.get('name', ''),
+                'context': ctx.to_dict(),
+                'target': target,
+                'action': action,
+                'cause': kwargs.get('cause', ''),
+                'owner': None,
+                'interval': kwargs.get('interval', -1),
+                'start_time': None,
+                'end_time': None,
+                'timeout': kwargs.get('timeout',
+                                      cfg.CONF.default_action_timeout),
+                'status': kwargs.get('status', cls.INIT),
+                'status_reason': kwargs.get('status_reason', ''),
+                'inputs': kwargs.get('inputs', {}),
+                'outputs': {},
+                'created_at': timestamp,
+                'updated_at': None,
+                'data': kwargs.get('data', {}),
+                'user': ctx.user,
+                'project': ctx.project,
+                'domain': ctx.domain,
+            }
+            if kwargs.get('id'):
+                values['id'] = kwargs['id']
+            values_list.append(values)
+
+        return ao.Action.create_all(context, values_list,
+                                    dependencies=dependencies)
+
     @classmethod
     def delete(cls, context, action_id):
         """Delete an action from database.
@@ -327,24 +388,31 @@ class Action(object):
         """Set action status based on return value from execute."""
 
         timestamp = wallclock()
+        dependents = None
+        depended = None
 
         if result == self.RES_OK:
             status = self.SUCCEEDED
-            ao.Action.mark_succeeded(self.context, self.id, timestamp)
+            dependents = ao.Action.mark_succeeded(self.context, self.id,
+                                                  timestamp)
+            # The dependents only have to know this action has succeeded
+            depended = self.id
+            action_graph.graph.complete(self.context, self.id)
 
         elif result == self.RES_ERROR:
             status = self.FAILED
-            ao.Action.mark_failed(self.context, self.id, timestamp,
-                                  reason or 'ERROR')
+            dependents = ao.Action.mark_failed(self.context, self.id,
+                                               timestamp, reason or 'ERROR')
 
         elif result == self.RES_TIMEOUT:
             status = self.FAILED
-            ao.Action.mark_failed(self.context, self.id, timestamp,
-                                  reason or 'TIMEOUT')
+            dependents = ao.Action.mark_failed(self.context, self.id,
+                                               timestamp, reason or 'TIMEOUT')
 
         elif result == self.RES_CANCEL:
             status = self.CANCELLED
-            ao.Action.mark_cancelled(self.context, self.id, timestamp)
+            dependents = ao.Action.mark_cancelled(self.context, self.id,
+                                                  timestamp)
 
         else:  # result == self.RES_RETRY:
             status = self.READY
@@ -352,6 +420,9 @@ class Action(object):
             # We abandon it and then notify other dispatchers to execute it
             ao.Action.abandon(self.context, self.id)
 
+        if dependents:
+            self._wakeup_dependents(dependents, depended)
+
         if status == self.SUCCEEDED:
             EVENT.info(self.context, self, self.action, status, reason)
         elif status == self.READY:
@@ -362,9 +433,45 @@ class Action(object):
         self.status = status
         self.status_reason = reason
 
+    def _wakeup_dependents(self, dependents, depended=None):
+        """Wake up dependent actions that are waiting for this action.
+
+        :param dependents: A dict mapping the IDs of the dependent actions to
+                           the IDs of the engines owning them.
+        :param depended: ID of this action if it succeeded, or None if the
+                         dependent actions have to check their status from
+                         the database.
+        """
+        # imported here to avoid circular imports
+        from senlin.engine import scheduler
+
+        for action_id, owner in dependents.items():
+            if owner is None:
+                # not being executed by any engine yet
+                continue
+
+            if owner == self.owner:
+                scheduler.wakeup_dependent(action_id, depended)
+            else:
+                dispatcher.wakeup_action(owner, action_id=action_id,
+                                         depended=depended)
+
     def get_status(self):
-        timestamp = wallclock()
-        status = ao.Action.check_status(self.context, self.id, timestamp)
+        pending = action_graph.graph.pending(self.id)
+        if pending is None:
+            # Not tracked yet, or the status has to be checked from database
+            depended = dobj.Dependency.get_pending(self.context, self.id)
+            action_graph.graph.track(self.id, depended)
+            pending = len(depended)
+
+        if pending > 0:
+            status = self.WAITING
+        else:
+            timestamp = wallclock()
+            status = ao.Action.check_status(self.context, self.id, timestamp)
+            if status == self.WAITING:
+                action_graph.graph.untrack(self.id)
+
         self.status = status
         return status
 
@@ -468,8 +575,14 @@ class Action(object):
 
     def to_dict(self):
         if self.id:
-            dep_on = dobj.Dependency.get_depended(self.context, self.id)
-            dep_by = dobj.Dependency.get_dependents(self.context, self.id)
+            # The dependencies on the actions succeeded are deleted later in
+            # batches, leave them out until then
+            dep_on = dobj.Dependency.get_pending(self.context, self.id)
+            if self.status == self.SUCCEEDED:
+                dep_by = []
+            else:
+                dep_by = dobj.Dependency.get_dependents(self.context,
+                                                        self.id)
         else:
             dep_on = []
             dep_by = []
@@ -13,16 +13,22 @@
 import copy
 import eventlet
 
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import six
 
 from senlin.common import consts
 from senlin.common import exception
 from senlin.common.i18n import _
 from senlin.common.i18n import _LI
+from senlin.common.i18n import _LW
 from senlin.common import scaleutils
 from senlin.common import utils
+from senlin.engine import action_graph
 from senlin.engine.actions import base
+from senlin.engine.actions import node_action
 from senlin.engine import cluster as cluster_mod
 from senlin.engine import dispatcher
 from senlin.engine import event as EVENT
@@ -31,7 +37,6 @@ from senlin.engine import scheduler
 from senlin.engine import senlin_lock
 from senlin.objects import action as ao
 from senlin.objects import cluster as co
-from senlin.objects import dependency as dobj
 from senlin.objects import node as no
 from senlin.policies import base as policy_mod
 
@@ -75,40 +80,348 @@ class ClusterAction(base.Action):
         if period:
             eventlet.sleep(period)
 
-    def _wait_for_dependents(self):
+    def _wait_for_dependents(self, allowed=0):
         """Wait for dependent actions to complete.
 
+        :param allowed: Number of dependent actions that may still be running
+                        when the wait ends. They remain tracked, so that more
+                        dependents can be started and waited for.
         :returns: A tuple containing the result and the corresponding reason.
         """
-        status = self.get_status()
-        reason = ''
-        while status != self.READY:
-            if status == self.FAILED:
-                reason = _('%(action)s [%(id)s] failed') % {
-                    'action': self.action, 'id': self.id[:8]}
-                LOG.debug(reason)
-                return self.RES_ERROR, reason
+        # Register for wakeups before checking status so that dependents
+        # finishing in between are not missed
+        scheduler.add_waiter(self.id)
+        action_graph.graph.allow(self.id, allowed)
+        proceed = False
+        try:
+            status = self.get_status()
+            reason = ''
+            while status != self.READY:
+                if status == self.FAILED:
+                    reason = _('%(action)s [%(id)s] failed') % {
+                        'action': self.action, 'id': self.id[:8]}
+                    LOG.debug(reason)
+                    return self.RES_ERROR, reason
+
+                if self.is_cancelled():
+                    # During this period, if cancel request comes, cancel this
+                    # operation immediately, then release the cluster lock
+                    reason = _('%(action)s [%(id)s] cancelled') % {
+                        'action': self.action, 'id': self.id[:8]}
+                    LOG.debug(reason)
+                    return self.RES_CANCEL, reason
+
+                if self.is_timeout():
+                    # Action timeout, return
+                    reason = _('%(action)s [%(id)s] timeout') % {
+                        'action': self.action, 'id': self.id[:8]}
+                    LOG.debug(reason)
+                    return self.RES_TIMEOUT, reason
+
+                pending = action_graph.graph.pending(self.id)
+                if allowed and pending is not None and pending <= allowed:
+                    # Enough dependents completed, unless one of them failed
+                    status = ao.Action.get(self.context, self.id).status
+                    if status != self.FAILED:
+                        proceed = True
+                        return self.RES_OK, _('Enough dependents ended with '
+                                              'success')
+                    continue
+
+                # Continue waiting until woken up by a dependent, or until
+                # it is time for a status check from database in case a
+                # wakeup was lost
+                if not scheduler.wait_for_wakeup(self.id,
+                                                 self._wait_interval()):
+                    action_graph.graph.untrack(self.id)
+                status = self.get_status()
+        finally:
+            scheduler.remove_waiter(self.id)
+            action_graph.graph.allow(self.id, 0)
+            if not proceed:
+                action_graph.graph.untrack(self.id)
+
+        return self.RES_OK, 'All dependents ended with success'
+
+    def _wait_interval(self):
+        """Get the number of seconds to wait before next status check.
+
+        :returns: The check interval, trimmed to the time left before the
+                  action times out.
+        """
+        interval = cfg.CONF.dependency_check_interval
+        if self.timeout is not None and self.start_time is not None:
+            remaining = self.start_time + self.timeout - base.wallclock()
+            interval = max(min(interval, remaining), 0)
+        return interval
+
+    def _start_children(self, specs, dependencies=None):
+        """Create derived actions ready for execution and start them.
+
+        The child actions are created in READY status, together with their
+        dependencies, in one database transaction.
+
+        :param specs: A list of (target, action, kwargs) tuples, one for each
+                      child action.
+        :param dependencies: A list of (depended, dependent) tuples of action
+                             IDs. By default, this action depends on all the
+                             child actions created.
+        :returns: A list of IDs of the child actions created.
+        """
+        for (target, action, kwargs) in specs:
+            kwargs.setdefault('id', uuidutils.generate_uuid())
+            kwargs['cause'] = base.CAUSE_DERIVED
+            kwargs['status'] = base.Action.READY
 
+        if dependencies is None:
+            dependencies = [(kwargs['id'], self.id)
+                            for (target, action, kwargs) in specs]
+
+        # Track the dependencies before any child can complete
+        depended = [d for (d, dependent) in dependencies
+                    if dependent == self.id]
+        if depended:
+            action_graph.graph.track(self.id, depended)
+
+        try:
+            child = base.Action.create_all(self.context, specs,
+                                           dependencies=dependencies)
+        except Exception:
+            action_graph.graph.untrack(self.id)
+            raise
+
+        dispatcher.start_action(cluster_id=self.target)
+        return child
+
+    def _run_node_operation(self, target, action_name, kwargs):
+        """Run a node operation in this action.
+
+        The operation is performed by a node action which is not stored, and
+        which locks the node on behalf of this action.
+
+        :param target: ID of the target node.
+        :param action_name: Name of the node action to be performed.
+        :param kwargs: Other arguments for the node action.
+        :returns: A tuple containing the result and the corresponding reason.
+        """
+        action = node_action.NodeAction(target, action_name, self.context,
+                                        id=self.id, owner=self.owner,
+                                        name=kwargs.get('name', ''),
+                                        cause=base.CAUSE_DERIVED,
+                                        inputs=kwargs.get('inputs', {}))
+        try:
+            return action.execute()
+        except Exception as ex:
+            LOG.exception(_('Unexpected exception occurred during node '
+                            'operation %(action)s on %(node)s: %(reason)s'),
+                          {'action': action_name, 'node': target,
+                           'reason': six.text_type(ex)})
+            return self.RES_ERROR, six.text_type(ex)
+
+    def _store_data(self):
+        """Save the data of the action, e.g. to record its progress."""
+        try:
+            ao.Action.update(self.context, self.id, {'data': self.data})
+        except Exception as ex:
+            LOG.warning(_LW('Failed in saving the data of action %(id)s: '
+                            '%(reason)s'), {'id': self.id, 'reason': ex})
+
+    def _wait_inline(self, state, running):
+        """Wait for inline node operations to complete.
+
+        :param state: A dict containing the number of operations 'running'.
+        :param running: Number of operations that may still be running when
+                        the wait ends.
+        :returns: None when done waiting, or a tuple containing the result
+                  and the corresponding reason if the action is cancelled or
+                  timed out in the meanwhile.
+        """
+        while True:
             if self.is_cancelled():
-                # During this period, if cancel request comes, cancel this
-                # operation immediately, then release the cluster lock
-                reason = _('%(action)s [%(id)s] cancelled') % {
+                return self.RES_CANCEL, _('%(action)s [%(id)s] cancelled') % {
                     'action': self.action, 'id': self.id[:8]}
-                LOG.debug(reason)
-                return self.RES_CANCEL, reason
 
             if self.is_timeout():
-                # Action timeout, return
-                reason = _('%(action)s [%(id)s] timeout') % {
+                return self.RES_TIMEOUT, _('%(action)s [%(id)s] timeout') % {
                     'action': self.action, 'id': self.id[:8]}
-                LOG.debug(reason)
-                return self.RES_TIMEOUT, reason
 
-            # Continue waiting (with reschedule)
-            scheduler.reschedule(self.id, 3)
-            status = self.get_status()
+            if state['running'] <= running:
+                return None
 
-        return self.RES_OK, 'All dependents ended with success'
+            # Woken up as each operation completes
+            scheduler.wait_for_wakeup(self.id, self._wait_interval())
+
+    def _record_failures(self, failures):
+        """Record a failed node action for each failed inline operation.
+
+        :param failures: A list of (target, action, kwargs, reason) tuples.
+        """
+        records = []
+        for (target, action_name, kwargs, status_reason) in failures:
+            records.append((target, action_name, {
+                'name': kwargs.get('name', ''),
+                'cause': base.CAUSE_DERIVED,
+                'status': self.FAILED,
+                'status_reason': status_reason,
+                'inputs': kwargs.get('inputs', {}),
+            }))
+        base.Action.create_all(self.context, records)
+
+    def _execute_inline(self, specs):
+        """Run node operations concurrently in this action.
+
+        At most 'inline_pool_size' operations are run at the same time, and
+        no more than 'max_actions_per_batch' are started consecutively. The
+        progress is recorded in the 'inline' entry of the action data, which
+        is saved as each operation completes. A node action is recorded for
+        each failed operation only.
+
+        Once cancelled or timed out, the action stops starting operations
+        and returns without waiting, as it does with node actions. The
+        operations in progress complete in the background and still record
+        their progress and failures.
+
+        :param specs: A list of (target, action, kwargs) tuples, one for each
+                      node operation.
+        :returns: A tuple containing the result and the corresponding reason.
+        """
+        batch_size = cfg.CONF.max_actions_per_batch
+        pool_size = cfg.CONF.inline_pool_size
+        if batch_size > 0:
+            pool_size = min(pool_size, batch_size)
+        pool_size = max(pool_size, 1)
+        pool = eventlet.GreenPool(pool_size)
+
+        record = {'total': len(specs), 'succeeded': 0, 'failed': {}}
+        self.data['inline'] = record
+        self._store_data()
+        failures = []
+        state = {'waiting': True, 'running': 0}
+
+        def _run(target, action_name, kwargs):
+            res, reason = self._run_node_operation(target, action_name,
+                                                   kwargs)
+            state['running'] -= 1
+            if res == self.RES_OK:
+                record['succeeded'] += 1
+            else:
+                record['failed'][target] = reason
+                failure = (target, action_name, kwargs, reason)
+                if state['waiting']:
+                    failures.append(failure)
+                else:
+                    self._record_failures([failure])
+            self._store_data()
+            scheduler.wakeup(self.id)
+
+        # Register for wakeups before starting any operation so that the
+        # operations completing early are not missed
+        scheduler.add_waiter(self.id)
+        try:
+            started = 0
+            stopped = None
+            for (target, action_name, kwargs) in specs:
+                if batch_size > 0 and started == batch_size:
+                    self._sleep(cfg.CONF.batch_interval)
+                    started = 0
+
+                stopped = self._wait_inline(state, pool_size - 1)
+                if stopped:
+                    break
+
+                state['running'] += 1
+                pool.spawn_n(_run, target, action_name, kwargs)
+                started += 1
+            else:
+                stopped = self._wait_inline(state, 0)
+        finally:
+            scheduler.remove_waiter(self.id)
+            state['waiting'] = False
+
+        if stopped:
+            result, reason = stopped
+        else:
+            result = self.RES_OK
+            reason = 'All dependents ended with success'
+
+        if failures:
+            self._record_failures(failures)
+            if result == self.RES_OK:
+                result = self.RES_ERROR
+                reason = _('%(action)s [%(id)s] failed') % {
+                    'action': self.action, 'id': self.id[:8]}
+
+        LOG.debug(reason)
+        return result, reason
+
+    def _run_children(self, specs):
+        """Perform node operations and wait for them to complete.
+
+        :param specs: A list of (target, action, kwargs) tuples, one for each
+                      node operation.
+        :returns: A tuple containing the result and the corresponding reason.
+        """
+        # Derived node actions never run policy checks, so nothing is lost
+        # when the node operations are not run as actions
+        if cfg.CONF.node_operation_mode == 'inline':
+            return self._execute_inline(specs)
+
+        self._start_children(specs)
+        return self._wait_for_dependents()
+
+    def _run_batches(self, specs):
+        """Perform node operations in the batches planned by a batch policy.
+
+        A batch is started as soon as enough operations of the previous
+        batches have completed for at most 'batch_size' of them to be in
+        progress, and no sooner than 'pause_time' seconds after the previous
+        batch was started. The timings of the batches are recorded in the
+        'batches' output. Node actions are always used for batches.
+
+        :param specs: A list of (target, action, kwargs) tuples, one for each
+                      node operation.
+        :returns: A tuple containing the result and the corresponding reason.
+        """
+        pd = self.data.get('batch', None)
+        if not pd:
+            return self._run_children(specs)
+
+        size = pd['batch_size']
+        pause_time = pd.get('pause_time', 0)
+
+        remaining = dict((spec[0], spec) for spec in specs)
+        batches = []
+        for node_ids in pd['plan']:
+            batch = [remaining.pop(n) for n in node_ids if n in remaining]
+            if batch:
+                batches.append(batch)
+        # Nodes that were not known when the plan was computed
+        rest = [spec for spec in specs if spec[0] in remaining]
+        batches.extend(rest[i:i + size] for i in range(0, len(rest), size))
+
+        timings = []
+        self.outputs['batches'] = timings
+        first_start = last_start = None
+        for batch in batches:
+            ready = base.wallclock()
+            if last_start is not None:
+                res, reason = self._wait_for_dependents(size - len(batch))
+                if res != self.RES_OK:
+                    return res, reason
+                self._sleep(max(last_start + pause_time - base.wallclock(),
+                                0))
+
+            last_start = base.wallclock()
+            if first_start is None:
+                first_start = last_start
+            self._start_children(batch)
+            timings.append({
+                'nodes': [spec[0] for spec in batch],
+                'start': round(last_start - first_start, 2),
+                'wait': round(last_start - ready, 2),
+            })
+
+        return self._wait_for_dependents()
 
     def _create_nodes(self, count):
         """Utility method for node creation.
@@ -122,10 +435,12 @@ class ClusterAction(base.Action):
 
         placement = self.data.get('placement', None)
 
+        # Reserve a block of consecutive indexes for the new nodes
+        first = co.Cluster.get_next_index(self.context, self.cluster.id,
+                                          count)
         nodes = []
-        child = []
         for m in range(count):
-            index = co.Cluster.get_next_index(self.context, self.cluster.id)
+            index = first + m
             kwargs = {
                 'index': index,
                 'metadata': {},
@@ -138,46 +453,30 @@ class ClusterAction(base.Action):
                 kwargs['data'] = {'placement': placement['placements'][m]}
 
             name = 'node-%s-%003d' % (self.cluster.id[:8], index)
+            # The runtime data is loaded when the nodes are stored
             node = node_mod.Node(name, self.cluster.profile_id,
-                                 self.cluster.id, context=self.context,
-                                 **kwargs)
-
-            node.store(self.context)
+                                 self.cluster.id, **kwargs)
             nodes.append(node)
 
-            kwargs = {
-                'name': 'node_create_%s' % node.id[:8],
-                'cause': base.CAUSE_DERIVED,
-            }
+        node_mod.Node.store_all(self.context, nodes)
 
-            action_id = base.Action.create(self.context, node.id,
-                                           consts.NODE_CREATE, **kwargs)
-            child.append(action_id)
-
-        if child:
-            # Build dependency and make the new action ready
-            dobj.Dependency.create(self.context, [a for a in child], self.id)
-            for cid in child:
-                ao.Action.update(self.context, cid,
-                                 {'status': base.Action.READY})
-            dispatcher.start_action()
-
-            # Wait for cluster creation to complete
-            res, reason = self._wait_for_dependents()
-            if res == self.RES_OK:
-                nodes_added = [n.id for n in nodes]
-                self.outputs['nodes_added'] = nodes_added
-                creation = self.data.get('creation', {})
-                creation['nodes'] = nodes_added
-                self.data['creation'] = creation
-                for node in nodes:
-                    self.cluster.add_node(node)
-            else:
-                reason = _('Failed in creating nodes.')
-
-            return res, reason
+        specs = [(node.id, consts.NODE_CREATE,
+                  {'name': 'node_create_%s' % node.id[:8]})
+                 for node in nodes]
+        # Wait for cluster creation to complete
+        res, reason = self._run_children(specs)
+        if res == self.RES_OK:
+            nodes_added = [n.id for n in nodes]
+            self.outputs['nodes_added'] = nodes_added
+            creation = self.data.get('creation', {})
+            creation['nodes'] = nodes_added
+            self.data['creation'] = creation
+            for node in nodes:
+                self.cluster.add_node(node)
+        else:
+            reason = _('Failed in creating nodes.')
 
-        return self.RES_OK, ''
+        return res, reason
 
     def do_create(self):
         """Handler for CLUSTER_CREATE action.
@@ -233,27 +532,18 @@ class ClusterAction(base.Action):
 
         fmt = _LI("Updating cluster '%(cluster)s': profile='%(profile)s'.")
         LOG.info(fmt, {'cluster': self.cluster.id, 'profile': profile_id})
-        child = []
+        specs = []
         for node in self.cluster.nodes:
             kwargs = {
                 'name': 'node_update_%s' % node.id[:8],
-                'cause': base.CAUSE_DERIVED,
                 'inputs': {
                     'new_profile_id': profile_id,
                 },
             }
-            action_id = base.Action.create(self.context, node.id,
-                                           consts.NODE_UPDATE, **kwargs)
-            child.append(action_id)
-
-        if child:
-            dobj.Dependency.create(self.context, [c for c in child], self.id)
-            for cid in child:
-                ao.Action.update(self.context, cid,
-                                 {'status': base.Action.READY})
-            dispatcher.start_action()
+            specs.append((node.id, consts.NODE_UPDATE, kwargs))
 
-            result, new_reason = self._wait_for_dependents()
+        if specs:
+            result, new_reason = self._run_batches(specs)
             if result != self.RES_OK:
                 self.cluster.eval_status(self.context, 'update')
                 return result, _('Failed in updating nodes.')
@@ -273,25 +563,12 @@ class ClusterAction(base.Action):
             if not destroy:
                 action_name = consts.NODE_LEAVE
 
-        child = []
-        for node_id in node_ids:
-            kwargs = {
-                'name': 'node_delete_%s' % node_id[:8],
-                'cause': base.CAUSE_DERIVED,
-            }
-            action_id = base.Action.create(self.context, node_id, action_name,
-                                           **kwargs)
-            child.append(action_id)
-
-        if child:
-            dobj.Dependency.create(self.context, [c for c in child], self.id)
-            for cid in child:
-                # Build dependency and make the new action ready
-                ao.Action.update(self.context, cid,
-                                 {'status': base.Action.READY})
-            dispatcher.start_action()
-
-            res, reason = self._wait_for_dependents()
+        specs = [(node_id, action_name,
+                  {'name': 'node_delete_%s' % node_id[:8]})
+                 for node_id in node_ids]
+
+        if specs:
+            res, reason = self._run_batches(specs)
             if res == self.RES_OK:
                 self.outputs['nodes_removed'] = node_ids
                 for node_id in node_ids:
@@ -363,24 +640,17 @@ class ClusterAction(base.Action):
 
         reason = _('Completed adding nodes.')
         current = no.Node.count_by_cluster(self.context, self.target)
-        child = []
+        specs = []
         for node in nodes:
             nid = node.id
             kwargs = {
                 'name': 'node_join_%s' % nid[:8],
-                'cause': base.CAUSE_DERIVED,
                 'inputs': {'cluster_id': self.target},
             }
-            action_id = base.Action.create(self.context, nid, consts.NODE_JOIN,
-                                           **kwargs)
-            child.append(action_id)
+            specs.append((nid, consts.NODE_JOIN, kwargs))
 
-        if child:
-            dobj.Dependency.create(self.context, [c for c in child], self.id)
-            for cid in child:
-                ao.Action.update(self.context, cid,
-                                 {'status': base.Action.READY})
-            dispatcher.start_action()
+        if specs:
+            self._start_children(specs)
 
         # Wait for dependent action if any
         result, new_reason = self._wait_for_dependents()
@@ -507,38 +777,29 @@ class ClusterAction(base.Action):
         result = self.RES_OK
         reason = _('Completed replacing nodes.')
 
-        children = []
+        specs = []
+        dependencies = []
         for (original, replacement) in node_dict.items():
-            kwargs = {
-                'cause': base.CAUSE_DERIVED,
-            }
+            leave_id = uuidutils.generate_uuid()
+            join_id = uuidutils.generate_uuid()
 
             # node_leave action
-            kwargs['name'] = 'node_leave_%s' % original[:8]
-            leave_action_id = base.Action.create(self.context, original,
-                                                 consts.NODE_LEAVE, **kwargs)
+            specs.append((original, consts.NODE_LEAVE, {
+                'id': leave_id,
+                'name': 'node_leave_%s' % original[:8],
+            }))
             # node_join action
-            kwargs['name'] = 'node_join_%s' % replacement[:8]
-            kwargs['inputs'] = {'cluster_id': self.target}
-            join_action_id = base.Action.create(self.context, replacement,
-                                                consts.NODE_JOIN, **kwargs)
-
-            children.append((join_action_id, leave_action_id))
-
-        if children:
-            dobj.Dependency.create(self.context, [c[0] for c in children],
-                                   self.id)
-            for child in children:
-                join_id = child[0]
-                leave_id = child[1]
-                ao.Action.update(self.context, join_id,
-                                 {'status': base.Action.READY})
+            specs.append((replacement, consts.NODE_JOIN, {
+                'id': join_id,
+                'name': 'node_join_%s' % replacement[:8],
+                'inputs': {'cluster_id': self.target},
+            }))
 
-                dobj.Dependency.create(self.context, [join_id], leave_id)
-                ao.Action.update(self.context, leave_id,
-                                 {'status': base.Action.READY})
+            dependencies.append((join_id, self.id))
+            dependencies.append((join_id, leave_id))
 
-                dispatcher.start_action()
+        if specs:
+            self._start_children(specs, dependencies)
 
             result, new_reason = self._wait_for_dependents()
             if result != self.RES_OK:
@@ -558,27 +819,15 @@ class ClusterAction(base.Action):
         """
         self.cluster.do_check(self.context)
 
-        child = []
         res = self.RES_OK
         reason = _('Cluster checking completed.')
-        for node in self.cluster.nodes:
-            node_id = node.id
-            action_id = base.Action.create(
-                self.context, node_id, consts.NODE_CHECK,
-                name='node_check_%s' % node_id[:8],
-                cause=base.CAUSE_DERIVED,
-            )
-            child.append(action_id)
-
-        if child:
-            dobj.Dependency.create(self.context, [c for c in child], self.id)
-            for cid in child:
-                ao.Action.update(self.context, cid,
-                                 {'status': base.Action.READY})
-            dispatcher.start_action()
+        specs = [(node.id, consts.NODE_CHECK,
+                  {'name': 'node_check_%s' % node.id[:8]})
+                 for node in self.cluster.nodes]
 
+        if specs:
             # Wait for dependent action if any
-            res, new_reason = self._wait_for_dependents()
+            res, new_reason = self._run_children(specs)
             if res != self.RES_OK:
                 reason = new_reason
 
@@ -603,29 +852,21 @@ class ClusterAction(base.Action):
             if fencing is not None and 'COMPUTE' in fencing:
                 inputs['force'] = True
 
-        children = []
+        specs = []
         for node in self.cluster.nodes:
             if node.status == 'ACTIVE':
                 continue
             node_id = node.id
-            action_id = base.Action.create(
-                self.context, node_id, consts.NODE_RECOVER,
-                name='node_recover_%s' % node_id[:8],
-                cause=base.CAUSE_DERIVED, inputs=inputs,
-            )
-            children.append(action_id)
+            specs.append((node_id, consts.NODE_RECOVER, {
+                'name': 'node_recover_%s' % node_id[:8],
+                'inputs': inputs,
+            }))
 
         res = self.RES_OK
         reason = _('Cluster recovery succeeded.')
-        if children:
-            dobj.Dependency.create(self.context, [c for c in children],
-                                   self.id)
-            for cid in children:
-                ao.Action.update(self.context, cid, {'status': 'READY'})
-            dispatcher.start_action()
-
+        if specs:
             # Wait for dependent action if any
-            res, new_reason = self._wait_for_dependents()
+            res, new_reason = self._run_children(specs)
             if res != self.RES_OK:
                 reason = new_reason
 
@@ -14,6 +14,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import timeutils
 
+from senlin.common import cache
 from senlin.common import consts
 from senlin.common import exception
 from senlin.common.i18n import _
@@ -23,6 +24,8 @@ from senlin.engine import cluster_policy as cpm
 from senlin.engine import node as node_mod
 from senlin.objects import cluster as co
 from senlin.objects import cluster_policy as cpo
+from senlin.objects import node as no
+from senlin.objects import profile as po
 from senlin.policies import base as pcb
 from senlin.profiles import base as pfb
 
@@ -82,33 +85,48 @@ class Cluster(object):
         self.metadata = kwargs.get('metadata') or {}
         self.dependents = kwargs.get('dependents') or {}
 
-        # rt is a dict for runtime data
-        self.rt = {
-            'profile': None,
-            'nodes': [],
-            'policies': []
-        }
+        # rt is a dict for runtime data, which are loaded from database only
+        # when they are accessed
+        self._context = context
+        self.rt = utils.LazyDict({
+            'profile': self._load_profile,
+            'nodes': self._load_nodes,
+            'policies': self._load_policies,
+        })
 
-        if context is not None:
-            self._load_runtime_data(context)
+        # projection is a dict of node IDs, policy IDs and profile name, for
+        # read-only clusters loaded without runtime data
+        self.projection = None
 
-    def _load_runtime_data(self, context):
-        if self.id is None:
-            return
+    def _load_profile(self):
+        if self._context is None or self.id is None:
+            return None
 
-        policies = []
-        bindings = cpo.ClusterPolicy.get_all(context, self.id)
-        for b in bindings:
-            # Detect policy type conflicts
-            policy = pcb.Policy.load(context, b.policy_id)
-            policies.append(policy)
-
-        self.rt = {
-            'profile': pfb.Profile.load(context, profile_id=self.profile_id,
-                                        project_safe=False),
-            'nodes': node_mod.Node.load_all(context, cluster_id=self.id),
-            'policies': policies
-        }
+        return pfb.Profile.load(self._context, profile_id=self.profile_id,
+                                project_safe=False)
+
+    def _load_nodes(self):
+        if self._context is None or self.id is None:
+            return []
+
+        return node_mod.Node.load_all(self._context, cluster_id=self.id)
+
+    def _load_policies(self):
+        if self._context is None or self.id is None:
+            return []
+
+        bindings = cpo.ClusterPolicy.get_all(self._context, self.id)
+        return [pcb.Policy.load(self._context, b.policy_id) for b in bindings]
+
+    def refresh(self, context=None):
+        """Discard the runtime data so they are reloaded when next accessed.
+
+        :param context: An optional context used for loading the runtime data
+                        from now on.
+        """
+        if context is not None:
+            self._context = context
+        self.rt.clear()
 
     def store(self, context):
         '''Store the cluster in database and return its ID.
@@ -147,15 +165,43 @@ class Cluster(object):
             cluster = co.Cluster.create(context, values)
             self.id = cluster.id
 
-        self._load_runtime_data(context)
+        self.refresh(context)
         return self.id
 
     @classmethod
-    def _from_object(cls, context, obj):
+    def _load_projections(cls, context, clusters):
+        """Load the node IDs, policy IDs and profile names of clusters.
+
+        The data are retrieved with three queries no matter how many clusters
+        and nodes there are, without constructing any node, policy or profile
+        objects.
+
+        :param context: the context used for DB operations;
+        :param clusters: a list of clusters loaded without runtime data;
+        """
+        if not clusters:
+            return
+
+        cluster_ids = [c.id for c in clusters]
+        nodes = no.Node.ids_by_cluster(context, cluster_ids)
+        policies = cpo.ClusterPolicy.ids_by_cluster(context, cluster_ids)
+        profiles = po.Profile.get_names(
+            context, list(set(c.profile_id for c in clusters)))
+
+        for cluster in clusters:
+            cluster.projection = {
+                'nodes': nodes.get(cluster.id, []),
+                'policies': policies.get(cluster.id, []),
+                'profile_name': profiles.get(cluster.profile_id),
+            }
+
+    @classmethod
+    def _from_object(cls, context, obj, projection=False):
         """Construct a cluster from database object.
 
         :param context: the context used for DB operations;
         :param obj: a DB cluster object that will receive all fields;
+        :param projection: whether to skip loading the runtime data;
         """
         kwargs = {
             'id': obj.id,
@@ -177,30 +223,49 @@ class Cluster(object):
         }
 
         return cls(obj.name, obj.desired_capacity, obj.profile_id,
-                   context=context, **kwargs)
+                   context=None if projection else context, **kwargs)
 
     @classmethod
-    def load(cls, context, cluster_id=None, dbcluster=None, project_safe=True):
-        '''Retrieve a cluster from database.'''
+    def load(cls, context, cluster_id=None, dbcluster=None, project_safe=True,
+             projection=False):
+        '''Retrieve a cluster from database.
+
+        A cluster loaded with projection set to True is read-only. It has
+        no runtime data but only what is needed by `to_dict`.
+        '''
         if dbcluster is None:
             dbcluster = co.Cluster.get(context, cluster_id,
                                        project_safe=project_safe)
             if dbcluster is None:
                 raise exception.ResourceNotFound(type='cluster', id=cluster_id)
 
-        return cls._from_object(context, dbcluster)
+        if not projection:
+            return cls._from_object(context, dbcluster)
+
+        cluster = cls._from_object(context, dbcluster, projection=True)
+        cls._load_projections(context, [cluster])
+        return cluster
 
     @classmethod
     def load_all(cls, context, limit=None, marker=None, sort=None,
-                 filters=None, project_safe=True):
-        """Retrieve all clusters from database."""
+                 filters=None, project_safe=True, projection=False):
+        """Retrieve all clusters from database.
+
+        See `load` for the meaning of projection.
+        """
 
         objs = co.Cluster.get_all(context, limit=limit, marker=marker,
                                   sort=sort, filters=filters,
                                   project_safe=project_safe)
 
-        for obj in objs:
-            cluster = cls._from_object(context, obj)
+        if projection:
+            clusters = [cls._from_object(context, obj, projection=True)
+                        for obj in objs]
+            cls._load_projections(context, clusters)
+        else:
+            clusters = (cls._from_object(context, obj) for obj in objs)
+
+        for cluster in clusters:
             yield cluster
 
     def to_dict(self):
@@ -226,7 +291,9 @@ class Cluster(object):
             'nodes': [node.id for node in self.rt['nodes']],
             'policies': [policy.id for policy in self.rt['policies']],
         }
-        if self.rt['profile']:
+        if self.projection is not None:
+            info.update(self.projection)
+        elif self.rt['profile']:
             info['profile_name'] = self.rt['profile'].name
         else:
             info['profile_name'] = None
@@ -298,6 +365,7 @@ class Cluster(object):
         """Additional logic at the end of cluster deletion process."""
 
         co.Cluster.delete(context, self.id)
+        cache.placements.invalidate(self.id)
         return True
 
     def do_update(self, context, **kwargs):
@@ -434,21 +502,36 @@ class Cluster(object):
     def nodes(self):
         return self.rt['nodes']
 
+    def _nodes_loaded(self):
+        # The nodes are loaded already or there is nothing to load them from
+        return ('nodes' in self.rt or self._context is None or
+                self.id is None)
+
     def add_node(self, node):
         """Append specified node to the cluster cache.
 
         :param node: The node to become a new member of the cluster.
         """
-        self.rt['nodes'].append(node)
+        # The nodes not loaded yet will include the node when they are, the
+        # nodes loaded after the node joined the cluster include it already
+        if self._nodes_loaded():
+            node_ids = set(n.id for n in self.rt['nodes'])
+            if node.id not in node_ids:
+                self.rt['nodes'].append(node)
+        if self.id:
+            cache.placements.add(self.id, node.id,
+                                 node.data.get('placement') or {})
 
     def remove_node(self, node_id):
         """Remove node with specified ID from cache.
 
         :param node_id: ID of the node to be removed from cache.
         """
-        for node in self.rt['nodes']:
-            if node.id == node_id:
-                self.rt['nodes'].remove(node)
+        if self._nodes_loaded():
+            self.rt['nodes'] = [n for n in self.rt['nodes']
+                                if n.id != node_id]
+        if self.id:
+            cache.placements.remove(self.id, node_id)
 
     @property
     def policies(self):
@@ -460,40 +543,49 @@ class Cluster(object):
         :param regions: list of region names to check.
         :return: a dict containing region and number as key value pairs.
         """
-        dist = dict.fromkeys(regions, 0)
-
-        for node in self.nodes:
-            placement = node.data.get('placement', {})
-            if placement:
-                region = placement.get('region_name', None)
-                if region and region in regions:
-                    dist[region] += 1
-
-        return dist
+        counts, _unplaced = cache.placements.count(self.id, self.nodes,
+                                                   'region_name')
+        return dict((r, counts.get(r, 0)) for r in regions)
 
     def get_zone_distribution(self, ctx, zones):
         """Get node distribution regarding the given the availability zones.
 
         The availability zone information is only available for some profiles.
+        The zones of nodes without placement data are retrieved from the
+        backend once and remembered along with the placement of other nodes.
 
         :param ctx: context used to access node details.
         :param zones: list of zone names to check.
         :returns: a dict containing zone and number as key-value pairs.
         """
-        dist = dict.fromkeys(zones, 0)
+        counts, unplaced = cache.placements.count(self.id, self.nodes,
+                                                  'zone')
+        dist = dict((z, counts.get(z, 0)) for z in zones)
+
+        details = node_mod.Node.get_details_many(ctx, unplaced)
+        for node in unplaced:
+            zname = details.get(node.id, {}).get(
+                'OS-EXT-AZ:availability_zone', None)
+            if zname and self.id:
+                cache.placements.add(self.id, node.id, {'zone': zname})
+            if zname and zname in dist:
+                dist[zname] += 1
 
+        return dist
+
+    def nodes_by_placement(self, key):
+        """Group the nodes by a placement value.
+
+        :param key: The placement key to group nodes by, e.g. 'zone'.
+        :return: A dict containing the list of nodes by value of the key.
+                 Nodes without such a placement value are not included.
+        """
+        result = {}
         for node in self.nodes:
             placement = node.data.get('placement', {})
-            if placement and 'zone' in placement:
-                zone = placement['zone']
-                dist[zone] += 1
-            else:
-                details = node.get_details(ctx)
-                zname = details.get('OS-EXT-AZ:availability_zone', None)
-                if zname and zname in dist:
-                    dist[zname] += 1
-
-        return dist
+            if placement and key in placement:
+                result.setdefault(placement[key], []).append(node)
+        return result
 
     def nodes_by_region(self, region):
         """Get list of nodes that belong to the specified region.
@@ -501,13 +593,7 @@ class Cluster(object):
         :param region: Name of region for filtering.
         :return: A list of nodes that are from the specified region.
         """
-        result = []
-        for node in self.nodes:
-            placement = node.data.get('placement', {})
-            if placement and 'region_name' in placement:
-                if region == placement['region_name']:
-                    result.append(node)
-        return result
+        return self.nodes_by_placement('region_name').get(region, [])
 
     def nodes_by_zone(self, zone):
         """Get list of nodes that reside in the specified availability zone.
@@ -516,13 +602,7 @@ class Cluster(object):
         :return: A list of nodes that reside in the specified AZ.
         """
         # TODO(anyone): Improve this to do a forced refresh via get_details?
-        result = []
-        for node in self.nodes:
-            placement = node.data.get('placement', {})
-            if placement and 'zone' in placement:
-                if zone == placement['zone']:
-                    result.append(node)
-        return result
+        return self.nodes_by_placement('zone').get(zone, [])
 
     def eval_status(self, ctx, operation, **params):
         """Re-evaluate cluster's health status.
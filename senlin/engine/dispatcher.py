@@ -10,21 +10,28 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import itertools
+
+import eventlet
+from oslo_config import cfg
 from oslo_context import context as oslo_context
 from oslo_log import log as logging
 import oslo_messaging
 from oslo_service import service
 
 from senlin.common import consts
+from senlin.common import hash_ring
 from senlin.common.i18n import _LI
+from senlin.common import membership
 from senlin.common import messaging as rpc_messaging
 
 LOG = logging.getLogger(__name__)
 
 OPERATIONS = (
-    START_ACTION, CANCEL_ACTION, STOP
+    START_ACTION, CANCEL_ACTION, WAKEUP_ACTION, WAIT_LOCK, WAKEUP_LOCK, STOP
 ) = (
-    'start_action', 'cancel_action', 'stop'
+    'start_action', 'cancel_action', 'wakeup_action', 'wait_lock',
+    'wakeup_lock', 'stop'
 )
 
 
@@ -67,6 +74,22 @@ class Dispatcher(service.Service):
         '''Resume an action.'''
         self.TG.resume_action(action_id)
 
+    def wakeup_action(self, ctxt, action_id, depended=None):
+        '''Wake up an action waiting for its dependents.
+
+        :param depended: ID of the dependent that succeeded, or None if the
+                         action has to check its status from the database.
+        '''
+        self.TG.wakeup_action(action_id, depended)
+
+    def wait_lock(self, ctxt, key, engine_id):
+        '''Register interest of another engine in a lock held here.'''
+        self.TG.add_remote_lock_waiter(key, engine_id)
+
+    def wakeup_lock(self, ctxt, key):
+        '''Wake up actions waiting for a lock that has been released.'''
+        self.TG.wakeup_lock(key)
+
     def stop(self):
         super(Dispatcher, self).stop()
         # Wait for all action threads to be finished
@@ -77,6 +100,137 @@ class Dispatcher(service.Service):
         LOG.info(_LI("All action threads have been finished"))
 
 
+class DispatchStrategy(object):
+    """Base class of the strategies choosing the engine to start actions.
+
+    The strategies other than fanout choose among the live engines of the
+    membership view, refreshed each time the engine reports.
+    """
+
+    def __init__(self):
+        self._services = []
+        self._version = None
+
+    def _refresh(self, services):
+        """Update the state of the strategy after reading the engines."""
+        pass
+
+    def _get_services(self):
+        """Get the live engines, sorted by ID."""
+        services = membership.view.get_engines()
+        if membership.view.version != self._version:
+            self._services = services
+            self._version = membership.view.version
+            self._refresh(self._services)
+        return self._services
+
+    def select(self, cluster_id=None):
+        """Choose the engine to notify.
+
+        :param cluster_id: ID of the cluster the actions are for, if known.
+        :returns: The ID of the engine, or None to notify all the engines.
+        """
+        raise NotImplementedError
+
+
+class FanoutStrategy(DispatchStrategy):
+    """Notify all the engines."""
+
+    def select(self, cluster_id=None):
+        return None
+
+
+class RoundRobinStrategy(DispatchStrategy):
+    """Notify the live engines in turn."""
+
+    def __init__(self):
+        super(RoundRobinStrategy, self).__init__()
+        self._counter = itertools.count()
+
+    def select(self, cluster_id=None):
+        services = self._get_services()
+        if not services:
+            return None
+        return services[next(self._counter) % len(services)].id
+
+
+class LeastLoadedStrategy(DispatchStrategy):
+    """Notify the engine running the fewest actions.
+
+    The number of actions last reported by each engine is increased by the
+    notifications sent to it since then, so that the notifications are not
+    all sent to the same engine between two reports.
+    """
+
+    def __init__(self):
+        super(LeastLoadedStrategy, self).__init__()
+        self._loads = {}
+
+    def _refresh(self, services):
+        self._loads = dict((svc.id, svc.workers or 0) for svc in services)
+
+    def select(self, cluster_id=None):
+        services = self._get_services()
+        if not services:
+            return None
+        engine_id = min(services, key=lambda svc: self._loads[svc.id]).id
+        self._loads[engine_id] += 1
+        return engine_id
+
+
+class ClusterHashStrategy(RoundRobinStrategy):
+    """Notify the engine the cluster of the actions hashes to.
+
+    The actions of a cluster are then mostly run by the same engine, which
+    keeps the waits for the locks of the cluster and of its nodes local.
+    Actions not known to be for a cluster are dispatched in turn.
+    """
+
+    def __init__(self):
+        super(ClusterHashStrategy, self).__init__()
+        self._ring = hash_ring.HashRing([])
+
+    def _refresh(self, services):
+        self._ring = hash_ring.HashRing(svc.id for svc in services)
+
+    def select(self, cluster_id=None):
+        if cluster_id is None:
+            return super(ClusterHashStrategy, self).select()
+        self._get_services()
+        return self._ring.get_member(cluster_id)
+
+
+STRATEGIES = {
+    'fanout': FanoutStrategy,
+    'round_robin': RoundRobinStrategy,
+    'least_loaded': LeastLoadedStrategy,
+    'cluster_hash': ClusterHashStrategy,
+}
+
+# The strategy in use, by name
+_strategy = {}
+
+# Notifications to start actions waiting to be sent, by engine ID
+_pending = {}
+
+dispatch_stats = {
+    'requests': 0,
+    'coalesced': 0,
+    'targeted': 0,
+}
+
+
+def get_strategy():
+    """Get the dispatch strategy configured."""
+    name = cfg.CONF.dispatch_strategy
+    strategy = _strategy.get(name)
+    if strategy is None:
+        _strategy.clear()
+        strategy = STRATEGIES[name]()
+        _strategy[name] = strategy
+    return strategy
+
+
 def notify(method, engine_id=None, **kwargs):
     '''Send notification to dispatcher
 
@@ -84,7 +238,8 @@ def notify(method, engine_id=None, **kwargs):
     :param engine_id: dispatcher to notify; None implies broadcast
     '''
 
-    client = rpc_messaging.get_rpc_client(version=consts.RPC_API_VERSION)
+    client = rpc_messaging.get_cached_rpc_client(
+        version=consts.RPC_API_VERSION)
 
     if engine_id:
         # Notify specific dispatcher identified by engine_id
@@ -109,5 +264,50 @@ def notify(method, engine_id=None, **kwargs):
         return False
 
 
-def start_action(engine_id=None, **kwargs):
-    return notify(START_ACTION, engine_id, **kwargs)
+def _send_pending(engine_id):
+    _pending.pop(engine_id, None)
+    notify(START_ACTION, engine_id)
+
+
+def start_action(engine_id=None, cluster_id=None, **kwargs):
+    '''Notify the dispatchers to start actions.
+
+    Without an engine ID or an action ID, the engine to notify is chosen by
+    the dispatch strategy configured. The notifications sent to the same
+    engine within the dispatch_coalesce_window are merged into one, sent at
+    the end of the window, as an engine notified starts all the actions
+    ready by then.
+
+    :param engine_id: dispatcher to notify.
+    :param cluster_id: ID of the cluster the actions are for, if known.
+    '''
+    if engine_id is not None or kwargs:
+        return notify(START_ACTION, engine_id, **kwargs)
+
+    dispatch_stats['requests'] += 1
+    engine_id = get_strategy().select(cluster_id)
+    if engine_id is not None:
+        dispatch_stats['targeted'] += 1
+
+    window = cfg.CONF.dispatch_coalesce_window
+    if window <= 0:
+        return notify(START_ACTION, engine_id)
+
+    if engine_id in _pending:
+        dispatch_stats['coalesced'] += 1
+    else:
+        _pending[engine_id] = eventlet.spawn_after(window, _send_pending,
+                                                   engine_id)
+    return True
+
+
+def wakeup_action(engine_id, **kwargs):
+    return notify(WAKEUP_ACTION, engine_id, **kwargs)
+
+
+def wait_lock(engine_id, **kwargs):
+    return notify(WAIT_LOCK, engine_id, **kwargs)
+
+
+def wakeup_lock(engine_id, **kwargs):
+    return notify(WAKEUP_LOCK, engine_id, **kwargs)
@@ -10,15 +10,25 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import time
+
+import eventlet
+from eventlet import queue
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import reflection
 from oslo_utils import timeutils
 
+from senlin.common import context as senlin_context
 from senlin.common.i18n import _, _LC, _LE, _LW, _LI
+from senlin.common import messaging
 from senlin.objects import event as eo
 
 LOG = logging.getLogger(__name__)
 
+cfg.CONF.import_group('event', 'senlin.common.config')
+
 
 class Event(object):
     '''Class capturing an interesting happening in Senlin.'''
@@ -82,9 +92,9 @@ class Event(object):
             self.oname = ''
             self.otype = ''
 
-    def store(self, context):
-        '''Store the event into database and return its ID.'''
-        values = {
+    def to_dict(self):
+        '''Get the values of the event as stored into database.'''
+        return {
             'level': self.level,
             'timestamp': self.timestamp,
             'oid': self.oid,
@@ -99,19 +109,240 @@ class Event(object):
             'meta_data': self.metadata,
         }
 
-        event = eo.Event.create(context, values)
+    def store(self, context):
+        '''Store the event into database and return its ID.'''
+        event = eo.Event.create(context, self.to_dict())
         self.id = event.id
 
         return self.id
 
 
+class DatabaseSink(object):
+    '''Sink storing events into database.'''
+
+    def write(self, events):
+        ctx = senlin_context.get_admin_context()
+        ids = eo.Event.create_all(ctx, [e.to_dict() for e in events])
+        for event, event_id in zip(events, ids):
+            event.id = event_id
+
+
+class MessageSink(object):
+    '''Sink sending events as notifications.'''
+
+    def write(self, events):
+        notifier = messaging.get_notifier('senlin-engine')
+        ctx = senlin_context.get_admin_context()
+        for event in events:
+            payload = jsonutils.to_primitive(event.to_dict(),
+                                             convert_datetime=True)
+            notifier.info(ctx, 'senlin.event', payload)
+
+
+class FileSink(object):
+    '''Sink appending events to a JSON lines file.'''
+
+    def write(self, events):
+        path = cfg.CONF.event.log_file
+        if not path:
+            return
+
+        with open(path, 'a') as f:
+            for event in events:
+                f.write(jsonutils.dumps(event.to_dict()) + '\n')
+
+
+SINKS = {
+    'database': DatabaseSink,
+    'message': MessageSink,
+    'file': FileSink,
+}
+
+
+def load_sinks():
+    '''Create the event sinks configured.'''
+    sinks = []
+    for name in cfg.CONF.event.sinks:
+        sink_class = SINKS.get(name)
+        if sink_class is None:
+            LOG.warning(_LW('Unknown event sink "%s" ignored.'), name)
+            continue
+        sinks.append(sink_class())
+    return sinks
+
+
+def write(sinks, events):
+    '''Write events to sinks, ignoring failures of individual sinks.'''
+    for sink in sinks:
+        try:
+            sink.write(events)
+        except Exception as ex:
+            LOG.error(_LE('Failed in writing %(num)s events to sink '
+                          '%(sink)s: %(ex)s'),
+                      {'num': len(events),
+                       'sink': reflection.get_class_name(sink),
+                       'ex': ex})
+
+
+class EventWriter(object):
+    '''Writer of events to sinks in background.
+
+    Events are queued into a bounded queue and written to the sinks in
+    batches by a green thread, when either the batch size is reached or the
+    oldest event queued has been waiting for the flush interval.
+    '''
+
+    _STOP = object()
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.dropped = 0
+        self._dropped_logged = 0
+        self.written = 0
+        self.flush_time = 0
+        self._queue = queue.LightQueue(max(cfg.CONF.event.queue_size, 1))
+        self._thread = None
+
+    def start(self):
+        self._thread = eventlet.spawn(self._run)
+
+    def stop(self):
+        '''Write all events queued and stop the writer.'''
+        if self._thread is None:
+            return
+
+        self._queue.put(self._STOP)
+        self._thread.wait()
+        self._thread = None
+
+    def put(self, event):
+        '''Queue an event for writing.
+
+        :param event: The event to be queued.
+        :returns: True if the event is queued or False if it is dropped.
+        '''
+        if (self._queue.full() and event.level == logging.DEBUG and
+                cfg.CONF.event.overflow_policy == 'drop_debug'):
+            self.dropped += 1
+            return False
+
+        self._queue.put(event)
+        return True
+
+    def _get_batch(self):
+        '''Get a batch of events from the queue.
+
+        :returns: A tuple of a list of events and a flag which indicates
+                  whether the writer is being stopped.
+        '''
+        event = self._queue.get()
+        if event is self._STOP:
+            return [], True
+
+        batch = [event]
+        batch_size = cfg.CONF.event.batch_size
+        deadline = time.time() + cfg.CONF.event.flush_interval
+        while len(batch) < batch_size:
+            timeout = deadline - time.time()
+            try:
+                if timeout > 0:
+                    event = self._queue.get(timeout=timeout)
+                else:
+                    event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if event is self._STOP:
+                return batch, True
+            batch.append(event)
+
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._get_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, events):
+        start = time.time()
+        write(self.sinks, events)
+        self.flush_time = time.time() - start
+        self.written += len(events)
+
+        dropped = self.dropped - self._dropped_logged
+        if dropped:
+            self._dropped_logged = self.dropped
+            LOG.warning(_LW('%(num)s DEBUG events dropped as the event queue '
+                            'was full, %(total)s in total.'),
+                        {'num': dropped, 'total': self.dropped})
+
+    def stats(self):
+        '''Get statistics of the writer.
+
+        :returns: A dict containing the number of events queued, written and
+                  dropped, and the number of seconds the last flush took.
+        '''
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'flush_time': self.flush_time,
+        }
+
+
+_writer = None
+_sinks = None
+
+
+def start_writer():
+    '''Start writing events in background.
+
+    Events are written synchronously before this is called or when the
+    'queue_size' option is 0.
+    '''
+    global _writer
+    if _writer is not None or cfg.CONF.event.queue_size <= 0:
+        return
+
+    _writer = EventWriter(load_sinks())
+    _writer.start()
+
+
+def stop_writer():
+    '''Write all events queued and stop writing events in background.'''
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+
+def writer_stats():
+    '''Get statistics of the background writer, if it is running.'''
+    if _writer is None:
+        return None
+    return _writer.stats()
+
+
+def _emit(event):
+    global _sinks
+    if _writer is not None:
+        _writer.put(event)
+        return
+
+    if _sinks is None:
+        _sinks = load_sinks()
+    write(_sinks, [event])
+
+
 def critical(context, entity, action, status=None, status_reason=None,
              timestamp=None):
     timestamp = timestamp or timeutils.utcnow(True)
     event = Event(timestamp, logging.CRITICAL, entity,
                   action=action, status=status, status_reason=status_reason,
                   user=context.user, project=context.project)
-    event.store(context)
+    _emit(event)
     LOG.critical(_LC('%(name)s [%(id)s] - %(status)s: %(reason)s'),
                  {'name': event.oname,
                   'id': event.oid and event.oid[:8],
@@ -125,7 +356,7 @@ def error(context, entity, action, status=None, status_reason=None,
     event = Event(timestamp, logging.ERROR, entity,
                   action=action, status=status, status_reason=status_reason,
                   user=context.user, project=context.project)
-    event.store(context)
+    _emit(event)
     msg = _LE('%(name)s [%(id)s] %(action)s - %(status)s: %(reason)s')
     LOG.error(msg,
               {'name': event.oname,
@@ -141,7 +372,7 @@ def warning(context, entity, action, status=None, status_reason=None,
     event = Event(timestamp, logging.WARNING, entity,
                   action=action, status=status, status_reason=status_reason,
                   user=context.user, project=context.project)
-    event.store(context)
+    _emit(event)
     msg = _LW('%(name)s [%(id)s] %(action)s - %(status)s: %(reason)s')
     LOG.warning(msg,
                 {'name': event.oname,
@@ -157,7 +388,7 @@ def info(context, entity, action, status=None, status_reason=None,
     event = Event(timestamp, logging.INFO, entity,
                   action=action, status=status, status_reason=status_reason,
                   user=context.user, project=context.project)
-    event.store(context)
+    _emit(event)
     LOG.info(_LI('%(name)s [%(id)s] %(action)s - %(status)s: %(reason)s'),
              {'name': event.oname,
               'id': event.oid and event.oid[:8],
@@ -172,7 +403,7 @@ def debug(context, entity, action, status=None, status_reason=None,
     event = Event(timestamp, logging.DEBUG, entity,
                   action=action, status=status, status_reason=status_reason,
                   user=context.user, project=context.project)
-    event.store(context)
+    _emit(event)
     LOG.debug(_('%(name)s [%(id)s] %(action)s - %(status)s: %(reason)s'),
               {'name': event.oname,
                'id': event.oid and event.oid[:8],
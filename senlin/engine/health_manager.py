@@ -17,16 +17,25 @@ trigger corresponding actions to recover the clusters based on the pre-defined
 health policies.
 """
 
+import random
+import time
+
+from eventlet import semaphore
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
 from oslo_service import service
 from oslo_service import threadgroup
+from oslo_utils import timeutils
 
 from senlin.common import consts
 from senlin.common import context
-from senlin.common.i18n import _LI, _LW
+from senlin.common import hash_ring
+from senlin.common.i18n import _LE, _LI, _LW
+from senlin.common import membership
 from senlin.common import messaging as rpc
+from senlin.common import utils
+from senlin.engine import node as node_mod
 from senlin import objects
 from senlin.rpc import client as rpc_client
 
@@ -34,6 +43,13 @@ LOG = logging.getLogger(__name__)
 
 
 class NotificationEndpoint(object):
+    """Endpoint dispatching the compute notifications to the clusters.
+
+    A single endpoint is shared by all the clusters monitored by a health
+    manager. It finds the cluster an event is about by looking up the
+    cluster ID in the instance metadata, so the cost of an event doesn't
+    depend on the number of clusters monitored.
+    """
 
     VM_FAILURE_EVENTS = {
         'compute.instance.delete.end': 'DELETE',
@@ -44,61 +60,99 @@ class NotificationEndpoint(object):
         'compute.instance.soft_delete.end': 'SOFT_DELETE',
     }
 
-    def __init__(self, project_id, cluster_id):
+    def __init__(self):
         self.filter_rule = messaging.NotificationFilter(
             publisher_id='^compute.*',
-            event_type='^compute\.instance\..*',
-            context={'project_id': '^%s$' % project_id})
-        self.project_id = project_id
-        self.cluster_id = cluster_id
+            event_type='^compute\.instance\..*')
+        # Projects of the clusters monitored, by cluster ID
+        self.clusters = {}
         self.rpc = rpc_client.EngineClient()
 
+    def add_cluster(self, cluster_id, project_id):
+        """Start dispatching the events of a cluster.
+
+        :param cluster_id: The UUID of the cluster.
+        :param project_id: The project owning the cluster. Events raised by
+                           other projects are ignored.
+        :returns: Nothing.
+        """
+        self.clusters[cluster_id] = project_id
+
+    def remove_cluster(self, cluster_id):
+        """Stop dispatching the events of a cluster.
+
+        :param cluster_id: The UUID of the cluster.
+        :returns: Nothing.
+        """
+        self.clusters.pop(cluster_id, None)
+
+    def _get_project(self, ctxt, payload):
+        """Get the project of the monitored cluster an event is about.
+
+        :returns: The project ID, or None if the event is not about a
+                  monitored cluster.
+        """
+        meta = payload.get('metadata') or {}
+        project_id = self.clusters.get(meta.get('cluster_id'))
+        if project_id is None:
+            return None
+
+        if (ctxt or {}).get('project_id') != project_id:
+            return None
+
+        return project_id
+
     def info(self, ctxt, publisher_id, event_type, payload, metadata):
-        meta = payload['metadata']
-        if meta.get('cluster_id') == self.cluster_id:
-            if event_type not in self.VM_FAILURE_EVENTS:
-                return
-            params = {
-                'event': self.VM_FAILURE_EVENTS[event_type],
-                'state': payload.get('state', 'Unknown'),
-                'instance_id': payload.get('instance_id', 'Unknown'),
-                'timestamp': metadata['timestamp'],
-                'publisher': publisher_id,
-            }
-            node_id = meta.get('cluster_node_id')
-            if node_id:
-                LOG.info(_LI("Requesting node recovery: %s"), node_id)
-                ctx_value = context.get_service_context(
-                    project=self.project_id, user=payload['user_id'])
-                ctx = context.RequestContext(**ctx_value)
-                self.rpc.node_recover(ctx, node_id, params)
+        if event_type not in self.VM_FAILURE_EVENTS:
+            return
+
+        project_id = self._get_project(ctxt, payload)
+        if project_id is None:
+            return
+
+        params = {
+            'event': self.VM_FAILURE_EVENTS[event_type],
+            'state': payload.get('state', 'Unknown'),
+            'instance_id': payload.get('instance_id', 'Unknown'),
+            'timestamp': metadata['timestamp'],
+            'publisher': publisher_id,
+        }
+        node_id = payload['metadata'].get('cluster_node_id')
+        if node_id:
+            LOG.info(_LI("Requesting node recovery: %s"), node_id)
+            ctx_value = context.get_service_context(
+                project=project_id, user=payload['user_id'])
+            ctx = context.RequestContext(**ctx_value)
+            self.rpc.node_recover(ctx, node_id, params)
 
     def warn(self, ctxt, publisher_id, event_type, payload, metadata):
-        meta = payload.get('metadata', {})
-        if meta.get('cluster_id') == self.cluster_id:
+        if self._get_project(ctxt, payload) is not None:
             LOG.warning("publisher=%s" % publisher_id)
             LOG.warning("event_type=%s" % event_type)
 
     def debug(self, ctxt, publisher_id, event_type, payload, metadata):
-        meta = payload.get('metadata', {})
-        if meta.get('cluster_id') == self.cluster_id:
+        if self._get_project(ctxt, payload) is not None:
             LOG.debug("publisher=%s" % publisher_id)
             LOG.debug("event_type=%s" % event_type)
 
 
-def ListenerProc(exchange, project_id, cluster_id):
+def ListenerProc(exchange, endpoint):
+    """Start listening to the notifications of an exchange.
+
+    :param exchange: The exchange to listen to.
+    :param endpoint: The endpoint to dispatch the notifications to.
+    :returns: The notification listener started.
+    """
     transport = messaging.get_notification_transport(cfg.CONF)
     targets = [
         messaging.Target(topic='versioned_notifications', exchange=exchange),
     ]
-    endpoints = [
-        NotificationEndpoint(project_id, cluster_id),
-    ]
     listener = messaging.get_notification_listener(
-        transport, targets, endpoints, executor='threading',
+        transport, targets, [endpoint], executor='threading',
         pool="senlin-listeners")
 
     listener.start()
+    return listener
 
 
 class HealthManager(service.Service):
@@ -107,6 +161,7 @@ class HealthManager(service.Service):
         super(HealthManager, self).__init__()
 
         self.TG = threadgroup.ThreadGroup()
+        self._rebalance_lock = semaphore.Semaphore()
         self.engine_id = engine_service.engine_id
         self.topic = topic
         self.version = version
@@ -114,6 +169,20 @@ class HealthManager(service.Service):
         self.rpc_client = rpc_client.EngineClient()
         self.rt = {
             'registries': [],
+            # Notification endpoints and listeners shared by the clusters
+            # monitored, by exchange
+            'endpoints': {},
+            'listeners': {},
+            # IDs of the nodes found unhealthy whose recovery is requested
+            # but not started yet, by cluster ID
+            'unhealthy': {},
+        }
+        self.poll_stats = {
+            'ticks': 0,
+            'nodes': 0,
+            'recoveries': 0,
+            'failures': 0,
+            'time': 0.0,
         }
 
     def _dummy_task(self):
@@ -127,24 +196,113 @@ class HealthManager(service.Service):
     def _poll_cluster(self, cluster_id):
         """Routine to be executed for polling cluster status.
 
+        The physical status of the nodes is checked with bulk queries at the
+        profile level, without creating any action. A node recovery is
+        requested only for the active nodes found unhealthy for the first
+        time, so nothing is written as long as the nodes are healthy.
+
         :param cluster_id: The UUID of the cluster to be checked.
         :returns: Nothing.
         """
-        self.rpc_client.cluster_check(self.ctx, cluster_id)
+        start = time.time()
+        try:
+            nodes = node_mod.Node.load_all(self.ctx, cluster_id=cluster_id,
+                                           project_safe=False)
+            results = node_mod.Node.check_many(self.ctx, nodes)
+
+            pending = self.rt['unhealthy'].get(cluster_id, set())
+            unhealthy = set()
+            for node in nodes:
+                # Nodes being created, recovered, etc. are left alone
+                if (node.status != node_mod.Node.ACTIVE or
+                        results.get(node.id) is not False):
+                    continue
+                unhealthy.add(node.id)
+                if node.id not in pending:
+                    self._recover_node(node)
+        except Exception as ex:
+            LOG.error(_LE('Failed in polling cluster %(c)s: %(ex)s'),
+                      {'c': cluster_id, 'ex': ex})
+            self.poll_stats['failures'] += 1
+            return
+        finally:
+            self.poll_stats['ticks'] += 1
+            self.poll_stats['time'] += time.time() - start
+
+        self.poll_stats['nodes'] += len(nodes)
+        LOG.debug('Polled %(n)s nodes of cluster %(c)s in %(t).3f seconds, '
+                  '%(u)s unhealthy', {'n': len(nodes), 'c': cluster_id,
+                                      't': time.time() - start,
+                                      'u': len(unhealthy)})
+        if unhealthy:
+            self.rt['unhealthy'][cluster_id] = unhealthy
+        else:
+            self.rt['unhealthy'].pop(cluster_id, None)
+
+    def _recover_node(self, node):
+        """Request the recovery of a node found unhealthy by polling.
+
+        :param node: The node to be recovered.
+        :returns: Nothing.
+        """
+        LOG.info(_LI("Requesting node recovery: %s"), node.id)
+        params = {
+            'event': 'POLLING',
+            'state': 'UNHEALTHY',
+            'timestamp': utils.isotime(timeutils.utcnow(True)),
+            'publisher': 'senlin.health_manager',
+        }
+        ctx_value = context.get_service_context(project=node.project,
+                                                user=node.user)
+        ctx = context.RequestContext(**ctx_value)
+        self.rpc_client.node_recover(ctx, node.id, params)
+        self.poll_stats['recoveries'] += 1
+
+    def stats(self):
+        """Get statistics of the polling of clusters.
+
+        :returns: A dict containing the number of polls done, of nodes
+                  checked, of recoveries requested and of polls failed, and
+                  the average number of nodes checked and seconds spent per
+                  poll.
+        """
+        stats = dict(self.poll_stats)
+        ticks = stats['ticks']
+        stats['nodes_per_tick'] = stats['nodes'] / float(ticks or 1)
+        stats['time_per_tick'] = stats['time'] / float(ticks or 1)
+        return stats
+
+    def _get_endpoint(self, exchange):
+        """Get the endpoint of an exchange, starting its listener if needed.
+
+        :param exchange: The exchange to listen to.
+        :returns: The notification endpoint of the exchange.
+        """
+        endpoint = self.rt['endpoints'].get(exchange)
+        if endpoint is None:
+            endpoint = NotificationEndpoint()
+            self.rt['listeners'][exchange] = ListenerProc(exchange, endpoint)
+            self.rt['endpoints'][exchange] = endpoint
+
+        return endpoint
 
     def _add_listener(self, cluster_id):
         """Routine to be executed for adding cluster listener.
 
+        The listener of the exchange is shared by all the clusters, adding
+        a cluster only registers it with the endpoint of the listener.
+
         :param cluster_id: The UUID of the cluster to be filtered.
-        :returns: Nothing.
+        :returns: The endpoint dispatching the events of the cluster.
         """
         cluster = objects.Cluster.get(self.ctx, cluster_id)
         if not cluster:
             LOG.warning(_LW("Cluster (%s) is not found."), cluster_id)
             return
 
-        project = cluster.project
-        return self.TG.add_thread(ListenerProc, 'nova', project, cluster_id)
+        endpoint = self._get_endpoint('nova')
+        endpoint.add_cluster(cluster_id, cluster.project)
+        return endpoint
 
     def _start_check(self, entry):
         """Routine for starting the checking for a cluster.
@@ -154,7 +312,10 @@ class HealthManager(service.Service):
         """
         if entry['check_type'] == consts.NODE_STATUS_POLLING:
             interval = min(entry['interval'], cfg.CONF.periodic_interval_max)
-            timer = self.TG.add_timer(interval, self._poll_cluster, None,
+            # Spread the polls of the clusters over the interval
+            delay = random.uniform(
+                0, interval * cfg.CONF.health_manager.polling_jitter)
+            timer = self.TG.add_timer(interval, self._poll_cluster, delay,
                                       entry['cluster_id'])
             entry['timer'] = timer
         elif entry['check_type'] == consts.VM_LIFECYCLE_EVENTS:
@@ -184,33 +345,117 @@ class HealthManager(service.Service):
         if timer:
             timer.stop()
             self.TG.timer_done(timer)
+            self.rt['unhealthy'].pop(entry.get('cluster_id'), None)
             return
 
         listener = entry.get('listener', None)
         if listener:
-            self.TG.thread_done(listener)
-            listener.stop()
+            listener.remove_cluster(entry['cluster_id'])
             return
 
+    def _load_registry(self, registry):
+        """Start checking a cluster from its registry in DB.
+
+        :param registry: The health registry object of the cluster.
+        :returns: Nothing.
+        """
+        entry = {
+            'cluster_id': registry.cluster_id,
+            'check_type': registry.check_type,
+            'interval': registry.interval,
+            'params': registry.params,
+            'enabled': True,
+        }
+
+        LOG.info("Loading cluster %s for health monitoring",
+                 registry.cluster_id)
+
+        entry = self._start_check(entry)
+        if entry:
+            self.rt['registries'].append(entry)
+
     def _load_runtime_registry(self):
         """Load the initial runtime registry with a DB scan."""
         db_registries = objects.HealthRegistry.claim(self.ctx, self.engine_id)
 
-        for cluster in db_registries:
-            entry = {
-                'cluster_id': cluster.cluster_id,
-                'check_type': cluster.check_type,
-                'interval': cluster.interval,
-                'params': cluster.params,
-                'enabled': True,
-            }
+        for registry in db_registries:
+            self._load_registry(registry)
 
-            LOG.info("Loading cluster %s for health monitoring",
-                     cluster.cluster_id)
+    def _get_ring(self):
+        """Get the ring sharding the clusters over the live engines.
 
-            entry = self._start_check(entry)
-            if entry:
-                self.rt['registries'].append(entry)
+        :returns: A `HashRing` object.
+        """
+        engines = membership.view.get_engine_ids(self.ctx)
+        engines.add(self.engine_id)
+        return hash_ring.HashRing(engines)
+
+    def _handoff(self, cluster_id, engine_id):
+        if objects.HealthRegistry.handoff(self.ctx, cluster_id,
+                                          self.engine_id, engine_id):
+            LOG.info(_LI("Handed cluster %(c)s over to engine %(e)s for "
+                         "health monitoring."),
+                     {'c': cluster_id, 'e': engine_id})
+
+    def _rebalance_registries(self):
+        """Stop, hand off, load and claim the registries per the ring."""
+        ring = self._get_ring()
+        owned = dict((r.cluster_id, r) for r in
+                     objects.HealthRegistry.get_by_engine(self.ctx,
+                                                          self.engine_id))
+
+        for entry in list(self.rt['registries']):
+            cluster_id = entry['cluster_id']
+            if cluster_id not in owned:
+                # Unregistered through another engine or claimed by an
+                # engine which took this one for dead
+                if entry['enabled']:
+                    self._stop_check(entry)
+                self.rt['registries'].remove(entry)
+            elif entry['enabled']:
+                # The disabled clusters are kept until they are enabled
+                owner = ring.get_member(cluster_id)
+                if owner != self.engine_id:
+                    self._stop_check(entry)
+                    self.rt['registries'].remove(entry)
+                    self._handoff(cluster_id, owner)
+
+        running = set(e['cluster_id'] for e in self.rt['registries'])
+        for cluster_id, registry in owned.items():
+            if cluster_id in running:
+                continue
+            owner = ring.get_member(cluster_id)
+            if owner == self.engine_id:
+                self._load_registry(registry)
+            else:
+                self._handoff(cluster_id, owner)
+
+        claimed = objects.HealthRegistry.claim(self.ctx, self.engine_id,
+                                               engine_ids=ring.members)
+        for registry in claimed:
+            if registry.cluster_id not in owned:
+                self._load_registry(registry)
+
+    def _rebalance(self):
+        """Rebalance the clusters checked over the live engines.
+
+        A cluster moved to another engine stops being checked here before it
+        is handed over in DB, and the engine taking it over only starts the
+        checking when it finds the cluster assigned to it, so no cluster is
+        ever checked by two engines. The clusters of the engines found dead
+        are claimed by their new owners.
+        """
+        # Run periodically and on membership changes, one at a time
+        with self._rebalance_lock:
+            try:
+                self._rebalance_registries()
+            except Exception as ex:
+                LOG.error(_LE('Failed in rebalancing health registries: %s'),
+                          ex)
+
+    def _on_membership_change(self, joined, left):
+        """Rebalance the clusters as soon as engines join or leave."""
+        self.TG.add_thread(self._rebalance)
 
     def start(self):
         super(HealthManager, self).start()
@@ -220,9 +465,18 @@ class HealthManager(service.Service):
         server.start()
         self.TG.add_timer(cfg.CONF.periodic_interval, self._dummy_task)
         self._load_runtime_registry()
+        self.TG.add_timer(cfg.CONF.periodic_interval, self._rebalance,
+                          cfg.CONF.periodic_interval)
+        membership.view.subscribe(self._on_membership_change)
 
     def stop(self):
+        membership.view.unsubscribe(self._on_membership_change)
         self.TG.stop_timers()
+        for listener in self.rt['listeners'].values():
+            listener.stop()
+            listener.wait()
+        self.rt['listeners'].clear()
+        self.rt['endpoints'].clear()
         super(HealthManager, self).stop()
 
     @property
@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
 from oslo_log import log as logging
 from oslo_utils import timeutils
 import six
@@ -71,7 +73,11 @@ class Node(object):
         self.data = kwargs.get('data', {})
         self.metadata = kwargs.get('metadata', {})
         self.dependents = kwargs.get('dependents', {})
-        self.rt = {}
+
+        # rt is a dict for runtime data, which are loaded from database only
+        # when they are accessed
+        self._context = context
+        self.rt = utils.LazyDict({'profile': self._load_profile})
 
         if context is not None:
             if self.user == '':
@@ -80,17 +86,27 @@ class Node(object):
                 self.project = context.project
             if self.domain == '':
                 self.domain = context.domain
-            self._load_runtime_data(context)
 
-    def _load_runtime_data(self, context):
-        profile = None
+    def _load_profile(self):
+        if self._context is None:
+            return None
+
         try:
-            profile = pb.Profile.load(context, profile_id=self.profile_id,
-                                      project_safe=False)
+            return pb.Profile.load(self._context, profile_id=self.profile_id,
+                                   project_safe=False)
         except exc.ResourceNotFound:
             LOG.debug(_('Profile not found: %s'), self.profile_id)
+            return None
 
-        self.rt = {'profile': profile}
+    def refresh(self, context=None):
+        """Discard the runtime data so they are reloaded when next accessed.
+
+        :param context: An optional context used for loading the runtime data
+                        from now on.
+        """
+        if context is not None:
+            self._context = context
+        self.rt.clear()
 
     def store(self, context):
         """Store the node into database table.
@@ -101,7 +117,53 @@ class Node(object):
         @param context: Request context for node creation.
         @return: UUID of node created.
         """
-        values = {
+        values = self._to_values()
+
+        if self.id:
+            no.Node.update(context, self.id, values)
+        else:
+            init_at = timeutils.utcnow(True)
+            self.init_at = init_at
+            values['init_at'] = init_at
+            node = no.Node.create(context, values)
+            self.id = node.id
+
+        self.refresh(context)
+        return self.id
+
+    @classmethod
+    def store_all(cls, context, nodes):
+        """Store a batch of new nodes into database table at one go.
+
+        The profile of the nodes is loaded only once for each distinct
+        profile ID rather than once per node, each node getting its own
+        copy of it as profiles keep per node state.
+
+        @param context: Request context for node creation.
+        @param nodes: A list of nodes that have no ID assigned yet.
+        @return: A list of UUIDs of the nodes created, in the same order.
+        """
+        init_at = timeutils.utcnow(True)
+        values_list = []
+        for node in nodes:
+            node.init_at = init_at
+            values_list.append(node._to_values())
+
+        node_ids = no.Node.create_all(context, values_list)
+
+        profiles = {}
+        for node, node_id in zip(nodes, node_ids):
+            node.id = node_id
+            node.refresh(context)
+            if node.profile_id not in profiles:
+                profiles[node.profile_id] = node.rt['profile']
+            else:
+                node.rt['profile'] = copy.copy(profiles[node.profile_id])
+
+        return node_ids
+
+    def _to_values(self):
+        return {
             'name': self.name,
             'physical_id': self.physical_id,
             'cluster_id': self.cluster_id,
@@ -121,18 +183,6 @@ class Node(object):
             'dependents': self.dependents,
         }
 
-        if self.id:
-            no.Node.update(context, self.id, values)
-        else:
-            init_at = timeutils.utcnow(True)
-            self.init_at = init_at
-            values['init_at'] = init_at
-            node = no.Node.create(context, values)
-            self.id = node.id
-
-        self._load_runtime_data(context)
-        return self.id
-
     @classmethod
     def _from_object(cls, context, obj):
         """Construct a node from node object.
@@ -242,6 +292,34 @@ class Node(object):
             return {}
         return pb.Profile.get_details(context, self)
 
+    @classmethod
+    def get_details_many(cls, context, nodes):
+        """Get details of a batch of nodes.
+
+        :param context: The request context.
+        :param nodes: A list of nodes.
+        :returns: A dict with node ID as key and node details as value.
+        """
+        if not nodes:
+            return {}
+        return pb.Profile.get_details_many(context, nodes)
+
+    @classmethod
+    def check_many(cls, context, nodes):
+        """Check the health of a batch of nodes.
+
+        Unlike `do_check`, this doesn't update the status of the nodes.
+
+        :param context: The request context.
+        :param nodes: A list of nodes.
+        :returns: A dict with node ID as key and the check result as value,
+                  i.e. True if the node is healthy, False if it is not, or
+                  None if it couldn't be checked.
+        """
+        if not nodes:
+            return {}
+        return pb.Profile.check_objects(context, nodes)
+
     def update_dependents(self, context, dependents):
         """Update dependency information of node's property.
 
@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Purging of expired events and actions according to retention policies.
+
+Rows are deleted in chunks, each in a separate short transaction, so that
+the tables are never locked for long. The purge can safely be run by more
+than one engine at the same time.
+"""
+
+import collections
+import datetime
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from senlin.common import consts
+from senlin.common.i18n import _LI, _LW
+from senlin.objects import action as ao
+from senlin.objects import dependency as dobj
+from senlin.objects import event as eo
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.import_group('retention', 'senlin.common.config')
+
+SECONDS_PER_DAY = 86400
+
+
+def _event_ages(max_age, level_max_age):
+    """Group event levels by the number of days events are kept.
+
+    :param max_age: Default number of days events are kept.
+    :param level_max_age: A dict mapping level names to number of days.
+    :returns: A dict mapping number of days to a list of integer levels.
+              Levels of events kept forever are not included.
+    """
+    level_max_age = dict((k.upper(), v) for k, v in level_max_age.items())
+    for name in level_max_age:
+        if name not in consts.EVENT_LEVELS:
+            LOG.warning(_LW('Ignoring retention of unknown event level '
+                            '"%s".'), name)
+
+    ages = collections.defaultdict(list)
+    for name, level in consts.EVENT_LEVELS.items():
+        days = int(level_max_age.get(name, max_age) or 0)
+        if days > 0:
+            ages[days].append(level)
+    return ages
+
+
+def purge_events(context, max_age=None, level_max_age=None,
+                 max_per_cluster=None, dry_run=False):
+    """Purge events by age, by level and by number per cluster.
+
+    The arguments not specified default to the options in the 'retention'
+    configuration group.
+
+    :param context: An admin request context.
+    :param max_age: Number of days events are kept, 0 for ever.
+    :param level_max_age: A dict mapping level names to number of days
+                          events of the level are kept, 0 for ever.
+    :param max_per_cluster: Maximum number of events kept for a cluster, 0
+                            for no limit.
+    :param dry_run: If True, events are counted but not deleted.
+    :returns: Number of events deleted or to be deleted.
+    """
+    conf = cfg.CONF.retention
+    if max_age is None:
+        max_age = conf.event_max_age
+    if level_max_age is None:
+        level_max_age = conf.event_level_max_age
+    if max_per_cluster is None:
+        max_per_cluster = conf.event_max_per_cluster
+
+    total = 0
+    now = timeutils.utcnow(True)
+    for days, levels in _event_ages(max_age, level_max_age).items():
+        older_than = now - datetime.timedelta(days=days)
+        total += eo.Event.purge(context, older_than, levels=levels,
+                                chunk_size=conf.chunk_size, dry_run=dry_run)
+
+    if max_per_cluster > 0:
+        total += eo.Event.purge_by_cluster(context, max_per_cluster,
+                                           chunk_size=conf.chunk_size,
+                                           dry_run=dry_run)
+    return total
+
+
+def purge_actions(context, max_age=None, dry_run=False):
+    """Purge completed actions and unused action dependencies.
+
+    :param context: An admin request context.
+    :param max_age: Number of days completed actions are kept, 0 for ever.
+                    Defaults to the 'action_max_age' option.
+    :param dry_run: If True, rows are counted but not deleted.
+    :returns: A tuple of the number of actions and the number of
+              dependencies deleted or to be deleted.
+    """
+    conf = cfg.CONF.retention
+    if max_age is None:
+        max_age = conf.action_max_age
+
+    actions = 0
+    if max_age > 0:
+        older_than = time.time() - max_age * SECONDS_PER_DAY
+        actions = ao.Action.purge(context, older_than,
+                                  chunk_size=conf.chunk_size,
+                                  dry_run=dry_run)
+
+    dependencies = dobj.Dependency.purge(context, chunk_size=conf.chunk_size,
+                                         dry_run=dry_run)
+    return actions, dependencies
+
+
+def purge(context):
+    """Purge events and actions according to the configured policies."""
+
+    events = purge_events(context)
+    actions, dependencies = purge_actions(context)
+    if events or actions or dependencies:
+        LOG.info(_LI('Purged %(e)s events, %(a)s actions and %(d)s action '
+                     'dependencies.'),
+                 {'e': events, 'a': actions, 'd': dependencies})
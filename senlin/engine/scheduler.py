@@ -10,22 +10,38 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
 import time
 
 import eventlet
+from eventlet import event as eventlet_event
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_service import threadgroup
+import six
 
 from senlin.common import context
-from senlin.common.i18n import _
+from senlin.common.i18n import _, _LE
+from senlin.engine import action_graph
 from senlin.engine.actions import base as action_mod
+from senlin.engine import retention
 from senlin.objects import action as ao
 
 LOG = logging.getLogger(__name__)
 
 wallclock = time.time
 
+# Events for waking up actions that are waiting for their dependents, indexed
+# by action ID.
+_waiters = {}
+
+# Events for waking up actions that are waiting for a lock, indexed by lock
+# key and then by action ID in the order the actions started waiting.
+_lock_waiters = collections.defaultdict(collections.OrderedDict)
+
+# IDs of other engines having actions waiting for a lock, indexed by lock key.
+_remote_lock_waiters = collections.defaultdict(set)
+
 
 class ThreadGroupManager(object):
     '''Thread group manager.'''
@@ -34,6 +50,7 @@ class ThreadGroupManager(object):
         super(ThreadGroupManager, self).__init__()
         self.workers = {}
         self.group = threadgroup.ThreadGroup()
+        self._next_purge = 0
 
         # Create dummy service task, because when there is nothing queued
         # on self.tg the process exits
@@ -44,17 +61,30 @@ class ThreadGroupManager(object):
         self.db_session = context.RequestContext(is_admin=True)
 
     def _service_task(self):
-        '''Dummy task which gets queued on the service.Service threadgroup.
+        '''Periodic task which gets queued on the service.Service threadgroup.
 
         Without this service.Service sees nothing running i.e has nothing to
-        wait() on, so the process exits..
-        This could also be used to trigger periodic non-cluster-specific
-        housekeeping tasks
-
-        (Yanyan)Not sure this is still necessary, just keep it temporarily.
+        wait() on, so the process exits.
+        It also deletes the dependencies on the actions completed, and
+        triggers the purge of expired events and actions, at most once every
+        'interval' seconds of the 'retention' group.
         '''
-        # TODO(Yanyan): have this task call dbapi purge events
-        pass
+        action_graph.graph.flush(self.db_session)
+
+        interval = cfg.CONF.retention.interval
+        if interval <= 0:
+            return
+
+        now = wallclock()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + interval
+
+        try:
+            retention.purge(self.db_session)
+        except Exception as ex:
+            LOG.exception(_LE('Failed in purging expired records: %s'),
+                          six.text_type(ex))
 
     def start(self, func, *args, **kwargs):
         '''Run the given method in a thread.'''
@@ -92,11 +122,19 @@ class ThreadGroupManager(object):
 
         batch_size = cfg.CONF.max_actions_per_batch
         batch_interval = cfg.CONF.batch_interval
+        # Do not hold more actions than can be launched in one batch
+        limit = cfg.CONF.max_actions_per_acquire
+        if batch_size > 0:
+            limit = min(limit, batch_size)
+
         while True:
             timestamp = wallclock()
-            action = ao.Action.acquire_1st_ready(self.db_session, worker_id,
-                                                 timestamp)
-            if action:
+            actions = ao.Action.acquire_batch(self.db_session, worker_id,
+                                              timestamp, limit)
+            if not actions:
+                break
+
+            for action in actions:
                 if batch_size > 0 and 'NODE' in action.action:
                     if actions_launched < batch_size:
                         launch(action.id)
@@ -113,13 +151,13 @@ class ThreadGroupManager(object):
                         actions_launched = 1
                 else:
                     launch(action.id)
-            else:
-                break
 
     def cancel_action(self, action_id):
         '''Cancel an action execution progress.'''
         action = action_mod.Action.load(self.db_session, action_id)
         action.signal(action.SIG_CANCEL)
+        # Let the action notice the signal if it is waiting for dependents
+        wakeup(action_id)
 
     def suspend_action(self, action_id):
         '''Suspend an action execution progress.'''
@@ -131,6 +169,18 @@ class ThreadGroupManager(object):
         action = action_mod.Action.load(self.db_session, action_id)
         action.signal(action.SIG_RESUME)
 
+    def wakeup_action(self, action_id, depended=None):
+        '''Wake up an action that is waiting for its dependents.'''
+        wakeup_dependent(action_id, depended)
+
+    def wakeup_lock(self, key):
+        '''Wake up actions that are waiting for a lock.'''
+        wakeup_lock(key)
+
+    def add_remote_lock_waiter(self, key, engine_id):
+        '''Remember an engine to notify when a lock is released.'''
+        add_remote_lock_waiter(key, engine_id)
+
     def add_timer(self, interval, func, *args, **kwargs):
         '''Define a periodic task to be run in the thread group.
 
@@ -149,6 +199,8 @@ class ThreadGroupManager(object):
         self.group.stop(graceful)
         self.group.wait()
 
+        action_graph.graph.flush(self.db_session)
+
         # Wait for link()ed functions (i.e. lock release)
         threads = self.group.threads[:]
         links_done = dict((th, False) for th in threads)
@@ -178,3 +230,189 @@ def sleep(sleep_time):
     '''Interface for sleeping.'''
 
     eventlet.sleep(sleep_time)
+
+
+def add_waiter(action_id):
+    '''Register an action as waiting to be woken up.
+
+    :param action_id: the action that is going to wait.
+    '''
+    _waiters[action_id] = eventlet_event.Event()
+
+
+def remove_waiter(action_id):
+    '''Unregister an action from waiting.
+
+    :param action_id: the action that is done with waiting.
+    '''
+    _waiters.pop(action_id, None)
+
+
+def wait_for_wakeup(action_id, timeout):
+    '''Put an action into sleep until it is woken up or the timeout expires.
+
+    A wakeup that arrives before this function is called is not lost, the
+    function returns immediately in that case.
+
+    :param action_id: the action to put into sleep.
+    :param timeout: maximum number of seconds to sleep.
+    :returns: True if the action was woken up, or False otherwise.
+    '''
+    event = _waiters.get(action_id)
+    if event is None:
+        reschedule(action_id, timeout)
+        return False
+
+    LOG.debug('Action %s wait for wakeup at most %s seconds' % (action_id,
+                                                                timeout))
+    woken = False
+    with eventlet.Timeout(timeout, False):
+        event.wait()
+        woken = True
+
+    # Arm a new event so that wakeups arriving before the next wait are kept
+    if action_id in _waiters:
+        _waiters[action_id] = eventlet_event.Event()
+    return woken
+
+
+def wakeup(action_id):
+    '''Wake up an action waiting in the current process.
+
+    :param action_id: the action to wake up.
+    :returns: True if the action is waiting in this process, or False if it
+              is not found.
+    '''
+    event = _waiters.get(action_id)
+    if event is None:
+        return False
+
+    if not event.ready():
+        event.send(True)
+    return True
+
+
+def wakeup_dependent(action_id, depended=None):
+    '''Wake up an action waiting in the current process for its dependents.
+
+    :param action_id: the action to wake up.
+    :param depended: ID of the dependent that succeeded. The action is woken
+                     up only if it is not waiting for more dependents than
+                     it is allowed to proceed with.
+                     None means the action has to check its status from the
+                     database, e.g. because its dependents failed.
+    :returns: True if the action is woken up, or False otherwise.
+    '''
+    if depended is None:
+        action_graph.graph.untrack(action_id)
+    elif not action_graph.graph.resolve(action_id, depended):
+        return False
+
+    return wakeup(action_id)
+
+
+def add_lock_waiter(key, action_id):
+    '''Register an action as waiting for a lock.
+
+    :param key: the key of the lock.
+    :param action_id: the action that is going to wait.
+    '''
+    _lock_waiters[key][action_id] = eventlet_event.Event()
+
+
+def remove_lock_waiter(key, action_id, wake_next=False):
+    '''Unregister an action from waiting for a lock.
+
+    :param key: the key of the lock.
+    :param action_id: the action that is done with waiting.
+    :param wake_next: whether the next waiting action should be woken up
+                      because the lock may still be available to it.
+    '''
+    waiters = _lock_waiters.get(key)
+    if waiters is None:
+        return
+
+    waiters.pop(action_id, None)
+    if not waiters:
+        _lock_waiters.pop(key, None)
+    elif wake_next:
+        wakeup_lock(key)
+
+
+def has_lock_waiters(key):
+    '''Check if there are actions waiting for a lock in this process.'''
+    return bool(_lock_waiters.get(key))
+
+
+def is_first_lock_waiter(key, action_id):
+    '''Check if an action has been waiting for a lock the longest.'''
+    waiters = _lock_waiters.get(key)
+    return bool(waiters) and next(iter(waiters)) == action_id
+
+
+def wait_for_lock(key, action_id, timeout):
+    '''Put an action into sleep until a lock is released or timeout expires.
+
+    A wakeup that arrives before this function is called is not lost, the
+    function returns immediately in that case.
+
+    :param key: the key of the lock.
+    :param action_id: the action to put into sleep.
+    :param timeout: maximum number of seconds to sleep.
+    :returns: True if the action was woken up, or False otherwise.
+    '''
+    waiters = _lock_waiters.get(key)
+    event = waiters.get(action_id) if waiters else None
+    if event is None:
+        sleep(timeout)
+        return False
+
+    woken = False
+    with eventlet.Timeout(timeout, False):
+        event.wait()
+        woken = True
+
+    # Arm a new event so that wakeups arriving before the next wait are kept
+    if action_id in waiters:
+        waiters[action_id] = eventlet_event.Event()
+    return woken
+
+
+def wakeup_lock(key):
+    '''Wake up actions waiting for a lock in the current process.
+
+    When the 'lock_wait_fair' option is set, only the action that has been
+    waiting the longest is woken up, so that no action starves.
+
+    :param key: the key of the lock.
+    :returns: True if any action is woken up, or False otherwise.
+    '''
+    waiters = _lock_waiters.get(key)
+    if not waiters:
+        return False
+
+    events = list(waiters.values())
+    if cfg.CONF.lock_wait_fair:
+        events = events[:1]
+    for event in events:
+        if not event.ready():
+            event.send(True)
+    return True
+
+
+def add_remote_lock_waiter(key, engine_id):
+    '''Remember an engine that has actions waiting for a lock.
+
+    :param key: the key of the lock.
+    :param engine_id: the engine to notify when the lock is released.
+    '''
+    _remote_lock_waiters[key].add(engine_id)
+
+
+def pop_remote_lock_waiters(key):
+    '''Get and forget the engines that have actions waiting for a lock.
+
+    :param key: the key of the lock.
+    :returns: A set of engine IDs.
+    '''
+    return _remote_lock_waiters.pop(key, set())
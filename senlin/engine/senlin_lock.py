@@ -12,10 +12,12 @@
 
 from oslo_config import cfg
 from oslo_log import log as logging
+import random
 import time
 
 from senlin.common.i18n import _, _LE, _LI
 from senlin.common import utils
+from senlin.engine import dispatcher
 from senlin.engine import scheduler
 from senlin.objects import action as ao
 from senlin.objects import cluster_lock as cl_obj
@@ -25,9 +27,12 @@ CONF = cfg.CONF
 
 CONF.import_opt('lock_retry_times', 'senlin.common.config')
 CONF.import_opt('lock_retry_interval', 'senlin.common.config')
+CONF.import_opt('lock_wait_fair', 'senlin.common.config')
 
 LOG = logging.getLogger(__name__)
 
+wallclock = time.time
+
 LOCK_SCOPES = (
     CLUSTER_SCOPE, NODE_SCOPE,
 ) = (
@@ -35,6 +40,110 @@ LOCK_SCOPES = (
 )
 
 
+def _cluster_lock_key(cluster_id):
+    return 'cluster:%s' % cluster_id
+
+
+def _node_lock_key(node_id):
+    return 'node:%s' % node_id
+
+
+def _watch_owners(context, key, owners, engine, watched):
+    """Ask the engines running the lock owners to notify this engine.
+
+    :param context: the context used for DB operations.
+    :param key: the key of the lock.
+    :param owners: IDs of the actions owning the lock.
+    :param engine: ID of the engine waiting for the lock.
+    :param watched: IDs of the owners already handled, updated in place.
+    """
+    if engine is None:
+        return
+
+    for owner in owners:
+        if owner in watched:
+            continue
+        watched.add(owner)
+        action = ao.Action.get(context, owner)
+        if action and action.owner and action.owner != engine:
+            dispatcher.wait_lock(action.owner, key=key, engine_id=engine)
+
+
+def _acquire(context, key, action_id, engine, acquire, shared=False):
+    """Grab a lock, waiting for it to be released if necessary.
+
+    The action waits to be woken up when the lock is released, either by an
+    action in this engine or by an engine that has been asked to notify
+    this engine. In case the notification is lost, it retries with an
+    exponential backoff. Only the retries after a timeout are limited by
+    the 'lock_retry_times' option. When the 'lock_wait_fair' option is set,
+    actions in this engine try to grab the lock in the order they started
+    waiting. In any case, the action gives up waiting after
+    'lock_retry_times' * 'lock_retry_interval' seconds, even if it is still
+    waiting in line.
+
+    :param context: the context used for DB operations.
+    :param key: the key of the lock.
+    :param action_id: ID of the action which wants to grab the lock.
+    :param engine: ID of the engine which wants to grab the lock.
+    :param acquire: a function which tries to grab the lock and returns the
+                    IDs of the actions owning the lock.
+    :param shared: whether the lock can be owned by several actions.
+    :returns: IDs of the actions owning the lock at the last attempt.
+    """
+    fair = cfg.CONF.lock_wait_fair
+    queued = fair and scheduler.has_lock_waiters(key)
+    scheduler.add_lock_waiter(key, action_id)
+
+    retries = cfg.CONF.lock_retry_times
+    owners = []
+    acquired = False
+    try:
+        if not queued or retries <= 0:
+            owners = acquire()
+            acquired = action_id in owners
+            if acquired or retries <= 0:
+                return owners
+
+        watched = set()
+        interval = cfg.CONF.lock_retry_interval
+        deadline = wallclock() + retries * interval
+        while True:
+            _watch_owners(context, key, owners, engine, watched)
+            remaining = max(deadline - wallclock(), 0)
+            timeout = min(interval * random.uniform(0.5, 1.0), remaining)
+            woken = scheduler.wait_for_lock(key, action_id, timeout)
+            expired = wallclock() >= deadline
+            if (fair and not expired and
+                    not scheduler.is_first_lock_waiter(key, action_id)):
+                # Wait in line, the lock is handed over in order
+                continue
+
+            if not woken:
+                retries -= 1
+                interval *= 2
+
+            LOG.debug('Acquire lock %s again' % key)
+            owners = acquire()
+            acquired = action_id in owners
+            if acquired or retries <= 0 or expired:
+                return owners
+    finally:
+        # Let the next waiter try if the lock may still be available to it
+        scheduler.remove_lock_waiter(key, action_id,
+                                     wake_next=(not acquired or shared))
+
+
+def _notify_waiters(key):
+    """Wake up actions waiting for a lock which has been released.
+
+    :param key: the key of the lock.
+    """
+    scheduler.wakeup_lock(key)
+    for engine_id in scheduler.pop_remote_lock_waiters(key):
+        dispatcher.wakeup_lock(engine_id, key=key)
+
+
 def cluster_lock_acquire(context, cluster_id, action_id, engine=None,
                          scope=CLUSTER_SCOPE, forced=False):
     """Try to lock the specified cluster.
@@ -49,25 +158,18 @@ def cluster_lock_acquire(context, cluster_id, action_id, engine=None,
     :returns: True if lock is acquired, or False otherwise.
     """
 
-    # Step 1: try lock the cluster - if the returned owner_id is the
-    #         action id, it was a success
-    owners = cl_obj.ClusterLock.acquire(cluster_id, action_id, scope)
+    # Step 1: try lock the cluster, waiting for it to be released if it is
+    #         locked - if the returned owners contain the action id, it was
+    #         a success
+    def acquire():
+        return cl_obj.ClusterLock.acquire(cluster_id, action_id, scope)
+
+    owners = _acquire(context, _cluster_lock_key(cluster_id), action_id,
+                      engine, acquire, shared=(scope == NODE_SCOPE))
     if action_id in owners:
         return True
 
-    # Step 2: retry using global configuration options
-    retries = cfg.CONF.lock_retry_times
-    retry_interval = cfg.CONF.lock_retry_interval
-
-    while retries > 0:
-        scheduler.sleep(retry_interval)
-        LOG.debug('Acquire lock for cluster %s again' % cluster_id)
-        owners = cl_obj.ClusterLock.acquire(cluster_id, action_id, scope)
-        if action_id in owners:
-            return True
-        retries = retries - 1
-
-    # Step 3: Last resort is 'forced locking', only needed when retry failed
+    # Step 2: Last resort is 'forced locking', only needed when retry failed
     if forced:
         owners = cl_obj.ClusterLock.steal(cluster_id, action_id)
         return action_id in owners
@@ -100,7 +202,9 @@ def cluster_lock_release(cluster_id, action_id, scope):
     :param action_id: ID of the action that attempts to release the node.
     :param scope: The scope of the lock to be released.
     """
-    return cl_obj.ClusterLock.release(cluster_id, action_id, scope)
+    res = cl_obj.ClusterLock.release(cluster_id, action_id, scope)
+    _notify_waiters(_cluster_lock_key(cluster_id))
+    return res
 
 
 def node_lock_acquire(context, node_id, action_id, engine=None,
@@ -115,25 +219,18 @@ def node_lock_acquire(context, node_id, action_id, engine=None,
                    if any.
     :returns: True if lock is acquired, or False otherwise.
     """
-    # Step 1: try lock the node - if the returned owner_id is the
-    #         action id, it was a success
-    owner = nl_obj.NodeLock.acquire(node_id, action_id)
+    # Step 1: try lock the node, waiting for it to be released if it is
+    #         locked - if the returned owner_id is the action id, it was a
+    #         success
+    def acquire():
+        return [nl_obj.NodeLock.acquire(node_id, action_id)]
+
+    owner = _acquire(context, _node_lock_key(node_id), action_id, engine,
+                     acquire)[0]
     if action_id == owner:
         return True
 
-    # Step 2: retry using global configuration options
-    retries = cfg.CONF.lock_retry_times
-    retry_interval = cfg.CONF.lock_retry_interval
-
-    while retries > 0:
-        scheduler.sleep(retry_interval)
-        LOG.debug('Acquire lock for node %s again' % node_id)
-        owner = nl_obj.NodeLock.acquire(node_id, action_id)
-        if action_id == owner:
-            return True
-        retries = retries - 1
-
-    # Step 3: Last resort is 'forced locking', only needed when retry failed
+    # Step 2: Last resort is 'forced locking', only needed when retry failed
     if forced:
         owner = nl_obj.NodeLock.steal(node_id, action_id)
         return action_id == owner
@@ -165,4 +262,6 @@ def node_lock_release(node_id, action_id):
     :param node_id: ID of the node to be released.
     :param action_id: ID of the action that attempts to release the node.
     """
-    return nl_obj.NodeLock.release(node_id, action_id)
+    res = nl_obj.NodeLock.release(node_id, action_id)
+    _notify_waiters(_node_lock_key(node_id))
+    return res
@@ -21,10 +21,12 @@ from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import six
 
+from senlin.common import cache
 from senlin.common import consts
 from senlin.common import context as senlin_context
 from senlin.common import exception
 from senlin.common.i18n import _, _LE, _LI
+from senlin.common import membership
 from senlin.common import messaging as rpc_messaging
 from senlin.common import scaleutils as su
 from senlin.common import schema
@@ -34,6 +36,7 @@ from senlin.engine import cluster as cluster_mod
 from senlin.engine import cluster_policy as cpm
 from senlin.engine import dispatcher
 from senlin.engine import environment
+from senlin.engine import event as EVENT
 from senlin.engine import health_manager
 from senlin.engine import node as node_mod
 from senlin.engine.receivers import base as receiver_mod
@@ -106,6 +109,9 @@ class EngineService(service.Service):
         self.engine_id = uuidutils.generate_uuid()
         self.init_tgm()
 
+        # write events in background from now on
+        EVENT.start_writer()
+
         # create a dispatcher RPC service for this engine.
         self.dispatcher = dispatcher.Dispatcher(self,
                                                 self.dispatcher_topic,
@@ -160,6 +166,9 @@ class EngineService(service.Service):
 
         self.TG.stop()
 
+        # Write events still queued before quitting
+        EVENT.stop_writer()
+
         ctx = senlin_context.get_admin_context()
         service_obj.Service.delete(ctx, self.engine_id)
         LOG.info(_LI('Engine %s is deleted'), self.engine_id)
@@ -169,7 +178,10 @@ class EngineService(service.Service):
     def service_manage_report(self):
         ctx = senlin_context.get_admin_context()
         try:
-            svc = service_obj.Service.update(ctx, self.engine_id)
+            # The number of running actions is reported for the dispatching
+            # of actions to the least loaded engines
+            svc = service_obj.Service.update(
+                ctx, self.engine_id, {'workers': len(self.TG.workers)})
             # if svc is None, means it's not created.
             if svc is None:
                 service_obj.Service.create(ctx, self.engine_id, self.host,
@@ -178,6 +190,20 @@ class EngineService(service.Service):
             LOG.error(_LE('Service %(service_id)s update failed: %(error)s'),
                       {'service_id': self.engine_id, 'error': ex})
 
+        # Read the engines alive once per report, for the liveness checks to
+        # be answered from memory
+        try:
+            membership.view.refresh(ctx)
+        except Exception as ex:
+            LOG.error(_LE('Failed in reading the engines alive: %s'), ex)
+
+        LOG.debug('Profile cache: %(profile)s; policy cache: %(policy)s; '
+                  'event writer: %(event)s; dispatch: %(dispatch)s',
+                  {'profile': cache.profiles.stats(),
+                   'policy': cache.policies.stats(),
+                   'event': EVENT.writer_stats(),
+                   'dispatch': dispatcher.dispatch_stats})
+
     def _service_manage_cleanup(self):
         ctx = senlin_context.get_admin_context()
         time_window = (2 * cfg.CONF.periodic_interval)
@@ -470,6 +496,7 @@ class EngineService(service.Service):
             changed = True
         if changed:
             profile.store(context)
+            cache.profiles.invalidate(profile.id)
         else:
             msg = _("No property needs an update.")
             raise exception.BadRequest(msg=msg)
@@ -495,6 +522,7 @@ class EngineService(service.Service):
             raise exception.ResourceInUse(type='profile', id=identity,
                                           reason=reason)
 
+        cache.profiles.invalidate(db_profile.id)
         LOG.info(_LI("Profile '%(id)s' is deleted."), {'id': identity})
 
     @request_context
@@ -678,6 +706,7 @@ class EngineService(service.Service):
             LOG.info(_LI("Updating policy '%s'."), identity)
             policy.name = name
             policy.store(context)
+            cache.policies.invalidate(policy.id)
             LOG.info(_LI("Policy '%s' is updated."), identity)
 
         return policy.to_dict()
@@ -700,6 +729,7 @@ class EngineService(service.Service):
             raise exception.ResourceInUse(type='policy', id=identity,
                                           reason=reason)
 
+        cache.policies.invalidate(db_policy.id)
         LOG.info(_LI("Policy '%s' is deleted."), identity)
 
     @request_context
@@ -772,7 +802,8 @@ class EngineService(service.Service):
         clusters = cluster_mod.Cluster.load_all(context, limit=limit,
                                                 marker=marker, sort=sort,
                                                 filters=filters,
-                                                project_safe=project_safe)
+                                                project_safe=project_safe,
+                                                projection=True)
 
         return [cluster.to_dict() for cluster in clusters]
 
@@ -785,7 +816,8 @@ class EngineService(service.Service):
         :return: A dictionary containing the details about a cluster.
         """
         db_cluster = self.cluster_find(context, identity)
-        cluster = cluster_mod.Cluster.load(context, dbcluster=db_cluster)
+        cluster = cluster_mod.Cluster.load(context, dbcluster=db_cluster,
+                                           projection=True)
         return cluster.to_dict()
 
     def check_cluster_quota(self, context):
@@ -872,7 +904,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, cluster.id,
                                              consts.CLUSTER_CREATE, **kwargs)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=cluster.id)
         LOG.info(_LI("Cluster create action queued: %s."), action_id)
 
         result = cluster.to_dict()
@@ -944,7 +976,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, cluster.id,
                                              consts.CLUSTER_UPDATE, **kwargs)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=cluster.id)
         LOG.info(_LI("Cluster update action queued: %s."), action_id)
 
         resp = cluster.to_dict()
@@ -1003,7 +1035,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, cluster.id,
                                              consts.CLUSTER_DELETE, **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=cluster.id)
         LOG.info(_LI("Cluster delete action queued: %s"), action_id)
 
         return {'action': action_id}
@@ -1088,7 +1120,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_ADD_NODES,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster add nodes action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1150,7 +1182,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_DEL_NODES,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster delete nodes action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1247,7 +1279,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_REPLACE_NODES,
                                              **kwargs)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster replace nodes action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1355,7 +1387,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_RESIZE, **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster resize action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1398,7 +1430,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_SCALE_OUT,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster Scale out action queued: %s"), action_id)
 
         return {'action': action_id}
@@ -1441,7 +1473,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_SCALE_IN,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster Scale in action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1463,11 +1495,14 @@ class EngineService(service.Service):
         cluster = self.cluster_find(context, identity)
         nodes = node_mod.Node.load_all(context, cluster_id=cluster.id,
                                        project_safe=project_safe)
+        nodes = list(nodes)
+        details = node_mod.Node.get_details_many(
+            context, [n for n in nodes if n.physical_id])
         attrs = []
         for node in nodes:
             info = node.to_dict()
             if node.physical_id:
-                info['details'] = node.get_details(context)
+                info['details'] = details.get(node.id, {})
             matches = [m.value for m in parser.find(info)]
             if matches:
                 attrs.append({'id': node.id, 'value': matches[0]})
@@ -1498,7 +1533,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_CHECK, **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster check action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1524,7 +1559,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_RECOVER, **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Cluster recover action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1935,7 +1970,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_ATTACH_POLICY,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Policy attach action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -1978,7 +2013,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_DETACH_POLICY,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Policy dettach action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -2025,7 +2060,7 @@ class EngineService(service.Service):
         action_id = action_mod.Action.create(context, db_cluster.id,
                                              consts.CLUSTER_UPDATE_POLICY,
                                              **params)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=db_cluster.id)
         LOG.info(_LI("Policy update action queued: %s."), action_id)
 
         return {'action': action_id}
@@ -2357,7 +2392,7 @@ class EngineService(service.Service):
         }
         action_id = action_mod.Action.create(context, cluster.id,
                                              receiver.action, **kwargs)
-        dispatcher.start_action()
+        dispatcher.start_action(cluster_id=cluster.id)
         LOG.info(_LI("Webhook %(w)s' triggered with action queued: %(a)s."),
                  {'w': identity, 'a': action_id})
 
@@ -51,6 +51,11 @@ class Action(base.SenlinObject, base.VersionedObjectDictCompat):
         obj = db_api.action_create(context, values)
         return cls._from_db_object(context, cls(context), obj)
 
+    @classmethod
+    def create_all(cls, context, values_list, dependencies=None):
+        return db_api.action_create_all(context, values_list,
+                                        dependencies=dependencies)
+
     @classmethod
     def get(cls, context, action_id, **kwargs):
         obj = db_api.action_get(context, action_id, **kwargs)
@@ -100,6 +105,10 @@ class Action(base.SenlinObject, base.VersionedObjectDictCompat):
     def acquire_1st_ready(cls, context, owner, timestamp):
         return db_api.action_acquire_1st_ready(context, owner, timestamp)
 
+    @classmethod
+    def acquire_batch(cls, context, owner, timestamp, limit):
+        return db_api.action_acquire_batch(context, owner, timestamp, limit)
+
     @classmethod
     def abandon(cls, context, action_id):
         return db_api.action_abandon(context, action_id)
@@ -123,3 +132,7 @@ class Action(base.SenlinObject, base.VersionedObjectDictCompat):
     @classmethod
     def delete(cls, context, action_id):
         db_api.action_delete(context, action_id)
+
+    @classmethod
+    def purge(cls, context, older_than, **kwargs):
+        return db_api.action_purge(context, older_than, **kwargs)
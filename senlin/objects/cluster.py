@@ -71,8 +71,8 @@ class Cluster(base.SenlinObject, base.VersionedObjectDictCompat):
         return [cls._from_db_object(context, cls(), obj) for obj in objs]
 
     @classmethod
-    def get_next_index(cls, context, cluster_id):
-        return db_api.cluster_next_index(context, cluster_id)
+    def get_next_index(cls, context, cluster_id, count=1):
+        return db_api.cluster_next_index(context, cluster_id, count=count)
 
     @classmethod
     def count_all(cls, context, **kwargs):
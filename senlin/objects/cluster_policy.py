@@ -76,6 +76,10 @@ class ClusterPolicy(base.SenlinObject, base.VersionedObjectDictCompat):
         objs = db_api.cluster_policy_get_all(context, cluster_id, **kwargs)
         return [cls._from_db_object(context, cls(), obj) for obj in objs]
 
+    @classmethod
+    def ids_by_cluster(cls, context, cluster_ids):
+        return db_api.cluster_policy_ids_by_cluster(context, cluster_ids)
+
     @classmethod
     def update(cls, context, cluster_id, policy_id, values):
         db_api.cluster_policy_update(context, cluster_id, policy_id, values)
@@ -38,3 +38,15 @@ class Dependency(base.SenlinObject, base.VersionedObjectDictCompat):
     @classmethod
     def get_dependents(cls, context, action_id):
         return db_api.dependency_get_dependents(context, action_id)
+
+    @classmethod
+    def get_pending(cls, context, action_id):
+        return db_api.dependency_get_pending(context, action_id)
+
+    @classmethod
+    def delete(cls, context, depended_ids):
+        return db_api.dependency_delete(context, depended_ids)
+
+    @classmethod
+    def purge(cls, context, **kwargs):
+        return db_api.dependency_purge(context, **kwargs)
@@ -42,6 +42,10 @@ class Event(base.SenlinObject, base.VersionedObjectDictCompat):
         obj = db_api.event_create(context, values)
         return cls._from_db_object(context, cls(context), obj)
 
+    @classmethod
+    def create_all(cls, context, values_list):
+        return db_api.event_create_all(context, values_list)
+
     @classmethod
     def get(cls, context, event_id, **kwargs):
         return db_api.event_get(context, event_id, **kwargs)
@@ -62,3 +66,11 @@ class Event(base.SenlinObject, base.VersionedObjectDictCompat):
     def get_all_by_cluster(cls, context, cluster_id, **kwargs):
         objs = db_api.event_get_all_by_cluster(context, cluster_id, **kwargs)
         return [cls._from_db_object(context, cls(), obj) for obj in objs]
+
+    @classmethod
+    def purge(cls, context, older_than, **kwargs):
+        return db_api.event_purge(context, older_than, **kwargs)
+
+    @classmethod
+    def purge_by_cluster(cls, context, max_events, **kwargs):
+        return db_api.event_purge_by_cluster(context, max_events, **kwargs)
@@ -38,10 +38,25 @@ class HealthRegistry(base.SenlinObject, base.VersionedObjectDictCompat):
         return cls._from_db_object(context, cls(context), obj)
 
     @classmethod
-    def claim(cls, context, engine_id):
-        objs = db_api.registry_claim(context, engine_id)
+    def claim(cls, context, engine_id, engine_ids=None):
+        objs = db_api.registry_claim(context, engine_id,
+                                     engine_ids=engine_ids)
         return [cls._from_db_object(context, cls(), obj) for obj in objs]
 
+    @classmethod
+    def get_by_engine(cls, context, engine_id):
+        objs = db_api.registry_get_by_engine(context, engine_id)
+        return [cls._from_db_object(context, cls(), obj) for obj in objs]
+
+    @classmethod
+    def handoff(cls, context, cluster_id, engine_id, new_engine_id):
+        return db_api.registry_handoff(context, cluster_id, engine_id,
+                                       new_engine_id)
+
+    @classmethod
+    def count_by_engine(cls, context):
+        return db_api.registry_count_by_engine(context)
+
     @classmethod
     def delete(cls, context, cluster_id):
         db_api.registry_delete(context, cluster_id)
@@ -49,6 +49,11 @@ class Node(base.SenlinObject, base.VersionedObjectDictCompat):
         obj = db_api.node_create(context, values)
         return cls._from_db_object(context, cls(context), obj)
 
+    @classmethod
+    def create_all(cls, context, values_list):
+        values_list = [cls._transpose_metadata(v) for v in values_list]
+        return db_api.node_create_all(context, values_list)
+
     @classmethod
     def get(cls, context, node_id, **kwargs):
         obj = db_api.node_get(context, node_id, **kwargs)
@@ -74,6 +79,16 @@ class Node(base.SenlinObject, base.VersionedObjectDictCompat):
         objs = db_api.node_get_all_by_cluster(context, cluster_id, **kwargs)
         return [cls._from_db_object(context, cls(), obj) for obj in objs]
 
+    @classmethod
+    def ids_by_cluster(cls, context, cluster_ids):
+        return db_api.node_ids_by_cluster(context, cluster_ids)
+
+    @classmethod
+    def ids_for_deletion(cls, context, cluster_id, count, order,
+                         project_safe=True):
+        return db_api.node_ids_for_deletion(context, cluster_id, count, order,
+                                            project_safe=project_safe)
+
     @classmethod
     def count_by_cluster(cls, context, cluster_id, **kwargs):
         return db_api.node_count_by_cluster(context, cluster_id, **kwargs)
@@ -83,6 +98,11 @@ class Node(base.SenlinObject, base.VersionedObjectDictCompat):
         values = cls._transpose_metadata(values)
         db_api.node_update(context, obj_id, values)
 
+    @classmethod
+    def update_all(cls, context, values_list):
+        values_list = [cls._transpose_metadata(v) for v in values_list]
+        db_api.node_update_all(context, values_list)
+
     @classmethod
     def migrate(cls, context, obj_id, to_cluster, timestamp, role=None):
         return db_api.node_migrate(context, obj_id, to_cluster, timestamp,
@@ -47,6 +47,10 @@ class Profile(base.SenlinObject, base.VersionedObjectDictCompat):
         obj = db_api.profile_get(context, profile_id, **kwargs)
         return cls._from_db_object(context, cls(), obj)
 
+    @classmethod
+    def get_names(cls, context, profile_ids):
+        return db_api.profile_get_names(context, profile_ids)
+
     @classmethod
     def get_by_name(cls, context, name, **kwargs):
         obj = db_api.profile_get_by_name(context, name, **kwargs)
@@ -10,10 +10,13 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
 from oslo_context import context as oslo_context
 from oslo_utils import reflection
 from oslo_utils import timeutils
 
+from senlin.common import cache
 from senlin.common import context as senlin_context
 from senlin.common import exception
 from senlin.common.i18n import _
@@ -116,6 +119,22 @@ class Policy(object):
         self._networkclient = None
         self._lbaasclient = None
 
+    def __copy__(self):
+        """Copy a policy without the clients it has built.
+
+        The clients carry the trust of the user and project they were built
+        for, so a copy builds its own. The parsed spec and properties are
+        shared between the copies and must not be modified.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.data = copy.copy(self.data)
+        obj._novaclient = None
+        obj._keystoneclient = None
+        obj._networkclient = None
+        obj._lbaasclient = None
+        return obj
+
     @classmethod
     def _from_object(cls, policy):
         """Construct a policy from a Policy object.
@@ -155,7 +174,15 @@ class Policy(object):
             if db_policy is None:
                 raise exception.ResourceNotFound(type='policy', id=policy_id)
 
-        return cls._from_object(db_policy)
+        # Parsing the spec is expensive, reuse the cached one if the policy
+        # has not been updated since it was cached. The cached instance is
+        # never handed out, so that it never holds any client.
+        policy = cache.policies.get(db_policy.id, db_policy.updated_at)
+        if policy is None:
+            policy = cls._from_object(db_policy)
+            cache.policies.put(db_policy.id, db_policy.updated_at, policy)
+            policy = copy.copy(policy)
+        return policy
 
     @classmethod
     def load_all(cls, context, limit=None, marker=None, sort=None,
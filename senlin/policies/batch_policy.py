@@ -13,32 +13,35 @@
 """
 Policy for batching operations on a cluster.
 
-NOTE: How update policy works
+NOTE: How batch policy works
 Input:
-  cluster: the cluster whose nodes are to be updated.
+  cluster: the cluster whose nodes are to be updated or deleted.
 Output:
-  stored in action.data: A dictionary containing a detailed update schedule.
+  stored in action.data: A dictionary containing a detailed batch schedule.
   {
     'status': 'OK',
-    'update': {
+    'batch': {
+      'batch_size': 2,
       'pause_time': 2,
-      'plan': [{
-          'node-id-1',
-          'node-id-2',
-        }, {
-          'node-id-3',
-          'node-id-4',
-        }, {
-          'node-id-5',
-        }
+      'plan': [
+        ['node-id-1', 'node-id-2'],
+        ['node-id-3', 'node-id-4'],
+        ['node-id-5'],
       ]
     }
   }
+
+The cluster action starts a batch as soon as enough nodes of the previous
+batches have been handled for no more than 'batch_size' nodes to be out of
+service at any time, and no sooner than 'pause_time' seconds after the start
+of the previous batch.
 """
 
 from senlin.common import consts
 from senlin.common.i18n import _
 from senlin.common import schema
+from senlin.engine import node as nm
+from senlin.objects import node as no
 from senlin.policies import base
 
 
@@ -49,6 +52,7 @@ class BatchPolicy(base.Policy):
 
     TARGET = [
         ('BEFORE', consts.CLUSTER_UPDATE),
+        ('BEFORE', consts.CLUSTER_DELETE),
     ]
 
     PROFILE_TYPE = [
@@ -84,13 +88,73 @@ class BatchPolicy(base.Policy):
         self.max_batch_size = self.properties[self.MAX_BATCH_SIZE]
         self.pause_time = self.properties[self.PAUSE_TIME]
 
+    def _get_batch_size(self, in_service, min_in_service):
+        """Get the number of nodes that can be out of service at a time.
+
+        :param in_service: Number of nodes in service.
+        :param min_in_service: Minimum number of nodes to keep in service.
+        :returns: The batch size, 0 if no node can be taken out of service.
+        """
+        size = max(in_service - min_in_service, 0)
+        if self.max_batch_size > 0:
+            size = min(size, self.max_batch_size)
+        return size
+
+    def _plan(self, nodes, batch_size):
+        """Split nodes into batches.
+
+        Nodes not in service are placed first, since operating on them
+        doesn't reduce the capacity of the cluster.
+
+        :param nodes: A list of node objects.
+        :param batch_size: Maximum number of nodes in a batch.
+        :returns: A list of lists of node IDs.
+        """
+        ordered = sorted(nodes, key=lambda n: (
+            n.status == nm.Node.ACTIVE, n.index))
+        node_ids = [n.id for n in ordered]
+        return [node_ids[i:i + batch_size]
+                for i in range(0, len(node_ids), batch_size)]
+
     def pre_op(self, cluster_id, action):
-        # TODO(anyone): compute batches
-        action.data['candidates'] = []
-        action.store(action.context)
+        """Compute the batches of nodes to be updated or deleted.
+
+        :param cluster_id: ID of the cluster to be handled.
+        :param action: The action object that triggered this policy.
+        """
+        if (action.action == consts.CLUSTER_UPDATE and
+                not action.inputs.get('new_profile_id')):
+            # No node is updated
+            return
 
-        return True
+        nodes = no.Node.get_all_by_cluster(action.context, cluster_id)
+        if action.action == consts.CLUSTER_DELETE:
+            # The cluster is going away, only the concurrency is limited
+            in_service = len(nodes)
+            min_in_service = 0
+        else:
+            in_service = len([n for n in nodes
+                              if n.status == nm.Node.ACTIVE])
+            min_in_service = self.min_in_service
 
-    def post_op(self, cluster_id, action):
-        # TODO(anyone): handle pause_time here
-        return True
+        size = self._get_batch_size(in_service, min_in_service)
+        if size == 0 and nodes:
+            action.data['status'] = base.CHECK_ERROR
+            action.data['reason'] = _('No node can be taken out of service, '
+                                      '%(num)s nodes are in service and '
+                                      'min_in_service is %(min)s.'
+                                      ) % {'num': in_service,
+                                           'min': min_in_service}
+            action.store(action.context)
+            return
+
+        action.data.update({
+            'status': base.CHECK_OK,
+            'reason': _('Batching request validated.'),
+            'batch': {
+                'batch_size': size,
+                'pause_time': self.pause_time,
+                'plan': self._plan(nodes, size) if nodes else [],
+            }
+        })
+        action.store(action.context)
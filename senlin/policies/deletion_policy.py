@@ -102,42 +102,54 @@ class DeletionPolicy(base.Policy):
         self.reduce_desired_capacity = self.properties[
             self.REDUCE_DESIRED_CAPACITY]
 
+    def _select(self, nodes, count):
+        """Select victims among the given nodes.
+
+        :param nodes: The candidate nodes.
+        :param count: Number of victims to select.
+        :returns: A list of IDs of the victim nodes.
+        """
+        if self.criteria == self.RANDOM:
+            return scaleutils.nodes_by_random(nodes, count)
+        elif self.criteria == self.OLDEST_PROFILE_FIRST:
+            return scaleutils.nodes_by_profile_age(nodes, count)
+        elif self.criteria == self.OLDEST_FIRST:
+            return scaleutils.nodes_by_age(nodes, count, True)
+        else:
+            return scaleutils.nodes_by_age(nodes, count, False)
+
     def _victims_by_regions(self, cluster, regions):
+        nodes = cluster.nodes_by_placement('region_name')
         victims = []
         for region in sorted(regions.keys()):
-            count = regions[region]
-            nodes = cluster.nodes_by_region(region)
-            if self.criteria == self.RANDOM:
-                candidates = scaleutils.nodes_by_random(nodes, count)
-            elif self.criteria == self.OLDEST_PROFILE_FIRST:
-                candidates = scaleutils.nodes_by_profile_age(nodes, count)
-            elif self.criteria == self.OLDEST_FIRST:
-                candidates = scaleutils.nodes_by_age(nodes, count, True)
-            else:
-                candidates = scaleutils.nodes_by_age(nodes, count, False)
-
-            victims.extend(candidates)
+            victims.extend(self._select(nodes.get(region, []),
+                                        regions[region]))
 
         return victims
 
     def _victims_by_zones(self, cluster, zones):
+        nodes = cluster.nodes_by_placement('zone')
         victims = []
         for zone in sorted(zones.keys()):
-            count = zones[zone]
-            nodes = cluster.nodes_by_zone(zone)
-            if self.criteria == self.RANDOM:
-                candidates = scaleutils.nodes_by_random(nodes, count)
-            elif self.criteria == self.OLDEST_PROFILE_FIRST:
-                candidates = scaleutils.nodes_by_profile_age(nodes, count)
-            elif self.criteria == self.OLDEST_FIRST:
-                candidates = scaleutils.nodes_by_age(nodes, count, True)
-            else:
-                candidates = scaleutils.nodes_by_age(nodes, count, False)
-
-            victims.extend(candidates)
+            victims.extend(self._select(nodes.get(zone, []), zones[zone]))
 
         return victims
 
+    def _victims_by_criteria(self, context, cluster_id, count):
+        """Select victims from all the nodes of a cluster.
+
+        The selection is done by the database, which only returns the IDs
+        of the victims, so that nodes don't have to be loaded.
+        """
+        orders = {
+            self.OLDEST_FIRST: 'created_at',
+            self.YOUNGEST_FIRST: '-created_at',
+            self.OLDEST_PROFILE_FIRST: 'profile_created_at',
+            self.RANDOM: 'random',
+        }
+        return no.Node.ids_for_deletion(context, cluster_id, count,
+                                        orders[self.criteria])
+
     def _update_action(self, action, victims):
         pd = action.data.get('deletion', {})
         pd['count'] = len(victims)
@@ -198,31 +210,21 @@ class DeletionPolicy(base.Policy):
                 return
             count = action.data['deletion']['count']
 
-        cluster = cm.Cluster.load(action.context, dbcluster=db_cluster,
-                                  cluster_id=cluster_id)
         # Cross-region
         if regions:
+            cluster = cm.Cluster.load(action.context, dbcluster=db_cluster,
+                                      cluster_id=cluster_id)
             victims = self._victims_by_regions(cluster, regions)
-            self._update_action(action, victims)
-            return
 
         # Cross-AZ
-        if zones:
+        elif zones:
+            cluster = cm.Cluster.load(action.context, dbcluster=db_cluster,
+                                      cluster_id=cluster_id)
             victims = self._victims_by_zones(cluster, zones)
-            self._update_action(action, victims)
-            return
 
-        if count > len(cluster.nodes):
-            count = len(cluster.nodes)
-
-        if self.criteria == self.RANDOM:
-            victims = scaleutils.nodes_by_random(cluster.nodes, count)
-        elif self.criteria == self.OLDEST_PROFILE_FIRST:
-            victims = scaleutils.nodes_by_profile_age(cluster.nodes, count)
-        elif self.criteria == self.OLDEST_FIRST:
-            victims = scaleutils.nodes_by_age(cluster.nodes, count, True)
         else:
-            victims = scaleutils.nodes_by_age(cluster.nodes, count, False)
+            victims = self._victims_by_criteria(action.context, cluster_id,
+                                                count)
 
         self._update_action(action, victims)
         return
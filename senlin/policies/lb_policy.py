@@ -325,19 +325,21 @@ class LoadBalancingPolicy(base.Policy):
         port = self.pool_spec.get(self.POOL_PROTOCOL_PORT)
         subnet = self.pool_spec.get(self.POOL_SUBNET)
 
+        members = lb_driver.members_add(nodes, data['loadbalancer'],
+                                        data['pool'], port, subnet)
+        if any(m is None for m in members.values()):
+            # When failed in adding member, remove all lb resources that
+            # were created and return the failure reason.
+            # TODO(anyone): May need to "roll-back" changes caused by any
+            # successful member creation.
+            lb_driver.lb_delete(**data)
+            return False, 'Failed in adding node into lb pool'
+
+        values = []
         for node in nodes:
-            member_id = lb_driver.member_add(node, data['loadbalancer'],
-                                             data['pool'], port, subnet)
-            if member_id is None:
-                # When failed in adding member, remove all lb resources that
-                # were created and return the failure reason.
-                # TODO(anyone): May need to "roll-back" changes caused by any
-                # successful member_add() calls.
-                lb_driver.lb_delete(**data)
-                return False, 'Failed in adding node into lb pool'
-
-            node.data.update({'lb_member': member_id})
-            node.store(oslo_context.get_current())
+            node.data.update({'lb_member': members[node.id]})
+            values.append({'id': node.id, 'data': node.data})
+        no.Node.update_all(oslo_context.get_current(), values)
 
         cluster_data_lb = cluster.data.get('loadbalancers', {})
         cluster_data_lb[self.id] = {'vip_address': data.pop('vip_address')}
@@ -373,10 +375,12 @@ class LoadBalancingPolicy(base.Policy):
 
         nodes = nm.Node.load_all(oslo_context.get_current(),
                                  cluster_id=cluster.id, project_safe=False)
+        values = []
         for node in nodes:
             if 'lb_member' in node.data:
                 node.data.pop('lb_member')
-                node.store(oslo_context.get_current())
+                values.append({'id': node.id, 'data': node.data})
+        no.Node.update_all(oslo_context.get_current(), values)
 
         lb_data = cluster.data.get('loadbalancers', {})
         if lb_data and isinstance(lb_data, dict):
@@ -459,20 +463,24 @@ class LoadBalancingPolicy(base.Policy):
         pool_id = policy_data['pool']
 
         # Remove nodes that will be deleted from lb pool
-        for node_id in candidates:
-            node = nm.Node.load(action.context, node_id=node_id)
+        nodes = nm.Node.load_all(action.context, filters={'id': candidates})
+        member_ids = []
+        for node in nodes:
             member_id = node.data.get('lb_member', None)
             if member_id is None:
                 LOG.warning(_LW('Node %(n)s not found in lb pool %(p)s.'),
-                            {'n': node_id, 'p': pool_id})
+                            {'n': node.id, 'p': pool_id})
                 continue
+            member_ids.append(member_id)
 
-            res = lb_driver.member_remove(lb_id, pool_id, member_id)
-            if res is not True:
-                action.data['status'] = base.CHECK_ERROR
-                action.data['reason'] = _('Failed in removing deleted '
-                                          'node(s) from lb pool.')
-                return
+        if not member_ids:
+            return
+
+        res = lb_driver.members_remove(lb_id, pool_id, member_ids)
+        if not all(r is True for r in res.values()):
+            action.data['status'] = base.CHECK_ERROR
+            action.data['reason'] = _('Failed in removing deleted '
+                                      'node(s) from lb pool.')
 
         return
 
@@ -509,23 +517,33 @@ class LoadBalancingPolicy(base.Policy):
         subnet = self.pool_spec.get(self.POOL_SUBNET)
 
         # Add new nodes to lb pool
-        for node_id in nodes_added:
-            node = nm.Node.load(action.context, node_id=node_id)
+        nodes = []
+        for node in nm.Node.load_all(action.context,
+                                     filters={'id': nodes_added}):
             member_id = node.data.get('lb_member', None)
             if member_id:
                 LOG.warning(_LW('Node %(n)s already in lb pool %(p)s.'),
-                            {'n': node_id, 'p': pool_id})
+                            {'n': node.id, 'p': pool_id})
                 continue
+            nodes.append(node)
+
+        if not nodes:
+            return
 
-            member_id = lb_driver.member_add(node, lb_id, pool_id, port,
-                                             subnet)
+        res = lb_driver.members_add(nodes, lb_id, pool_id, port, subnet)
+        values = []
+        for node in nodes:
+            member_id = res.get(node.id, None)
             if member_id is None:
                 action.data['status'] = base.CHECK_ERROR
                 action.data['reason'] = _('Failed in adding new node(s) '
                                           'into lb pool.')
-                return
+                continue
 
             node.data.update({'lb_member': member_id})
-            node.store(action.context)
+            values.append({'id': node.id, 'data': node.data})
+
+        # Record the members of all the nodes added with a single write
+        no.Node.update_all(action.context, values)
 
         return
@@ -17,7 +17,6 @@ NOTE: For full documentation about how the policy works, check:
 http://docs.openstack.org/developer/senlin/developer/policies/region_v1.html
 """
 
-import math
 from oslo_log import log as logging
 
 from senlin.common import consts
@@ -125,56 +124,12 @@ class RegionPlacementPolicy(base.Policy):
 
         :returns: A list of region names selected for the nodes.
         """
-        # sort candidate regions by distribution and covert it into a list
-        candidates = sorted(regions.items(), key=lambda x: x[1]['weight'],
-                            reverse=expand)
-        sum_weight = sum(r['weight'] for r in regions.values())
-        if expand:
-            total = count + sum(current.values())
-        else:
-            total = sum(current.values()) - count
-        remain = count
-        plan = dict.fromkeys(regions.keys(), 0)
-
-        for i in range(len(candidates)):
-            region = candidates[i]
-            r_name = region[0]
-            r_weight = region[1]['weight']
-            r_cap = region[1]['cap']
-
-            # maximum number of nodes on current region
-            q = total * r_weight / float(sum_weight)
-            if expand:
-                quota = int(math.ceil(q))
-                # respect the cap setting, if any
-                if r_cap >= 0:
-                    quota = min(quota, r_cap)
-                headroom = quota - current[r_name]
-            else:
-                quota = int(math.floor(q))
-                headroom = current[r_name] - quota
-
-            if headroom <= 0:
-                continue
-
-            if headroom < remain:
-                plan[r_name] = headroom
-                remain -= headroom
-            else:
-                plan[r_name] = remain if remain > 0 else 0
-                remain = 0
-                break
-
-        # we have leftovers
-        if remain > 0:
-            return None
-
-        result = {}
-        for reg, count in plan.items():
-            if count > 0:
-                result[reg] = count
-
-        return result
+        weights = dict((name, r[self.REGION_WEIGHT])
+                       for name, r in regions.items())
+        caps = dict((name, r[self.REGION_CAP])
+                    for name, r in regions.items())
+        return scaleutils.weighted_plan(current, weights, count, expand,
+                                        caps=caps)
 
     def _get_count(self, cluster_id, action):
         """Get number of nodes to create or delete.
@@ -17,9 +17,6 @@ NOTE: For full documentation about how the policy works, check:
 http://docs.openstack.org/developer/senlin/developer/policies/zone_v1.html
 """
 
-import math
-import operator
-
 from oslo_log import log as logging
 
 from senlin.common import consts
@@ -114,51 +111,7 @@ class ZonePlacementPolicy(base.Policy):
         :param current: Distribution of existing nodes.
         :returns: A dict that contains a placement plan.
         """
-        # sort candidate zones by distribution and covert it into a list
-        candidates = sorted(zones.items(), key=operator.itemgetter(1),
-                            reverse=expand)
-
-        sum_weight = sum(zones.values())
-        if expand:
-            total = count + sum(current.values())
-        else:
-            total = sum(current.values()) - count
-
-        remain = count
-        plan = dict.fromkeys(zones.keys(), 0)
-
-        for i in range(len(zones)):
-            zone = candidates[i][0]
-            weight = candidates[i][1]
-            q = total * weight / float(sum_weight)
-            if expand:
-                quota = int(math.ceil(q))
-                headroom = quota - current[zone]
-            else:
-                quota = int(math.floor(q))
-                headroom = current[zone] - quota
-
-            if headroom <= 0:
-                continue
-
-            if headroom < remain:
-                plan[zone] = headroom
-                remain -= headroom
-            else:
-                plan[zone] = remain if remain > 0 else 0
-                remain = 0
-                break
-
-        if remain > 0:
-            return None
-
-        # filter out zero values
-        result = {}
-        for z, c in plan.items():
-            if c > 0:
-                result[z] = c
-
-        return result
+        return scaleutils.weighted_plan(current, zones, count, expand)
 
     def _get_count(self, cluster_id, action):
         """Get number of nodes to create or delete.
@@ -12,11 +12,14 @@
 
 import copy
 
+import eventlet
+from oslo_config import cfg
 from oslo_context import context as oslo_context
 from oslo_log import log as logging
 from oslo_utils import timeutils
 import six
 
+from senlin.common import cache
 from senlin.common import consts
 from senlin.common import context
 from senlin.common import exception as exc
@@ -122,6 +125,22 @@ class Profile(object):
         self._networkclient = None
         self._orchestrationclient = None
 
+    def __copy__(self):
+        """Copy a profile without the clients it has built.
+
+        The clients carry the trust of the user and project they were built
+        for, so a copy builds its own. The parsed spec and properties are
+        shared between the copies and must not be modified.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.metadata = copy.copy(self.metadata)
+        obj.context = copy.copy(self.context)
+        obj._computeclient = None
+        obj._networkclient = None
+        obj._orchestrationclient = None
+        return obj
+
     @classmethod
     def from_object(cls, profile):
         '''Construct a profile from profile object.
@@ -151,7 +170,15 @@ class Profile(object):
             if profile is None:
                 raise exc.ResourceNotFound(type='profile', id=profile_id)
 
-        return cls.from_object(profile)
+        # Parsing the spec is expensive, reuse the cached one if the profile
+        # has not been updated since it was cached. The cached instance is
+        # never handed out, so that it never holds any client.
+        obj = cache.profiles.get(profile.id, profile.updated_at)
+        if obj is None:
+            obj = cls.from_object(profile)
+            cache.profiles.put(profile.id, profile.updated_at, obj)
+            obj = copy.copy(obj)
+        return obj
 
     @classmethod
     def load_all(cls, ctx, limit=None, marker=None, sort=None, filters=None,
@@ -219,6 +246,43 @@ class Profile(object):
         profile = cls.load(ctx, profile_id=obj.profile_id)
         return profile.do_get_details(obj)
 
+    @classmethod
+    def get_details_many(cls, ctx, objs):
+        """Get details of a batch of objects.
+
+        Objects are grouped by profile and owner so that each group is
+        served by one profile instance. Details retrieved are cached for a
+        short period of time and shared by all callers.
+
+        :param ctx: The request context.
+        :param objs: A list of node objects.
+        :returns: A dict with object ID as key and object details as value.
+        """
+        result = {}
+        groups = {}
+        for obj in objs:
+            if not obj.physical_id:
+                result[obj.id] = {}
+                continue
+            details = cache.details.get(obj.physical_id)
+            if details is not None:
+                result[obj.id] = details
+                continue
+            key = (obj.profile_id, obj.user, obj.project)
+            groups.setdefault(key, []).append(obj)
+
+        for (profile_id, user, project), group in groups.items():
+            profile = cls.load(ctx, profile_id=profile_id)
+            details = profile.do_get_details_many(group)
+            for obj in group:
+                res = details.get(obj.id, {})
+                # Don't cache errors so that they are retried next time
+                if res and 'Error' not in res:
+                    cache.details.put(obj.physical_id, res)
+                result[obj.id] = res
+
+        return result
+
     @classmethod
     def join_cluster(cls, ctx, obj, cluster_id):
         profile = cls.load(ctx, profile_id=obj.profile_id)
@@ -234,6 +298,35 @@ class Profile(object):
         profile = cls.load(ctx, profile_id=obj.profile_id)
         return profile.do_check(obj)
 
+    @classmethod
+    def check_objects(cls, ctx, objs):
+        """Check the health of a batch of objects.
+
+        Objects are grouped by profile and owner so that each group is
+        checked by one profile instance, with a bulk query to the backend
+        service when the profile supports it.
+
+        :param ctx: The request context.
+        :param objs: A list of node objects.
+        :returns: A dict with object ID as key and the check result as value,
+                  i.e. True if the object is healthy, False if it is not, or
+                  None if it couldn't be checked.
+        """
+        result = {}
+        groups = {}
+        for obj in objs:
+            if not obj.physical_id:
+                result[obj.id] = False
+                continue
+            key = (obj.profile_id, obj.user, obj.project)
+            groups.setdefault(key, []).append(obj)
+
+        for (profile_id, user, project), group in groups.items():
+            profile = cls.load(ctx, profile_id=profile_id)
+            result.update(profile.do_check_many(group))
+
+        return result
+
     @classmethod
     def recover_object(cls, ctx, obj, **options):
         profile = cls.load(ctx, profile_id=obj.profile_id)
@@ -346,11 +439,49 @@ class Profile(object):
         LOG.warning(_LW("Check operation not supported."))
         return True
 
+    def do_check_many(self, objs):
+        """Check a batch of objects.
+
+        Subclasses can override this with a bulk query to the backend
+        service. By default, `do_check` is invoked on the objects
+        concurrently using a bounded pool of green threads.
+
+        :param objs: A list of node objects.
+        :returns: A dict with object ID as key and True if the object is
+                  healthy, False if it is not, or None if it couldn't be
+                  checked.
+        """
+        def _check(obj):
+            try:
+                return self.do_check(obj)
+            except exc.EResourceOperation as ex:
+                LOG.warning(_LW('Failed in checking node %(node)s: %(ex)s'),
+                            {'node': obj.id, 'ex': six.text_type(ex)})
+                return None
+
+        pool = eventlet.GreenPool(max(cfg.CONF.max_details_fetches, 1))
+        results = pool.imap(_check, objs)
+        return dict((obj.id, res) for obj, res in zip(objs, results))
+
     def do_get_details(self, obj):
         """For subclass to override."""
         LOG.warning(_LW("Get_details operation not supported."))
         return {}
 
+    def do_get_details_many(self, objs):
+        """Get details of a batch of objects.
+
+        Subclasses can override this with a bulk query to the backend
+        service. By default, `do_get_details` is invoked on the objects
+        concurrently using a bounded pool of green threads.
+
+        :param objs: A list of node objects.
+        :returns: A dict with object ID as key and object details as value.
+        """
+        pool = eventlet.GreenPool(max(cfg.CONF.max_details_fetches, 1))
+        details = pool.imap(self.do_get_details, objs)
+        return dict((obj.id, res) for obj, res in zip(objs, details))
+
     def do_join(self, obj, cluster_id):
         """For subclass to override to perform extra operations."""
         LOG.warning(_LW("Join operation not specialized."))
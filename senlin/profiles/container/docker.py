@@ -76,6 +76,11 @@ class DockerProfile(base.Profile):
         self.host = None
         self.cluster = None
 
+    def __copy__(self):
+        obj = super(DockerProfile, self).__copy__()
+        obj._dockerclient = None
+        return obj
+
     def docker(self, obj):
         """Construct docker client based on object.
 
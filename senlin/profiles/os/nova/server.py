@@ -12,16 +12,21 @@
 
 import base64
 import copy
+import os
+import re
 
+from oslo_log import log as logging
 from oslo_utils import encodeutils
 import six
 
 from senlin.common import constraints
 from senlin.common import exception as exc
-from senlin.common.i18n import _
+from senlin.common.i18n import _, _LW
 from senlin.common import schema
 from senlin.profiles import base
 
+LOG = logging.getLogger(__name__)
+
 
 class ServerProfile(base.Profile):
     """Profile for an OpenStack Nova server."""
@@ -874,6 +879,93 @@ class ServerProfile(base.Profile):
         return True
 
     def do_get_details(self, obj):
+        if obj.physical_id is None or obj.physical_id == '':
+            return {}
+
+        driver = self.compute(obj)
+        try:
+            server = driver.server_get(obj.physical_id)
+        except exc.InternalError as ex:
+            return {
+                'Error': {
+                    'code': ex.code,
+                    'message': six.text_type(ex)
+                }
+            }
+
+        if server is None:
+            return {}
+        return self._server_details(server)
+
+    def _list_servers(self, objs):
+        """List the servers of a batch of objects.
+
+        The compute API cannot filter the servers by metadata, such as the
+        cluster ID, so the listing is narrowed by the names the servers were
+        given instead. They all start with the name of the profile, if any,
+        or else usually with the 'node-<cluster>-' prefix of the node names.
+        Without a common prefix, all the servers of the project are listed.
+        Servers renamed outside of Senlin are not listed, which is fine as
+        the callers get the servers not listed one by one.
+
+        :param objs: A list of node objects.
+        :returns: A dict with the physical IDs of the objects as keys and the
+                  servers listed as values.
+        """
+        names = set(self.properties[self.NAME] or o.name or '' for o in objs)
+        prefix = os.path.commonprefix(list(names))
+        # Keep the characters which are never special in a regex
+        prefix = re.match(r'[\w-]*', prefix).group(0)
+        query = {}
+        if prefix:
+            query['name'] = '^' + prefix
+            if names == set([prefix]):
+                query['name'] += '$'
+
+        wanted = set(o.physical_id for o in objs)
+        servers = {}
+        for server in self.compute(objs[0]).server_list(**query):
+            if server.id in wanted:
+                servers[server.id] = server
+        return servers
+
+    def do_get_details_many(self, objs):
+        """Get details of a batch of servers with one paginated listing.
+
+        The servers listed, see `_list_servers`, are matched against the
+        physical IDs of the objects. Servers not found are retrieved one by
+        one, so that deleted servers are reported the same way as in
+        `do_get_details`.
+
+        :param objs: A list of node objects.
+        :returns: A dict with object ID as key and object details as value.
+        """
+        objs = [o for o in objs if o.physical_id]
+        if len(objs) <= 1:
+            return super(ServerProfile, self).do_get_details_many(objs)
+
+        try:
+            servers = self._list_servers(objs)
+        except exc.InternalError as ex:
+            LOG.warning(_LW('Failed in listing servers: %s'),
+                        six.text_type(ex))
+            return super(ServerProfile, self).do_get_details_many(objs)
+
+        result = {}
+        missing = []
+        for obj in objs:
+            server = servers.get(obj.physical_id)
+            if server is None:
+                missing.append(obj)
+            else:
+                result[obj.id] = self._server_details(server)
+
+        if missing:
+            result.update(
+                super(ServerProfile, self).do_get_details_many(missing))
+        return result
+
+    def _server_details(self, server):
         known_keys = {
             'OS-DCF:diskConfig',
             'OS-EXT-AZ:availability_zone',
@@ -894,22 +986,6 @@ class ServerProfile(base.Profile):
             'status',
             'updated'
         }
-        if obj.physical_id is None or obj.physical_id == '':
-            return {}
-
-        driver = self.compute(obj)
-        try:
-            server = driver.server_get(obj.physical_id)
-        except exc.InternalError as ex:
-            return {
-                'Error': {
-                    'code': ex.code,
-                    'message': six.text_type(ex)
-                }
-            }
-
-        if server is None:
-            return {}
         server_data = server.to_dict()
         details = {
             'image': server_data['image']['id'],
@@ -1012,6 +1088,43 @@ class ServerProfile(base.Profile):
 
         return True
 
+    def do_check_many(self, objs):
+        """Check a batch of servers with one paginated listing.
+
+        A server listed, see `_list_servers`, is healthy if it is ACTIVE.
+        Servers not listed are checked one by one, the same way as in
+        `do_check`.
+
+        :param objs: A list of node objects.
+        :returns: A dict with object ID as key and the check result as value.
+        """
+        result = dict((o.id, False) for o in objs if not o.physical_id)
+        objs = [o for o in objs if o.physical_id]
+        if len(objs) <= 1:
+            result.update(super(ServerProfile, self).do_check_many(objs))
+            return result
+
+        try:
+            servers = self._list_servers(objs)
+        except exc.InternalError as ex:
+            LOG.warning(_LW('Failed in listing servers: %s'),
+                        six.text_type(ex))
+            result.update(super(ServerProfile, self).do_check_many(objs))
+            return result
+
+        missing = []
+        for obj in objs:
+            server = servers.get(obj.physical_id)
+            if server is None:
+                missing.append(obj)
+            else:
+                result[obj.id] = server.status == 'ACTIVE'
+
+        if missing:
+            result.update(
+                super(ServerProfile, self).do_check_many(missing))
+        return result
+
     def do_recover(self, obj, **options):
         # NOTE: We do a 'get' not a 'pop' here, because the operations may
         #       get fall back to the base class for handling
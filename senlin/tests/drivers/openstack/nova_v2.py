@@ -185,6 +185,9 @@ class NovaClient(base.DriverBase):
     def server_get(self, server):
         return sdk.FakeResourceObject(self.fake_server_get)
 
+    def server_list(self, details=True, **query):
+        return [sdk.FakeResourceObject(self.fake_server_get)]
+
     def wait_for_server(self, server, timeout=None):
         return
 
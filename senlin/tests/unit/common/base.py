@@ -23,7 +23,11 @@ import six
 import testscenarios
 import testtools
 
+from senlin.common import cache
+from senlin.common import membership
 from senlin.common import messaging
+from senlin.drivers.openstack import sdk
+from senlin.engine import action_graph
 from senlin.engine import scheduler
 from senlin.tests.unit.common import utils
 
@@ -81,6 +85,14 @@ class SenlinTestCase(testscenarios.WithScenarios,
         utils.setup_dummy_db()
         self.addCleanup(utils.reset_dummy_db)
 
+        cache.profiles.clear()
+        cache.policies.clear()
+        cache.details.clear()
+        cache.placements.clear()
+        membership.view.clear()
+        sdk.connections.clear()
+        action_graph.graph.clear()
+
     def stub_wallclock(self):
         # Overrides scheduler wallclock to speed up tests expecting timeouts.
         self._wallclock = time.time()
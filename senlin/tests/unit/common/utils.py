@@ -13,6 +13,7 @@
 import random
 import string
 
+import fixtures
 from oslo_config import cfg
 from oslo_db import options
 from oslo_utils import timeutils
@@ -47,6 +48,32 @@ def reset_dummy_db():
         engine.execute(table.delete())
 
 
+class QueryCounter(fixtures.Fixture):
+    """Fixture counting the SQL statements sent to the database.
+
+    The connection liveness checks done by oslo.db are not counted.
+    """
+
+    def _setUp(self):
+        self.statements = []
+        self.engine = db_api.get_engine()
+        sqlalchemy.event.listen(self.engine, 'before_cursor_execute',
+                                self._record)
+        self.addCleanup(sqlalchemy.event.remove, self.engine,
+                        'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, *args):
+        if statement.strip().upper() != 'SELECT 1':
+            self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements = []
+
+
 def dummy_context(user=None, project=None, password=None, roles=None,
                   user_id=None, trust_id=None, region_name=None, domain=None,
                   is_admin=False):
@@ -12,11 +12,13 @@
 
 import time
 
+from oslo_utils import uuidutils
 import six
 
 from senlin.common import consts
 from senlin.common import exception
 from senlin.db.sqlalchemy import api as db_api
+from senlin.db.sqlalchemy import models
 from senlin.engine import parser
 from senlin.tests.unit.common import base
 from senlin.tests.unit.common import utils
@@ -55,6 +57,49 @@ class DBAPIActionTest(base.SenlinTestCase):
         self.assertEqual(self.ctx.domain, action.domain)
         self.assertIsNone(action.outputs)
 
+    def test_action_create_all(self):
+        data = parser.simple_parse(shared.sample_action)
+        data['user'] = self.ctx.user
+        data['project'] = self.ctx.project
+        data['domain'] = self.ctx.domain
+        values = []
+        for i in range(3):
+            v = dict(data, name='action-%s' % i, status=consts.ACTION_READY)
+            values.append(v)
+
+        res = db_api.action_create_all(self.ctx, values)
+
+        self.assertEqual(3, len(res))
+        for i, action_id in enumerate(res):
+            action = db_api.action_get(self.ctx, action_id)
+            self.assertEqual('action-%s' % i, action.name)
+            self.assertEqual(consts.ACTION_READY, action.status)
+            self.assertEqual(data['target'], action.target)
+
+    def test_action_create_all_with_dependencies(self):
+        parent = _create_action(self.ctx)
+        data = parser.simple_parse(shared.sample_action)
+        data['user'] = self.ctx.user
+        data['project'] = self.ctx.project
+        data['domain'] = self.ctx.domain
+        values = [dict(data, id=aid, status=consts.ACTION_READY)
+                  for aid in ('CHILD_1', 'CHILD_2')]
+        deps = [('CHILD_1', parent.id), ('CHILD_2', parent.id),
+                ('CHILD_1', 'CHILD_2')]
+
+        res = db_api.action_create_all(self.ctx, values, dependencies=deps)
+
+        self.assertEqual(['CHILD_1', 'CHILD_2'], res)
+        depended = db_api.dependency_get_depended(self.ctx, parent.id)
+        self.assertEqual(set(['CHILD_1', 'CHILD_2']), set(depended))
+        depended = db_api.dependency_get_depended(self.ctx, 'CHILD_2')
+        self.assertEqual(['CHILD_1'], depended)
+        # Only dependents created out of this batch are set to WAITING
+        action = db_api.action_get(self.ctx, parent.id)
+        self.assertEqual(consts.ACTION_WAITING, action.status)
+        action = db_api.action_get(self.ctx, 'CHILD_2')
+        self.assertEqual(consts.ACTION_READY, action.status)
+
     def test_action_update(self):
         action = _create_action(self.ctx)
         values = {
@@ -122,6 +167,60 @@ class DBAPIActionTest(base.SenlinTestCase):
         self.assertEqual(consts.ACTION_RUNNING, action.status)
         self.assertEqual(timestamp, action.start_time)
 
+    def test_action_acquire_batch(self):
+        specs = [
+            {'name': 'A01', 'status': 'INIT'},
+            {'name': 'A02', 'status': 'READY', 'owner': 'worker1'},
+            {'name': 'A03', 'status': 'READY'},
+            {'name': 'A04', 'status': 'READY'},
+            {'name': 'A05', 'status': 'READY'},
+        ]
+
+        for spec in specs:
+            _create_action(self.ctx, **spec)
+
+        timestamp = time.time()
+        actions = db_api.action_acquire_batch(self.ctx, 'worker2', timestamp,
+                                              2)
+        self.assertEqual(2, len(actions))
+        for action in actions:
+            self.assertIn(action.name, ['A03', 'A04', 'A05'])
+            self.assertEqual('worker2', action.owner)
+            self.assertEqual(consts.ACTION_RUNNING, action.status)
+            self.assertEqual(timestamp, action.start_time)
+
+        actions = db_api.action_acquire_batch(self.ctx, 'worker3', timestamp,
+                                              2)
+        self.assertEqual(1, len(actions))
+        self.assertEqual('worker3', actions[0].owner)
+
+        actions = db_api.action_acquire_batch(self.ctx, 'worker3', timestamp,
+                                              2)
+        self.assertEqual([], actions)
+
+    def test_action_acquire_batch_multiple_workers(self):
+        for i in range(30):
+            _create_action(self.ctx, name='A%02d' % i, status='READY')
+
+        acquired = {}
+        workers = ['worker%s' % i for i in range(4)]
+        while True:
+            count = 0
+            for worker in workers:
+                actions = db_api.action_acquire_batch(self.ctx, worker,
+                                                      time.time(), 4)
+                for action in actions:
+                    # no action is ever acquired twice
+                    self.assertNotIn(action.id, acquired)
+                    acquired[action.id] = worker
+                count += len(actions)
+            if count == 0:
+                break
+
+        self.assertEqual(30, len(acquired))
+        for worker in workers:
+            self.assertIn(worker, acquired.values())
+
     def test_action_get_all_by_owner(self):
         specs = [
             {'name': 'A01', 'owner': 'work1'},
@@ -270,18 +369,57 @@ class DBAPIActionTest(base.SenlinTestCase):
         timestamp = time.time()
         id_of = self._check_dependency_add_dependent_list()
 
-        db_api.action_mark_succeeded(self.ctx, id_of['A01'], timestamp)
-
-        res = db_api.dependency_get_depended(self.ctx, id_of['A01'])
-        self.assertEqual(0, len(res))
+        res = db_api.action_mark_succeeded(self.ctx, id_of['A01'], timestamp)
 
+        self.assertEqual({id_of['A02']: None, id_of['A03']: None,
+                          id_of['A04']: None}, res)
         action = db_api.action_get(self.ctx, id_of['A01'])
         self.assertEqual(consts.ACTION_SUCCEEDED, action.status)
         self.assertEqual(timestamp, action.end_time)
 
+        # the dependencies are kept but no longer pending
         for aid in [id_of['A02'], id_of['A03'], id_of['A04']]:
-            res = db_api.dependency_get_dependents(self.ctx, aid)
-            self.assertEqual(0, len(res))
+            res = db_api.dependency_get_depended(self.ctx, aid)
+            self.assertEqual([id_of['A01']], res)
+            res = db_api.dependency_get_pending(self.ctx, aid)
+            self.assertEqual([], res)
+
+    def test_action_mark_succeeded_still_blocked(self):
+        timestamp = time.time()
+        id_of = self._check_dependency_add_depended_list()
+        db_api.action_update(self.ctx, id_of['A01'], {'owner': 'ENGINE'})
+
+        res = db_api.action_mark_succeeded(self.ctx, id_of['A02'], timestamp)
+        self.assertEqual({id_of['A01']: 'ENGINE'}, res)
+        res = db_api.action_mark_succeeded(self.ctx, id_of['A03'], timestamp)
+        self.assertEqual({id_of['A01']: 'ENGINE'}, res)
+
+        res = db_api.dependency_get_pending(self.ctx, id_of['A01'])
+        self.assertEqual([id_of['A04']], res)
+        status = db_api.action_check_status(self.ctx, id_of['A01'],
+                                            timestamp)
+        self.assertEqual(consts.ACTION_WAITING, status)
+
+        res = db_api.action_mark_succeeded(self.ctx, id_of['A04'], timestamp)
+        self.assertEqual({id_of['A01']: 'ENGINE'}, res)
+        res = db_api.dependency_get_pending(self.ctx, id_of['A01'])
+        self.assertEqual([], res)
+        status = db_api.action_check_status(self.ctx, id_of['A01'],
+                                            timestamp)
+        self.assertEqual(consts.ACTION_READY, status)
+
+    def test_dependency_delete(self):
+        timestamp = time.time()
+        id_of = self._check_dependency_add_depended_list()
+        for name in ('A02', 'A03'):
+            db_api.action_mark_succeeded(self.ctx, id_of[name], timestamp)
+
+        res = db_api.dependency_delete(self.ctx,
+                                       [id_of['A02'], id_of['A03']])
+
+        self.assertEqual(2, res)
+        res = db_api.dependency_get_depended(self.ctx, id_of['A01'])
+        self.assertEqual([id_of['A04']], res)
 
     def _prepare_action_mark_failed_cancel(self):
         specs = [
@@ -345,7 +483,12 @@ class DBAPIActionTest(base.SenlinTestCase):
     def test_action_mark_failed(self):
         timestamp = time.time()
         id_of = self._prepare_action_mark_failed_cancel()
-        db_api.action_mark_failed(self.ctx, id_of['A01'], timestamp)
+        db_api.action_update(self.ctx, id_of['A05'], {'owner': 'ENGINE'})
+
+        res = db_api.action_mark_failed(self.ctx, id_of['A01'], timestamp)
+
+        self.assertEqual({id_of['A05']: 'ENGINE', id_of['A06']: None,
+                          id_of['A07']: None}, res)
 
         for aid in [id_of['A05'], id_of['A06'], id_of['A07']]:
             action = db_api.action_get(self.ctx, aid)
@@ -355,10 +498,64 @@ class DBAPIActionTest(base.SenlinTestCase):
         result = db_api.dependency_get_dependents(self.ctx, id_of['A01'])
         self.assertEqual(0, len(result))
 
+    def test_action_mark_failed_wide_and_deep(self):
+        width, depth = 5000, 4
+        root = _create_action(self.ctx, status=consts.ACTION_RUNNING).id
+        actions = []
+        dependencies = []
+        parents = [root]
+        for i in range(depth):
+            level = [uuidutils.generate_uuid() for j in range(width)]
+            for j, action_id in enumerate(level):
+                actions.append({
+                    'id': action_id,
+                    'status': consts.ACTION_WAITING,
+                    'owner': 'ENGINE' if i == 0 else None,
+                })
+                dependencies.append({
+                    'id': uuidutils.generate_uuid(),
+                    'depended': parents[j % len(parents)],
+                    'dependent': action_id,
+                })
+            # an action depending on two actions of the previous level
+            if len(parents) > 1:
+                dependencies.append({
+                    'id': uuidutils.generate_uuid(),
+                    'depended': parents[0],
+                    'dependent': level[1],
+                })
+            parents = level
+
+        engine = db_api.get_engine()
+        engine.execute(models.Action.__table__.insert(), actions)
+        engine.execute(models.ActionDependency.__table__.insert(),
+                       dependencies)
+
+        with utils.QueryCounter() as counter:
+            res = db_api.action_mark_failed(self.ctx, root, time.time())
+
+        self.assertEqual(width * depth, len(res))
+        self.assertEqual(width, list(res.values()).count('ENGINE'))
+        # the number of statements grows with the number of chunks of each
+        # level, not with the number of actions
+        chunks = width // db_api.IN_LIST_LIMIT
+        self.assertLessEqual(counter.count, 1 + 4 * (1 + depth * chunks))
+
+        with db_api.session_for_read() as session:
+            query = session.query(models.Action).filter_by(
+                status=consts.ACTION_FAILED, owner=None)
+            self.assertEqual(width * depth + 1, query.count())
+            self.assertEqual(
+                0, session.query(models.ActionDependency).count())
+
     def test_action_mark_cancelled(self):
         timestamp = time.time()
         id_of = self._prepare_action_mark_failed_cancel()
-        db_api.action_mark_cancelled(self.ctx, id_of['A01'], timestamp)
+
+        res = db_api.action_mark_cancelled(self.ctx, id_of['A01'], timestamp)
+
+        self.assertEqual({id_of['A05']: None, id_of['A06']: None,
+                          id_of['A07']: None}, res)
 
         for aid in [id_of['A05'], id_of['A06'], id_of['A07']]:
             action = db_api.action_get(self.ctx, aid)
@@ -434,3 +631,47 @@ class DBAPIActionTest(base.SenlinTestCase):
         actions = db_api.action_get_all(self.ctx)
         self.assertEqual(1, len(actions))
         self.assertEqual('CLUSTER_DELETE', actions[0].action)
+
+    def test_action_purge(self):
+        now = time.time()
+        old = now - 3600
+        a1 = _create_action(self.ctx, status=consts.ACTION_SUCCEEDED,
+                            end_time=old)
+        a2 = _create_action(self.ctx, status=consts.ACTION_FAILED,
+                            end_time=old)
+        a3 = _create_action(self.ctx, status=consts.ACTION_CANCELLED,
+                            end_time=now)
+        a4 = _create_action(self.ctx, status=consts.ACTION_RUNNING,
+                            end_time=old)
+        db_api.dependency_add(self.ctx, a1.id, a4.id)
+
+        res = db_api.action_purge(self.ctx, now - 60, dry_run=True)
+        self.assertEqual(2, res)
+        self.assertEqual(4, len(db_api.action_get_all(self.ctx)))
+
+        res = db_api.action_purge(self.ctx, now - 60, chunk_size=1)
+        self.assertEqual(2, res)
+        actions = db_api.action_get_all(self.ctx)
+        self.assertEqual(set([a3.id, a4.id]), set(a.id for a in actions))
+        self.assertIsNone(db_api.action_get(self.ctx, a2.id))
+        self.assertEqual([], db_api.dependency_get_depended(self.ctx, a4.id))
+
+    def test_dependency_purge(self):
+        a1 = _create_action(self.ctx)
+        a2 = _create_action(self.ctx)
+        a3 = _create_action(self.ctx)
+        a4 = _create_action(self.ctx)
+        db_api.dependency_add(self.ctx, [a1.id, a2.id], a3.id)
+        db_api.dependency_add(self.ctx, a1.id, a4.id)
+        db_api.action_update(self.ctx, a4.id,
+                             {'status': consts.ACTION_FAILED})
+
+        res = db_api.dependency_purge(self.ctx, dry_run=True)
+        self.assertEqual(1, res)
+        res = db_api.dependency_purge(self.ctx)
+        self.assertEqual(1, res)
+
+        self.assertEqual([], db_api.dependency_get_depended(self.ctx, a4.id))
+        self.assertEqual(set([a1.id, a2.id]),
+                         set(db_api.dependency_get_depended(self.ctx, a3.id)))
+        self.assertEqual(0, db_api.dependency_purge(self.ctx))
@@ -310,6 +310,16 @@ class DBAPIClusterTest(base.SenlinTestCase):
         res = db_api.cluster_get(self.ctx, cluster_id)
         self.assertEqual(3, res.next_index)
 
+    def test_cluster_next_index_count(self):
+        cluster = shared.create_cluster(self.ctx, self.profile)
+        cluster_id = cluster.id
+        res = db_api.cluster_next_index(self.ctx, cluster_id, 5)
+        self.assertEqual(1, res)
+        res = db_api.cluster_get(self.ctx, cluster_id)
+        self.assertEqual(6, res.next_index)
+        res = db_api.cluster_next_index(self.ctx, cluster_id)
+        self.assertEqual(6, res)
+
     def test_cluster_count_all(self):
         clusters = [shared.create_cluster(self.ctx, self.profile)
                     for i in range(3)]
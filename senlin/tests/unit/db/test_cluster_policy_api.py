@@ -223,3 +223,22 @@ class DBAPIClusterPolicyTest(base.SenlinTestCase):
                                                     'ScalingPolicy',
                                                     filters=filters)
         self.assertEqual(0, len(results))
+
+    def test_cluster_policy_ids_by_cluster(self):
+        cluster2 = shared.create_cluster(self.ctx, self.profile)
+        cluster3 = shared.create_cluster(self.ctx, self.profile)
+        policy1 = self.create_policy()
+        policy2 = self.create_policy()
+        db_api.cluster_policy_attach(self.ctx, self.cluster.id, policy1.id,
+                                     {})
+        db_api.cluster_policy_attach(self.ctx, self.cluster.id, policy2.id,
+                                     {})
+        db_api.cluster_policy_attach(self.ctx, cluster2.id, policy1.id, {})
+
+        res = db_api.cluster_policy_ids_by_cluster(
+            self.ctx, [self.cluster.id, cluster2.id, cluster3.id])
+
+        self.assertEqual(set([policy1.id, policy2.id]),
+                         set(res[self.cluster.id]))
+        self.assertEqual([policy1.id], res[cluster2.id])
+        self.assertEqual([], res[cluster3.id])
@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 from oslo_log import log as logging
 from oslo_utils import reflection
 from oslo_utils import timeutils as tu
@@ -87,6 +89,34 @@ class DBAPIEventTest(base.SenlinTestCase):
         self.assertEqual(self.ctx.user, ret_event.user)
         self.assertEqual(self.ctx.project, ret_event.project)
 
+    def test_event_create_all(self):
+        timestamp = tu.utcnow(True)
+        values_list = [{
+            'timestamp': timestamp,
+            'level': logging.INFO,
+            'oid': UUID1,
+            'otype': 'CLUSTER',
+            'action': 'CLUSTER_CREATE',
+            'status': 'START',
+            'user': self.ctx.user,
+            'project': self.ctx.project,
+            'meta_data': {'index': i},
+        } for i in range(3)]
+        values_list[0]['id'] = UUID2
+
+        ids = db_api.event_create_all(self.ctx, values_list)
+
+        self.assertEqual(3, len(ids))
+        self.assertEqual(UUID2, ids[0])
+        for i, event_id in enumerate(ids):
+            event = db_api.event_get(self.ctx, event_id)
+            self.assertEqual('20', event.level)
+            self.assertEqual(UUID1, event.oid)
+            self.assertEqual('CLUSTER_CREATE', event.action)
+            self.assertEqual({'index': i}, event.meta_data)
+        # the values passed in are not changed
+        self.assertNotIn('id', values_list[1])
+
     def test_event_get_diff_project(self):
         event = self.create_event(self.ctx)
         new_ctx = utils.dummy_context(project='a-different-project')
@@ -520,3 +550,54 @@ class DBAPIEventTest(base.SenlinTestCase):
         db_api.event_prune(self.ctx, cluster1.id)
         res = db_api.event_get_all_by_cluster(self.ctx, cluster1.id)
         self.assertEqual(0, len(res))
+
+    def test_event_purge(self):
+        now = tu.utcnow(True)
+        old = now - datetime.timedelta(days=10)
+        self.create_event(self.ctx, timestamp=old)
+        self.create_event(self.ctx, timestamp=old, level=logging.DEBUG)
+        self.create_event(self.ctx, timestamp=old, level=logging.ERROR)
+        self.create_event(self.ctx, timestamp=now)
+        older_than = now - datetime.timedelta(days=5)
+
+        res = db_api.event_purge(self.ctx, older_than, dry_run=True)
+        self.assertEqual(3, res)
+        self.assertEqual(4, len(db_api.event_get_all(self.ctx)))
+
+        res = db_api.event_purge(self.ctx, older_than,
+                                 levels=[logging.DEBUG, logging.INFO],
+                                 chunk_size=1)
+        self.assertEqual(2, res)
+        events = db_api.event_get_all(self.ctx)
+        self.assertEqual(2, len(events))
+
+        res = db_api.event_purge(self.ctx, older_than)
+        self.assertEqual(1, res)
+        events = db_api.event_get_all(self.ctx)
+        self.assertEqual(1, len(events))
+        self.assertEqual(tu.isotime(now), tu.isotime(events[0].timestamp))
+
+    def test_event_purge_by_cluster(self):
+        cluster1 = shared.create_cluster(self.ctx, self.profile)
+        cluster2 = shared.create_cluster(self.ctx, self.profile)
+        now = tu.utcnow(True)
+        for i in range(5):
+            timestamp = now - datetime.timedelta(seconds=i)
+            self.create_event(self.ctx, timestamp=timestamp, entity=cluster1)
+        self.create_event(self.ctx, entity=cluster2)
+        self.create_event(self.ctx)
+        self.create_event(self.ctx)
+
+        res = db_api.event_purge_by_cluster(self.ctx, 2, dry_run=True)
+        self.assertEqual(3, res)
+
+        res = db_api.event_purge_by_cluster(self.ctx, 2, chunk_size=2)
+        self.assertEqual(3, res)
+        events = db_api.event_get_all_by_cluster(self.ctx, cluster1.id)
+        self.assertEqual(2, len(events))
+        timestamps = sorted(tu.isotime(e.timestamp) for e in events)
+        self.assertEqual([tu.isotime(now - datetime.timedelta(seconds=1)),
+                          tu.isotime(now)], timestamps)
+        res = db_api.event_get_all_by_cluster(self.ctx, cluster2.id)
+        self.assertEqual(1, len(res))
+        self.assertEqual(4, len(db_api.event_get_all(self.ctx)))
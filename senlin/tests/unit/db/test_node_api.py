@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 import mock
 from oslo_db.sqlalchemy import utils as sa_utils
 from oslo_serialization import jsonutils
@@ -57,6 +59,41 @@ class DBAPINodeTest(base.SenlinTestCase):
         nodes = db_api.node_get_all_by_cluster(self.ctx, self.cluster.id)
         self.assertEqual(1, len(nodes))
 
+    def test_node_create_all(self):
+        values = [{
+            'name': 'node-%s' % i,
+            'cluster_id': self.cluster.id,
+            'profile_id': self.profile.id,
+            'index': i,
+            'status': 'INIT',
+            'init_at': tu.utcnow(True),
+        } for i in range(3)]
+
+        res = db_api.node_create_all(self.ctx, values)
+
+        self.assertEqual(3, len(res))
+        for i, node_id in enumerate(res):
+            node = db_api.node_get(self.ctx, node_id)
+            self.assertEqual('node-%s' % i, node.name)
+            self.assertEqual(i, node.index)
+            self.assertEqual(self.cluster.id, node.cluster_id)
+        nodes = db_api.node_get_all_by_cluster(self.ctx, self.cluster.id)
+        self.assertEqual(3, len(nodes))
+
+    def test_node_create_all_with_id(self):
+        values = [{
+            'id': UUID2,
+            'name': 'node-1',
+            'cluster_id': self.cluster.id,
+            'profile_id': self.profile.id,
+            'status': 'INIT',
+        }]
+
+        res = db_api.node_create_all(self.ctx, values)
+
+        self.assertEqual([UUID2], res)
+        self.assertIsNotNone(db_api.node_get(self.ctx, UUID2))
+
     def test_node_get(self):
         res = shared.create_node(self.ctx, self.cluster, self.profile)
         node = db_api.node_get(self.ctx, res.id)
@@ -399,6 +436,76 @@ class DBAPINodeTest(base.SenlinTestCase):
         res = db_api.node_count_by_cluster(ctx_new, self.cluster.id)
         self.assertEqual(0, res)
 
+    def test_node_ids_by_cluster(self):
+        cluster2 = shared.create_cluster(self.ctx, self.profile)
+        cluster3 = shared.create_cluster(self.ctx, self.profile)
+        now = tu.utcnow(True)
+        node1 = shared.create_node(self.ctx, self.cluster, self.profile,
+                                   init_at=now)
+        node2 = shared.create_node(self.ctx, self.cluster, self.profile,
+                                   init_at=now - datetime.timedelta(1))
+        node3 = shared.create_node(self.ctx, cluster2, self.profile)
+        shared.create_node(self.ctx, None, self.profile)
+
+        res = db_api.node_ids_by_cluster(
+            self.ctx, [self.cluster.id, cluster2.id, cluster3.id])
+
+        self.assertEqual({self.cluster.id: [node2.id, node1.id],
+                          cluster2.id: [node3.id],
+                          cluster3.id: []}, res)
+        self.assertEqual({}, db_api.node_ids_by_cluster(self.ctx, []))
+
+    def test_node_ids_for_deletion(self):
+        now = tu.utcnow(True)
+        old_profile = shared.create_profile(
+            self.ctx, created_at=now - datetime.timedelta(days=10))
+        self.profile = db_api.profile_update(self.ctx, self.profile.id,
+                                             {'created_at': now})
+        ids = []
+
+        def create(delta, **kwargs):
+            created_at = None if delta is None else (
+                now - datetime.timedelta(days=delta))
+            kwargs.setdefault('profile_id', self.profile.id)
+            return shared.create_node(
+                self.ctx, self.cluster, self.profile, created_at=created_at,
+                init_at=now - datetime.timedelta(seconds=10 - len(ids)),
+                **kwargs).id
+
+        ids.append(create(3))
+        ids.append(create(0, status='ERROR'))
+        ids.append(create(None))
+        ids.append(create(1, profile_id=old_profile.id))
+        ids.append(create(2))
+        n1, n2, n3, n4, n5 = ids
+        shared.create_node(self.ctx, None, self.profile)
+
+        def victims(count, order):
+            return db_api.node_ids_for_deletion(self.ctx, self.cluster.id,
+                                                count, order)
+
+        # failed nodes first, then nodes not created yet
+        self.assertEqual([n2], victims(1, 'created_at'))
+        self.assertEqual([n2, n3], victims(2, '-created_at'))
+        self.assertEqual([n2, n3, n1, n5, n4], victims(5, 'created_at'))
+        self.assertEqual([n2, n3, n4, n5], victims(4, '-created_at'))
+        self.assertEqual([n2, n3, n4, n1],
+                         victims(4, 'profile_created_at'))
+        self.assertEqual([n2, n3, n1, n5, n4], victims(10, 'created_at'))
+
+        res = victims(10, 'random')
+        self.assertEqual([n2, n3], res[:2])
+        self.assertEqual(set([n1, n4, n5]), set(res[2:]))
+        self.assertEqual(3, len(victims(3, 'random')))
+
+        ctx_new = utils.dummy_context(project='a_different_project')
+        res = db_api.node_ids_for_deletion(ctx_new, self.cluster.id, 10,
+                                           'created_at')
+        self.assertEqual([], res)
+        res = db_api.node_ids_for_deletion(ctx_new, self.cluster.id, 10,
+                                           'created_at', project_safe=False)
+        self.assertEqual(5, len(res))
+
         res = db_api.node_count_by_cluster(ctx_new, self.cluster.id,
                                            project_safe=False)
         self.assertEqual(2, res)
@@ -439,6 +546,23 @@ class DBAPINodeTest(base.SenlinTestCase):
         self.assertEqual('The node (BogusId) could not be found.',
                          six.text_type(ex))
 
+    def test_node_update_all(self):
+        node1 = shared.create_node(self.ctx, self.cluster, self.profile)
+        node2 = shared.create_node(self.ctx, self.cluster, self.profile)
+
+        db_api.node_update_all(self.ctx, [
+            {'id': node1.id, 'data': {'lb_member': 'MEMBER_1'}},
+            {'id': node2.id, 'data': {'lb_member': 'MEMBER_2'}},
+        ])
+
+        node = db_api.node_get(self.ctx, node1.id)
+        self.assertEqual({'lb_member': 'MEMBER_1'}, node.data)
+        node = db_api.node_get(self.ctx, node2.id)
+        self.assertEqual({'lb_member': 'MEMBER_2'}, node.data)
+        # the cluster status is not touched
+        cluster = db_api.cluster_get(self.ctx, self.cluster.id)
+        self.assertEqual('INIT', cluster.status)
+
     def test_node_update_cluster_status_updated(self):
         cluster = db_api.cluster_get(self.ctx, self.cluster.id)
         self.assertEqual('INIT', cluster.status)
@@ -49,6 +49,16 @@ class DBAPIProfileTest(base.SenlinTestCase):
         res = db_api.profile_get(new_ctx, profile.id)
         self.assertIsNone(res)
 
+    def test_profile_get_names(self):
+        profile1 = shared.create_profile(self.ctx, name='p1')
+        profile2 = shared.create_profile(self.ctx, name='p2')
+
+        res = db_api.profile_get_names(self.ctx, [profile1.id, profile2.id,
+                                                  'non-existent'])
+
+        self.assertEqual({profile1.id: 'p1', profile2.id: 'p2'}, res)
+        self.assertEqual({}, db_api.profile_get_names(self.ctx, []))
+
         res = db_api.profile_get(new_ctx, profile.id, project_safe=False)
         self.assertIsNotNone(res)
         self.assertEqual(profile.id, res.id)
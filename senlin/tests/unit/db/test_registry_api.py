@@ -46,7 +46,8 @@ class DBAPIRegistryTest(base.SenlinTestCase):
         self.assertEqual(registry.params, ret_registry.params)
         self.assertEqual(registry.engine_id, ret_registry.engine_id)
 
-    def test_registry_claim(self):
+    @mock.patch.object(db_utils, 'is_service_dead', return_value=True)
+    def test_registry_claim(self, mock_check):
         for i in range(2):
             cluster_id = 'cluster-%s' % i
             self._create_registry(cluster_id=cluster_id,
@@ -77,6 +78,109 @@ class DBAPIRegistryTest(base.SenlinTestCase):
         self.assertEqual(1, len(registries))
         self.assertEqual('ENGINE_ID', registries[0].engine_id)
 
+    def test_registry_claim_sharded(self):
+        db_api.service_create(self.ctx, 'ENGINE_1')
+        db_api.service_create(self.ctx, 'ENGINE_2')
+        cluster_ids = ['CLUSTER_%s' % i for i in range(300)]
+        for cluster_id in cluster_ids:
+            self._create_registry(cluster_id, 'NODE_STATUS_POLLING', 60, {},
+                                  'DEAD_ENGINE')
+
+        claimed = {}
+        for engine_id in ('ENGINE_1', 'ENGINE_2', 'SERVICE_ID'):
+            registries = db_api.registry_claim(self.ctx, engine_id)
+            claimed[engine_id] = [r.cluster_id for r in registries]
+            for r in registries:
+                self.assertEqual(engine_id, r.engine_id)
+
+        # each registry claimed once, about a third by each engine
+        self.assertEqual(sorted(cluster_ids),
+                         sorted(c for ids in claimed.values() for c in ids))
+        for ids in claimed.values():
+            self.assertTrue(50 < len(ids) < 150, len(ids))
+        self.assertEqual(
+            [], db_api.registry_get_by_engine(self.ctx, 'DEAD_ENGINE'))
+
+    def test_registry_claim_not_owned(self):
+        db_api.service_create(self.ctx, 'ENGINE_1')
+        cluster_ids = ['CLUSTER_%s' % i for i in range(100)]
+        for cluster_id in cluster_ids:
+            self._create_registry(cluster_id, 'NODE_STATUS_POLLING', 60, {},
+                                  'DEAD_ENGINE')
+
+        registries = db_api.registry_claim(self.ctx, 'ENGINE_1')
+
+        # The registries not falling to the engine are left to the others
+        self.assertTrue(0 < len(registries) < 100)
+        left = db_api.registry_get_by_engine(self.ctx, 'DEAD_ENGINE')
+        self.assertEqual(100, len(registries) + len(left))
+
+    def test_registry_claim_none_dead(self):
+        self._create_registry('CLUSTER_ID', 'NODE_STATUS_POLLING', 60, {},
+                              'SERVICE_ID')
+
+        self.assertEqual([], db_api.registry_claim(self.ctx, 'ENGINE_ID'))
+
+    @mock.patch.object(db_utils, 'is_service_dead')
+    def test_registry_claim_engines_given(self, mock_check):
+        self._create_registry('CLUSTER_1', 'NODE_STATUS_POLLING', 60, {},
+                              'ENGINE_1')
+        self._create_registry('CLUSTER_2', 'NODE_STATUS_POLLING', 60, {},
+                              'DEAD_ENGINE')
+
+        registries = db_api.registry_claim(self.ctx, 'ENGINE_1',
+                                           engine_ids=['ENGINE_1'])
+
+        # the engines given are trusted, the service table is not read
+        self.assertFalse(mock_check.called)
+        self.assertEqual(['CLUSTER_2'], [r.cluster_id for r in registries])
+        self.assertEqual(
+            [], db_api.registry_get_by_engine(self.ctx, 'DEAD_ENGINE'))
+
+    def test_registry_get_by_engine(self):
+        self._create_registry('CLUSTER_1', 'NODE_STATUS_POLLING', 60, {},
+                              'ENGINE_1')
+        self._create_registry('CLUSTER_2', 'NODE_STATUS_POLLING', 60, {},
+                              'ENGINE_2')
+
+        res = db_api.registry_get_by_engine(self.ctx, 'ENGINE_1')
+
+        self.assertEqual(['CLUSTER_1'], [r.cluster_id for r in res])
+        self.assertEqual([], db_api.registry_get_by_engine(self.ctx, 'FAKE'))
+
+    def test_registry_handoff(self):
+        self._create_registry('CLUSTER_ID', 'NODE_STATUS_POLLING', 60, {},
+                              'ENGINE_1')
+
+        res = db_api.registry_handoff(self.ctx, 'CLUSTER_ID', 'ENGINE_1',
+                                      'ENGINE_2')
+
+        self.assertTrue(res)
+        res = db_api.registry_get_by_engine(self.ctx, 'ENGINE_2')
+        self.assertEqual(['CLUSTER_ID'], [r.cluster_id for r in res])
+
+    def test_registry_handoff_not_owner(self):
+        self._create_registry('CLUSTER_ID', 'NODE_STATUS_POLLING', 60, {},
+                              'ENGINE_3')
+
+        res = db_api.registry_handoff(self.ctx, 'CLUSTER_ID', 'ENGINE_1',
+                                      'ENGINE_2')
+
+        self.assertFalse(res)
+        res = db_api.registry_get_by_engine(self.ctx, 'ENGINE_3')
+        self.assertEqual(['CLUSTER_ID'], [r.cluster_id for r in res])
+
+    def test_registry_count_by_engine(self):
+        for i in range(3):
+            self._create_registry('CLUSTER_%s' % i, 'NODE_STATUS_POLLING',
+                                  60, {}, 'ENGINE_1')
+        self._create_registry('CLUSTER_3', 'NODE_STATUS_POLLING', 60, {},
+                              'ENGINE_2')
+
+        res = db_api.registry_count_by_engine(self.ctx)
+
+        self.assertEqual({'ENGINE_1': 3, 'ENGINE_2': 1}, res)
+
     def test_registry_delete(self):
         registry = self._create_registry('CLUSTER_ID',
                                          check_type='NODE_STATUS_POLLING',
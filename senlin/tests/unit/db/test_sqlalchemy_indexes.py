@@ -0,0 +1,201 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+from oslo_utils import timeutils as tu
+import sqlalchemy
+
+from senlin.common import consts
+from senlin.db.sqlalchemy import api as db_api
+from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
+from senlin.tests.unit.db import shared
+
+
+class IndexUsageTest(base.SenlinTestCase):
+    """Check that the hot queries are served by indexes.
+
+    The statements issued by a DB API function are captured and explained
+    with SQLite's 'EXPLAIN QUERY PLAN'. A table accessed without any index
+    shows up in the plan as 'SCAN <table>' with no 'USING' clause.
+    """
+
+    def setUp(self):
+        super(IndexUsageTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.profile = shared.create_profile(self.ctx)
+        self.cluster = shared.create_cluster(self.ctx, self.profile)
+        for i in range(3):
+            shared.create_node(self.ctx, self.cluster, self.profile)
+            shared.create_node(self.ctx, None, self.profile)
+
+        self.engine = db_api.get_engine()
+        self.statements = []
+
+    def _create_action(self, **kwargs):
+        values = {
+            'name': 'test_action',
+            'target': self.cluster.id,
+            'action': 'CLUSTER_CREATE',
+            'status': consts.ACTION_INIT,
+            'user': self.ctx.user,
+            'project': self.ctx.project,
+        }
+        values.update(kwargs)
+        return db_api.action_create(self.ctx, values)
+
+    def _create_event(self, **kwargs):
+        values = {
+            'timestamp': tu.utcnow(True),
+            'oid': self.cluster.id,
+            'otype': 'CLUSTER',
+            'cluster_id': self.cluster.id,
+            'level': '20',
+            'user': self.ctx.user,
+            'project': self.ctx.project,
+        }
+        values.update(kwargs)
+        return db_api.event_create(self.ctx, values)
+
+    def _capture(self, conn, cursor, statement, parameters, context,
+                 executemany):
+        if not executemany:
+            self.statements.append((statement, parameters))
+
+    def _explain(self, table, func, *args, **kwargs):
+        self.statements = []
+        sqlalchemy.event.listen(self.engine, 'before_cursor_execute',
+                                self._capture)
+        try:
+            func(self.ctx, *args, **kwargs)
+        finally:
+            sqlalchemy.event.remove(self.engine, 'before_cursor_execute',
+                                    self._capture)
+
+        plans = []
+        conn = self.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            for statement, parameters in self.statements:
+                words = statement.split()
+                if words[0].upper() not in ('SELECT', 'UPDATE', 'DELETE'):
+                    continue
+                if table not in statement:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+                plans.append([row[-1] for row in cursor.fetchall()])
+        finally:
+            conn.close()
+
+        self.assertNotEqual([], plans)
+        return plans
+
+    def _check(self, table, index, func, *args, **kwargs):
+        plans = self._explain(table, func, *args, **kwargs)
+
+        used = False
+        for plan in plans:
+            for detail in plan:
+                words = detail.split()
+                if words[0] == 'SCAN' and table in words:
+                    self.assertIn('USING', words,
+                                  'Full scan of %s: %s' % (table, plan))
+                if index in words:
+                    used = True
+        self.assertTrue(used, '%s not used: %s' % (index, plans))
+
+    def test_action_acquire_1st_ready(self):
+        self._create_action(status=consts.ACTION_READY)
+
+        self._check('action', 'ix_action_status_owner',
+                    db_api.action_acquire_1st_ready, 'WORKER', time.time())
+
+    def test_action_acquire_batch(self):
+        self._create_action(status=consts.ACTION_READY)
+
+        self._check('action', 'ix_action_status_owner',
+                    db_api.action_acquire_batch, 'WORKER', time.time(), 10)
+
+    def test_action_delete_by_target(self):
+        self._create_action()
+
+        self._check('action', 'ix_action_target',
+                    db_api.action_delete_by_target, self.cluster.id)
+
+    def test_action_check_status(self):
+        a1 = self._create_action()
+        a2 = self._create_action()
+        db_api.dependency_add(self.ctx, a1.id, a2.id)
+
+        self._check('dependency', 'ix_dependency_dependent',
+                    db_api.action_check_status, a2.id, time.time())
+
+    def test_action_mark_failed(self):
+        a1 = self._create_action()
+        a2 = self._create_action()
+        db_api.dependency_add(self.ctx, a1.id, a2.id)
+
+        self._check('dependency', 'ix_dependency_depended',
+                    db_api.action_mark_failed, a1.id, time.time())
+
+    def test_dependency_get_dependents(self):
+        a1 = self._create_action()
+        a2 = self._create_action()
+        db_api.dependency_add(self.ctx, a1.id, a2.id)
+
+        self._check('dependency', 'ix_dependency_depended',
+                    db_api.dependency_get_dependents, a1.id)
+
+    def test_node_get_all_by_cluster(self):
+        self._check('node', 'ix_node_cluster_id',
+                    db_api.node_get_all, cluster_id=self.cluster.id)
+
+    def test_node_count_by_cluster(self):
+        self._check('node', 'ix_node_cluster_id',
+                    db_api.node_count_by_cluster, self.cluster.id)
+
+    def test_node_ids_for_deletion_failed(self):
+        self._check('node', 'ix_node_cluster_id_status',
+                    db_api.node_ids_for_deletion, self.cluster.id, 1,
+                    'created_at')
+
+    def test_node_ids_for_deletion_by_age(self):
+        self._check('node', 'ix_node_cluster_id_created_at',
+                    db_api.node_ids_for_deletion, self.cluster.id, 10,
+                    '-created_at')
+
+    def test_event_get_all_by_cluster(self):
+        self._create_event()
+
+        self._check('event', 'ix_event_cluster_id_timestamp',
+                    db_api.event_get_all_by_cluster, self.cluster.id)
+
+    def test_event_count_by_cluster(self):
+        self._create_event()
+
+        self._check('event', 'ix_event_cluster_id_timestamp',
+                    db_api.event_count_by_cluster, self.cluster.id)
+
+    def test_event_purge(self):
+        self._create_event()
+
+        self._check('event', 'ix_event_timestamp',
+                    db_api.event_purge, tu.utcnow(True))
+
+    def test_registry_claim(self):
+        db_api.service_create(self.ctx, 'SERVICE_ID')
+        db_api.registry_create(self.ctx, self.cluster.id,
+                               'NODE_STATUS_POLLING', 60, {}, 'DEAD_ENGINE')
+
+        self._check('health_registry', 'ix_health_registry_engine_id',
+                    db_api.registry_claim, 'SERVICE_ID')
@@ -11,6 +11,7 @@
 # under the License.
 
 import mock
+from openstack import exceptions as sdk_exc
 from oslo_config import cfg
 
 from senlin.drivers.openstack import heat_v1
@@ -30,6 +31,7 @@ class TestHeatV1(base.SenlinTestCase):
         self.mock_create = self.patchobject(sdk, 'create_connection',
                                             return_value=self.mock_conn)
         self.orch = self.mock_conn.orchestration
+        self.mock_get = self.patchobject(heat_v1.StackWatcher, 'get')
         self.hc = heat_v1.HeatClient(self.conn_params)
 
     def test_init(self):
@@ -76,15 +78,16 @@ class TestHeatV1(base.SenlinTestCase):
         self.hc.wait_for_stack('FAKE_ID', 'STATUS', [], 100, 200)
         self.orch.find_stack.assert_called_once_with('FAKE_ID', False)
         stk = self.orch.find_stack.return_value
-        self.orch.wait_for_status.assert_called_once_with(
-            stk, 'STATUS', [], 100, 200)
+        self.mock_get.assert_called_once_with(self.mock_conn)
+        self.mock_get.return_value.wait.assert_called_once_with(
+            stk.id, 'STATUS', failures=[], interval=100, timeout=200)
 
     def test_wait_for_stack_failures_not_specified(self):
         self.hc.wait_for_stack('FAKE_ID', 'STATUS', None, 100, 200)
         self.orch.find_stack.assert_called_once_with('FAKE_ID', False)
         stk = self.orch.find_stack.return_value
-        self.orch.wait_for_status.assert_called_once_with(
-            stk, 'STATUS', [], 100, 200)
+        self.mock_get.return_value.wait.assert_called_once_with(
+            stk.id, 'STATUS', failures=[], interval=100, timeout=200)
 
     def test_wait_for_stack_default_timeout(self):
         cfg.CONF.set_override('default_action_timeout', 361, enforce_type=True)
@@ -92,26 +95,27 @@ class TestHeatV1(base.SenlinTestCase):
         self.hc.wait_for_stack('FAKE_ID', 'STATUS', None, 100, None)
         self.orch.find_stack.assert_called_once_with('FAKE_ID', False)
         stk = self.orch.find_stack.return_value
-        self.orch.wait_for_status.assert_called_once_with(
-            stk, 'STATUS', [], 100, 361)
+        self.mock_get.return_value.wait.assert_called_once_with(
+            stk.id, 'STATUS', failures=[], interval=100, timeout=361)
 
     def test_wait_for_stack_delete_successful(self):
         fake_stack = mock.Mock(id='stack_id')
         self.orch.find_stack.return_value = fake_stack
         self.hc.wait_for_stack_delete('stack_id')
         self.orch.find_stack.assert_called_once_with('stack_id', True)
-        self.orch.wait_for_delete.assert_called_once_with(fake_stack,
-                                                          wait=3600)
+        self.mock_get.return_value.wait.assert_called_once_with(
+            'stack_id', None, timeout=3600)
 
     def test_wait_for_stack_not_found(self):
         self.orch.find_stack.return_value = None
         self.hc.wait_for_stack('FAKE_ID', 'STATUS', [], 100, 200)
-        self.assertEqual(0, self.orch.wait_for_status.call_count)
+        self.assertFalse(self.mock_get.called)
 
     def test_wait_for_stack_delete_with_resource_not_found(self):
         self.orch.find_stack.return_value = None
         self.hc.wait_for_stack_delete('stack_id')
         self.orch.find_stack.assert_called_once_with('stack_id', True)
+        self.assertFalse(self.mock_get.called)
 
     def test_wait_for_server_delete_with_timeout(self):
         cfg.CONF.set_override('default_action_timeout', 360, enforce_type=True)
@@ -119,5 +123,36 @@ class TestHeatV1(base.SenlinTestCase):
         self.orch.find_stack.return_value = fake_stack
 
         self.hc.wait_for_stack_delete('stack_id')
-        self.orch.wait_for_delete.assert_called_once_with(fake_stack,
-                                                          wait=360)
+        self.mock_get.return_value.wait.assert_called_once_with(
+            'stack_id', None, timeout=360)
+
+    def test_stack_watcher_poll(self):
+        mock_list = self.patchobject(heat_v1._Stack, 'list', return_value=[
+            mock.Mock(id='STACK_1', status='CREATE_COMPLETE'),
+            mock.Mock(id='STACK_2', status='CREATE_IN_PROGRESS'),
+        ])
+        w = heat_v1.StackWatcher(self.mock_conn)
+        stack_ids = ['STACK_1', 'STACK_2', 'STACK_3']
+
+        res = w._poll(stack_ids, None)
+
+        # only the stacks watched are listed
+        mock_list.assert_called_once_with(self.mock_conn.session,
+                                          id=stack_ids)
+        # stacks not listed are deleted
+        self.assertEqual({'STACK_1': 'CREATE_COMPLETE',
+                          'STACK_2': 'CREATE_IN_PROGRESS',
+                          'STACK_3': None}, res)
+
+    def test_stack_watcher_get(self):
+        w = heat_v1.StackWatcher(self.mock_conn)
+        self.orch.get_stack.return_value = mock.Mock(status='CREATE_COMPLETE')
+        self.assertEqual('CREATE_COMPLETE', w._get('STACK'))
+        self.orch.get_stack.assert_called_once_with('STACK')
+
+        self.orch.get_stack.return_value = mock.Mock(status='DELETE_COMPLETE')
+        self.assertIsNone(w._get('STACK'))
+
+        self.orch.get_stack.side_effect = sdk_exc.ResourceNotFound(
+            'Not found', http_status=404)
+        self.assertIsNone(w._get('STACK'))
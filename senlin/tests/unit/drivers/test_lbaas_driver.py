@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+
 import eventlet
 import mock
 
@@ -23,6 +25,62 @@ from senlin.tests.unit.common import base
 from senlin.tests.unit.common import utils
 
 
+class FakeLBaaS(object):
+    """Fake Neutron LBaaS modelling the latency of member operations.
+
+    The loadbalancer stays in PENDING_UPDATE for `latency` seconds after each
+    member operation, during which other member operations are rejected. The
+    time is simulated, it only advances when `sleep` is called.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.now = 0
+        self.ready_at = 0
+        self.members = {}
+        self.calls = collections.Counter()
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def _update(self):
+        if self.now < self.ready_at:
+            raise exception.InternalError(
+                code=409, message='Invalid state PENDING_UPDATE')
+        self.ready_at = self.now + self.latency
+
+    def subnet_get(self, subnet):
+        self.calls['subnet_get'] += 1
+        return mock.Mock(id='SUBNET_ID', network_id='NETWORK_ID')
+
+    def network_get(self, network):
+        self.calls['network_get'] += 1
+        net = mock.Mock(id=network)
+        net.name = 'network1'
+        return net
+
+    def loadbalancer_get(self, lb_id):
+        self.calls['loadbalancer_get'] += 1
+        if self.now < self.ready_at:
+            status = 'PENDING_UPDATE'
+        else:
+            status = 'ACTIVE'
+        return mock.Mock(id=lb_id, provisioning_status=status,
+                         operating_status='ONLINE')
+
+    def pool_member_create(self, pool_id, address, port, subnet_id):
+        self.calls['pool_member_create'] += 1
+        self._update()
+        member_id = 'MEMBER_%s' % address
+        self.members[member_id] = address
+        return mock.Mock(id=member_id)
+
+    def pool_member_delete(self, pool_id, member_id):
+        self.calls['pool_member_delete'] += 1
+        self._update()
+        del self.members[member_id]
+
+
 class TestNeutronLBaaSDriver(base.SenlinTestCase):
 
     def setUp(self):
@@ -120,7 +178,22 @@ class TestNeutronLBaaSDriver(base.SenlinTestCase):
         res = self.lb_driver._wait_for_lb_ready(lb_id)
 
         self.assertFalse(res)
-        mock_sleep.assert_called_once_with(10)
+        # the interval doubles up to the maximum
+        mock_sleep.assert_has_calls([mock.call(1), mock.call(2),
+                                     mock.call(4), mock.call(8)])
+
+    @mock.patch.object(eventlet, 'sleep')
+    def test_wait_for_lb_ready_max_interval(self, mock_sleep):
+        self.lb_driver.lb_status_timeout = 40
+        lb_obj = mock.Mock(provisioning_status='PENDING_UPDATE',
+                           operating_status='OFFLINE')
+        self.nc.loadbalancer_get.return_value = lb_obj
+
+        res = self.lb_driver._wait_for_lb_ready('LB_ID')
+
+        self.assertFalse(res)
+        self.assertEqual([1, 2, 4, 8, 10, 10, 10],
+                         [c[0][0] for c in mock_sleep.call_args_list])
 
     def test_lb_create_succeeded(self):
         lb_obj = mock.Mock()
@@ -644,3 +717,183 @@ class TestNeutronLBaaSDriver(base.SenlinTestCase):
         self.assertIsNone(res)
         self.lb_driver._wait_for_lb_ready.assert_has_calls(
             [mock.call('LB_ID'), mock.call('LB_ID')])
+
+    def _create_nodes(self, count, network='network1'):
+        nodes = []
+        for i in range(count):
+            node = mock.Mock(id='NODE_%s' % i)
+            node.get_details.return_value = {
+                'addresses': {network: [{'addr': '10.0.0.%s' % i}]}
+            }
+            nodes.append(node)
+        return nodes
+
+    @mock.patch.object(oslo_context, 'get_current')
+    def test_members_add(self, mock_get_current):
+        nodes = self._create_nodes(2)
+        subnet_obj = mock.Mock(id='SUBNET_ID', network_id='NETWORK_ID')
+        network_obj = mock.Mock(id='NETWORK_ID')
+        network_obj.name = 'network1'
+        self.nc.subnet_get.return_value = subnet_obj
+        self.nc.network_get.return_value = network_obj
+        self.nc.pool_member_create.side_effect = [mock.Mock(id='MEMBER_0'),
+                                                  mock.Mock(id='MEMBER_1')]
+        self.lb_driver._wait_for_lb_ready = mock.Mock(return_value=True)
+
+        res = self.lb_driver.members_add(nodes, 'LB_ID', 'POOL_ID', 80,
+                                         'subnet')
+
+        self.assertEqual({'NODE_0': 'MEMBER_0', 'NODE_1': 'MEMBER_1'}, res)
+        self.nc.subnet_get.assert_called_once_with('subnet')
+        self.nc.network_get.assert_called_once_with('NETWORK_ID')
+        self.nc.pool_member_create.assert_has_calls([
+            mock.call('POOL_ID', '10.0.0.0', 80, 'SUBNET_ID'),
+            mock.call('POOL_ID', '10.0.0.1', 80, 'SUBNET_ID'),
+        ])
+        # once before the batch and once after each member
+        self.assertEqual(3, self.lb_driver._wait_for_lb_ready.call_count)
+
+    def test_members_add_empty(self):
+        res = self.lb_driver.members_add([], 'LB_ID', 'POOL_ID', 80,
+                                         'subnet')
+
+        self.assertEqual({}, res)
+        self.assertFalse(self.nc.subnet_get.called)
+
+    @mock.patch.object(oslo_context, 'get_current')
+    def test_members_add_subnet_get_failed(self, mock_get_current):
+        nodes = self._create_nodes(2)
+        self.nc.subnet_get.side_effect = exception.InternalError(
+            code=500, message="Can't find subnet")
+
+        res = self.lb_driver.members_add(nodes, 'LB_ID', 'POOL_ID', 80,
+                                         'subnet')
+
+        self.assertEqual({'NODE_0': None, 'NODE_1': None}, res)
+        self.assertFalse(self.nc.pool_member_create.called)
+
+    @mock.patch.object(oslo_context, 'get_current')
+    def test_members_add_lb_unready(self, mock_get_current):
+        nodes = self._create_nodes(2)
+        network_obj = mock.Mock()
+        network_obj.name = 'network1'
+        self.nc.network_get.return_value = network_obj
+        self.lb_driver._wait_for_lb_ready = mock.Mock(return_value=False)
+
+        res = self.lb_driver.members_add(nodes, 'LB_ID', 'POOL_ID', 80,
+                                         'subnet')
+
+        self.assertEqual({'NODE_0': None, 'NODE_1': None}, res)
+        self.assertFalse(self.nc.pool_member_create.called)
+        self.lb_driver._wait_for_lb_ready.assert_called_once_with('LB_ID')
+
+    @mock.patch.object(oslo_context, 'get_current')
+    def test_members_add_partial_failure(self, mock_get_current):
+        nodes = self._create_nodes(2) + self._create_nodes(1, 'network2')
+        nodes[2].id = 'NODE_2'
+        network_obj = mock.Mock()
+        network_obj.name = 'network1'
+        self.nc.network_get.return_value = network_obj
+        self.nc.pool_member_create.side_effect = [
+            exception.InternalError(code=500, message='CREATE FAILED'),
+            mock.Mock(id='MEMBER_1'),
+        ]
+        self.lb_driver._wait_for_lb_ready = mock.Mock(return_value=True)
+
+        res = self.lb_driver.members_add(nodes, 'LB_ID', 'POOL_ID', 80,
+                                         'subnet')
+
+        # the other nodes are still added
+        self.assertEqual({'NODE_0': None, 'NODE_1': 'MEMBER_1',
+                          'NODE_2': None}, res)
+        self.assertEqual(2, self.nc.pool_member_create.call_count)
+
+    @mock.patch.object(oslo_context, 'get_current')
+    def test_members_add_wait_for_lb_timeout(self, mock_get_current):
+        nodes = self._create_nodes(2)
+        network_obj = mock.Mock()
+        network_obj.name = 'network1'
+        self.nc.network_get.return_value = network_obj
+        self.lb_driver._wait_for_lb_ready = mock.Mock(
+            side_effect=[True, False])
+
+        res = self.lb_driver.members_add(nodes, 'LB_ID', 'POOL_ID', 80,
+                                         'subnet')
+
+        # no more member is created after the loadbalancer timed out
+        self.assertEqual({'NODE_0': None, 'NODE_1': None}, res)
+        self.assertEqual(1, self.nc.pool_member_create.call_count)
+
+    def test_members_remove(self):
+        self.lb_driver._wait_for_lb_ready = mock.Mock(return_value=True)
+        self.nc.pool_member_delete.side_effect = [
+            None, exception.InternalError(code=500, message=''), None]
+
+        res = self.lb_driver.members_remove('LB_ID', 'POOL_ID',
+                                            ['MEMBER_0', 'MEMBER_1',
+                                             'MEMBER_2'])
+
+        self.assertEqual({'MEMBER_0': True, 'MEMBER_1': None,
+                          'MEMBER_2': True}, res)
+        self.nc.pool_member_delete.assert_has_calls([
+            mock.call('POOL_ID', 'MEMBER_0'),
+            mock.call('POOL_ID', 'MEMBER_1'),
+            mock.call('POOL_ID', 'MEMBER_2'),
+        ])
+        self.assertEqual(3, self.lb_driver._wait_for_lb_ready.call_count)
+
+    def test_members_remove_lb_unready(self):
+        self.lb_driver._wait_for_lb_ready = mock.Mock(return_value=False)
+
+        res = self.lb_driver.members_remove('LB_ID', 'POOL_ID', ['MEMBER_0'])
+
+        self.assertEqual({'MEMBER_0': None}, res)
+        self.assertFalse(self.nc.pool_member_delete.called)
+
+    def _run_with_fake_lbaas(self, latency, min_interval, func, *args):
+        fake = FakeLBaaS(latency)
+        self.lb_driver._nc = fake
+        self.lb_driver.lb_status_timeout = 600
+        self.lb_driver.lb_status_min_interval = min_interval
+        with mock.patch.object(eventlet, 'sleep', side_effect=fake.sleep):
+            res = func(*args)
+        return fake, res
+
+    @mock.patch.object(oslo_context, 'get_current')
+    def test_members_add_fake_lbaas(self, mock_get_current):
+        nodes = self._create_nodes(50)
+
+        fake, res = self._run_with_fake_lbaas(
+            3, 1, self.lb_driver.members_add, nodes, 'LB_ID', 'POOL_ID', 80,
+            'subnet')
+
+        self.assertNotIn(None, res.values())
+        self.assertEqual(50, len(fake.members))
+        self.assertEqual(1, fake.calls['subnet_get'])
+        self.assertEqual(1, fake.calls['network_get'])
+        # each member creation waits for its own latency only, polling after
+        # 1 and 3 seconds
+        self.assertEqual(150, fake.now)
+        self.assertEqual(1 + 50 * 3, fake.calls['loadbalancer_get'])
+
+        # polling every 10 seconds, each member creation costs 10 seconds
+        fake, res = self._run_with_fake_lbaas(
+            3, 10, self.lb_driver.members_add, nodes, 'LB_ID', 'POOL_ID', 80,
+            'subnet')
+
+        self.assertNotIn(None, res.values())
+        self.assertEqual(500, fake.now)
+
+    def test_members_remove_fake_lbaas(self):
+        member_ids = ['MEMBER_%s' % i for i in range(50)]
+
+        fake = FakeLBaaS(3)
+        fake.members = dict((m, None) for m in member_ids)
+        self.lb_driver._nc = fake
+        with mock.patch.object(eventlet, 'sleep', side_effect=fake.sleep):
+            res = self.lb_driver.members_remove('LB_ID', 'POOL_ID',
+                                                member_ids)
+
+        self.assertEqual(dict((m, True) for m in member_ids), res)
+        self.assertEqual({}, fake.members)
+        self.assertEqual(150, fake.now)
@@ -10,7 +10,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
 import mock
+from openstack import exceptions as sdk_exc
 from oslo_config import cfg
 
 from senlin.drivers.openstack import nova_v2
@@ -86,6 +89,15 @@ class TestNovaV2(base.SenlinTestCase):
         d.server_get('foo')
         self.compute.get_server.assert_called_once_with('foo')
 
+    def test_server_list(self):
+        d = nova_v2.NovaClient(self.conn_params)
+        self.compute.servers.return_value = iter(['s1', 's2'])
+
+        res = d.server_list(name='foo')
+
+        self.assertEqual(['s1', 's2'], res)
+        self.compute.servers.assert_called_once_with(True, name='foo')
+
     def test_server_update(self):
         d = nova_v2.NovaClient(self.conn_params)
         attrs = {'mem': 2}
@@ -158,55 +170,91 @@ class TestNovaV2(base.SenlinTestCase):
         self.assertEqual(target.return_value, res)
         target.assert_called_once_with('fakeid', 'new_password')
 
-    def test_wait_for_server(self):
-        self.compute.find_server.return_value = 'foo'
-
+    @mock.patch.object(nova_v2.ServerWatcher, 'get')
+    def test_wait_for_server(self, mock_get):
         d = nova_v2.NovaClient(self.conn_params)
         d.wait_for_server('foo', 'STATUS1', ['STATUS2'], 5, 10)
-        self.compute.wait_for_server.assert_called_once_with(
-            'foo', status='STATUS1', failures=['STATUS2'], interval=5, wait=10)
-
-    def test_wait_for_server_default_value(self):
-        self.compute.find_server.return_value = 'foo'
+        mock_get.assert_called_once_with(self.mock_conn)
+        mock_get.return_value.wait.assert_called_once_with(
+            'foo', 'STATUS1', failures=['STATUS2'], interval=5, timeout=10)
+        # the server is not polled on its own
+        self.assertFalse(self.compute.find_server.called)
 
+    @mock.patch.object(nova_v2.ServerWatcher, 'get')
+    def test_wait_for_server_default_value(self, mock_get):
         d = nova_v2.NovaClient(self.conn_params)
         d.wait_for_server('foo', timeout=10)
-        self.compute.wait_for_server.assert_called_once_with(
-            'foo', status='ACTIVE', failures=['ERROR'], interval=2, wait=10)
+        mock_get.return_value.wait.assert_called_once_with(
+            'foo', 'ACTIVE', failures=['ERROR'], interval=2, timeout=10)
 
-    def test_wait_for_server_with_default_timeout(self):
-        self.compute.find_server.return_value = 'foo'
+    @mock.patch.object(nova_v2.ServerWatcher, 'get')
+    def test_wait_for_server_with_default_timeout(self, mock_get):
         timeout = cfg.CONF.default_action_timeout
 
         d = nova_v2.NovaClient(self.conn_params)
         d.wait_for_server('foo')
-        self.compute.wait_for_server.assert_called_once_with(
-            'foo', status='ACTIVE', failures=['ERROR'], interval=2,
-            wait=timeout)
+        mock_get.return_value.wait.assert_called_once_with(
+            'foo', 'ACTIVE', failures=['ERROR'], interval=2, timeout=timeout)
 
-    def test_wait_for_server_delete(self):
-        self.compute.find_server.return_value = 'FOO'
+    @mock.patch.object(nova_v2.ServerWatcher, 'get')
+    def test_wait_for_server_delete(self, mock_get):
+        self.compute.find_server.return_value = mock.Mock(id='FOO')
 
         d = nova_v2.NovaClient(self.conn_params)
         d.wait_for_server_delete('foo', 120)
         self.compute.find_server.assert_called_once_with('foo', True)
-        self.compute.wait_for_delete.assert_called_once_with('FOO', wait=120)
+        mock_get.assert_called_once_with(self.mock_conn)
+        mock_get.return_value.wait.assert_called_once_with(
+            'FOO', None, timeout=120)
 
-    def test_wait_for_server_delete_with_default_timeout(self):
+    @mock.patch.object(nova_v2.ServerWatcher, 'get')
+    def test_wait_for_server_delete_with_default_timeout(self, mock_get):
         cfg.CONF.set_override('default_action_timeout', 360, enforce_type=True)
-        self.compute.find_server.return_value = 'FOO'
+        self.compute.find_server.return_value = mock.Mock(id='FOO')
 
         d = nova_v2.NovaClient(self.conn_params)
         d.wait_for_server_delete('foo')
         self.compute.find_server.assert_called_once_with('foo', True)
-        self.compute.wait_for_delete.assert_called_once_with('FOO', wait=360)
+        mock_get.return_value.wait.assert_called_once_with(
+            'FOO', None, timeout=360)
 
-    def test_wait_for_server_delete_server_doesnt_exist(self):
+    @mock.patch.object(nova_v2.ServerWatcher, 'get')
+    def test_wait_for_server_delete_server_doesnt_exist(self, mock_get):
         self.compute.find_server.return_value = None
 
         d = nova_v2.NovaClient(self.conn_params)
         res = d.wait_for_server_delete('foo')
         self.assertIsNone(res)
+        self.assertFalse(mock_get.called)
+
+    def test_server_watcher_poll(self):
+        self.compute.servers.return_value = [
+            mock.Mock(id='SERVER_1', status='ACTIVE'),
+            mock.Mock(id='SERVER_2', status='DELETED'),
+            mock.Mock(id='OTHER', status='ACTIVE'),
+        ]
+        w = nova_v2.ServerWatcher(self.mock_conn)
+
+        res = w._poll(['SERVER_1', 'SERVER_2', 'SERVER_3'],
+                      datetime.datetime(2016, 7, 1, 12, 1, 0))
+
+        self.compute.servers.assert_called_once_with(
+            True, changes_since='2016-07-01T12:00:00')
+        # servers not listed didn't change
+        self.assertEqual({'SERVER_1': 'ACTIVE', 'SERVER_2': None}, res)
+
+    def test_server_watcher_get(self):
+        w = nova_v2.ServerWatcher(self.mock_conn)
+        self.compute.get_server.return_value = mock.Mock(status='ACTIVE')
+        self.assertEqual('ACTIVE', w._get('SERVER'))
+        self.compute.get_server.assert_called_once_with('SERVER')
+
+        self.compute.get_server.return_value = mock.Mock(status='DELETED')
+        self.assertIsNone(w._get('SERVER'))
+
+        self.compute.get_server.side_effect = sdk_exc.ResourceNotFound(
+            'Not found', http_status=404)
+        self.assertIsNone(w._get('SERVER'))
 
     def test_server_interface_create(self):
         server = mock.Mock()
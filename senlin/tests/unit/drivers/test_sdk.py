@@ -15,6 +15,7 @@ import types
 import mock
 from openstack import connection
 from openstack import profile
+from oslo_config import cfg
 from oslo_serialization import jsonutils
 from requests import exceptions as req_exc
 import six
@@ -228,6 +229,67 @@ class OpenStackSDKTest(base.SenlinTestCase):
         self.assertEqual(123, ex.code)
         self.assertEqual('BOOM', ex.message)
 
+    @mock.patch.object(profile, 'Profile')
+    @mock.patch.object(connection, 'Connection')
+    def test_create_connection_reused(self, mock_conn, mock_profile):
+        conn1 = mock.Mock()
+        conn2 = mock.Mock()
+        mock_conn.side_effect = [conn1, conn2]
+
+        res1 = sdk.create_connection({'trust_id': 'TRUST1',
+                                      'region_name': 'R1'})
+        res2 = sdk.create_connection({'trust_id': 'TRUST1',
+                                      'region_name': 'R1'})
+        res3 = sdk.create_connection({'trust_id': 'TRUST1',
+                                      'region_name': 'R2'})
+
+        self.assertEqual(conn1, res1)
+        self.assertEqual(conn1, res2)
+        self.assertEqual(conn2, res3)
+        self.assertEqual(2, mock_conn.call_count)
+        self.assertEqual({'hits': 1, 'misses': 2, 'size': 2},
+                         sdk.connections.stats())
+
+    @mock.patch.object(profile, 'Profile')
+    @mock.patch.object(connection, 'Connection')
+    def test_create_connection_token_not_reused(self, mock_conn,
+                                                mock_profile):
+        sdk.create_connection({'token': 'TOKEN'})
+        sdk.create_connection({'token': 'TOKEN'})
+
+        self.assertEqual(2, mock_conn.call_count)
+        self.assertEqual(0, sdk.connections.stats()['size'])
+
+    @mock.patch.object(profile, 'Profile')
+    @mock.patch.object(connection, 'Connection')
+    def test_create_connection_pool_evict(self, mock_conn, mock_profile):
+        cfg.CONF.set_override('max_cached_connections', 2,
+                              enforce_type=True)
+        mock_conn.side_effect = [mock.Mock() for i in range(4)]
+
+        res1 = sdk.create_connection({'trust_id': 'T1'})
+        sdk.create_connection({'trust_id': 'T2'})
+        sdk.create_connection({'trust_id': 'T1'})
+        sdk.create_connection({'trust_id': 'T3'})
+
+        # T2 is the least recently used one
+        self.assertEqual(2, sdk.connections.stats()['size'])
+        self.assertEqual(res1, sdk.create_connection({'trust_id': 'T1'}))
+        sdk.create_connection({'trust_id': 'T2'})
+        self.assertEqual(4, mock_conn.call_count)
+
+    @mock.patch.object(profile, 'Profile')
+    @mock.patch.object(connection, 'Connection')
+    def test_create_connection_pool_disabled(self, mock_conn, mock_profile):
+        cfg.CONF.set_override('max_cached_connections', 0,
+                              enforce_type=True)
+
+        sdk.create_connection({'trust_id': 'T1'})
+        sdk.create_connection({'trust_id': 'T1'})
+
+        self.assertEqual(2, mock_conn.call_count)
+        self.assertEqual(0, sdk.connections.stats()['size'])
+
     @mock.patch.object(sdk, 'create_connection')
     def test_authenticate(self, mock_conn):
         x_conn = mock_conn.return_value
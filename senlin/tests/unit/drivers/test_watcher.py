@@ -0,0 +1,166 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import eventlet
+import mock
+from openstack import exceptions as sdk_exc
+
+from senlin.drivers.openstack import nova_v2
+from senlin.drivers.openstack import watcher
+from senlin.tests.unit.common import base
+
+
+class FakeCompute(object):
+    """Fake compute proxy counting the API calls made.
+
+    :param statuses: A dict containing the status of the servers at first,
+                     servers not in the dict don't exist.
+    :param transitions: A list of dicts, the status of the servers changed
+                        before each call to list the servers.
+    """
+
+    def __init__(self, statuses, transitions):
+        self.statuses = dict(statuses)
+        self.transitions = transitions
+        self.calls = {'servers': 0, 'get_server': 0}
+
+    def servers(self, details=True, **query):
+        index = min(self.calls['servers'], len(self.transitions) - 1)
+        self.calls['servers'] += 1
+        changes = self.transitions[index]
+        self.statuses.update(changes)
+        return [mock.Mock(id=server_id, status=status)
+                for server_id, status in changes.items()]
+
+    def get_server(self, server):
+        self.calls['get_server'] += 1
+        if server not in self.statuses:
+            raise sdk_exc.ResourceNotFound('Server %s not found' % server,
+                                           http_status=404)
+        return mock.Mock(id=server, status=self.statuses[server])
+
+
+class TestServerWatcher(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestServerWatcher, self).setUp()
+        self.addCleanup(watcher._watchers.clear)
+
+    def _watcher(self, statuses, transitions):
+        self.compute = FakeCompute(statuses, transitions)
+        self.conn = mock.Mock(compute=self.compute)
+        return nova_v2.ServerWatcher.get(self.conn)
+
+    def test_get(self):
+        conn1 = mock.Mock()
+        conn2 = mock.Mock()
+
+        w = nova_v2.ServerWatcher.get(conn1)
+
+        self.assertIs(w, nova_v2.ServerWatcher.get(conn1))
+        self.assertIsNot(w, nova_v2.ServerWatcher.get(conn2))
+
+    def test_wait_shared(self):
+        server_ids = ['SERVER_%s' % i for i in range(50)]
+        w = self._watcher(dict((s, 'BUILD') for s in server_ids), [
+            dict((s, 'BUILD') for s in server_ids[:10]),
+            dict((s, 'ACTIVE') for s in server_ids),
+        ])
+
+        pool = eventlet.GreenPool()
+        for server_id in server_ids:
+            pool.spawn_n(w.wait, server_id, 'ACTIVE', interval=0.01,
+                         timeout=10)
+        pool.waitall()
+
+        # One get per server when its wait starts, then two list calls for
+        # all the servers
+        self.assertEqual({'servers': 2, 'get_server': 50}, self.compute.calls)
+        self.assertNotIn(w.key, watcher._watchers)
+
+    def test_wait_failure(self):
+        w = self._watcher({'SERVER': 'BUILD'}, [{'SERVER': 'ERROR'}])
+
+        self.assertRaises(sdk_exc.ResourceFailure, w.wait, 'SERVER',
+                          'ACTIVE', failures=['ERROR'], interval=0.01,
+                          timeout=10)
+
+    def test_wait_deleted(self):
+        w = self._watcher({'SERVER': 'BUILD'}, [{'SERVER': 'DELETED'}])
+
+        self.assertRaises(sdk_exc.ResourceNotFound, w.wait, 'SERVER',
+                          'ACTIVE', interval=0.01, timeout=10)
+
+    def test_wait_delete(self):
+        w = self._watcher({'SERVER': 'ACTIVE'},
+                          [{}, {'SERVER': 'ACTIVE'}, {'SERVER': 'DELETED'}])
+
+        w.wait('SERVER', None, interval=0.01, timeout=10)
+
+        self.assertEqual(3, self.compute.calls['servers'])
+
+    def test_wait_timeout(self):
+        w = self._watcher({'SERVER': 'BUILD'}, [{'SERVER': 'BUILD'}])
+
+        self.assertRaises(sdk_exc.ResourceTimeout, w.wait, 'SERVER',
+                          'ACTIVE', interval=0.01, timeout=0.05)
+
+        # the watcher stops once there is nothing to watch
+        eventlet.sleep(0.02)
+        self.assertNotIn(w.key, watcher._watchers)
+
+    def test_wait_poll_failed(self):
+        w = self._watcher({'SERVER': 'BUILD'}, [])
+
+        def fake_servers(*args, **kwargs):
+            self.compute.statuses['SERVER'] = 'ACTIVE'
+            raise Exception('boom')
+
+        self.compute.servers = fake_servers
+
+        w.wait('SERVER', 'ACTIVE', interval=0.01, timeout=10)
+
+        # the failed list falls back to getting the server
+        self.assertEqual(2, self.compute.calls['get_server'])
+
+    def test_wait_get_failed(self):
+        w = self._watcher({'SERVER_1': 'BUILD', 'SERVER_2': 'BUILD'}, [])
+        self.compute.servers = mock.Mock(side_effect=Exception('boom'))
+        get_server = self.compute.get_server
+
+        def fake_get(server):
+            if self.compute.servers.called:
+                if server == 'SERVER_2':
+                    raise Exception('bang')
+                self.compute.statuses[server] = 'ACTIVE'
+            return get_server(server)
+
+        self.compute.get_server = fake_get
+        pool = eventlet.GreenPool()
+        ok = pool.spawn(w.wait, 'SERVER_1', 'ACTIVE', interval=0.01,
+                        timeout=10)
+        failed = pool.spawn(w.wait, 'SERVER_2', 'ACTIVE', interval=0.01,
+                            timeout=10)
+
+        # only the thread waiting for the server failed to get fails
+        self.assertIsNone(ok.wait())
+        ex = self.assertRaises(Exception, failed.wait)
+        self.assertEqual('bang', str(ex))
+
+    def test_wait_reached(self):
+        w = self._watcher({'SERVER': 'ACTIVE'}, [{}])
+
+        w.wait('SERVER', 'ACTIVE', interval=0.01, timeout=10)
+
+        # the server is never listed, it was active before the wait
+        self.assertEqual({'servers': 0, 'get_server': 1}, self.compute.calls)
+        self.assertNotIn(w.key, watcher._watchers)
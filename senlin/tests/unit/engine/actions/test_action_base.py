@@ -19,12 +19,15 @@ import six
 
 from senlin.common import exception
 from senlin.common import utils as common_utils
+from senlin.engine import action_graph
 from senlin.engine.actions import base as ab
 from senlin.engine import cluster as cluster_mod
 from senlin.engine import cluster_policy as cp_mod
+from senlin.engine import dispatcher
 from senlin.engine import environment
 from senlin.engine import event as EVENT
 from senlin.engine import node as node_mod
+from senlin.engine import scheduler
 from senlin.objects import action as ao
 from senlin.objects import dependency as dobj
 from senlin.policies import base as policy_mod
@@ -267,6 +270,35 @@ class ActionBaseTest(base.SenlinTestCase):
         self.assertEqual('FAKE_ID', result)
         mock_store.assert_called_once_with(self.ctx)
 
+    @mock.patch.object(ao.Action, 'create_all')
+    def test_action_create_all(self, mock_create):
+        mock_create.return_value = ['ACTION_1', 'ACTION_2']
+        specs = [
+            ('NODE_1', 'NODE_CREATE', {'id': 'ACTION_1', 'name': 'create'}),
+            ('NODE_2', 'NODE_CHECK', {'status': 'READY', 'inputs': {'k': 1}}),
+        ]
+
+        result = ab.Action.create_all(self.ctx, specs,
+                                      dependencies=[('ACTION_1', 'FOO')])
+
+        self.assertEqual(['ACTION_1', 'ACTION_2'], result)
+        mock_create.assert_called_once_with(
+            self.ctx, mock.ANY, dependencies=[('ACTION_1', 'FOO')])
+        values = mock_create.call_args[0][1]
+        self.assertEqual(2, len(values))
+        self.assertEqual('ACTION_1', values[0]['id'])
+        self.assertEqual('create', values[0]['name'])
+        self.assertEqual('NODE_1', values[0]['target'])
+        self.assertEqual('NODE_CREATE', values[0]['action'])
+        self.assertEqual('INIT', values[0]['status'])
+        self.assertEqual(self.ctx.user, values[0]['user'])
+        self.assertEqual(self.ctx.project, values[0]['project'])
+        self.assertIsNotNone(values[0]['created_at'])
+        self.assertNotIn('id', values[1])
+        self.assertEqual('READY', values[1]['status'])
+        self.assertEqual({'k': 1}, values[1]['inputs'])
+        self.assertEqual(values[0]['context'], values[1]['context'])
+
     def test_action_delete(self):
         result = ab.Action.delete(self.ctx, 'non-existent')
         self.assertIsNone(result)
@@ -417,8 +449,53 @@ class ActionBaseTest(base.SenlinTestCase):
         self.assertEqual('BUSY', action.status_reason)
         mock_abandon.assert_called_once_with(action.context, 'FAKE_ID')
 
+    @mock.patch.object(EVENT, 'info')
+    @mock.patch.object(ao.Action, 'mark_succeeded')
+    def test_set_status_wakeup_dependents(self, mark_succeed, mock_info):
+        action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        mark_succeed.return_value = {'PARENT': 'ENGINE'}
+        mock_complete = self.patchobject(action_graph.graph, 'complete')
+        mock_wakeup = self.patchobject(action, '_wakeup_dependents')
+
+        action.set_status(action.RES_OK, 'FAKE_REASON')
+
+        mock_wakeup.assert_called_once_with({'PARENT': 'ENGINE'}, 'FAKE_ID')
+        mock_complete.assert_called_once_with(action.context, 'FAKE_ID')
+
+    @mock.patch.object(EVENT, 'error')
+    @mock.patch.object(ao.Action, 'mark_failed')
+    def test_set_status_failed_wakeup_dependents(self, mark_fail,
+                                                 mock_error):
+        action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        mark_fail.return_value = {'PARENT': 'ENGINE'}
+        mock_wakeup = self.patchobject(action, '_wakeup_dependents')
+
+        action.set_status(action.RES_ERROR, 'FAKE_REASON')
+
+        # the dependents have to check their status from database
+        mock_wakeup.assert_called_once_with({'PARENT': 'ENGINE'}, None)
+
+    @mock.patch.object(dispatcher, 'wakeup_action')
+    @mock.patch.object(scheduler, 'wakeup_dependent')
+    def test_wakeup_dependents(self, mock_local, mock_remote):
+        action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx, owner='ENGINE1')
+
+        action._wakeup_dependents({
+            'A1': 'ENGINE1',
+            'A2': 'ENGINE2',
+            'A3': None,
+        }, 'FAKE_ID')
+
+        mock_local.assert_called_once_with('A1', 'FAKE_ID')
+        mock_remote.assert_called_once_with('ENGINE2', action_id='A2',
+                                            depended='FAKE_ID')
+
     @mock.patch.object(ao.Action, 'check_status')
-    def test_get_status(self, mock_get):
+    @mock.patch.object(dobj.Dependency, 'get_pending')
+    def test_get_status(self, mock_pending, mock_get):
+        mock_pending.return_value = []
         mock_get.return_value = 'FAKE_STATUS'
 
         action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
@@ -428,8 +505,59 @@ class ActionBaseTest(base.SenlinTestCase):
 
         self.assertEqual('FAKE_STATUS', res)
         self.assertEqual('FAKE_STATUS', action.status)
+        mock_pending.assert_called_once_with(action.context, 'FAKE_ID')
+        mock_get.assert_called_once_with(action.context, 'FAKE_ID', mock.ANY)
+
+    @mock.patch.object(ao.Action, 'check_status')
+    @mock.patch.object(dobj.Dependency, 'get_pending')
+    def test_get_status_tracked(self, mock_pending, mock_get):
+        action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        action_graph.graph.track('FAKE_ID', ['CHILD_1', 'CHILD_2'])
+
+        res = action.get_status()
+
+        # no database access while dependents are pending
+        self.assertEqual(action.WAITING, res)
+        self.assertFalse(mock_pending.called)
+        self.assertFalse(mock_get.called)
+
+        action_graph.graph.resolve('FAKE_ID', 'CHILD_1')
+        action_graph.graph.resolve('FAKE_ID', 'CHILD_2')
+        mock_get.return_value = action.READY
+
+        res = action.get_status()
+
+        self.assertEqual(action.READY, res)
+        self.assertFalse(mock_pending.called)
         mock_get.assert_called_once_with(action.context, 'FAKE_ID', mock.ANY)
 
+    @mock.patch.object(ao.Action, 'check_status')
+    @mock.patch.object(dobj.Dependency, 'get_pending')
+    def test_get_status_rebuild(self, mock_pending, mock_get):
+        mock_pending.return_value = ['CHILD_1']
+        action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+
+        res = action.get_status()
+
+        self.assertEqual(action.WAITING, res)
+        self.assertEqual(1, action_graph.graph.pending('FAKE_ID'))
+        self.assertFalse(mock_get.called)
+
+    @mock.patch.object(ao.Action, 'check_status')
+    def test_get_status_still_waiting_in_db(self, mock_get):
+        mock_get.return_value = ab.Action.WAITING
+        action = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        action_graph.graph.track('FAKE_ID', [])
+
+        res = action.get_status()
+
+        # the graph is rebuilt from database on next check
+        self.assertEqual(action.WAITING, res)
+        self.assertIsNone(action_graph.graph.pending('FAKE_ID'))
+
     @mock.patch.object(ab, 'wallclock')
     def test_is_timeout(self, mock_time):
         action = ab.Action.__new__(DummyAction, 'OBJ', 'BOOM', self.ctx)
@@ -543,7 +671,7 @@ class ActionBaseTest(base.SenlinTestCase):
                                           sort='priority',
                                           filters={'enabled': True})
 
-    @mock.patch.object(dobj.Dependency, 'get_depended')
+    @mock.patch.object(dobj.Dependency, 'get_pending')
     @mock.patch.object(dobj.Dependency, 'get_dependents')
     def test_action_to_dict(self, mock_dep_by, mock_dep_on):
         mock_dep_on.return_value = ['ACTION_1']
@@ -579,6 +707,24 @@ class ActionBaseTest(base.SenlinTestCase):
         mock_dep_on.assert_called_once_with(action.context, 'FAKE_ID')
         mock_dep_by.assert_called_once_with(action.context, 'FAKE_ID')
 
+    def test_action_to_dict_dependencies_not_flushed(self):
+        parent = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        parent.store(self.ctx)
+        child1 = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        child1.store(self.ctx)
+        child2 = ab.Action(OBJID, 'OBJECT_ACTION', self.ctx)
+        child2.store(self.ctx)
+        dobj.Dependency.create(self.ctx, [child1.id, child2.id], parent.id)
+
+        # child1 succeeded but its dependency is not deleted yet
+        ao.Action.mark_succeeded(self.ctx, child1.id, 1234)
+        child1.status = child1.SUCCEEDED
+
+        res = parent.to_dict()
+        self.assertEqual([child2.id], res['depends_on'])
+        self.assertEqual([], child1.to_dict()['depended_by'])
+        self.assertEqual([parent.id], child2.to_dict()['depended_by'])
+
 
 class ActionPolicyCheckTest(base.SenlinTestCase):
 
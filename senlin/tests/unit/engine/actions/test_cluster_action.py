@@ -10,9 +10,16 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
+import eventlet
+from eventlet import event as eventlet_event
 import mock
+from oslo_config import cfg
+from oslo_utils import uuidutils
 
 from senlin.common import scaleutils
+from senlin.engine import action_graph
 from senlin.engine.actions import base as ab
 from senlin.engine.actions import cluster_action as ca
 from senlin.engine import cluster as cm
@@ -23,9 +30,9 @@ from senlin.engine import scheduler
 from senlin.engine import senlin_lock
 from senlin.objects import action as ao
 from senlin.objects import cluster as co
-from senlin.objects import dependency as dobj
 from senlin.objects import node as no
 from senlin.policies import base as pb
+from senlin.profiles import base as pfb
 from senlin.tests.unit.common import base
 from senlin.tests.unit.common import utils
 
@@ -87,8 +94,11 @@ class ClusterActionWaitTest(base.SenlinTestCase):
         self.ctx = utils.dummy_context()
 
     @mock.patch.object(cm.Cluster, 'load')
-    @mock.patch.object(scheduler, 'reschedule')
-    def test_wait_dependents(self, mock_reschedule, mock_load):
+    @mock.patch.object(scheduler, 'remove_waiter')
+    @mock.patch.object(scheduler, 'add_waiter')
+    @mock.patch.object(scheduler, 'wait_for_wakeup')
+    def test_wait_dependents(self, mock_wait, mock_add, mock_remove,
+                             mock_load):
         action = ca.ClusterAction('ID', 'ACTION', self.ctx)
         action.id = 'FAKE_ID'
         self.patchobject(action, 'get_status', side_effect=self.statuses)
@@ -98,7 +108,370 @@ class ClusterActionWaitTest(base.SenlinTestCase):
         res_code, res_msg = action._wait_for_dependents()
         self.assertEqual(self.code, res_code)
         self.assertEqual(self.message, res_msg)
-        self.assertEqual(self.rescheduled_times, mock_reschedule.call_count)
+        self.assertEqual(self.rescheduled_times, mock_wait.call_count)
+        mock_wait.assert_called_with('FAKE_ID', 30)
+        mock_add.assert_called_once_with('FAKE_ID')
+        mock_remove.assert_called_once_with('FAKE_ID')
+        self.assertIsNone(action_graph.graph.pending('FAKE_ID'))
+
+
+class ClusterActionWaitTimeoutTest(base.SenlinTestCase):
+
+    def setUp(self):
+        super(ClusterActionWaitTimeoutTest, self).setUp()
+        self.ctx = utils.dummy_context()
+
+    @mock.patch.object(cm.Cluster, 'load')
+    @mock.patch.object(scheduler, 'wait_for_wakeup')
+    def test_wait_dependents_not_woken_up(self, mock_wait, mock_load):
+        action = ca.ClusterAction('ID', 'ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        action_graph.graph.track('FAKE_ID', ['CHILD'])
+        mock_wait.return_value = False
+        pending = []
+
+        def get_status():
+            pending.append(action_graph.graph.pending('FAKE_ID'))
+            return ab.Action.WAITING if len(pending) == 1 else ab.Action.READY
+
+        self.patchobject(action, 'get_status', side_effect=get_status)
+        self.patchobject(action, 'is_cancelled', return_value=False)
+        self.patchobject(action, 'is_timeout', return_value=False)
+
+        res_code, res_msg = action._wait_for_dependents()
+
+        self.assertEqual(ab.Action.RES_OK, res_code)
+        # the status is checked from database after the wait timed out
+        self.assertEqual([1, None], pending)
+
+    @mock.patch.object(ao.Action, 'get')
+    @mock.patch.object(cm.Cluster, 'load')
+    @mock.patch.object(scheduler, 'wait_for_wakeup')
+    def test_wait_dependents_allowed(self, mock_wait, mock_load, mock_get):
+        action = ca.ClusterAction('ID', 'ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        action_graph.graph.track('FAKE_ID', ['C1', 'C2', 'C3'])
+        mock_get.return_value = mock.Mock(status=ab.Action.RUNNING)
+
+        def wait_for_wakeup(action_id, timeout):
+            action_graph.graph.resolve('FAKE_ID', 'C1')
+            return True
+
+        mock_wait.side_effect = wait_for_wakeup
+        self.patchobject(action, 'get_status',
+                         return_value=ab.Action.WAITING)
+        self.patchobject(action, 'is_cancelled', return_value=False)
+        self.patchobject(action, 'is_timeout', return_value=False)
+
+        res_code, res_msg = action._wait_for_dependents(2)
+
+        self.assertEqual(ab.Action.RES_OK, res_code)
+        self.assertEqual('Enough dependents ended with success', res_msg)
+        self.assertEqual(1, mock_wait.call_count)
+        # the dependents still running remain tracked
+        self.assertEqual(2, action_graph.graph.pending('FAKE_ID'))
+        self.assertFalse(action_graph.graph.resolve('FAKE_ID', 'C2'))
+
+    @mock.patch.object(ao.Action, 'get')
+    @mock.patch.object(cm.Cluster, 'load')
+    @mock.patch.object(scheduler, 'wait_for_wakeup')
+    def test_wait_dependents_allowed_failed(self, mock_wait, mock_load,
+                                            mock_get):
+        action = ca.ClusterAction('ID', 'ACTION', self.ctx)
+        action.id = 'FAKE_ID'
+        action_graph.graph.track('FAKE_ID', ['C1'])
+        mock_get.return_value = mock.Mock(status=ab.Action.FAILED)
+        self.patchobject(action, 'get_status',
+                         return_value=ab.Action.WAITING)
+        self.patchobject(action, 'is_cancelled', return_value=False)
+        self.patchobject(action, 'is_timeout', return_value=False)
+
+        res_code, res_msg = action._wait_for_dependents(1)
+
+        self.assertEqual(ab.Action.RES_ERROR, res_code)
+        self.assertEqual('ACTION [FAKE_ID] failed', res_msg)
+        mock_get.assert_called_once_with(action.context, 'FAKE_ID')
+        self.assertFalse(mock_wait.called)
+        self.assertIsNone(action_graph.graph.pending('FAKE_ID'))
+
+
+class ClusterActionWaitIntervalTest(base.SenlinTestCase):
+
+    def setUp(self):
+        super(ClusterActionWaitIntervalTest, self).setUp()
+        self.ctx = utils.dummy_context()
+
+    @mock.patch.object(cm.Cluster, 'load')
+    def test_wait_interval_default(self, mock_load):
+        action = ca.ClusterAction('ID', 'ACTION', self.ctx)
+
+        self.assertEqual(30, action._wait_interval())
+
+    @mock.patch.object(ab, 'wallclock')
+    @mock.patch.object(cm.Cluster, 'load')
+    def test_wait_interval_trimmed(self, mock_load, mock_clock):
+        mock_clock.return_value = 110
+        action = ca.ClusterAction('ID', 'ACTION', self.ctx, start_time=100,
+                                  timeout=20)
+
+        self.assertEqual(10, action._wait_interval())
+
+        mock_clock.return_value = 130
+        self.assertEqual(0, action._wait_interval())
+
+
+@mock.patch.object(cm.Cluster, 'load')
+class ClusterActionInlineTest(base.SenlinTestCase):
+
+    def setUp(self):
+        super(ClusterActionInlineTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        cfg.CONF.set_override('node_operation_mode', 'inline',
+                              enforce_type=True)
+        cfg.CONF.set_override('max_actions_per_batch', 0, enforce_type=True)
+        self.specs = [
+            ('NODE_1', 'NODE_CHECK', {'name': 'node_check_1'}),
+            ('NODE_2', 'NODE_CHECK', {'name': 'node_check_2'}),
+            ('NODE_3', 'NODE_CHECK', {'name': 'node_check_3'}),
+        ]
+
+    def _create_action(self, mock_load):
+        mock_load.return_value = mock.Mock(policies=[])
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx,
+                                  id='CLUSTER_ACTION_ID', owner='ENGINE')
+        self.patchobject(action, 'is_cancelled', return_value=False)
+        self.patchobject(action, 'is_timeout', return_value=False)
+        self.mock_update = self.patchobject(ao.Action, 'update')
+        return action
+
+    @mock.patch.object(ca.ClusterAction, '_execute_inline')
+    @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
+    def test__run_children_inline(self, mock_start, mock_wait, mock_inline,
+                                  mock_load):
+        action = self._create_action(mock_load)
+        # the policies do not apply to the derived node actions
+        action.cluster.policies = [
+            mock.Mock(TARGET=[('BEFORE', 'NODE_CHECK')])]
+        mock_inline.return_value = (action.RES_OK, 'OK')
+
+        res = action._run_children(self.specs)
+
+        self.assertEqual((action.RES_OK, 'OK'), res)
+        mock_inline.assert_called_once_with(self.specs)
+        self.assertFalse(mock_start.called)
+        self.assertFalse(mock_wait.called)
+
+    @mock.patch.object(ca.ClusterAction, '_execute_inline')
+    @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
+    def test__run_children_actions(self, mock_start, mock_wait, mock_inline,
+                                   mock_load):
+        cfg.CONF.set_override('node_operation_mode', 'actions',
+                              enforce_type=True)
+        action = self._create_action(mock_load)
+        mock_wait.return_value = (action.RES_OK, 'OK')
+
+        res = action._run_children(self.specs)
+
+        self.assertEqual((action.RES_OK, 'OK'), res)
+        mock_start.assert_called_once_with(self.specs)
+        mock_wait.assert_called_once_with()
+        self.assertFalse(mock_inline.called)
+
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline(self, mock_node_action, mock_create, mock_load):
+        mock_node_action.return_value.execute.return_value = (
+            ab.Action.RES_OK, 'Node status checked.')
+        action = self._create_action(mock_load)
+
+        res, reason = action._execute_inline(self.specs)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual('All dependents ended with success', reason)
+        self.assertEqual(3, mock_node_action.call_count)
+        mock_node_action.assert_any_call(
+            'NODE_1', 'NODE_CHECK', action.context, id='CLUSTER_ACTION_ID',
+            owner='ENGINE', name='node_check_1', cause='Derived Action',
+            inputs={})
+        self.assertEqual({'total': 3, 'succeeded': 3, 'failed': {}},
+                         action.data['inline'])
+        # no action is recorded for the successful operations
+        self.assertFalse(mock_create.called)
+
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_progress(self, mock_node_action, mock_load):
+        action = self._create_action(mock_load)
+        progress = []
+
+        def _update(context, action_id, values):
+            progress.append(copy.deepcopy(values['data']['inline']))
+
+        self.mock_update.side_effect = _update
+        mock_node_action.return_value.execute.side_effect = [
+            (ab.Action.RES_OK, 'Node status checked.'),
+            (ab.Action.RES_ERROR, 'Node status check failed.'),
+            (ab.Action.RES_OK, 'Node status checked.'),
+        ]
+
+        action._execute_inline(self.specs)
+
+        # saved before any operation and as each one completes
+        self.assertEqual(
+            [(0, {}), (1, {}), (1, {'NODE_2': 'Node status check failed.'}),
+             (2, {'NODE_2': 'Node status check failed.'})],
+            [(p['succeeded'], p['failed']) for p in progress])
+        self.mock_update.assert_called_with(action.context,
+                                            'CLUSTER_ACTION_ID',
+                                            {'data': action.data})
+
+    @mock.patch.object(ca.LOG, 'warning')
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_progress_failed(self, mock_node_action,
+                                             mock_log, mock_load):
+        mock_node_action.return_value.execute.return_value = (
+            ab.Action.RES_OK, 'Node status checked.')
+        action = self._create_action(mock_load)
+        self.mock_update.side_effect = Exception('boom')
+
+        res, reason = action._execute_inline(self.specs)
+
+        # the progress is not essential to the operations
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual(4, mock_log.call_count)
+
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_failed(self, mock_node_action, mock_create,
+                                    mock_load):
+        node_action = mock_node_action.return_value
+        node_action.execute.side_effect = [
+            (ab.Action.RES_OK, 'Node status checked.'),
+            (ab.Action.RES_ERROR, 'Node status check failed.'),
+            Exception('boom'),
+        ]
+        action = self._create_action(mock_load)
+
+        res, reason = action._execute_inline(self.specs)
+
+        self.assertEqual(action.RES_ERROR, res)
+        self.assertEqual('CLUSTER_ACTION [CLUSTER_] failed', reason)
+        self.assertEqual({'total': 3, 'succeeded': 1,
+                          'failed': {'NODE_2': 'Node status check failed.',
+                                     'NODE_3': 'boom'}},
+                         action.data['inline'])
+        mock_create.assert_called_once_with(action.context, [
+            ('NODE_2', 'NODE_CHECK', {
+                'name': 'node_check_2', 'cause': 'Derived Action',
+                'status': 'FAILED',
+                'status_reason': 'Node status check failed.',
+                'inputs': {}}),
+            ('NODE_3', 'NODE_CHECK', {
+                'name': 'node_check_3', 'cause': 'Derived Action',
+                'status': 'FAILED', 'status_reason': 'boom',
+                'inputs': {}}),
+        ])
+
+    @mock.patch.object(ca.ClusterAction, '_sleep')
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_batched(self, mock_node_action, mock_sleep,
+                                     mock_load):
+        cfg.CONF.set_override('max_actions_per_batch', 2, enforce_type=True)
+        cfg.CONF.set_override('batch_interval', 5, enforce_type=True)
+        mock_node_action.return_value.execute.return_value = (
+            ab.Action.RES_OK, 'Node status checked.')
+        action = self._create_action(mock_load)
+
+        res, reason = action._execute_inline(self.specs)
+
+        self.assertEqual(action.RES_OK, res)
+        self.assertEqual(3, mock_node_action.call_count)
+        mock_sleep.assert_called_once_with(5)
+
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_cancelled(self, mock_node_action, mock_load):
+        mock_node_action.return_value.execute.return_value = (
+            ab.Action.RES_OK, 'Node status checked.')
+        action = self._create_action(mock_load)
+        action.is_cancelled.side_effect = [False, True]
+
+        res, reason = action._execute_inline(self.specs)
+
+        self.assertEqual(action.RES_CANCEL, res)
+        self.assertEqual('CLUSTER_ACTION [CLUSTER_] cancelled', reason)
+        # the operation started completes in the background
+        eventlet.sleep(0)
+        self.assertEqual(1, mock_node_action.call_count)
+        self.assertEqual({'total': 3, 'succeeded': 1, 'failed': {}},
+                         action.data['inline'])
+
+    def _execute_blocked(self, action, mock_node_action):
+        blocked = eventlet_event.Event()
+
+        def _execute():
+            blocked.wait()
+            return ab.Action.RES_ERROR, 'Node status check failed.'
+
+        mock_node_action.return_value.execute.side_effect = _execute
+        self.patchobject(scheduler, 'wait_for_wakeup',
+                         side_effect=lambda a, t: eventlet.sleep(0))
+
+        res = action._execute_inline(self.specs)
+
+        # not waiting for the operations in progress
+        self.assertEqual(3, mock_node_action.call_count)
+        self.assertEqual({'total': 3, 'succeeded': 0, 'failed': {}},
+                         action.data['inline'])
+        blocked.send()
+        eventlet.sleep(0.01)
+        return res
+
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_cancelled_running(self, mock_node_action,
+                                               mock_create, mock_load):
+        action = self._create_action(mock_load)
+        action.is_cancelled.side_effect = [False, False, False, False, True]
+
+        res, reason = self._execute_blocked(action, mock_node_action)
+
+        self.assertEqual(action.RES_CANCEL, res)
+        self.assertEqual('CLUSTER_ACTION [CLUSTER_] cancelled', reason)
+        # the failures are still recorded once the operations complete
+        self.assertEqual(3, len(action.data['inline']['failed']))
+        self.assertEqual(3, mock_create.call_count)
+        mock_create.assert_any_call(action.context, [
+            ('NODE_1', 'NODE_CHECK', {
+                'name': 'node_check_1', 'cause': 'Derived Action',
+                'status': 'FAILED',
+                'status_reason': 'Node status check failed.',
+                'inputs': {}}),
+        ])
+
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_timeout_running(self, mock_node_action,
+                                             mock_create, mock_load):
+        action = self._create_action(mock_load)
+        action.is_timeout.side_effect = [False, False, False, False, True]
+
+        res, reason = self._execute_blocked(action, mock_node_action)
+
+        self.assertEqual(action.RES_TIMEOUT, res)
+        self.assertEqual('CLUSTER_ACTION [CLUSTER_] timeout', reason)
+        self.assertEqual(3, mock_create.call_count)
+
+    @mock.patch('senlin.engine.actions.node_action.NodeAction')
+    def test__execute_inline_timeout(self, mock_node_action, mock_load):
+        action = self._create_action(mock_load)
+        action.is_timeout.return_value = True
+
+        res, reason = action._execute_inline(self.specs)
+
+        self.assertEqual(action.RES_TIMEOUT, res)
+        self.assertEqual('CLUSTER_ACTION [CLUSTER_] timeout', reason)
+        self.assertFalse(mock_node_action.called)
 
 
 @mock.patch.object(cm.Cluster, 'load')
@@ -108,16 +481,149 @@ class ClusterActionTest(base.SenlinTestCase):
         super(ClusterActionTest, self).setUp()
         self.ctx = utils.dummy_context()
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch.object(dispatcher, 'start_action')
+    def test__start_children(self, mock_start, mock_create, mock_load):
+        mock_create.return_value = ['ACTION_1', 'ACTION_2']
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx)
+        action.id = 'CLUSTER_ACTION_ID'
+        specs = [
+            ('NODE_1', 'NODE_CHECK', {'id': 'ACTION_1', 'name': 'check_1'}),
+            ('NODE_2', 'NODE_CHECK', {'id': 'ACTION_2', 'name': 'check_2'}),
+        ]
+
+        res = action._start_children(specs)
+
+        self.assertEqual(['ACTION_1', 'ACTION_2'], res)
+        mock_create.assert_called_once_with(
+            action.context,
+            [('NODE_1', 'NODE_CHECK',
+              {'id': 'ACTION_1', 'name': 'check_1',
+               'cause': 'Derived Action', 'status': 'READY'}),
+             ('NODE_2', 'NODE_CHECK',
+              {'id': 'ACTION_2', 'name': 'check_2',
+               'cause': 'Derived Action', 'status': 'READY'})],
+            dependencies=[('ACTION_1', 'CLUSTER_ACTION_ID'),
+                          ('ACTION_2', 'CLUSTER_ACTION_ID')])
+        mock_start.assert_called_once_with(cluster_id='CLUSTER_ID')
+        self.assertEqual(2, action_graph.graph.pending('CLUSTER_ACTION_ID'))
+
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch.object(dispatcher, 'start_action')
+    def test__start_children_failed(self, mock_start, mock_create,
+                                    mock_load):
+        mock_create.side_effect = Exception('boom')
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx)
+        action.id = 'CLUSTER_ACTION_ID'
+        specs = [('NODE_1', 'NODE_CHECK', {'name': 'check_1'})]
+
+        self.assertRaises(Exception, action._start_children, specs)
+
+        self.assertIsNone(action_graph.graph.pending('CLUSTER_ACTION_ID'))
+        self.assertFalse(mock_start.called)
+
+    @mock.patch.object(ab.Action, 'create_all')
+    @mock.patch.object(dispatcher, 'start_action')
+    def test__start_children_with_dependencies(self, mock_start, mock_create,
+                                               mock_load):
+        mock_create.return_value = ['ACTION_1']
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx)
+        action.id = 'CLUSTER_ACTION_ID'
+        specs = [('NODE_1', 'NODE_CHECK', {'name': 'check_1'})]
+
+        res = action._start_children(specs, [('FOO', 'BAR')])
+
+        self.assertEqual(['ACTION_1'], res)
+        mock_create.assert_called_once_with(action.context, mock.ANY,
+                                            dependencies=[('FOO', 'BAR')])
+        self.assertIsNotNone(specs[0][2]['id'])
+        self.assertIsNone(action_graph.graph.pending('CLUSTER_ACTION_ID'))
+
+    @mock.patch.object(ca.ClusterAction, '_run_children')
+    def test__run_batches_no_plan(self, mock_run, mock_load):
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx)
+        mock_run.return_value = (action.RES_OK, 'OK')
+        specs = [('NODE_1', 'NODE_UPDATE', {'name': 'update_1'})]
+
+        res = action._run_batches(specs)
+
+        self.assertEqual((action.RES_OK, 'OK'), res)
+        mock_run.assert_called_once_with(specs)
+        self.assertNotIn('batches', action.outputs)
+
+    @mock.patch.object(ab, 'wallclock')
+    @mock.patch.object(ca.ClusterAction, '_sleep')
+    @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
+    def test__run_batches(self, mock_start, mock_wait, mock_sleep,
+                          mock_clock, mock_load):
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx)
+        action.data = {
+            'batch': {
+                'batch_size': 2,
+                'pause_time': 10,
+                'plan': [['N1', 'N2'], ['N3', 'N4'], ['N5']],
+            }
+        }
+        mock_wait.return_value = (action.RES_OK, 'OK')
+        mock_clock.side_effect = [100, 100, 101, 105, 110, 111, 125, 125,
+                                  126, 136, 137]
+        specs = [(n, 'NODE_UPDATE', {'name': 'update_%s' % n})
+                 for n in ['N5', 'N4', 'N3', 'N2', 'N1', 'N6']]
+
+        res = action._run_batches(specs)
+
+        self.assertEqual((action.RES_OK, 'OK'), res)
+        # the node not in the plan is handled in a last batch
+        mock_start.assert_has_calls([
+            mock.call([specs[4], specs[3]]),
+            mock.call([specs[2], specs[1]]),
+            mock.call([specs[0]]),
+            mock.call([specs[5]]),
+        ])
+        # each batch is started as soon as it doesn't make more than two
+        # operations in progress
+        mock_wait.assert_has_calls([
+            mock.call(0), mock.call(1), mock.call(1), mock.call()])
+        mock_sleep.assert_has_calls([
+            mock.call(5), mock.call(0), mock.call(0)])
+        self.assertEqual([
+            {'nodes': ['N1', 'N2'], 'start': 0, 'wait': 0},
+            {'nodes': ['N3', 'N4'], 'start': 10, 'wait': 9},
+            {'nodes': ['N5'], 'start': 25, 'wait': 14},
+            {'nodes': ['N6'], 'start': 37, 'wait': 11},
+        ], action.outputs['batches'])
+
+    @mock.patch.object(ca.ClusterAction, '_sleep')
+    @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
+    def test__run_batches_failed(self, mock_start, mock_wait, mock_sleep,
+                                 mock_load):
+        action = ca.ClusterAction('CLUSTER_ID', 'CLUSTER_ACTION', self.ctx)
+        action.data = {
+            'batch': {
+                'batch_size': 1,
+                'pause_time': 0,
+                'plan': [['N1'], ['N2']],
+            }
+        }
+        mock_wait.return_value = (action.RES_ERROR, 'Failed')
+        specs = [(n, 'NODE_UPDATE', {'name': 'update_%s' % n})
+                 for n in ['N1', 'N2']]
+
+        res = action._run_batches(specs)
+
+        self.assertEqual((action.RES_ERROR, 'Failed'), res)
+        mock_start.assert_called_once_with([specs[0]])
+        mock_wait.assert_called_once_with(0)
+        self.assertEqual(1, len(action.outputs['batches']))
+
     @mock.patch.object(co.Cluster, 'get_next_index')
     @mock.patch.object(nm, 'Node')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test__create_nodes_single(self, mock_wait, mock_start, mock_dep,
-                                  mock_node, mock_index, mock_action,
-                                  mock_update, mock_load):
+    def test__create_nodes_single(self, mock_wait, mock_children, mock_node,
+                                  mock_index, mock_load):
         # prepare mocks
         cluster = mock.Mock(id='CLUSTER_ID', profile_id='FAKE_PROFILE',
                             user='FAKE_USER', project='FAKE_PROJECT',
@@ -133,7 +639,7 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_wait.return_value = (action.RES_OK, 'All dependents completed')
 
         # node_action is faked
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
 
         # do it
         res_code, res_msg = action._create_nodes(1)
@@ -141,26 +647,17 @@ class ClusterActionTest(base.SenlinTestCase):
         # assertions
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('All dependents completed', res_msg)
-        mock_index.assert_called_once_with(action.context, 'CLUSTER_ID')
+        mock_index.assert_called_once_with(action.context, 'CLUSTER_ID', 1)
         mock_node.assert_called_once_with('node-CLUSTER_-123',
                                           'FAKE_PROFILE',
                                           'CLUSTER_ID',
-                                          context=action.context,
                                           user='FAKE_USER',
                                           project='FAKE_PROJECT',
                                           domain='FAKE_DOMAIN',
                                           index=123, metadata={})
-        node.store.assert_called_once_with(action.context)
-        mock_action.assert_called_once_with(action.context, 'NODE_ID',
-                                            'NODE_CREATE',
-                                            name='node_create_NODE_ID',
-                                            cause='Derived Action')
-        mock_dep.assert_called_once_with(action.context, ['NODE_ACTION_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(
-            action.context, 'NODE_ACTION_ID',
-            {'status': ab.Action.READY})
-        mock_start.assert_called_once_with()
+        mock_node.store_all.assert_called_once_with(action.context, [node])
+        mock_children.assert_called_once_with(
+            [('NODE_ID', 'NODE_CREATE', {'name': 'node_create_NODE_ID'})])
         mock_wait.assert_called_once_with()
         self.assertEqual({'nodes_added': ['NODE_ID']}, action.outputs)
 
@@ -177,23 +674,19 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('', res_msg)
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
     @mock.patch.object(co.Cluster, 'get_next_index')
     @mock.patch.object(nm, 'Node')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test__create_nodes_multiple(self, mock_wait, mock_start, mock_dep,
-                                    mock_node, mock_index, mock_action,
-                                    mock_update, mock_load):
+    def test__create_nodes_multiple(self, mock_wait, mock_children, mock_node,
+                                    mock_index, mock_load):
         cluster = mock.Mock(id='01234567-123434')
         node1 = mock.Mock(id='01234567-abcdef',
                           data={'placement': {'region': 'regionOne'}})
         node2 = mock.Mock(id='abcdefab-123456',
                           data={'placement': {'region': 'regionTwo'}})
         mock_node.side_effect = [node1, node2]
-        mock_index.side_effect = [123, 124]
+        mock_index.return_value = 123
 
         mock_load.return_value = cluster
         # cluster action is real
@@ -211,7 +704,7 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_wait.return_value = (action.RES_OK, 'All dependents completed')
 
         # node_action is faked
-        mock_action.side_effect = ['NODE_ACTION_1', 'NODE_ACTION_2']
+        mock_children.return_value = ['NODE_ACTION_1', 'NODE_ACTION_2']
 
         # do it
         res_code, res_msg = action._create_nodes(2)
@@ -219,19 +712,14 @@ class ClusterActionTest(base.SenlinTestCase):
         # assertions
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('All dependents completed', res_msg)
-        self.assertEqual(2, mock_index.call_count)
+        mock_index.assert_called_once_with(action.context, cluster.id, 2)
         self.assertEqual(2, mock_node.call_count)
-        node1.store.assert_called_once_with(action.context)
-        node2.store.assert_called_once_with(action.context)
-        self.assertEqual(2, mock_action.call_count)
-        self.assertEqual(1, mock_dep.call_count)
-
-        update_calls = [
-            mock.call(action.context, 'NODE_ACTION_1', {'status': 'READY'}),
-            mock.call(action.context, 'NODE_ACTION_2', {'status': 'READY'})
-        ]
-        mock_update.assert_has_calls(update_calls)
-        mock_start.assert_called_once_with()
+        mock_node.store_all.assert_called_once_with(action.context,
+                                                    [node1, node2])
+        mock_children.assert_called_once_with([
+            (node1.id, 'NODE_CREATE', {'name': 'node_create_01234567'}),
+            (node2.id, 'NODE_CREATE', {'name': 'node_create_abcdefab'}),
+        ])
         mock_wait.assert_called_once_with()
         self.assertEqual({'nodes_added': [node1.id, node2.id]}, action.outputs)
         self.assertEqual({'region': 'regionOne'}, node1.data['placement'])
@@ -239,11 +727,11 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_node_calls = [
             mock.call('node-01234567-123', mock.ANY, '01234567-123434',
                       user=mock.ANY, project=mock.ANY, domain=mock.ANY,
-                      index=123, context=mock.ANY, metadata={},
+                      index=123, metadata={},
                       data={'placement': {'region': 'regionOne'}}),
             mock.call('node-01234567-124', mock.ANY, '01234567-123434',
                       user=mock.ANY, project=mock.ANY, domain=mock.ANY,
-                      index=124, context=mock.ANY, metadata={},
+                      index=124, metadata={},
                       data={'placement': {'region': 'regionTwo'}})
         ]
 
@@ -251,15 +739,55 @@ class ClusterActionTest(base.SenlinTestCase):
         cluster.add_node.assert_has_calls([
             mock.call(node1), mock.call(node2)])
 
-    @mock.patch.object(ao.Action, 'update')
+    @mock.patch.object(ao.Action, 'create_all')
+    @mock.patch.object(no.Node, 'create_all')
+    @mock.patch.object(co.Cluster, 'get_next_index')
+    @mock.patch.object(pfb.Profile, 'load')
+    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
+    def test__create_nodes_db_calls(self, mock_wait, mock_start,
+                                    mock_profile, mock_index, mock_nodes,
+                                    mock_actions, mock_load):
+        # The number of DB calls must not grow with the number of nodes
+        count = 100
+        cluster = mock.Mock(id='CLUSTER_ID', profile_id='FAKE_PROFILE',
+                            user='FAKE_USER', project='FAKE_PROJECT',
+                            domain='FAKE_DOMAIN')
+        mock_load.return_value = cluster
+        mock_index.return_value = 1
+        node_ids = ['NODE_%03d' % i for i in range(count)]
+        mock_nodes.return_value = node_ids
+        mock_actions.side_effect = lambda ctx, values, dependencies: [
+            v['id'] for v in values]
+        action = ca.ClusterAction(cluster.id, 'CLUSTER_ACTION', self.ctx)
+        action.id = 'CLUSTER_ACTION_ID'
+        mock_wait.return_value = (action.RES_OK, 'All dependents completed')
+
+        res_code, res_msg = action._create_nodes(count)
+
+        self.assertEqual(action.RES_OK, res_code)
+        self.assertEqual(node_ids, action.outputs['nodes_added'])
+        self.assertEqual(1, mock_index.call_count)
+        self.assertEqual(1, mock_nodes.call_count)
+        self.assertEqual(count, len(mock_nodes.call_args[0][1]))
+        self.assertEqual(1, mock_profile.call_count)
+        self.assertEqual(1, mock_actions.call_count)
+        values = mock_actions.call_args[0][1]
+        deps = mock_actions.call_args[1]['dependencies']
+        self.assertEqual(count, len(values))
+        self.assertEqual(count, len(deps))
+        for v in values:
+            self.assertEqual('READY', v['status'])
+            self.assertIn((v['id'], 'CLUSTER_ACTION_ID'), deps)
+        mock_start.assert_called_once_with(cluster_id='CLUSTER_ID')
+
     @mock.patch.object(co.Cluster, 'get')
     @mock.patch.object(nm, 'Node')
-    @mock.patch.object(dobj.Dependency, 'create')
     @mock.patch.object(dispatcher, 'start_action')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
     def test__create_nodes_multiple_failed_wait(self, mock_wait, mock_start,
-                                                mock_dep, mock_node, mock_get,
-                                                mock_update, mock_load):
+                                                mock_node, mock_get,
+                                                mock_load):
         cluster = mock.Mock(id='01234567-123434')
         db_cluster = mock.Mock(next_index=1)
         mock_get.return_value = db_cluster
@@ -359,13 +887,9 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual('retry', res_msg)
         cluster.eval_status.assert_called_once_with(action.context, 'create')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_update_multi(self, mock_wait, mock_start, mock_dep,
-                             mock_action, mock_update, mock_load):
+    def test_do_update_multi(self, mock_wait, mock_children, mock_load):
         node1 = mock.Mock(id='fake id 1')
         node2 = mock.Mock(id='fake id 2')
         cluster = mock.Mock(id='FAKE_ID', nodes=[node1, node2],
@@ -374,7 +898,7 @@ class ClusterActionTest(base.SenlinTestCase):
         action = ca.ClusterAction(cluster.id, 'CLUSTER_ACTION', self.ctx)
         action.inputs = {'new_profile_id': 'FAKE_PROFILE'}
 
-        mock_action.side_effect = ['NODE_ACTION_1', 'NODE_ACTION_2']
+        mock_children.return_value = ['NODE_ACTION_1', 'NODE_ACTION_2']
         mock_wait.return_value = (action.RES_OK, 'OK')
 
         # do it
@@ -383,15 +907,13 @@ class ClusterActionTest(base.SenlinTestCase):
         # assertions
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('Cluster update completed.', res_msg)
-        self.assertEqual(2, mock_action.call_count)
-        self.assertEqual(1, mock_dep.call_count)
-        update_calls = [
-            mock.call(action.context, 'NODE_ACTION_1', {'status': 'READY'}),
-            mock.call(action.context, 'NODE_ACTION_2', {'status': 'READY'})
-        ]
-        mock_update.assert_has_calls(update_calls)
-
-        mock_start.assert_called_once_with()
+        inputs = {'new_profile_id': 'FAKE_PROFILE'}
+        mock_children.assert_called_once_with([
+            ('fake id 1', 'NODE_UPDATE',
+             {'name': 'node_update_fake id ', 'inputs': inputs}),
+            ('fake id 2', 'NODE_UPDATE',
+             {'name': 'node_update_fake id ', 'inputs': inputs}),
+        ])
         cluster.eval_status.assert_called_once_with(
             action.context, 'update', profile_id='FAKE_PROFILE',
             updated_at=mock.ANY)
@@ -424,20 +946,17 @@ class ClusterActionTest(base.SenlinTestCase):
             action.context, 'update', profile_id='FAKE_PROFILE',
             updated_at=mock.ANY)
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_update_failed_wait(self, mock_wait, mock_start, mock_dep,
-                                   mock_action, mock_update, mock_load):
+    def test_do_update_failed_wait(self, mock_wait, mock_children,
+                                   mock_load):
         node = mock.Mock(id='fake node id')
         cluster = mock.Mock(id='FAKE_CLUSTER', nodes=[node], ACTIVE='ACTIVE')
         mock_load.return_value = cluster
         action = ca.ClusterAction(cluster.id, 'CLUSTER_ACTION', self.ctx)
         action.inputs = {'new_profile_id': 'FAKE_PROFILE'}
 
-        mock_action.return_value = 'NODE_ACTION'
+        mock_children.return_value = ['NODE_ACTION']
         mock_wait.return_value = (action.RES_TIMEOUT, 'Timeout')
 
         # do it
@@ -446,21 +965,13 @@ class ClusterActionTest(base.SenlinTestCase):
         # assertions
         self.assertEqual(action.RES_TIMEOUT, res_code)
         self.assertEqual('Failed in updating nodes.', res_msg)
-        self.assertEqual(1, mock_action.call_count)
-        self.assertEqual(1, mock_dep.call_count)
-        mock_update.assert_called_once_with(action.context, 'NODE_ACTION',
-                                            {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        self.assertEqual(1, mock_children.call_count)
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(action.context, 'update')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test__delete_nodes_single(self, mock_wait, mock_start, mock_dep,
-                                  mock_action, mock_update, mock_load):
+    def test__delete_nodes_single(self, mock_wait, mock_children, mock_load):
         # prepare mocks
         cluster = mock.Mock(id='FAKE_CLUSTER', desired_capacity=100)
 
@@ -469,7 +980,7 @@ class ClusterActionTest(base.SenlinTestCase):
         action = ca.ClusterAction(cluster.id, 'CLUSTER_ACTION', self.ctx)
         action.id = 'CLUSTER_ACTION_ID'
         mock_wait.return_value = (action.RES_OK, 'All dependents completed')
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
 
         # do it
         res_code, res_msg = action._delete_nodes(['NODE_ID'])
@@ -477,25 +988,15 @@ class ClusterActionTest(base.SenlinTestCase):
         # assertions
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('All dependents completed', res_msg)
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_ID', 'NODE_DELETE',
-            name='node_delete_NODE_ID', cause='Derived Action')
-        mock_dep.assert_called_once_with(action.context, ['NODE_ACTION_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(action.context, 'NODE_ACTION_ID',
-                                            {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with(
+            [('NODE_ID', 'NODE_DELETE', {'name': 'node_delete_NODE_ID'})])
         mock_wait.assert_called_once_with()
         self.assertEqual(['NODE_ID'], action.outputs['nodes_removed'])
         cluster.remove_node.assert_called_once_with('NODE_ID')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test__delete_nodes_multi(self, mock_wait, mock_start, mock_dep,
-                                 mock_action, mock_update, mock_load):
+    def test__delete_nodes_multi(self, mock_wait, mock_children, mock_load):
         # prepare mocks
         cluster = mock.Mock(id='CLUSTER_ID', desired_capacity=100)
         mock_load.return_value = cluster
@@ -504,7 +1005,7 @@ class ClusterActionTest(base.SenlinTestCase):
         action = ca.ClusterAction(cluster.id, 'CLUSTER_ACTION', self.ctx)
         action.id = 'CLUSTER_ACTION_ID'
         mock_wait.return_value = (action.RES_OK, 'All dependents completed')
-        mock_action.side_effect = ['NODE_ACTION_1', 'NODE_ACTION_2']
+        mock_children.return_value = ['NODE_ACTION_1', 'NODE_ACTION_2']
 
         # do it
         res_code, res_msg = action._delete_nodes(['NODE_1', 'NODE_2'])
@@ -512,14 +1013,10 @@ class ClusterActionTest(base.SenlinTestCase):
         # assertions
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('All dependents completed', res_msg)
-        self.assertEqual(2, mock_action.call_count)
-        update_calls = [
-            mock.call(action.context, 'NODE_ACTION_1', {'status': 'READY'}),
-            mock.call(action.context, 'NODE_ACTION_2', {'status': 'READY'})
-        ]
-        mock_update.assert_has_calls(update_calls)
-        self.assertEqual(1, mock_dep.call_count)
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with([
+            ('NODE_1', 'NODE_DELETE', {'name': 'node_delete_NODE_1'}),
+            ('NODE_2', 'NODE_DELETE', {'name': 'node_delete_NODE_2'}),
+        ])
         mock_wait.assert_called_once_with()
         self.assertEqual({'nodes_removed': ['NODE_1', 'NODE_2']},
                          action.outputs)
@@ -539,13 +1036,10 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('', res_msg)
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test__delete_nodes_with_pd(self, mock_wait, mock_start, mock_dep,
-                                   mock_action, mock_update, mock_load):
+    def test__delete_nodes_with_pd(self, mock_wait, mock_children,
+                                   mock_load):
         # prepare mocks
         cluster = mock.Mock(id='CLUSTER_ID', desired_capacity=100)
         mock_load.return_value = cluster
@@ -558,24 +1052,20 @@ class ClusterActionTest(base.SenlinTestCase):
             }
         }
         mock_wait.return_value = (action.RES_OK, 'All dependents completed')
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
         # do it
         res_code, res_msg = action._delete_nodes(['NODE_ID'])
 
         # assertions (other assertions are skipped)
         self.assertEqual(action.RES_OK, res_code)
         self.assertEqual('All dependents completed', res_msg)
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_ID', 'NODE_LEAVE',
-            name='node_delete_NODE_ID', cause='Derived Action')
+        mock_children.assert_called_once_with(
+            [('NODE_ID', 'NODE_LEAVE', {'name': 'node_delete_NODE_ID'})])
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test__delete_nodes_failed_wait(self, mock_wait, mock_start, mock_dep,
-                                       mock_action, mock_update, mock_load):
+    def test__delete_nodes_failed_wait(self, mock_wait, mock_children,
+                                       mock_load):
         # prepare mocks
         cluster = mock.Mock(id='ID')
         mock_load.return_value = cluster
@@ -584,7 +1074,7 @@ class ClusterActionTest(base.SenlinTestCase):
         action.id = 'CLUSTER_ACTION_ID'
         action.data = {}
         mock_wait.return_value = (action.RES_TIMEOUT, 'Timeout!')
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
 
         # do it
         res_code, res_msg = action._delete_nodes(['NODE_ID'])
@@ -715,15 +1205,12 @@ class ClusterActionTest(base.SenlinTestCase):
 
     @mock.patch.object(no.Node, 'get')
     @mock.patch.object(no.Node, 'count_by_cluster')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
     @mock.patch.object(nm.Node, 'load')
-    def test_do_add_nodes_single(self, mock_load_node, mock_wait, mock_start,
-                                 mock_update, mock_dep, mock_action,
-                                 mock_count, mock_get, mock_load):
+    def test_do_add_nodes_single(self, mock_load_node, mock_wait,
+                                 mock_children, mock_count, mock_get,
+                                 mock_load):
         cluster = mock.Mock(id='CLUSTER_ID')
         mock_load.return_value = cluster
         mock_count.return_value = 2
@@ -734,7 +1221,7 @@ class ClusterActionTest(base.SenlinTestCase):
         db_node = mock.Mock(id='NODE_1', cluster_id='', ACTIVE='ACTIVE',
                             status='ACTIVE')
         mock_get.return_value = db_node
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
         mock_wait.return_value = (action.RES_OK, 'Good to go!')
 
         # do it
@@ -747,15 +1234,10 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(action.context, 'CLUSTER_ID')
         mock_get.assert_called_once_with(action.context, 'NODE_1')
         mock_count.assert_called_once_with(action.context, 'CLUSTER_ID')
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_1', 'NODE_JOIN',
-            name='node_join_NODE_1', cause='Derived Action',
-            inputs={'cluster_id': 'CLUSTER_ID'})
-        mock_dep.assert_called_once_with(action.context, ['NODE_ACTION_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(
-            action.context, 'NODE_ACTION_ID', {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with([
+            ('NODE_1', 'NODE_JOIN',
+             {'name': 'node_join_NODE_1',
+              'inputs': {'cluster_id': 'CLUSTER_ID'}})])
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(
             action.context, 'add_nodes', desired_capacity=3)
@@ -767,15 +1249,12 @@ class ClusterActionTest(base.SenlinTestCase):
 
     @mock.patch.object(no.Node, 'get')
     @mock.patch.object(no.Node, 'count_by_cluster')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
     @mock.patch.object(nm.Node, 'load')
-    def test_do_add_nodes_multi(self, mock_load_node, mock_wait, mock_start,
-                                mock_update, mock_dep, mock_action,
-                                mock_count, mock_get, mock_load):
+    def test_do_add_nodes_multi(self, mock_load_node, mock_wait,
+                                mock_children, mock_count, mock_get,
+                                mock_load):
 
         cluster = mock.Mock(id='CLUSTER_ID')
         mock_load.return_value = cluster
@@ -793,7 +1272,7 @@ class ClusterActionTest(base.SenlinTestCase):
         node_obj_1 = mock.Mock()
         node_obj_2 = mock.Mock()
         mock_load_node.side_effect = [node_obj_1, node_obj_2]
-        mock_action.side_effect = ['NODE_ACTION_1', 'NODE_ACTION_2']
+        mock_children.return_value = ['NODE_ACTION_1', 'NODE_ACTION_2']
         mock_wait.return_value = (action.RES_OK, 'Good to go!')
 
         # do it
@@ -808,23 +1287,13 @@ class ClusterActionTest(base.SenlinTestCase):
             mock.call(action.context, 'NODE_1'),
             mock.call(action.context, 'NODE_2')])
         mock_count.assert_called_once_with(action.context, 'CLUSTER_ID')
-        mock_action.assert_has_calls([
-            mock.call(action.context, 'NODE_1', 'NODE_JOIN',
-                      name='node_join_NODE_1', cause='Derived Action',
-                      inputs={'cluster_id': 'CLUSTER_ID'}),
-            mock.call(action.context, 'NODE_2', 'NODE_JOIN',
-                      name='node_join_NODE_2', cause='Derived Action',
-                      inputs={'cluster_id': 'CLUSTER_ID'})])
-
-        mock_dep.assert_called_once_with(
-            action.context,
-            ['NODE_ACTION_1', 'NODE_ACTION_2'],
-            'CLUSTER_ACTION_ID')
-        mock_update.assert_has_calls([
-            mock.call(action.context, 'NODE_ACTION_1', {'status': 'READY'}),
-            mock.call(action.context, 'NODE_ACTION_2', {'status': 'READY'})
-        ])
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with([
+            ('NODE_1', 'NODE_JOIN',
+             {'name': 'node_join_NODE_1',
+              'inputs': {'cluster_id': 'CLUSTER_ID'}}),
+            ('NODE_2', 'NODE_JOIN',
+             {'name': 'node_join_NODE_2',
+              'inputs': {'cluster_id': 'CLUSTER_ID'}})])
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(
             action.context, 'add_nodes', desired_capacity=4)
@@ -901,15 +1370,11 @@ class ClusterActionTest(base.SenlinTestCase):
 
     @mock.patch.object(no.Node, 'get')
     @mock.patch.object(no.Node, 'count_by_cluster')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
     @mock.patch.object(nm.Node, 'load')
     def test_do_add_nodes_failed_waiting(self, mock_load_node, mock_wait,
-                                         mock_start, mock_update, mock_dep,
-                                         mock_action, mock_count, mock_get,
+                                         mock_children, mock_count, mock_get,
                                          mock_load):
         cluster = mock.Mock(id='CLUSTER_ID')
         mock_load.return_value = cluster
@@ -920,7 +1385,7 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_get.return_value = mock.Mock(id='NODE_1', cluster_id='',
                                           status='ACTIVE', ACTIVE='ACTIVE')
         mock_count.return_value = 3
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
         mock_wait.return_value = (action.RES_TIMEOUT, 'Timeout!')
 
         # do it
@@ -930,15 +1395,10 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(action.context, 'CLUSTER_ID')
         mock_get.assert_called_once_with(action.context, 'NODE_1')
         mock_count.assert_called_once_with(action.context, 'CLUSTER_ID')
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_1', 'NODE_JOIN',
-            name='node_join_NODE_1', cause='Derived Action',
-            inputs={'cluster_id': 'CLUSTER_ID'})
-        mock_dep.assert_called_once_with(action.context, ['NODE_ACTION_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(
-            action.context, 'NODE_ACTION_ID', {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with([
+            ('NODE_1', 'NODE_JOIN',
+             {'name': 'node_join_NODE_1',
+              'inputs': {'cluster_id': 'CLUSTER_ID'}})])
         mock_wait.assert_called_once_with()
         self.assertEqual(0, cluster.eval_status.call_count)
         self.assertEqual({}, action.outputs)
@@ -946,15 +1406,12 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual(0, mock_load_node.call_count)
         self.assertEqual(0, cluster.add_node.call_count)
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
+    @mock.patch.object(uuidutils, 'generate_uuid')
     @mock.patch.object(no.Node, 'get')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_replace_nodes(self, mock_wait, mock_start, mock_dep,
-                              mock_get_node, mock_action, mock_update,
-                              mock_load):
+    def test_do_replace_nodes(self, mock_wait, mock_children, mock_get_node,
+                              mock_uuid, mock_load):
         cluster = mock.Mock(id='CLUSTER_ID', desired_capacity=10)
         mock_load.return_value = cluster
 
@@ -968,7 +1425,7 @@ class ClusterActionTest(base.SenlinTestCase):
         replace_node = mock.Mock(id='R_NODE_1', cluster_id='',
                                  ACTIVE='ACTIVE', status='ACTIVE')
         mock_get_node.side_effect = [origin_node, replace_node]
-        mock_action.side_effect = ['NODE_LEAVE_1', 'NODE_JOIN_1']
+        mock_uuid.side_effect = ['NODE_LEAVE_1', 'NODE_JOIN_1']
         mock_wait.return_value = (action.RES_OK, 'Free to fly!')
 
         # do the action
@@ -984,31 +1441,14 @@ class ClusterActionTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(
             action.context,
             'CLUSTER_ID')
-        mock_action.assert_has_calls([
-            mock.call(action.context, 'O_NODE_1', 'NODE_LEAVE',
-                      name='node_leave_O_NODE_1',
-                      cause='Derived Action'),
-            mock.call(action.context, 'R_NODE_1', 'NODE_JOIN',
-                      name='node_join_R_NODE_1',
-                      cause='Derived Action',
-                      inputs={'cluster_id': 'CLUSTER_ID'})])
-
-        mock_dep.assert_has_calls([
-            mock.call(action.context,
-                      ['NODE_JOIN_1'],
-                      'CLUSTER_ACTION_ID'),
-            mock.call(action.context,
-                      ['NODE_JOIN_1'],
-                      'NODE_LEAVE_1')])
-
-        mock_update.assert_has_calls([
-            mock.call(action.context,
-                      'NODE_JOIN_1',
-                      {'status': 'READY'}),
-            mock.call(action.context,
-                      'NODE_LEAVE_1',
-                      {'status': 'READY'})])
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with(
+            [('O_NODE_1', 'NODE_LEAVE',
+              {'id': 'NODE_LEAVE_1', 'name': 'node_leave_O_NODE_1'}),
+             ('R_NODE_1', 'NODE_JOIN',
+              {'id': 'NODE_JOIN_1', 'name': 'node_join_R_NODE_1',
+               'inputs': {'cluster_id': 'CLUSTER_ID'}})],
+            [('NODE_JOIN_1', 'CLUSTER_ACTION_ID'),
+             ('NODE_JOIN_1', 'NODE_LEAVE_1')])
 
         mock_wait.assert_called_once_with()
 
@@ -1138,15 +1578,12 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual(action.RES_ERROR, res_code)
         self.assertEqual("Node REPLACE_NODE is not in ACTIVE status.", res_msg)
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
+    @mock.patch.object(uuidutils, 'generate_uuid')
     @mock.patch.object(no.Node, 'get')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_replace_failed_waiting(self, mock_wait, mock_start, mock_dep,
-                                       mock_get_node, mock_action,
-                                       mock_update, mock_load):
+    def test_do_replace_failed_waiting(self, mock_wait, mock_children,
+                                       mock_get_node, mock_uuid, mock_load):
         cluster = mock.Mock(id='CLUSTER_ID', desired_capacity=10)
         mock_load.return_value = cluster
 
@@ -1160,37 +1597,21 @@ class ClusterActionTest(base.SenlinTestCase):
         replace_node = mock.Mock(id='R_NODE_1', cluster_id='',
                                  ACTIVE='ACTIVE', status='ACTIVE')
         mock_get_node.side_effect = [origin_node, replace_node]
-        mock_action.side_effect = ['NODE_LEAVE_1', 'NODE_JOIN_1']
+        mock_uuid.side_effect = ['NODE_LEAVE_1', 'NODE_JOIN_1']
         mock_wait.return_value = (action.RES_TIMEOUT, 'Timeout!')
 
         # do the action
         res_code, res_msg = action.do_replace_nodes()
 
         # assertions
-        mock_action.assert_has_calls([
-            mock.call(action.context, 'O_NODE_1', 'NODE_LEAVE',
-                      name='node_leave_O_NODE_1',
-                      cause='Derived Action'),
-            mock.call(action.context, 'R_NODE_1', 'NODE_JOIN',
-                      name='node_join_R_NODE_1',
-                      cause='Derived Action',
-                      inputs={'cluster_id': 'CLUSTER_ID'})])
-
-        mock_dep.assert_has_calls([
-            mock.call(action.context,
-                      ['NODE_JOIN_1'],
-                      'CLUSTER_ACTION_ID'),
-            mock.call(action.context,
-                      ['NODE_JOIN_1'],
-                      'NODE_LEAVE_1')])
-
-        mock_update.assert_has_calls([
-            mock.call(action.context,
-                      'NODE_JOIN_1',
-                      {'status': 'READY'}),
-            mock.call(action.context,
-                      'NODE_LEAVE_1',
-                      {'status': 'READY'})])
+        mock_children.assert_called_once_with(
+            [('O_NODE_1', 'NODE_LEAVE',
+              {'id': 'NODE_LEAVE_1', 'name': 'node_leave_O_NODE_1'}),
+             ('R_NODE_1', 'NODE_JOIN',
+              {'id': 'NODE_JOIN_1', 'name': 'node_join_R_NODE_1',
+               'inputs': {'cluster_id': 'CLUSTER_ID'}})],
+            [('NODE_JOIN_1', 'CLUSTER_ACTION_ID'),
+             ('NODE_JOIN_1', 'NODE_LEAVE_1')])
 
         self.assertEqual(action.RES_TIMEOUT, res_code)
         self.assertEqual('Timeout!', res_msg)
@@ -1363,13 +1784,9 @@ class ClusterActionTest(base.SenlinTestCase):
         cluster.eval_status.assert_called_once_with(
             action.context, 'del_nodes', desired_capacity=2)
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_check(self, mock_wait, mock_start, mock_dep, mock_action,
-                      mock_update, mock_load):
+    def test_do_check(self, mock_wait, mock_children, mock_load):
         node1 = mock.Mock(id='NODE_1')
         node2 = mock.Mock(id='NODE_2')
         cluster = mock.Mock(id='FAKE_ID', status='old status',
@@ -1377,7 +1794,7 @@ class ClusterActionTest(base.SenlinTestCase):
         cluster.nodes = [node1, node2]
         cluster.do_check.return_value = True
         mock_load.return_value = cluster
-        mock_action.side_effect = ['NODE_ACTION_1', 'NODE_ACTION_2']
+        mock_children.return_value = ['NODE_ACTION_1', 'NODE_ACTION_2']
 
         action = ca.ClusterAction('FAKE_CLUSTER', 'CLUSTER_CHECK', self.ctx)
         action.id = 'CLUSTER_ACTION_ID'
@@ -1393,22 +1810,10 @@ class ClusterActionTest(base.SenlinTestCase):
 
         mock_load.assert_called_once_with(action.context, 'FAKE_CLUSTER')
         cluster.do_check.assert_called_once_with(action.context)
-        mock_action.assert_has_calls([
-            mock.call(action.context, 'NODE_1', 'NODE_CHECK',
-                      name='node_check_NODE_1',
-                      cause=ab.CAUSE_DERIVED),
-            mock.call(action.context, 'NODE_2', 'NODE_CHECK',
-                      name='node_check_NODE_2',
-                      cause=ab.CAUSE_DERIVED)
-        ])
-        mock_dep.assert_called_once_with(action.context,
-                                         ['NODE_ACTION_1', 'NODE_ACTION_2'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_has_calls([
-            mock.call(action.context, 'NODE_ACTION_1', {'status': 'READY'}),
-            mock.call(action.context, 'NODE_ACTION_2', {'status': 'READY'}),
+        mock_children.assert_called_once_with([
+            ('NODE_1', 'NODE_CHECK', {'name': 'node_check_NODE_1'}),
+            ('NODE_2', 'NODE_CHECK', {'name': 'node_check_NODE_2'}),
         ])
-        mock_start.assert_called_once_with()
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(action.context, 'check')
 
@@ -1428,20 +1833,17 @@ class ClusterActionTest(base.SenlinTestCase):
         cluster.do_check.assert_called_once_with(self.ctx)
         cluster.eval_status.assert_called_once_with(action.context, 'check')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_check_failed_waiting(self, mock_wait, mock_start, mock_dep,
-                                     mock_action, mock_update, mock_load):
+    def test_do_check_failed_waiting(self, mock_wait, mock_children,
+                                     mock_load):
         node = mock.Mock(id='NODE_1')
         cluster = mock.Mock(id='CLUSTER_ID', status='old status',
                             status_reason='old reason')
         cluster.do_recover.return_value = True
         cluster.nodes = [node]
         mock_load.return_value = cluster
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
 
         action = ca.ClusterAction('FAKE_CLUSTER', 'CLUSTER_CHECK', self.ctx)
         action.id = 'CLUSTER_ACTION_ID'
@@ -1455,26 +1857,14 @@ class ClusterActionTest(base.SenlinTestCase):
 
         mock_load.assert_called_once_with(self.ctx, 'FAKE_CLUSTER')
         cluster.do_check.assert_called_once_with(action.context)
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_1', 'NODE_CHECK',
-            name='node_check_NODE_1',
-            cause=ab.CAUSE_DERIVED,
-        )
-        mock_dep.assert_called_once_with(action.context, ['NODE_ACTION_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(action.context, 'NODE_ACTION_ID',
-                                            {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with(
+            [('NODE_1', 'NODE_CHECK', {'name': 'node_check_NODE_1'})])
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(action.context, 'check')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_recover(self, mock_wait, mock_start, mock_dep, mock_action,
-                        mock_update, mock_load):
+    def test_do_recover(self, mock_wait, mock_children, mock_load):
         node1 = mock.Mock(id='NODE_1', cluster_id='FAKE_ID', status='ACTIVE')
         node2 = mock.Mock(id='NODE_2', cluster_id='FAKE_ID', statu='ERROR')
 
@@ -1487,7 +1877,7 @@ class ClusterActionTest(base.SenlinTestCase):
         action.id = 'CLUSTER_ACTION_ID'
         action.data = {}
 
-        mock_action.return_value = 'NODE_RECOVER_ID'
+        mock_children.return_value = ['NODE_RECOVER_ID']
         mock_wait.return_value = (action.RES_OK, 'Everything is Okay')
 
         # do it
@@ -1498,27 +1888,16 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual('Cluster recovery succeeded.', res_msg)
 
         cluster.do_recover.assert_called_once_with(action.context)
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_2', 'NODE_RECOVER',
-            name='node_recover_NODE_2',
-            cause=ab.CAUSE_DERIVED,
-            inputs={}
-        )
-        mock_dep.assert_called_once_with(action.context, ['NODE_RECOVER_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(action.context, 'NODE_RECOVER_ID',
-                                            {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with(
+            [('NODE_2', 'NODE_RECOVER',
+              {'name': 'node_recover_NODE_2', 'inputs': {}})])
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(action.context, 'recover')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_recover_with_data(self, mock_wait, mock_start, mock_dep,
-                                  mock_action, mock_update, mock_load):
+    def test_do_recover_with_data(self, mock_wait, mock_children,
+                                  mock_load):
         node1 = mock.Mock(id='NODE_1', cluster_id='FAKE_ID', status='ERROR')
         cluster = mock.Mock(id='FAKE_ID', RECOVERING='RECOVERING')
         cluster.nodes = [node1]
@@ -1533,7 +1912,7 @@ class ClusterActionTest(base.SenlinTestCase):
             }
         }
 
-        mock_action.return_value = 'NODE_RECOVER_ID'
+        mock_children.return_value = ['NODE_RECOVER_ID']
         mock_wait.return_value = (action.RES_OK, 'Everything is Okay')
 
         # do it
@@ -1544,17 +1923,10 @@ class ClusterActionTest(base.SenlinTestCase):
         self.assertEqual('Cluster recovery succeeded.', res_msg)
 
         cluster.do_recover.assert_called_once_with(action.context)
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_1', 'NODE_RECOVER',
-            name='node_recover_NODE_1',
-            cause=ab.CAUSE_DERIVED,
-            inputs={'operation': ['REBOOT']}
-        )
-        mock_dep.assert_called_once_with(action.context, ['NODE_RECOVER_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(action.context, 'NODE_RECOVER_ID',
-                                            {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with(
+            [('NODE_1', 'NODE_RECOVER',
+              {'name': 'node_recover_NODE_1',
+               'inputs': {'operation': ['REBOOT']}})])
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(action.context, 'recover')
 
@@ -1577,19 +1949,16 @@ class ClusterActionTest(base.SenlinTestCase):
         cluster.do_recover.assert_called_once_with(self.ctx)
         cluster.eval_status.assert_called_once_with(action.context, 'recover')
 
-    @mock.patch.object(ao.Action, 'update')
-    @mock.patch.object(ab.Action, 'create')
-    @mock.patch.object(dobj.Dependency, 'create')
-    @mock.patch.object(dispatcher, 'start_action')
+    @mock.patch.object(ca.ClusterAction, '_start_children')
     @mock.patch.object(ca.ClusterAction, '_wait_for_dependents')
-    def test_do_recover_failed_waiting(self, mock_wait, mock_start, mock_dep,
-                                       mock_action, mock_update, mock_load):
+    def test_do_recover_failed_waiting(self, mock_wait, mock_children,
+                                       mock_load):
         node = mock.Mock(id='NODE_1', cluster_id='CID', status='ERROR')
         cluster = mock.Mock(id='CID')
         cluster.do_recover.return_value = True
         cluster.nodes = [node]
         mock_load.return_value = cluster
-        mock_action.return_value = 'NODE_ACTION_ID'
+        mock_children.return_value = ['NODE_ACTION_ID']
 
         action = ca.ClusterAction('FAKE_CLUSTER', 'CLUSTER_REOVER', self.ctx)
         action.id = 'CLUSTER_ACTION_ID'
@@ -1603,17 +1972,9 @@ class ClusterActionTest(base.SenlinTestCase):
 
         mock_load.assert_called_once_with(self.ctx, 'FAKE_CLUSTER')
         cluster.do_recover.assert_called_once_with(action.context)
-        mock_action.assert_called_once_with(
-            action.context, 'NODE_1', 'NODE_RECOVER',
-            name='node_recover_NODE_1',
-            cause=ab.CAUSE_DERIVED,
-            inputs={}
-        )
-        mock_dep.assert_called_once_with(action.context, ['NODE_ACTION_ID'],
-                                         'CLUSTER_ACTION_ID')
-        mock_update.assert_called_once_with(action.context, 'NODE_ACTION_ID',
-                                            {'status': 'READY'})
-        mock_start.assert_called_once_with()
+        mock_children.assert_called_once_with(
+            [('NODE_1', 'NODE_RECOVER',
+              {'name': 'node_recover_NODE_1', 'inputs': {}})])
         mock_wait.assert_called_once_with()
         cluster.eval_status.assert_called_once_with(action.context, 'recover')
 
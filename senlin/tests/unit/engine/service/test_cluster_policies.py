@@ -192,7 +192,7 @@ class ClusterPolicyTest(base.SenlinTestCase):
             status=action_mod.Action.READY,
             inputs={'policy_id': '87654321abcd', 'enabled': True},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678abcd')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_policy_attach_cluster_not_found(self, mock_cluster):
@@ -268,7 +268,7 @@ class ClusterPolicyTest(base.SenlinTestCase):
             status=action_mod.Action.READY,
             inputs={'policy_id': '87654321abcd'},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678abcd')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_policy_detach_cluster_not_found(self, mock_cluster):
@@ -349,7 +349,7 @@ class ClusterPolicyTest(base.SenlinTestCase):
             status=action_mod.Action.READY,
             inputs={'policy_id': '87654321abcd', 'enabled': False},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678abcd')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_policy_update_cluster_not_found(self, mock_cluster):
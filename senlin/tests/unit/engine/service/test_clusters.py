@@ -121,7 +121,7 @@ class ClusterTest(base.SenlinTestCase):
         self.assertEqual([{'k': 'v1'}, {'k': 'v2'}], result)
         mock_load.assert_called_once_with(self.ctx, limit=None, marker=None,
                                           filters=None, sort=None,
-                                          project_safe=True)
+                                          project_safe=True, projection=True)
 
     @mock.patch.object(cm.Cluster, 'load_all')
     def test_cluster_list_with_params(self, mock_load):
@@ -135,7 +135,7 @@ class ClusterTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(self.ctx, limit=10, marker='KEY',
                                           filters={'foo': 'bar'},
                                           sort='name:asc',
-                                          project_safe=True)
+                                          project_safe=True, projection=True)
 
     def test_cluster_list_bad_param(self):
         ex = self.assertRaises(rpc.ExpectedException,
@@ -161,7 +161,7 @@ class ClusterTest(base.SenlinTestCase):
         self.assertEqual([], result)
         mock_load.assert_called_once_with(self.ctx, filters=None, limit=None,
                                           sort=None, marker=None,
-                                          project_safe=True)
+                                          project_safe=True, projection=True)
         mock_load.reset_mock()
 
         ex = self.assertRaises(rpc.ExpectedException,
@@ -175,21 +175,21 @@ class ClusterTest(base.SenlinTestCase):
         self.assertEqual([], result)
         mock_load.assert_called_once_with(self.ctx, filters=None, limit=None,
                                           sort=None, marker=None,
-                                          project_safe=True)
+                                          project_safe=True, projection=True)
         mock_load.reset_mock()
 
         result = self.eng.cluster_list(self.ctx, project_safe=True)
         self.assertEqual([], result)
         mock_load.assert_called_once_with(self.ctx, filters=None, limit=None,
                                           sort=None, marker=None,
-                                          project_safe=True)
+                                          project_safe=True, projection=True)
         mock_load.reset_mock()
 
         result = self.eng.cluster_list(self.ctx, project_safe=False)
         self.assertEqual([], result)
         mock_load.assert_called_once_with(self.ctx, filters=None, limit=None,
                                           sort=None, marker=None,
-                                          project_safe=False)
+                                          project_safe=False, projection=True)
 
     @mock.patch.object(cm.Cluster, 'load')
     @mock.patch.object(service.EngineService, 'cluster_find')
@@ -204,7 +204,8 @@ class ClusterTest(base.SenlinTestCase):
 
         self.assertEqual({'foo': 'bar'}, result)
         mock_find.assert_called_once_with(self.ctx, 'CLUSTER')
-        mock_load.assert_called_once_with(self.ctx, dbcluster=x_obj)
+        mock_load.assert_called_once_with(self.ctx, dbcluster=x_obj,
+                                          projection=True)
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_get_not_found(self, mock_find):
@@ -251,7 +252,7 @@ class ClusterTest(base.SenlinTestCase):
             cause=am.CAUSE_RPC,
             status=am.Action.READY,
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABC')
 
     @mock.patch.object(co.Cluster, 'count_all')
     def test_check_cluster_quota(self, mock_count):
@@ -449,7 +450,7 @@ class ClusterTest(base.SenlinTestCase):
                 'name': 'new_name',
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678AB')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_update_cluster_not_found(self, mock_find):
@@ -574,7 +575,7 @@ class ClusterTest(base.SenlinTestCase):
                 'name': 'new_name',
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678AB')
 
     @mock.patch.object(am.Action, 'create')
     @mock.patch.object(cm.Cluster, 'load')
@@ -607,7 +608,7 @@ class ClusterTest(base.SenlinTestCase):
                 'name': 'new_name',
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678AB')
 
     @mock.patch.object(cm.Cluster, 'load')
     @mock.patch.object(service.EngineService, 'cluster_find')
@@ -665,7 +666,7 @@ class ClusterTest(base.SenlinTestCase):
             cause=am.CAUSE_RPC,
             status=am.Action.READY)
 
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678AB')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_delete_contain_container(self, mock_find):
@@ -786,7 +787,7 @@ class ClusterTest(base.SenlinTestCase):
             cause=am.CAUSE_RPC,
             status=am.Action.READY,
             inputs={'ORIGIN': 'REPLACE'})
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='CID')
 
     @mock.patch.object(service.EngineService, 'node_find')
     @mock.patch.object(service.EngineService, 'profile_find')
@@ -992,7 +993,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={'nodes': ['NODE1', 'NODE2']},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678AB')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_add_nodes_cluster_not_found(self, mock_find):
@@ -1185,7 +1186,7 @@ class ClusterTest(base.SenlinTestCase):
                 'candidates': ['NODE2'],
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='1234')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_del_nodes_cluster_not_found(self, mock_find):
@@ -1326,7 +1327,7 @@ class ClusterTest(base.SenlinTestCase):
                 consts.ADJUSTMENT_STRICT: True
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCDEFGH')
 
     @mock.patch.object(no.Node, 'count_by_cluster')
     @mock.patch.object(su, 'calculate_desired')
@@ -1367,7 +1368,7 @@ class ClusterTest(base.SenlinTestCase):
                 consts.ADJUSTMENT_STRICT: True
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCDEFGH')
 
     @mock.patch.object(no.Node, 'count_by_cluster')
     @mock.patch.object(su, 'calculate_desired')
@@ -1408,7 +1409,7 @@ class ClusterTest(base.SenlinTestCase):
                 consts.ADJUSTMENT_STRICT: True
             },
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCDEFGH')
 
     def test_cluster_resize_bad_adj_type(self):
         ex = self.assertRaises(rpc.ExpectedException,
@@ -1580,7 +1581,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={'count': 1},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCDEFGH')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_scale_out_cluster_not_found(self, mock_find):
@@ -1616,7 +1617,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCDEFGH')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_scale_out_count_not_int_or_zero(self, mock_find):
@@ -1678,7 +1679,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={'count': 1},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCD')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_scale_in_cluster_not_found(self, mock_find):
@@ -1714,7 +1715,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='12345678ABCD')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_scale_in_count_not_int_or_zero(self, mock_find):
@@ -1753,18 +1754,21 @@ class ClusterTest(base.SenlinTestCase):
         mock_find.assert_called_once_with(self.ctx, 'FAKE_CLUSTER')
         mock_check.assert_called_once_with(x_cluster, 2)
 
+    @mock.patch.object(nm.Node, 'get_details_many')
     @mock.patch.object(nm.Node, 'load_all')
     @mock.patch.object(service.EngineService, 'cluster_find')
-    def test_cluster_collect(self, mock_find, mock_load):
+    def test_cluster_collect(self, mock_find, mock_load, mock_details):
         x_cluster = mock.Mock(id='FAKE_CLUSTER')
         mock_find.return_value = x_cluster
         x_node_1 = mock.Mock(id='NODE1', physical_id='PHYID1')
         x_node_1.to_dict.return_value = {'name': 'node1'}
-        x_node_1.get_details.return_value = {'ip': '1.2.3.4'}
         x_node_2 = mock.Mock(id='NODE2', physical_id='PHYID2')
         x_node_2.to_dict.return_value = {'name': 'node2'}
-        x_node_2.get_details.return_value = {'ip': '5.6.7.8'}
         mock_load.return_value = [x_node_1, x_node_2]
+        mock_details.return_value = {
+            'NODE1': {'ip': '1.2.3.4'},
+            'NODE2': {'ip': '5.6.7.8'},
+        }
 
         res = self.eng.cluster_collect(self.ctx, 'CLUSTER_ID', 'details.ip')
 
@@ -1777,9 +1781,10 @@ class ClusterTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(self.ctx, cluster_id='FAKE_CLUSTER',
                                           project_safe=True)
         x_node_1.to_dict.assert_called_once_with()
-        x_node_1.get_details.assert_called_once_with(self.ctx)
         x_node_2.to_dict.assert_called_once_with()
-        x_node_2.get_details.assert_called_once_with(self.ctx)
+        mock_details.assert_called_once_with(self.ctx, [x_node_1, x_node_2])
+        self.assertEqual(0, x_node_1.get_details.call_count)
+        self.assertEqual(0, x_node_2.get_details.call_count)
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     @mock.patch.object(common_utils, 'get_path_parser')
@@ -1821,9 +1826,11 @@ class ClusterTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(self.ctx, cluster_id='FAKE_CLUSTER',
                                           project_safe=True)
 
+    @mock.patch.object(nm.Node, 'get_details_many')
     @mock.patch.object(nm.Node, 'load_all')
     @mock.patch.object(service.EngineService, 'cluster_find')
-    def test_cluster_collect_no_details(self, mock_find, mock_load):
+    def test_cluster_collect_no_details(self, mock_find, mock_load,
+                                        mock_details):
         x_cluster = mock.Mock(id='FAKE_CLUSTER')
         mock_find.return_value = x_cluster
         x_node_1 = mock.Mock(id='NODE1', physical_id=None)
@@ -1831,6 +1838,7 @@ class ClusterTest(base.SenlinTestCase):
         x_node_2 = mock.Mock(id='NODE2', physical_id=None)
         x_node_2.to_dict.return_value = {'name': 'node2'}
         mock_load.return_value = [x_node_1, x_node_2]
+        mock_details.return_value = {}
 
         res = self.eng.cluster_collect(self.ctx, 'CLUSTER_ID', 'name')
 
@@ -1846,10 +1854,13 @@ class ClusterTest(base.SenlinTestCase):
         self.assertEqual(0, x_node_1.get_details.call_count)
         x_node_2.to_dict.assert_called_once_with()
         self.assertEqual(0, x_node_2.get_details.call_count)
+        mock_details.assert_called_once_with(self.ctx, [])
 
+    @mock.patch.object(nm.Node, 'get_details_many')
     @mock.patch.object(nm.Node, 'load_all')
     @mock.patch.object(service.EngineService, 'cluster_find')
-    def test_cluster_collect_no_match(self, mock_find, mock_load):
+    def test_cluster_collect_no_match(self, mock_find, mock_load,
+                                      mock_details):
         x_cluster = mock.Mock(id='FAKE_CLUSTER')
         mock_find.return_value = x_cluster
         x_node_1 = mock.Mock(physical_id=None)
@@ -1857,6 +1868,7 @@ class ClusterTest(base.SenlinTestCase):
         x_node_2 = mock.Mock(physical_id=None)
         x_node_2.to_dict.return_value = {'name': 'node2'}
         mock_load.return_value = [x_node_1, x_node_2]
+        mock_details.return_value = {}
 
         res = self.eng.cluster_collect(self.ctx, 'CLUSTER_ID', 'bogus')
 
@@ -1868,6 +1880,7 @@ class ClusterTest(base.SenlinTestCase):
         self.assertEqual(0, x_node_1.get_details.call_count)
         x_node_2.to_dict.assert_called_once_with()
         self.assertEqual(0, x_node_2.get_details.call_count)
+        mock_details.assert_called_once_with(self.ctx, [])
 
     @mock.patch.object(am.Action, 'create')
     @mock.patch.object(service.EngineService, 'cluster_find')
@@ -1891,7 +1904,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={'foo': 'bar'},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='CID')
 
     @mock.patch.object(am.Action, 'create')
     @mock.patch.object(service.EngineService, 'cluster_find')
@@ -1916,7 +1929,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={'foo': 'bar'},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='CID')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_check_cluster_not_found(self, mock_find):
@@ -1952,7 +1965,7 @@ class ClusterTest(base.SenlinTestCase):
             status=am.Action.READY,
             inputs={'foo': 'bar'},
         )
-        notify.assert_called_once_with()
+        notify.assert_called_once_with(cluster_id='CID')
 
     @mock.patch.object(service.EngineService, 'cluster_find')
     def test_cluster_recover_cluster_not_found(self, mock_find):
@@ -16,6 +16,7 @@ from oslo_messaging.rpc import dispatcher as rpc
 from oslo_utils import uuidutils
 import six
 
+from senlin.common import cache
 from senlin.common import exception as exc
 from senlin.engine import environment
 from senlin.engine import service
@@ -346,7 +347,8 @@ class PolicyTest(base.SenlinTestCase):
 
     @mock.patch.object(pb.Policy, 'load')
     @mock.patch.object(service.EngineService, 'policy_find')
-    def test_policy_update(self, mock_find, mock_load):
+    @mock.patch.object(cache.policies, 'invalidate')
+    def test_policy_update(self, mock_invalidate, mock_find, mock_load):
         x_obj = mock.Mock()
         mock_find.return_value = x_obj
         x_policy = mock.Mock()
@@ -361,6 +363,7 @@ class PolicyTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(self.ctx, db_policy=x_obj)
         self.assertEqual('NEW_NAME', x_policy.name)
         x_policy.store.assert_called_once_with(self.ctx)
+        mock_invalidate.assert_called_once_with(x_policy.id)
 
     def test_policy_update_name_not_specified(self):
         ex = self.assertRaises(rpc.ExpectedException,
@@ -407,7 +410,8 @@ class PolicyTest(base.SenlinTestCase):
 
     @mock.patch.object(pb.Policy, 'delete')
     @mock.patch.object(service.EngineService, 'policy_find')
-    def test_policy_delete(self, mock_find, mock_delete):
+    @mock.patch.object(cache.policies, 'invalidate')
+    def test_policy_delete(self, mock_invalidate, mock_find, mock_delete):
         x_obj = mock.Mock(id='POLICY_ID')
         mock_find.return_value = x_obj
         mock_delete.return_value = None
@@ -417,6 +421,7 @@ class PolicyTest(base.SenlinTestCase):
         self.assertIsNone(result)
         mock_find.assert_called_once_with(self.ctx, 'FAKE_POLICY')
         mock_delete.assert_called_once_with(self.ctx, 'POLICY_ID')
+        mock_invalidate.assert_called_once_with('POLICY_ID')
 
     @mock.patch.object(service.EngineService, 'policy_find')
     def test_policy_delete_not_found(self, mock_find):
@@ -16,6 +16,7 @@ from oslo_messaging.rpc import dispatcher as rpc
 from oslo_utils import uuidutils
 import six
 
+from senlin.common import cache
 from senlin.common import exception as exc
 from senlin.engine import environment
 from senlin.engine import service
@@ -354,7 +355,8 @@ class ProfileTest(base.SenlinTestCase):
 
     @mock.patch.object(pb.Profile, 'load')
     @mock.patch.object(service.EngineService, 'profile_find')
-    def test_profile_update(self, mock_find, mock_load):
+    @mock.patch.object(cache.profiles, 'invalidate')
+    def test_profile_update(self, mock_invalidate, mock_find, mock_load):
         x_obj = mock.Mock()
         mock_find.return_value = x_obj
         x_profile = mock.Mock()
@@ -372,6 +374,7 @@ class ProfileTest(base.SenlinTestCase):
         self.assertEqual('NEW_NAME', x_profile.name)
         self.assertEqual({'K': 'V'}, x_profile.metadata)
         x_profile.store.assert_called_once_with(self.ctx)
+        mock_invalidate.assert_called_once_with(x_profile.id)
 
     @mock.patch.object(service.EngineService, 'profile_find')
     def test_profile_update_not_found(self, mock_find):
@@ -409,7 +412,8 @@ class ProfileTest(base.SenlinTestCase):
 
     @mock.patch.object(pb.Profile, 'delete')
     @mock.patch.object(service.EngineService, 'profile_find')
-    def test_profile_delete(self, mock_find, mock_delete):
+    @mock.patch.object(cache.profiles, 'invalidate')
+    def test_profile_delete(self, mock_invalidate, mock_find, mock_delete):
         x_obj = mock.Mock(id='PROFILE_ID')
         mock_find.return_value = x_obj
         mock_delete.return_value = None
@@ -419,6 +423,7 @@ class ProfileTest(base.SenlinTestCase):
         self.assertIsNone(result)
         mock_find.assert_called_once_with(self.ctx, 'FAKE_PROFILE')
         mock_delete.assert_called_once_with(self.ctx, 'PROFILE_ID')
+        mock_invalidate.assert_called_once_with('PROFILE_ID')
 
     @mock.patch.object(service.EngineService, 'profile_find')
     def test_profile_delete_not_found(self, mock_find):
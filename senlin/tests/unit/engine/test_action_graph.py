@@ -0,0 +1,119 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+from oslo_config import cfg
+
+from senlin.engine import action_graph
+from senlin.objects import dependency as dobj
+from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
+
+
+class TestActionGraph(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestActionGraph, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.graph = action_graph.ActionGraph()
+
+    def test_track_and_resolve(self):
+        self.graph.track('PARENT', ['C1', 'C2', 'C3'])
+        self.assertEqual(3, self.graph.pending('PARENT'))
+
+        self.assertFalse(self.graph.resolve('PARENT', 'C1'))
+        # resolving again is harmless
+        self.assertFalse(self.graph.resolve('PARENT', 'C1'))
+        self.assertFalse(self.graph.resolve('PARENT', 'C3'))
+        self.assertEqual(1, self.graph.pending('PARENT'))
+
+        self.assertTrue(self.graph.resolve('PARENT', 'C2'))
+        self.assertEqual(0, self.graph.pending('PARENT'))
+
+    def test_track_more(self):
+        self.graph.track('PARENT', ['C1'])
+        self.graph.track('PARENT', ['C2', 'C3'])
+
+        self.assertEqual(3, self.graph.pending('PARENT'))
+
+    def test_allow(self):
+        self.graph.track('PARENT', ['C1', 'C2', 'C3'])
+        self.graph.allow('PARENT', 1)
+
+        self.assertFalse(self.graph.resolve('PARENT', 'C1'))
+        self.assertTrue(self.graph.resolve('PARENT', 'C2'))
+
+        # waiting for all of them again
+        self.graph.allow('PARENT', 0)
+        self.graph.track('PARENT', ['C4'])
+        self.assertFalse(self.graph.resolve('PARENT', 'C3'))
+        self.assertTrue(self.graph.resolve('PARENT', 'C4'))
+
+    def test_resolve_not_tracked(self):
+        self.assertIsNone(self.graph.pending('PARENT'))
+        self.assertTrue(self.graph.resolve('PARENT', 'C1'))
+
+    def test_untrack(self):
+        self.graph.track('PARENT', ['C1'])
+
+        self.graph.untrack('PARENT')
+
+        self.assertIsNone(self.graph.pending('PARENT'))
+        # untracking again is harmless
+        self.graph.untrack('PARENT')
+
+    @mock.patch.object(dobj.Dependency, 'delete')
+    def test_complete_batched(self, mock_delete):
+        cfg.CONF.set_override('dependency_batch_size', 3, enforce_type=True)
+
+        self.graph.complete(self.ctx, 'C1')
+        self.graph.complete(self.ctx, 'C2')
+        self.assertFalse(mock_delete.called)
+
+        self.graph.complete(self.ctx, 'C3')
+        mock_delete.assert_called_once_with(self.ctx, ['C1', 'C2', 'C3'])
+
+        # nothing left to delete
+        mock_delete.reset_mock()
+        self.graph.flush(self.ctx)
+        self.assertFalse(mock_delete.called)
+
+    @mock.patch.object(dobj.Dependency, 'delete')
+    def test_complete_not_batched(self, mock_delete):
+        cfg.CONF.set_override('dependency_batch_size', 0, enforce_type=True)
+
+        self.graph.complete(self.ctx, 'C1')
+
+        mock_delete.assert_called_once_with(self.ctx, ['C1'])
+
+    @mock.patch.object(dobj.Dependency, 'delete')
+    def test_flush(self, mock_delete):
+        self.graph.complete(self.ctx, 'C1')
+        self.graph.complete(self.ctx, 'C2')
+
+        self.graph.flush(self.ctx)
+
+        mock_delete.assert_called_once_with(self.ctx, ['C1', 'C2'])
+
+    @mock.patch.object(dobj.Dependency, 'delete')
+    def test_flush_failed(self, mock_delete):
+        mock_delete.side_effect = [Exception('boom'), 2]
+        self.graph.complete(self.ctx, 'C1')
+
+        self.graph.flush(self.ctx)
+        self.graph.complete(self.ctx, 'C2')
+        self.graph.flush(self.ctx)
+
+        # the failed batch is retried with the next one
+        mock_delete.assert_has_calls([
+            mock.call(self.ctx, ['C1']),
+            mock.call(self.ctx, ['C1', 'C2'])])
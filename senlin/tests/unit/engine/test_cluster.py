@@ -10,6 +10,9 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+import random
+
 import mock
 from oslo_config import cfg
 from oslo_utils import timeutils
@@ -21,10 +24,13 @@ from senlin.engine import cluster_policy as cpm
 from senlin.engine import node as node_mod
 from senlin.objects import cluster as co
 from senlin.objects import cluster_policy as cpo
+from senlin.objects import node as no
+from senlin.objects import profile as po
 from senlin.policies import base as pcb
 from senlin.profiles import base as pfb
 from senlin.tests.unit.common import base
 from senlin.tests.unit.common import utils
+from senlin.tests.unit.db import shared
 
 PROFILE_ID = 'aa5f86b8-e52b-4f2b-828a-4c14c770938d'
 CLUSTER_ID = '60efdaa1-06c2-4fcf-ae44-17a2d85ff3ea'
@@ -60,8 +66,9 @@ class TestCluster(base.SenlinTestCase):
         self.assertEqual('Initializing', cluster.status_reason)
         self.assertEqual({}, cluster.data)
         self.assertEqual({}, cluster.metadata)
-        self.assertEqual({'profile': None, 'nodes': [], 'policies': []},
-                         cluster.rt)
+        self.assertIsNone(cluster.rt['profile'])
+        self.assertEqual([], cluster.rt['nodes'])
+        self.assertEqual([], cluster.rt['policies'])
 
     def test_init_with_none(self):
         kwargs = {
@@ -74,17 +81,25 @@ class TestCluster(base.SenlinTestCase):
         self.assertEqual(-1, cluster.max_size)
         self.assertEqual({}, cluster.metadata)
 
-    @mock.patch.object(cm.Cluster, '_load_runtime_data')
-    def test_init_with_context(self, mock_load):
-        cm.Cluster('test-cluster', 0, PROFILE_ID, context=self.context)
-        mock_load.assert_called_once_with(self.context)
+    @mock.patch.object(cpo.ClusterPolicy, 'get_all')
+    @mock.patch.object(pfb.Profile, 'load')
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test_init_with_context(self, mock_nodes, mock_profile, mock_pb):
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID,
+                             context=self.context)
+
+        # Nothing is loaded until the runtime data are accessed
+        self.assertEqual({}, cluster.rt)
+        self.assertFalse(mock_nodes.called)
+        self.assertFalse(mock_profile.called)
+        self.assertFalse(mock_pb.called)
 
     @mock.patch.object(cpo.ClusterPolicy, 'get_all')
     @mock.patch.object(pcb.Policy, 'load')
     @mock.patch.object(pfb.Profile, 'load')
     @mock.patch.object(node_mod.Node, 'load_all')
-    def test__load_runtime_data(self, mock_nodes, mock_profile, mock_policy,
-                                mock_pb):
+    def test_load_runtime_data(self, mock_nodes, mock_profile, mock_policy,
+                               mock_pb):
         x_binding = mock.Mock()
         x_binding.policy_id = POLICY_ID
         mock_pb.return_value = [x_binding]
@@ -96,15 +111,16 @@ class TestCluster(base.SenlinTestCase):
         x_node_2 = mock.Mock()
         mock_nodes.return_value = [x_node_1, x_node_2]
 
-        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID)
-        cluster.id = CLUSTER_ID
-
-        cluster._load_runtime_data(self.context)
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID,
+                             context=self.context)
 
         rt = cluster.rt
         self.assertEqual(x_profile, rt['profile'])
         self.assertEqual([x_node_1, x_node_2], rt['nodes'])
         self.assertEqual([x_policy], rt['policies'])
+        # The data are loaded only once
+        self.assertEqual([x_node_1, x_node_2], cluster.nodes)
+        self.assertEqual([x_policy], cluster.policies)
 
         mock_pb.assert_called_once_with(self.context, CLUSTER_ID)
         mock_policy.assert_called_once_with(self.context, POLICY_ID)
@@ -114,20 +130,35 @@ class TestCluster(base.SenlinTestCase):
         mock_nodes.assert_called_once_with(self.context,
                                            cluster_id=CLUSTER_ID)
 
-    def test__load_runtime_data_id_is_none(self):
-        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID)
-
-        cluster._load_runtime_data(self.context)
+    def test_load_runtime_data_id_is_none(self):
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID,
+                             context=self.context)
 
         self.assertIsNone(cluster.rt['profile'])
         self.assertEqual([], cluster.rt['nodes'])
         self.assertEqual([], cluster.rt['policies'])
 
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test_refresh(self, mock_nodes):
+        mock_nodes.side_effect = [['NODE1'], ['NODE1', 'NODE2']]
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID,
+                             context=self.context)
+        self.assertEqual(['NODE1'], cluster.nodes)
+
+        new_context = utils.dummy_context()
+        cluster.refresh(new_context)
+
+        self.assertEqual({}, cluster.rt)
+        self.assertEqual(['NODE1', 'NODE2'], cluster.nodes)
+        mock_nodes.assert_has_calls([
+            mock.call(self.context, cluster_id=CLUSTER_ID),
+            mock.call(new_context, cluster_id=CLUSTER_ID)])
+
     def test_store_for_create(self):
         cluster = cm.Cluster('test-cluster', 0, PROFILE_ID,
                              user=self.context.user,
                              project=self.context.project)
-        mock_load = self.patchobject(cluster, '_load_runtime_data')
+        mock_load = self.patchobject(cluster, 'refresh')
         self.assertIsNone(cluster.id)
 
         cluster_id = cluster.store(self.context)
@@ -161,7 +192,7 @@ class TestCluster(base.SenlinTestCase):
         cluster = cm.Cluster('test-cluster', 0, PROFILE_ID,
                              user=self.context.user,
                              project=self.context.project)
-        mock_load = self.patchobject(cluster, '_load_runtime_data')
+        mock_load = self.patchobject(cluster, 'refresh')
         self.assertIsNone(cluster.id)
 
         cluster_id = cluster.store(self.context)
@@ -252,7 +283,7 @@ class TestCluster(base.SenlinTestCase):
             mock.call(self.context, x_obj_1),
             mock.call(self.context, x_obj_2)])
 
-    @mock.patch.object(cm.Cluster, '_load_runtime_data')
+    @mock.patch.object(pfb.Profile, 'load', return_value=None)
     def test_to_dict(self, mock_load):
         values = {
             'id': CLUSTER_ID,
@@ -294,6 +325,91 @@ class TestCluster(base.SenlinTestCase):
         result = cm.Cluster.load(self.context, cluster_id=CLUSTER_ID)
         self.assertEqual(expected, result.to_dict())
 
+    @mock.patch.object(po.Profile, 'get_names')
+    @mock.patch.object(cpo.ClusterPolicy, 'ids_by_cluster')
+    @mock.patch.object(no.Node, 'ids_by_cluster')
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test_load_projection(self, mock_load, mock_nodes, mock_policies,
+                             mock_profiles):
+        values = {
+            'id': CLUSTER_ID,
+            'profile_id': PROFILE_ID,
+            'name': 'test-cluster',
+            'desired_capacity': 1,
+            'status': 'INIT',
+            'init_at': timeutils.utcnow(True),
+            'user': self.context.user,
+            'project': self.context.project,
+        }
+        co.Cluster.create(self.context, values)
+        mock_nodes.return_value = {CLUSTER_ID: ['N1', 'N2']}
+        mock_policies.return_value = {CLUSTER_ID: [POLICY_ID]}
+        mock_profiles.return_value = {PROFILE_ID: 'test-profile'}
+
+        result = cm.Cluster.load(self.context, cluster_id=CLUSTER_ID,
+                                 projection=True)
+
+        self.assertFalse(mock_load.called)
+        self.assertEqual([], result.rt['nodes'])
+        res = result.to_dict()
+        self.assertEqual(['N1', 'N2'], res['nodes'])
+        self.assertEqual([POLICY_ID], res['policies'])
+        self.assertEqual('test-profile', res['profile_name'])
+        mock_nodes.assert_called_once_with(self.context, [CLUSTER_ID])
+        mock_policies.assert_called_once_with(self.context, [CLUSTER_ID])
+        mock_profiles.assert_called_once_with(self.context, [PROFILE_ID])
+
+    @mock.patch.object(po.Profile, 'get_names')
+    @mock.patch.object(cpo.ClusterPolicy, 'ids_by_cluster')
+    @mock.patch.object(no.Node, 'ids_by_cluster')
+    @mock.patch.object(co.Cluster, 'get_all')
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test_load_all_projection(self, mock_load, mock_get, mock_nodes,
+                                 mock_policies, mock_profiles):
+        objs = []
+        for cluster_id in ('C1', 'C2'):
+            obj = mock.Mock(id=cluster_id, profile_id=PROFILE_ID,
+                            desired_capacity=0)
+            obj.name = cluster_id
+            objs.append(obj)
+        mock_get.return_value = objs
+        mock_nodes.return_value = {'C1': ['N1'], 'C2': []}
+        mock_policies.return_value = {'C1': [], 'C2': [POLICY_ID]}
+        mock_profiles.return_value = {}
+
+        result = [c.to_dict() for c in
+                  cm.Cluster.load_all(self.context, projection=True)]
+
+        self.assertFalse(mock_load.called)
+        self.assertEqual(['N1'], result[0]['nodes'])
+        self.assertEqual([], result[0]['policies'])
+        self.assertEqual([], result[1]['nodes'])
+        self.assertEqual([POLICY_ID], result[1]['policies'])
+        self.assertIsNone(result[1]['profile_name'])
+        mock_nodes.assert_called_once_with(self.context, ['C1', 'C2'])
+        mock_policies.assert_called_once_with(self.context, ['C1', 'C2'])
+        mock_profiles.assert_called_once_with(self.context, [PROFILE_ID])
+
+    def test_load_all_projection_query_count(self):
+        # The number of queries doesn't grow with the number of nodes
+        profile = shared.create_profile(self.context)
+
+        counts = []
+        for size in (1, 20):
+            cluster = shared.create_cluster(self.context, profile)
+            for i in range(size):
+                shared.create_node(self.context, cluster, profile)
+
+            with utils.QueryCounter() as counter:
+                clusters = [c.to_dict() for c in cm.Cluster.load_all(
+                    self.context, projection=True)]
+            counts.append(counter.count)
+
+        self.assertEqual(2, len(clusters))
+        self.assertEqual(sorted([1, 20]),
+                         sorted(len(c['nodes']) for c in clusters))
+        self.assertEqual(counts[0], counts[1])
+
     @mock.patch.object(co.Cluster, 'update')
     def test_set_status_for_create(self, mock_update):
         cluster = cm.Cluster('test-cluster', 0, PROFILE_ID,
@@ -484,6 +600,24 @@ class TestCluster(base.SenlinTestCase):
         cluster.add_node(another_node)
         self.assertEqual([node, another_node], cluster.nodes)
 
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test_add_node_lazy(self, mock_load):
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID,
+                             context=self.context)
+        node = mock.Mock(id='NODE_ID', data={})
+
+        # the nodes are not loaded for adding a node
+        cluster.add_node(node)
+        self.assertFalse(mock_load.called)
+        self.assertNotIn('nodes', cluster.rt)
+
+        # once loaded, a node already included isn't added twice
+        mock_load.return_value = [mock.Mock(id='NODE_ID')]
+        self.assertEqual(1, len(cluster.nodes))
+        cluster.add_node(node)
+        self.assertEqual(['NODE_ID'], [n.id for n in cluster.nodes])
+        mock_load.assert_called_once_with(self.context, cluster_id=CLUSTER_ID)
+
     def test_remove_node(self):
         cluster = cm.Cluster('test-cluster', 0, PROFILE_ID)
         self.assertEqual([], cluster.nodes)
@@ -758,14 +892,16 @@ class TestCluster(base.SenlinTestCase):
         self.assertEqual(1, result['R2'])
         self.assertEqual(0, result['R3'])
 
-    def test_get_zone_distribution(self):
+    @mock.patch.object(node_mod.Node, 'get_details_many')
+    def test_get_zone_distribution(self, mock_details):
         cluster = cm.Cluster('test-cluster', 0, PROFILE_ID)
-        node1 = mock.Mock()
+        node1 = mock.Mock(id='NODE1')
         node1.data = {}
-        node1.get_details.return_value = {
-            'OS-EXT-AZ:availability_zone': 'AZ1',
+        mock_details.return_value = {
+            'NODE1': {'OS-EXT-AZ:availability_zone': 'AZ1'},
+            'NODE2': {},
         }
-        node2 = mock.Mock()
+        node2 = mock.Mock(id='NODE2')
         node2.data = {
             'foobar': 'irrelevant'
         }
@@ -788,7 +924,93 @@ class TestCluster(base.SenlinTestCase):
         self.assertEqual(1, result['AZ2'])
         self.assertEqual(0, result['AZ3'])
 
-        node1.get_details.assert_called_once_with(self.context)
+        mock_details.assert_called_once_with(self.context, [node1, node2])
+        self.assertEqual(0, node1.get_details.call_count)
+
+    @mock.patch.object(node_mod.Node, 'get_details_many')
+    def test_get_zone_distribution_cached(self, mock_details):
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID)
+        node1 = mock.Mock(id='NODE1', data={})
+        node2 = mock.Mock(id='NODE2', data={'placement': {'zone': 'AZ2'}})
+        cluster.rt['nodes'] = [node1, node2]
+        mock_details.return_value = {
+            'NODE1': {'OS-EXT-AZ:availability_zone': 'AZ1'},
+        }
+
+        result = cluster.get_zone_distribution(self.context, ['AZ1', 'AZ2'])
+        self.assertEqual({'AZ1': 1, 'AZ2': 1}, result)
+
+        # zone of node1 is remembered, node2 is deleted and node3 created
+        mock_details.return_value = {}
+        cluster.remove_node('NODE2')
+        node3 = mock.Mock(id='NODE3', data={'placement': {'zone': 'AZ2'}})
+        cluster.add_node(node3)
+        cluster.add_node(mock.Mock(id='NODE4',
+                                   data={'placement': {'zone': 'AZ2'}}))
+        cluster.rt['nodes'].pop()
+
+        result = cluster.get_zone_distribution(self.context, ['AZ1', 'AZ2'])
+        self.assertEqual({'AZ1': 1, 'AZ2': 1}, result)
+        self.assertEqual([mock.call(self.context, [node1]),
+                          mock.call(self.context, [])],
+                         mock_details.call_args_list)
+
+    @mock.patch.object(node_mod.Node, 'get_details_many')
+    def test_get_distribution_large_cluster(self, mock_details):
+        # 10k nodes across 50 zones and 5 regions, 1% without placement
+        FakeNode = collections.namedtuple('FakeNode', ['id', 'data'])
+        rand = random.Random(20160901)
+        zones = ['AZ%s' % i for i in range(50)]
+        regions = ['R%s' % i for i in range(5)]
+
+        def new_node(i):
+            zone = rand.choice(zones)
+            placement = {'zone': zone, 'region_name': rand.choice(regions)}
+            if rand.random() < 0.01:
+                placement = {}
+            return FakeNode('NODE%s' % i, {'placement': placement,
+                                           'zone': zone})
+
+        def reference(nodes, key):
+            dist = dict.fromkeys(zones if key == 'zone' else regions, 0)
+            for node in nodes:
+                value = node.data['placement'].get(key)
+                if value is None and key == 'zone':
+                    value = node.data['zone']
+                if value is not None:
+                    dist[value] += 1
+            return dist
+
+        def get_details(ctx, nodes):
+            return dict((n.id, {'OS-EXT-AZ:availability_zone': n.data['zone']})
+                        for n in nodes)
+
+        mock_details.side_effect = get_details
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID)
+        cluster.rt['nodes'] = [new_node(i) for i in range(10000)]
+
+        for i in range(5):
+            self.assertEqual(
+                reference(cluster.nodes, 'zone'),
+                cluster.get_zone_distribution(self.context, zones))
+            self.assertEqual(
+                reference(cluster.nodes, 'region_name'),
+                cluster.get_region_distribution(regions))
+
+            # members changed through this engine and others
+            for n in range(50):
+                victim = rand.choice(cluster.nodes)
+                cluster.remove_node(victim.id)
+                cluster.add_node(new_node(10000 + i * 100 + n))
+            cluster.rt['nodes'].pop(rand.randrange(len(cluster.nodes)))
+            cluster.rt['nodes'].append(new_node(10000 + i * 100 + 50))
+
+        # details are retrieved once for each node without placement data
+        fetched = [n.id for c in mock_details.call_args_list for n in c[0][1]]
+        self.assertEqual(len(set(fetched)), len(fetched))
+        self.assertTrue(all(n.data['placement'] == {}
+                            for c in mock_details.call_args_list
+                            for n in c[0][1]))
 
     def test_nodes_by_region(self):
         cluster = cm.Cluster('test-cluster', 0, PROFILE_ID)
@@ -834,6 +1056,21 @@ class TestCluster(base.SenlinTestCase):
         result = cluster.nodes_by_region('AZ3')
         self.assertEqual(0, len(result))
 
+    def test_nodes_by_placement(self):
+        cluster = cm.Cluster('test-cluster', 0, PROFILE_ID)
+        node1 = mock.Mock(data={'placement': {'zone': 'AZ1',
+                                              'region_name': 'R1'}})
+        node2 = mock.Mock(data={'placement': {'zone': 'AZ2'}})
+        node3 = mock.Mock(data={'key': 'value'})
+        node4 = mock.Mock(data={'placement': {'zone': 'AZ1'}})
+        for n in [node1, node2, node3, node4]:
+            cluster.add_node(n)
+
+        self.assertEqual({'AZ1': [node1, node4], 'AZ2': [node2]},
+                         cluster.nodes_by_placement('zone'))
+        self.assertEqual({'R1': [node1]},
+                         cluster.nodes_by_placement('region_name'))
+
     @mock.patch.object(co.Cluster, 'update')
     @mock.patch.object(node_mod.Node, 'load_all')
     def test_eval_status_below_min_size(self, mock_load, mock_update):
@@ -10,15 +10,22 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
+import eventlet
 import mock
+from oslo_config import cfg
 from oslo_context import context
 import oslo_messaging
+from oslo_utils import timeutils
 
 from senlin.common import consts
+from senlin.common import membership
 from senlin.common import messaging
 from senlin.engine import dispatcher
 from senlin.engine import scheduler
 from senlin.engine import service
+from senlin.objects import service as service_obj
 from senlin.tests.unit.common import base
 from senlin.tests.unit.common import utils
 
@@ -96,6 +103,34 @@ class TestDispatcher(base.SenlinTestCase):
 
         mock_resume.assert_called_once_with('FOO')
 
+    @mock.patch.object(scheduler.ThreadGroupManager, 'wakeup_action')
+    def test_wakeup_action(self, mock_wakeup):
+        disp = dispatcher.Dispatcher(self.svc, 'TOPIC', '1', self.thm)
+        disp.wakeup_action(self.context, action_id='FOO')
+
+        mock_wakeup.assert_called_once_with('FOO', None)
+
+    @mock.patch.object(scheduler.ThreadGroupManager, 'wakeup_action')
+    def test_wakeup_action_depended(self, mock_wakeup):
+        disp = dispatcher.Dispatcher(self.svc, 'TOPIC', '1', self.thm)
+        disp.wakeup_action(self.context, action_id='FOO', depended='BAR')
+
+        mock_wakeup.assert_called_once_with('FOO', 'BAR')
+
+    @mock.patch.object(scheduler.ThreadGroupManager, 'add_remote_lock_waiter')
+    def test_wait_lock(self, mock_add):
+        disp = dispatcher.Dispatcher(self.svc, 'TOPIC', '1', self.thm)
+        disp.wait_lock(self.context, key='cluster:C', engine_id='E2')
+
+        mock_add.assert_called_once_with('cluster:C', 'E2')
+
+    @mock.patch.object(scheduler.ThreadGroupManager, 'wakeup_lock')
+    def test_wakeup_lock(self, mock_wakeup):
+        disp = dispatcher.Dispatcher(self.svc, 'TOPIC', '1', self.thm)
+        disp.wakeup_lock(self.context, key='cluster:C')
+
+        mock_wakeup.assert_called_once_with('cluster:C')
+
     @mock.patch.object(scheduler.ThreadGroupManager, 'stop')
     def test_stop(self, mock_stop):
         disp = dispatcher.Dispatcher(self.svc, 'TOPIC', '1', self.thm)
@@ -166,3 +201,249 @@ class TestDispatcher(base.SenlinTestCase):
 
         mock_notify.assert_called_once_with(dispatcher.START_ACTION,
                                             'FAKE_ENGINE')
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_wakeup_action_function(self, mock_notify):
+        dispatcher.wakeup_action('FAKE_ENGINE', action_id='FAKE_ACTION')
+
+        mock_notify.assert_called_once_with(dispatcher.WAKEUP_ACTION,
+                                            'FAKE_ENGINE',
+                                            action_id='FAKE_ACTION')
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_wait_lock_function(self, mock_notify):
+        dispatcher.wait_lock('FAKE_ENGINE', key='node:N', engine_id='E2')
+
+        mock_notify.assert_called_once_with(dispatcher.WAIT_LOCK,
+                                            'FAKE_ENGINE',
+                                            key='node:N', engine_id='E2')
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_wakeup_lock_function(self, mock_notify):
+        dispatcher.wakeup_lock('FAKE_ENGINE', key='node:N')
+
+        mock_notify.assert_called_once_with(dispatcher.WAKEUP_LOCK,
+                                            'FAKE_ENGINE', key='node:N')
+
+    @mock.patch.object(messaging, 'get_rpc_client')
+    def test_notify_client_cached(self, mock_rpc):
+        dispatcher.notify('METHOD')
+        dispatcher.notify('METHOD', 'FAKE_ENGINE')
+
+        mock_rpc.assert_called_once_with(version=consts.RPC_API_VERSION)
+        mock_client = mock_rpc.return_value
+        self.assertEqual(2, mock_client.prepare.call_count)
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_start_action_fanout(self, mock_notify):
+        dispatcher.start_action(cluster_id='CLUSTER_ID')
+
+        mock_notify.assert_called_once_with(dispatcher.START_ACTION, None)
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_start_action_action_id(self, mock_notify):
+        cfg.CONF.set_override('dispatch_strategy', 'round_robin',
+                              enforce_type=True)
+
+        dispatcher.start_action(action_id='ACTION_ID')
+
+        mock_notify.assert_called_once_with(dispatcher.START_ACTION, None,
+                                            action_id='ACTION_ID')
+
+
+class TestDispatchStrategy(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestDispatchStrategy, self).setUp()
+        self.addCleanup(dispatcher._strategy.clear)
+        self.addCleanup(dispatcher._pending.clear)
+        self.patchobject(dispatcher, 'dispatch_stats',
+                         new={'requests': 0, 'coalesced': 0, 'targeted': 0})
+        self.now = timeutils.utcnow(True)
+        self.services = [self._service('E%s' % i) for i in range(3)]
+        self.mock_get = self.patchobject(service_obj.Service, 'get_all',
+                                         return_value=self.services)
+
+    def _service(self, engine_id, workers=0, age=0):
+        updated_at = self.now - datetime.timedelta(seconds=age)
+        return mock.Mock(id=engine_id, workers=workers,
+                         updated_at=updated_at)
+
+    def test_get_strategy(self):
+        strategy = dispatcher.get_strategy()
+        self.assertIsInstance(strategy, dispatcher.FanoutStrategy)
+        self.assertIs(strategy, dispatcher.get_strategy())
+
+        cfg.CONF.set_override('dispatch_strategy', 'least_loaded',
+                              enforce_type=True)
+        strategy = dispatcher.get_strategy()
+        self.assertIsInstance(strategy, dispatcher.LeastLoadedStrategy)
+
+    def test_fanout(self):
+        strategy = dispatcher.FanoutStrategy()
+
+        self.assertIsNone(strategy.select('CLUSTER_ID'))
+        self.assertFalse(self.mock_get.called)
+
+    def test_round_robin(self):
+        # dead engines are skipped
+        self.services.append(
+            self._service('E3', age=3 * cfg.CONF.periodic_interval))
+        strategy = dispatcher.RoundRobinStrategy()
+
+        res = [strategy.select() for i in range(6)]
+
+        self.assertEqual(['E0', 'E1', 'E2', 'E0', 'E1', 'E2'], res)
+        # the service table is read once per interval
+        self.assertEqual(1, self.mock_get.call_count)
+
+    def test_round_robin_no_engine(self):
+        self.mock_get.return_value = []
+        strategy = dispatcher.RoundRobinStrategy()
+
+        self.assertIsNone(strategy.select())
+
+    def test_refresh(self):
+        strategy = dispatcher.RoundRobinStrategy()
+        strategy.select()
+        self.services.append(self._service('E3'))
+
+        membership.view.refresh()
+        res = set(strategy.select() for i in range(4))
+
+        self.assertEqual(set(['E0', 'E1', 'E2', 'E3']), res)
+        self.assertEqual(2, self.mock_get.call_count)
+
+    def test_least_loaded(self):
+        self.services[0].workers = 3
+        self.services[1].workers = None
+        self.services[2].workers = 1
+        strategy = dispatcher.LeastLoadedStrategy()
+
+        res = [strategy.select() for i in range(5)]
+
+        # each action dispatched counts until the next report
+        self.assertEqual(['E1', 'E1', 'E2', 'E1', 'E2'], res)
+
+    def test_cluster_hash(self):
+        strategy = dispatcher.ClusterHashStrategy()
+
+        res = strategy.select('CLUSTER_ID')
+
+        self.assertIn(res, ['E0', 'E1', 'E2'])
+        for i in range(10):
+            self.assertEqual(res, strategy.select('CLUSTER_ID'))
+        # actions not for a cluster are dispatched in turn
+        self.assertEqual(['E0', 'E1'], [strategy.select(), strategy.select()])
+
+    def test_cluster_hash_no_engine(self):
+        self.mock_get.return_value = []
+        strategy = dispatcher.ClusterHashStrategy()
+
+        self.assertIsNone(strategy.select('CLUSTER_ID'))
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_start_action_targeted(self, mock_notify):
+        cfg.CONF.set_override('dispatch_strategy', 'round_robin',
+                              enforce_type=True)
+
+        dispatcher.start_action()
+        dispatcher.start_action()
+
+        mock_notify.assert_has_calls([
+            mock.call(dispatcher.START_ACTION, 'E0'),
+            mock.call(dispatcher.START_ACTION, 'E1'),
+        ])
+        self.assertEqual(2, dispatcher.dispatch_stats['targeted'])
+
+    @mock.patch.object(dispatcher, 'notify')
+    def test_start_action_coalesced(self, mock_notify):
+        cfg.CONF.set_override('dispatch_strategy', 'cluster_hash',
+                              enforce_type=True)
+        cfg.CONF.set_override('dispatch_coalesce_window', 0.01,
+                              enforce_type=True)
+        engine_id = dispatcher.get_strategy().select('C1')
+        other = [c for c in ('C%s' % i for i in range(2, 20))
+                 if dispatcher.get_strategy().select(c) != engine_id][0]
+
+        for i in range(10):
+            self.assertTrue(dispatcher.start_action(cluster_id='C1'))
+        dispatcher.start_action(cluster_id=other)
+
+        self.assertFalse(mock_notify.called)
+        eventlet.sleep(0.05)
+
+        # one notification per engine, sent at the end of the window
+        self.assertEqual(2, mock_notify.call_count)
+        mock_notify.assert_any_call(dispatcher.START_ACTION, engine_id)
+        self.assertEqual(9, dispatcher.dispatch_stats['coalesced'])
+        self.assertEqual({}, dispatcher._pending)
+
+        # a new window is opened by the next request
+        dispatcher.start_action(cluster_id='C1')
+        eventlet.sleep(0.05)
+        self.assertEqual(3, mock_notify.call_count)
+
+
+class FakeEngines(object):
+    """Engines competing for the ready actions in a shared queue.
+
+    An engine notified to start actions acquires ready actions until there
+    is none left, as ThreadGroupManager.start_action does. An acquisition
+    finding no action is a wasted 'SELECT ... FOR UPDATE'.
+    """
+
+    def __init__(self, count):
+        self.engine_ids = ['E%s' % i for i in range(count)]
+        self.ready = []
+        self.acquired = dict((e, 0) for e in self.engine_ids)
+        self.wasted = 0
+
+    def start_action(self, engine_id):
+        while True:
+            if not self.ready:
+                self.wasted += 1
+                break
+            self.ready.pop(0)
+            self.acquired[engine_id] += 1
+
+    def notify(self, method, engine_id=None, **kwargs):
+        for eid in ([engine_id] if engine_id else self.engine_ids):
+            self.start_action(eid)
+        return True
+
+
+class TestDispatchWaste(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestDispatchWaste, self).setUp()
+        self.addCleanup(dispatcher._strategy.clear)
+        self.now = timeutils.utcnow(True)
+        self.services = []
+        self.patchobject(service_obj.Service, 'get_all',
+                         side_effect=lambda ctx: self.services)
+
+    def _wasted(self, strategy, count, actions=100):
+        """Get the wasted acquisitions per action dispatched."""
+        cfg.CONF.set_override('dispatch_strategy', strategy, enforce_type=True)
+        dispatcher._strategy.clear()
+        membership.view.clear()
+        engines = FakeEngines(count)
+        self.services = [mock.Mock(id=e, workers=0, updated_at=self.now)
+                         for e in engines.engine_ids]
+        self.patchobject(dispatcher, 'notify', side_effect=engines.notify)
+
+        for i in range(actions):
+            engines.ready.append('ACTION_%s' % i)
+            dispatcher.start_action(cluster_id='CLUSTER_%s' % (i % 7))
+
+        self.assertEqual(actions, sum(engines.acquired.values()))
+        return engines.wasted / float(actions)
+
+    def test_wasted_acquisitions(self):
+        for count in (2, 4, 8):
+            # every engine notified but one finds nothing to do
+            self.assertEqual(count, self._wasted('fanout', count))
+            for strategy in ('round_robin', 'least_loaded', 'cluster_hash'):
+                # only the final check of the engine notified
+                self.assertEqual(1, self._wasted(strategy, count))
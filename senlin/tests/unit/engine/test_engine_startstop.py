@@ -19,7 +19,9 @@ from oslo_utils import uuidutils
 
 from senlin.common import consts
 from senlin.common import context
+from senlin.common import membership
 from senlin.common import messaging as rpc_messaging
+from senlin.engine import event as EVENT
 from senlin.engine import service
 from senlin.objects import service as service_obj
 from senlin.tests.unit.common import base
@@ -41,6 +43,8 @@ class EngineBasicTest(base.SenlinTestCase):
         self.fake_rpc_server = mock.Mock()
         self.get_rpc = self.patchobject(rpc_messaging, 'get_rpc_server',
                                         return_value=self.fake_rpc_server)
+        self.start_writer = self.patchobject(EVENT, 'start_writer')
+        self.stop_writer = self.patchobject(EVENT, 'stop_writer')
 
     # TODO(Yanyan Hu): Remove this decorator after DB session related
     # work is done.
@@ -79,6 +83,7 @@ class EngineBasicTest(base.SenlinTestCase):
         self.get_rpc.assert_called_once_with(mock_target, self.eng)
         self.assertEqual(self.fake_rpc_server, self.eng._rpc_server)
         self.fake_rpc_server.start.assert_called_once_with()
+        self.start_writer.assert_called_once_with()
 
     @mock.patch.object(service_obj.Service, 'delete')
     def test_engine_stop(self, mock_delete, mock_msg_cls, mock_hm_cls,
@@ -94,6 +99,7 @@ class EngineBasicTest(base.SenlinTestCase):
 
         mock_disp.stop.assert_called_once_with()
         mock_hm.stop.assert_called_once_with()
+        self.stop_writer.assert_called_once_with()
 
         mock_delete.assert_called_once_with(mock.ANY, self.fake_id)
 
@@ -129,6 +135,7 @@ class EngineStatusTest(base.SenlinTestCase):
     @mock.patch.object(service_obj.Service, 'create')
     @mock.patch.object(service_obj.Service, 'update')
     def test_service_manage_report_create(self, mock_update, mock_create):
+        self.eng.TG = mock.Mock(workers={})
         mock_update.return_value = None
 
         self.eng.service_manage_report()
@@ -139,18 +146,38 @@ class EngineStatusTest(base.SenlinTestCase):
 
     @mock.patch.object(service_obj.Service, 'update')
     def test_service_manage_report_update(self, mock_update):
+        self.eng.TG = mock.Mock(workers={'A1': mock.Mock(),
+                                         'A2': mock.Mock()})
         mock_update.return_value = mock.Mock()
         self.eng.service_manage_report()
-        mock_update.assert_called_once_with(mock.ANY, self.eng.engine_id)
+        mock_update.assert_called_once_with(mock.ANY, self.eng.engine_id,
+                                            {'workers': 2})
 
     @mock.patch.object(service_obj.Service, 'update')
     def test_service_manage_report_error(self, mock_update):
+        self.eng.TG = mock.Mock(workers={})
         mock_update.side_effect = [Exception]
         self.eng.service_manage_report()
-        mock_update.assert_called_once_with(mock.ANY, self.eng.engine_id)
+        mock_update.assert_called_once_with(mock.ANY, self.eng.engine_id,
+                                            {'workers': 0})
         expect_str = 'Service %s update failed' % self.eng.engine_id
         self.assertIn(expect_str, self.LOG.output)
 
+    @mock.patch.object(membership.view, 'refresh')
+    @mock.patch.object(service_obj.Service, 'update')
+    def test_service_manage_report_membership(self, mock_update,
+                                              mock_refresh):
+        self.eng.TG = mock.Mock(workers={})
+
+        self.eng.service_manage_report()
+
+        mock_refresh.assert_called_once_with(mock.ANY)
+
+        mock_refresh.side_effect = Exception('boom')
+        self.eng.service_manage_report()
+        self.assertIn('Failed in reading the engines alive: boom',
+                      self.LOG.output)
+
     @mock.patch.object(service_obj.Service, 'get_all')
     @mock.patch.object(service_obj.Service, 'delete')
     def test__service_manage_cleanup(self, mock_delete, mock_get_all):
@@ -11,10 +11,17 @@
 # under the License.
 
 
+import os
+
+import eventlet
+import fixtures
 import mock
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 
+from senlin.common import messaging
 from senlin.engine import cluster as cluster_mod
 from senlin.engine import event as EVENT
 from senlin.objects import event as eo
@@ -209,3 +216,227 @@ class TestEvent(base.SenlinTestCase):
         self.assertEqual(event.oname, result.oname)
         self.assertEqual(event.cluster_id, result.cluster_id)
         self.assertEqual(event.metadata, result.meta_data)
+
+    def test_event_to_dict(self):
+        timestamp = timeutils.utcnow(True)
+        event = EVENT.Event(timestamp, logging.INFO, oid='OID',
+                            otype='NODE', oname='node1', cluster_id='CID',
+                            user='USER', project='PROJECT', action='ACTION',
+                            status='START', status_reason='Started',
+                            metadata={'foo': 'bar'})
+
+        expected = {
+            'level': logging.INFO,
+            'timestamp': timestamp,
+            'oid': 'OID',
+            'otype': 'NODE',
+            'oname': 'node1',
+            'cluster_id': 'CID',
+            'user': 'USER',
+            'project': 'PROJECT',
+            'action': 'ACTION',
+            'status': 'START',
+            'status_reason': 'Started',
+            'meta_data': {'foo': 'bar'},
+        }
+        self.assertEqual(expected, event.to_dict())
+
+
+class TestEventSinks(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestEventSinks, self).setUp()
+        self.context = utils.dummy_context()
+        self.event = EVENT.Event(timeutils.utcnow(True), logging.INFO,
+                                 oid=CLUSTER_ID, otype='CLUSTER',
+                                 oname='c1', action='CLUSTER_CREATE',
+                                 status='START', user=self.context.user,
+                                 project=self.context.project)
+
+    def test_database_sink(self):
+        EVENT.DatabaseSink().write([self.event])
+
+        self.assertIsNotNone(self.event.id)
+        result = eo.Event.get(self.context, self.event.id)
+        self.assertEqual(CLUSTER_ID, result.oid)
+        self.assertEqual('CLUSTER_CREATE', result.action)
+
+    @mock.patch.object(messaging, 'get_notifier')
+    def test_message_sink(self, mock_notifier):
+        notifier = mock_notifier.return_value
+
+        EVENT.MessageSink().write([self.event])
+
+        mock_notifier.assert_called_once_with('senlin-engine')
+        notifier.info.assert_called_once_with(mock.ANY, 'senlin.event',
+                                              mock.ANY)
+        payload = notifier.info.call_args[0][2]
+        self.assertEqual(CLUSTER_ID, payload['oid'])
+        self.assertEqual('CLUSTER_CREATE', payload['action'])
+
+    def test_file_sink(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'events.log')
+        cfg.CONF.set_override('log_file', path, 'event', enforce_type=True)
+
+        EVENT.FileSink().write([self.event, self.event])
+
+        with open(path) as f:
+            lines = f.readlines()
+        self.assertEqual(2, len(lines))
+        record = jsonutils.loads(lines[0])
+        self.assertEqual(CLUSTER_ID, record['oid'])
+        self.assertEqual('START', record['status'])
+
+    def test_load_sinks(self):
+        cfg.CONF.set_override('sinks', ['database', 'bogus', 'file'],
+                              'event', enforce_type=True)
+
+        sinks = EVENT.load_sinks()
+
+        self.assertEqual(2, len(sinks))
+        self.assertIsInstance(sinks[0], EVENT.DatabaseSink)
+        self.assertIsInstance(sinks[1], EVENT.FileSink)
+
+    def test_write_sink_failure(self):
+        sink1 = mock.Mock()
+        sink1.write.side_effect = Exception('Boom')
+        sink2 = mock.Mock()
+
+        EVENT.write([sink1, sink2], [self.event])
+
+        sink1.write.assert_called_once_with([self.event])
+        sink2.write.assert_called_once_with([self.event])
+
+    def test_emit_synchronously(self):
+        sink = mock.Mock()
+        self.patchobject(EVENT, '_sinks', new=[sink])
+
+        EVENT.info(self.context, mock.Mock(), 'CLUSTER_CREATE', 'START')
+
+        sink.write.assert_called_once_with([mock.ANY])
+        event = sink.write.call_args[0][0][0]
+        self.assertEqual(logging.INFO, event.level)
+        self.assertEqual('START', event.status)
+
+
+class TestEventWriter(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestEventWriter, self).setUp()
+        self.sink = mock.Mock()
+        self.written = []
+        self.sink.write.side_effect = lambda events: self.written.append(
+            list(events))
+
+    def _event(self, level=logging.INFO):
+        return EVENT.Event(timeutils.utcnow(True), level, oid='OID')
+
+    def test_write_in_batches(self):
+        cfg.CONF.set_override('batch_size', 2, 'event', enforce_type=True)
+        writer = EVENT.EventWriter([self.sink])
+        writer.start()
+        events = [self._event() for i in range(5)]
+
+        for event in events:
+            self.assertTrue(writer.put(event))
+        writer.stop()
+
+        self.assertEqual(events, [e for batch in self.written for e in batch])
+        for batch in self.written:
+            self.assertLessEqual(len(batch), 2)
+        stats = writer.stats()
+        self.assertEqual(0, stats['queued'])
+        self.assertEqual(5, stats['written'])
+        self.assertEqual(0, stats['dropped'])
+
+    def test_write_after_flush_interval(self):
+        cfg.CONF.set_override('flush_interval', 0, 'event',
+                              enforce_type=True)
+        writer = EVENT.EventWriter([self.sink])
+        writer.start()
+        event = self._event()
+
+        writer.put(event)
+        # let the writer run
+        eventlet.sleep(0.01)
+
+        self.assertEqual([[event]], self.written)
+        writer.stop()
+
+    @mock.patch.object(EVENT, 'LOG')
+    def test_overflow_drop_debug(self, mock_log):
+        cfg.CONF.set_override('queue_size', 1, 'event', enforce_type=True)
+        cfg.CONF.set_override('overflow_policy', 'drop_debug', 'event',
+                              enforce_type=True)
+        writer = EVENT.EventWriter([self.sink])
+
+        self.assertTrue(writer.put(self._event()))
+        self.assertFalse(writer.put(self._event(logging.DEBUG)))
+
+        stats = writer.stats()
+        self.assertEqual(1, stats['queued'])
+        self.assertEqual(1, stats['dropped'])
+
+        # the events dropped are reported once written
+        writer.start()
+        writer.stop()
+        mock_log.warning.assert_called_once_with(
+            mock.ANY, {'num': 1, 'total': 1})
+
+    def test_overflow_default(self):
+        cfg.CONF.set_override('queue_size', 1, 'event', enforce_type=True)
+        writer = EVENT.EventWriter([self.sink])
+        writer.put(self._event())
+
+        # no event is dropped unless configured
+        thread = eventlet.spawn(writer.put, self._event(logging.DEBUG))
+        eventlet.sleep(0)
+        writer.start()
+        self.assertTrue(thread.wait())
+        writer.stop()
+
+        self.assertEqual(0, writer.stats()['dropped'])
+
+    def test_overflow_block(self):
+        cfg.CONF.set_override('queue_size', 1, 'event', enforce_type=True)
+        cfg.CONF.set_override('overflow_policy', 'block', 'event',
+                              enforce_type=True)
+        writer = EVENT.EventWriter([self.sink])
+        writer.put(self._event())
+
+        # the second event waits until the writer makes room for it
+        thread = eventlet.spawn(writer.put, self._event(logging.DEBUG))
+        eventlet.sleep(0)
+        self.assertEqual(1, writer.stats()['queued'])
+        writer.start()
+        self.assertTrue(thread.wait())
+        writer.stop()
+
+        self.assertEqual(2, sum(len(b) for b in self.written))
+        self.assertEqual(0, writer.stats()['dropped'])
+
+    @mock.patch.object(EVENT, 'load_sinks')
+    def test_start_stop_writer(self, mock_load):
+        mock_load.return_value = [self.sink]
+        self.addCleanup(EVENT.stop_writer)
+
+        EVENT.start_writer()
+        self.assertIsNotNone(EVENT.writer_stats())
+
+        EVENT.warning(mock.Mock(), mock.Mock(), 'NODE_CREATE', 'FAILED')
+        self.assertEqual([], self.written)
+
+        EVENT.stop_writer()
+        self.assertEqual(1, len(self.written))
+        self.assertEqual(logging.WARNING, self.written[0][0].level)
+        self.assertIsNone(EVENT.writer_stats())
+
+    @mock.patch.object(EVENT, 'load_sinks')
+    def test_start_writer_disabled(self, mock_load):
+        cfg.CONF.set_override('queue_size', 0, 'event', enforce_type=True)
+
+        EVENT.start_writer()
+
+        self.assertIsNone(EVENT.writer_stats())
+        self.assertEqual(0, mock_load.call_count)
@@ -11,22 +11,41 @@
 # under the License.
 
 import copy
+import datetime
+import random
 
+import eventlet
 import mock
 from oslo_config import cfg
+import oslo_messaging
+from oslo_utils import timeutils
 
 from senlin.common import consts
+from senlin.common import membership
 from senlin.common import messaging
+from senlin.db import api as db_api
 from senlin.engine import health_manager
+from senlin.engine import node as node_mod
 from senlin.objects import cluster as obj_cluster
 from senlin.objects import health_registry as hr
+from senlin.objects import service as obj_service
 from senlin.rpc import client as rpc_client
 from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
 
 
 @mock.patch('oslo_messaging.NotificationFilter')
 class TestNotificationEndpoint(base.SenlinTestCase):
 
+    def setUp(self):
+        super(TestNotificationEndpoint, self).setUp()
+        self.ctx = {'project_id': 'PROJECT'}
+
+    def _endpoint(self):
+        endpoint = health_manager.NotificationEndpoint()
+        endpoint.add_cluster('CLUSTER_ID', 'PROJECT')
+        return endpoint
+
     @mock.patch('senlin.rpc.client.EngineClient')
     def test_init(self, mock_rpc, mock_filter):
         x_filter = mock_filter.return_value
@@ -39,27 +58,39 @@ class TestNotificationEndpoint(base.SenlinTestCase):
             'compute.instance.soft_delete.end': 'SOFT_DELETE',
         }
 
-        obj = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER')
+        obj = health_manager.NotificationEndpoint()
 
         mock_filter.assert_called_once_with(
             publisher_id='^compute.*',
-            event_type='^compute\.instance\..*',
-            context={'project_id': '^PROJECT$'})
+            event_type='^compute\.instance\..*')
         mock_rpc.assert_called_once_with()
         self.assertEqual(x_filter, obj.filter_rule)
         self.assertEqual(mock_rpc.return_value, obj.rpc)
         for e in event_map:
             self.assertIn(e, obj.VM_FAILURE_EVENTS)
             self.assertEqual(event_map[e], obj.VM_FAILURE_EVENTS[e])
-        self.assertEqual('PROJECT', obj.project_id)
-        self.assertEqual('CLUSTER', obj.cluster_id)
+        self.assertEqual({}, obj.clusters)
+
+    @mock.patch('senlin.rpc.client.EngineClient')
+    def test_add_remove_cluster(self, mock_rpc, mock_filter):
+        endpoint = health_manager.NotificationEndpoint()
+
+        endpoint.add_cluster('CLUSTER1', 'PROJECT1')
+        endpoint.add_cluster('CLUSTER2', 'PROJECT2')
+        self.assertEqual({'CLUSTER1': 'PROJECT1', 'CLUSTER2': 'PROJECT2'},
+                         endpoint.clusters)
 
+        endpoint.remove_cluster('CLUSTER1')
+        endpoint.remove_cluster('CLUSTER3')
+        self.assertEqual({'CLUSTER2': 'PROJECT2'}, endpoint.clusters)
+
+    @mock.patch('senlin.common.context.get_service_context')
     @mock.patch('senlin.common.context.RequestContext')
     @mock.patch('senlin.rpc.client.EngineClient')
-    def test_info(self, mock_rpc, mock_context, mock_filter):
+    def test_info(self, mock_rpc, mock_context, mock_service_ctx,
+                  mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {
             'metadata': {
                 'cluster_id': 'CLUSTER_ID',
@@ -73,11 +104,15 @@ class TestNotificationEndpoint(base.SenlinTestCase):
         metadata = {'timestamp': 'TIMESTAMP'}
         call_ctx = mock.Mock()
         mock_context.return_value = call_ctx
+        mock_service_ctx.return_value = {'project': 'PROJECT'}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.end',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
 
         self.assertIsNone(res)
+        mock_service_ctx.assert_called_once_with(project='PROJECT',
+                                                 user='USER')
+        mock_context.assert_called_once_with(project='PROJECT')
         x_rpc.node_recover.assert_called_once_with(
             call_ctx,
             'FAKE_NODE',
@@ -92,13 +127,12 @@ class TestNotificationEndpoint(base.SenlinTestCase):
     @mock.patch('senlin.rpc.client.EngineClient')
     def test_info_no_metadata(self, mock_rpc, mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {'metadata': {}}
         metadata = {'timestamp': 'TIMESTAMP'}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.end',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
 
         self.assertIsNone(res)
         self.assertEqual(0, x_rpc.node_recover.call_count)
@@ -106,13 +140,12 @@ class TestNotificationEndpoint(base.SenlinTestCase):
     @mock.patch('senlin.rpc.client.EngineClient')
     def test_info_no_cluster_in_metadata(self, mock_rpc, mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {'metadata': {'foo': 'bar'}}
         metadata = {'timestamp': 'TIMESTAMP'}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.end',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
 
         self.assertIsNone(res)
         self.assertEqual(0, x_rpc.node_recover.call_count)
@@ -120,13 +153,51 @@ class TestNotificationEndpoint(base.SenlinTestCase):
     @mock.patch('senlin.rpc.client.EngineClient')
     def test_info_cluster_id_not_match(self, mock_rpc, mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {'metadata': {'cluster_id': 'FOOBAR'}}
         metadata = {'timestamp': 'TIMESTAMP'}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.end',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
+
+        self.assertIsNone(res)
+        self.assertEqual(0, x_rpc.node_recover.call_count)
+
+    @mock.patch('senlin.rpc.client.EngineClient')
+    def test_info_project_not_match(self, mock_rpc, mock_filter):
+        x_rpc = mock_rpc.return_value
+        endpoint = self._endpoint()
+        payload = {
+            'metadata': {
+                'cluster_id': 'CLUSTER_ID',
+                'cluster_node_id': 'FAKE_NODE',
+            },
+            'user_id': 'USER',
+        }
+        metadata = {'timestamp': 'TIMESTAMP'}
+
+        res = endpoint.info({'project_id': 'OTHER'}, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
+
+        self.assertIsNone(res)
+        self.assertEqual(0, x_rpc.node_recover.call_count)
+
+    @mock.patch('senlin.rpc.client.EngineClient')
+    def test_info_cluster_removed(self, mock_rpc, mock_filter):
+        x_rpc = mock_rpc.return_value
+        endpoint = self._endpoint()
+        endpoint.remove_cluster('CLUSTER_ID')
+        payload = {
+            'metadata': {
+                'cluster_id': 'CLUSTER_ID',
+                'cluster_node_id': 'FAKE_NODE',
+            },
+            'user_id': 'USER',
+        }
+        metadata = {'timestamp': 'TIMESTAMP'}
+
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
 
         self.assertIsNone(res)
         self.assertEqual(0, x_rpc.node_recover.call_count)
@@ -134,13 +205,13 @@ class TestNotificationEndpoint(base.SenlinTestCase):
     @mock.patch('senlin.rpc.client.EngineClient')
     def test_info_event_type_not_interested(self, mock_rpc, mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {'metadata': {'cluster_id': 'CLUSTER_ID'}}
         metadata = {'timestamp': 'TIMESTAMP'}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.start',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.start', payload,
+                            metadata)
 
         self.assertIsNone(res)
         self.assertEqual(0, x_rpc.node_recover.call_count)
@@ -148,23 +219,23 @@ class TestNotificationEndpoint(base.SenlinTestCase):
     @mock.patch('senlin.rpc.client.EngineClient')
     def test_info_no_node_id(self, mock_rpc, mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {'metadata': {'cluster_id': 'CLUSTER_ID'}}
         metadata = {'timestamp': 'TIMESTAMP'}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.end',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
 
         self.assertIsNone(res)
         self.assertEqual(0, x_rpc.node_recover.call_count)
 
+    @mock.patch('senlin.common.context.get_service_context')
     @mock.patch('senlin.common.context.RequestContext')
     @mock.patch('senlin.rpc.client.EngineClient')
-    def test_info_default_values(self, mock_rpc, mock_context, mock_filter):
+    def test_info_default_values(self, mock_rpc, mock_context,
+                                 mock_service_ctx, mock_filter):
         x_rpc = mock_rpc.return_value
-        endpoint = health_manager.NotificationEndpoint('PROJECT', 'CLUSTER_ID')
-        ctx = mock.Mock()
+        endpoint = self._endpoint()
         payload = {
             'metadata': {
                 'cluster_id': 'CLUSTER_ID',
@@ -175,9 +246,10 @@ class TestNotificationEndpoint(base.SenlinTestCase):
         metadata = {'timestamp': 'TIMESTAMP'}
         call_ctx = mock.Mock()
         mock_context.return_value = call_ctx
+        mock_service_ctx.return_value = {}
 
-        res = endpoint.info(ctx, 'PUBLISHER', 'compute.instance.delete.end',
-                            payload, metadata)
+        res = endpoint.info(self.ctx, 'PUBLISHER',
+                            'compute.instance.delete.end', payload, metadata)
 
         self.assertIsNone(res)
         x_rpc.node_recover.assert_called_once_with(
@@ -191,15 +263,49 @@ class TestNotificationEndpoint(base.SenlinTestCase):
                 'publisher': 'PUBLISHER',
             })
 
+    @mock.patch('senlin.common.context.get_service_context')
+    @mock.patch('senlin.common.context.RequestContext')
+    @mock.patch('senlin.rpc.client.EngineClient')
+    def test_info_many_clusters(self, mock_rpc, mock_context,
+                                mock_service_ctx, mock_filter):
+        x_rpc = mock_rpc.return_value
+        mock_service_ctx.return_value = {}
+        endpoint = health_manager.NotificationEndpoint()
+        for i in range(500):
+            endpoint.add_cluster('CLUSTER_%s' % i, 'PROJECT_%s' % (i % 10))
+
+        # Replay a stream of events about clusters monitored or not, half
+        # of them not failures
+        events = list(endpoint.VM_FAILURE_EVENTS) + [
+            'compute.instance.%s.start' % e for e in range(6)]
+        expected = 0
+        for i in range(10000):
+            event_type = events[i % len(events)]
+            cluster = i % 1000
+            if cluster < 500 and event_type in endpoint.VM_FAILURE_EVENTS:
+                expected += 1
+            payload = {
+                'metadata': {
+                    'cluster_id': 'CLUSTER_%s' % cluster,
+                    'cluster_node_id': 'NODE_%s' % i,
+                },
+                'user_id': 'USER',
+            }
+            endpoint.info({'project_id': 'PROJECT_%s' % (cluster % 10)},
+                          'compute.host', event_type, payload,
+                          {'timestamp': 'TIMESTAMP'})
+
+        # a single endpoint recovers the nodes of all the clusters
+        self.assertEqual(expected, x_rpc.node_recover.call_count)
+        self.assertEqual(500, len(endpoint.clusters))
+
 
-@mock.patch('senlin.engine.health_manager.NotificationEndpoint')
 @mock.patch('oslo_messaging.Target')
 @mock.patch('oslo_messaging.get_notification_transport')
 @mock.patch('oslo_messaging.get_notification_listener')
 class TestListenerProc(base.SenlinTestCase):
 
-    def test_listener_proc(self, mock_listener, mock_transport, mock_target,
-                           mock_endpoint):
+    def test_listener_proc(self, mock_listener, mock_transport, mock_target):
         x_listener = mock.Mock()
         mock_listener.return_value = x_listener
         x_transport = mock.Mock()
@@ -207,22 +313,62 @@ class TestListenerProc(base.SenlinTestCase):
         x_target = mock.Mock()
         mock_target.return_value = x_target
         x_endpoint = mock.Mock()
-        mock_endpoint.return_value = x_endpoint
 
-        res = health_manager.ListenerProc('EXCHANGE', 'PROJECT_ID',
-                                          'CLUSTER_ID')
+        res = health_manager.ListenerProc('EXCHANGE', x_endpoint)
 
-        self.assertIsNone(res)
+        self.assertEqual(x_listener, res)
         mock_transport.assert_called_once_with(cfg.CONF)
         mock_target.assert_called_once_with(topic="versioned_notifications",
                                             exchange='EXCHANGE')
-        mock_endpoint.assert_called_once_with('PROJECT_ID', 'CLUSTER_ID')
         mock_listener.assert_called_once_with(
             x_transport, [x_target], [x_endpoint],
             executor='threading', pool="senlin-listeners")
         x_listener.start.assert_called_once_with()
 
 
+class TestListenerFakeTransport(base.SenlinTestCase):
+
+    @mock.patch('senlin.common.context.get_service_context')
+    @mock.patch.object(rpc_client.EngineClient, 'node_recover')
+    def test_replay(self, mock_recover, mock_service_ctx):
+        mock_service_ctx.return_value = {}
+        cfg.CONF.set_override('control_exchange', 'nova')
+        transport = oslo_messaging.get_notification_transport(
+            cfg.CONF, url='fake://')
+        self.addCleanup(transport.cleanup)
+        self.patchobject(oslo_messaging, 'get_notification_transport',
+                         return_value=transport)
+
+        endpoint = health_manager.NotificationEndpoint()
+        for i in range(100):
+            endpoint.add_cluster('CLUSTER_%s' % i, 'PROJECT')
+        listener = health_manager.ListenerProc('nova', endpoint)
+        self.addCleanup(listener.wait)
+        self.addCleanup(listener.stop)
+
+        notifier = oslo_messaging.Notifier(
+            transport, publisher_id='compute.host1', driver='messaging',
+            topics=['versioned_notifications'])
+        for i in range(200):
+            payload = {
+                'metadata': {
+                    'cluster_id': 'CLUSTER_%s' % i,
+                    'cluster_node_id': 'NODE_%s' % i,
+                },
+                'user_id': 'USER',
+            }
+            notifier.info({'project_id': 'PROJECT'},
+                          'compute.instance.delete.end', payload)
+
+        # Only the events of the 100 clusters monitored are dispatched
+        for i in range(100):
+            if mock_recover.call_count >= 100:
+                break
+            eventlet.sleep(0.1)
+        eventlet.sleep(0.1)
+        self.assertEqual(100, mock_recover.call_count)
+
+
 class TestHealthManager(base.SenlinTestCase):
 
     def setUp(self):
@@ -241,6 +387,8 @@ class TestHealthManager(base.SenlinTestCase):
         self.assertEqual(consts.ENGINE_HEALTH_MGR_TOPIC, self.hm.topic)
         self.assertEqual(consts.RPC_API_VERSION, self.hm.version)
         self.assertEqual(0, len(self.hm.rt['registries']))
+        self.assertEqual({}, self.hm.rt['endpoints'])
+        self.assertEqual({}, self.hm.rt['listeners'])
 
     @mock.patch.object(hr.HealthRegistry, 'claim')
     def test__load_runtime_registry(self, mock_claim):
@@ -270,8 +418,8 @@ class TestHealthManager(base.SenlinTestCase):
         # assertions
         mock_claim.assert_called_once_with(self.hm.ctx, self.hm.engine_id)
         mock_calls = [
-            mock.call(12, self.hm._poll_cluster, None, 'CID1'),
-            mock.call(34, self.hm._poll_cluster, None, 'CID2')
+            mock.call(12, self.hm._poll_cluster, mock.ANY, 'CID1'),
+            mock.call(34, self.hm._poll_cluster, mock.ANY, 'CID2')
         ]
         mock_add_timer.assert_has_calls(mock_calls)
         self.assertEqual(2, len(self.hm.registries))
@@ -296,16 +444,258 @@ class TestHealthManager(base.SenlinTestCase):
             },
             self.hm.registries[1])
 
-    @mock.patch.object(rpc_client.EngineClient, 'cluster_check')
-    def test__poll_cluster(self, mock_check):
+    @mock.patch.object(obj_service.Service, 'get_all')
+    def test__get_ring(self, mock_get):
+        now = timeutils.utcnow(True)
+        mock_get.return_value = [
+            mock.Mock(id='LIVE', updated_at=now),
+            mock.Mock(id='DEAD', updated_at=now - datetime.timedelta(
+                seconds=3 * cfg.CONF.periodic_interval)),
+        ]
+
+        ring = self.hm._get_ring()
+
+        self.assertEqual(set(['ENGINE_ID', 'LIVE']), ring.members)
+        mock_get.assert_called_once_with(self.hm.ctx)
+
+    def _rebalance(self, owners, owned, claimed=None):
+        ring = mock.Mock()
+        ring.get_member.side_effect = lambda c: owners[c]
+        self.patchobject(self.hm, '_get_ring', return_value=ring)
+        self.patchobject(hr.HealthRegistry, 'get_by_engine',
+                         return_value=[mock.Mock(cluster_id=c)
+                                       for c in owned])
+        self.patchobject(hr.HealthRegistry, 'claim',
+                         return_value=claimed or [])
+        mock_handoff = self.patchobject(hr.HealthRegistry, 'handoff',
+                                        return_value=True)
+        mock_stop = self.patchobject(self.hm, '_stop_check')
+        mock_load = self.patchobject(self.hm, '_load_registry')
+
+        self.hm._rebalance()
+
+        return mock_handoff, mock_stop, mock_load
+
+    def test__rebalance_handoff(self):
+        entry1 = {'cluster_id': 'CID1', 'enabled': True}
+        entry2 = {'cluster_id': 'CID2', 'enabled': True}
+        self.hm.rt['registries'] = [entry1, entry2]
+
+        mock_handoff, mock_stop, mock_load = self._rebalance(
+            {'CID1': 'ENGINE_ID', 'CID2': 'ENGINE_2'}, ['CID1', 'CID2'])
+
+        # stopped before handed over
+        mock_stop.assert_called_once_with(entry2)
+        mock_handoff.assert_called_once_with(self.hm.ctx, 'CID2',
+                                             'ENGINE_ID', 'ENGINE_2')
+        self.assertEqual([entry1], self.hm.registries)
+        self.assertFalse(mock_load.called)
+
+    def test__rebalance_disabled(self):
+        entry = {'cluster_id': 'CID1', 'enabled': False}
+        self.hm.rt['registries'] = [entry]
+
+        mock_handoff, mock_stop, mock_load = self._rebalance(
+            {'CID1': 'ENGINE_2'}, ['CID1'])
+
+        # disabled clusters are not handed over
+        self.assertFalse(mock_stop.called)
+        self.assertFalse(mock_handoff.called)
+        self.assertEqual([entry], self.hm.registries)
+
+    def test__rebalance_not_owned(self):
+        entry1 = {'cluster_id': 'CID1', 'enabled': True}
+        entry2 = {'cluster_id': 'CID2', 'enabled': False}
+        self.hm.rt['registries'] = [entry1, entry2]
+
+        mock_handoff, mock_stop, mock_load = self._rebalance(
+            {'CID1': 'ENGINE_ID', 'CID2': 'ENGINE_ID'}, [])
+
+        # registries deleted or claimed by another engine
+        mock_stop.assert_called_once_with(entry1)
+        self.assertFalse(mock_handoff.called)
+        self.assertEqual([], self.hm.registries)
+
+    def test__rebalance_assigned(self):
+        self.hm.rt['registries'] = [{'cluster_id': 'CID1', 'enabled': True}]
+        claimed = mock.Mock(cluster_id='CID4')
+
+        mock_handoff, mock_stop, mock_load = self._rebalance(
+            {'CID1': 'ENGINE_ID', 'CID2': 'ENGINE_ID', 'CID3': 'ENGINE_2',
+             'CID4': 'ENGINE_ID'},
+            ['CID1', 'CID2', 'CID3'], [claimed])
+
+        self.assertFalse(mock_stop.called)
+        # handed over to this engine then moved on in the meanwhile
+        mock_handoff.assert_called_once_with(self.hm.ctx, 'CID3',
+                                             'ENGINE_ID', 'ENGINE_2')
+        self.assertEqual(2, mock_load.call_count)
+        self.assertEqual('CID2', mock_load.call_args_list[0][0][0].cluster_id)
+        mock_load.assert_called_with(claimed)
+        # the orphans are claimed over the engines of the ring
+        hr.HealthRegistry.claim.assert_called_once_with(
+            self.hm.ctx, 'ENGINE_ID',
+            engine_ids=self.hm._get_ring.return_value.members)
+
+    @mock.patch.object(health_manager.LOG, 'error')
+    @mock.patch.object(hr.HealthRegistry, 'get_by_engine')
+    def test__rebalance_failed(self, mock_get, mock_log):
+        self.patchobject(self.hm, '_get_ring')
+        mock_get.side_effect = Exception('boom')
+
+        self.hm._rebalance()
+
+        self.assertEqual(1, mock_log.call_count)
+
+    def test__on_membership_change(self):
+        self.hm.TG = mock.Mock()
+
+        self.hm._on_membership_change(set(['ENGINE_2']), set())
+
+        self.hm.TG.add_thread.assert_called_once_with(self.hm._rebalance)
+
+    @mock.patch.object(obj_service.Service, 'get_all')
+    def test_membership_change_notified(self, mock_get):
+        self.hm.TG = mock.Mock()
+        now = timeutils.utcnow(True)
+        mock_get.return_value = [mock.Mock(id='ENGINE_2', updated_at=now)]
+        membership.view.refresh(self.hm.ctx)
+        membership.view.subscribe(self.hm._on_membership_change)
+
+        # no change, no rebalance
+        membership.view.refresh(self.hm.ctx)
+        self.assertFalse(self.hm.TG.add_thread.called)
+
+        # ENGINE_2 dies
+        mock_get.return_value = []
+        membership.view.refresh(self.hm.ctx)
+        self.hm.TG.add_thread.assert_called_once_with(self.hm._rebalance)
+
+    def _create_nodes(self, statuses):
+        return [mock.Mock(id='NODE_%s' % i, status=status, user='USER',
+                          project='PROJECT')
+                for i, status in enumerate(statuses)]
+
+    @mock.patch.object(rpc_client.EngineClient, 'node_recover')
+    @mock.patch.object(node_mod.Node, 'check_many')
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test__poll_cluster_healthy(self, mock_load, mock_check,
+                                   mock_recover):
+        nodes = self._create_nodes(['ACTIVE'] * 1000)
+        mock_load.return_value = nodes
+        mock_check.return_value = dict((n.id, True) for n in nodes)
+        mock_cluster_check = self.patchobject(self.hm.rpc_client,
+                                              'cluster_check')
+
+        self.hm._poll_cluster('CLUSTER_ID')
+
+        mock_load.assert_called_once_with(self.hm.ctx,
+                                          cluster_id='CLUSTER_ID',
+                                          project_safe=False)
+        # one bulk check for all the nodes, no action created
+        mock_check.assert_called_once_with(self.hm.ctx, nodes)
+        self.assertFalse(mock_recover.called)
+        self.assertFalse(mock_cluster_check.called)
+        self.assertEqual({}, self.hm.rt['unhealthy'])
+        self.assertEqual(1, self.hm.poll_stats['ticks'])
+        self.assertEqual(1000, self.hm.poll_stats['nodes'])
+
+    @mock.patch('senlin.common.context.get_service_context')
+    @mock.patch('senlin.common.context.RequestContext')
+    @mock.patch.object(rpc_client.EngineClient, 'node_recover')
+    @mock.patch.object(node_mod.Node, 'check_many')
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test__poll_cluster_unhealthy(self, mock_load, mock_check,
+                                     mock_recover, mock_context,
+                                     mock_service_ctx):
+        mock_service_ctx.return_value = {'project': 'PROJECT'}
+        call_ctx = mock_context.return_value
+        nodes = self._create_nodes(['ACTIVE', 'ACTIVE', 'RECOVERING',
+                                    'ACTIVE'])
+        mock_load.return_value = nodes
+        mock_check.return_value = {
+            'NODE_0': True, 'NODE_1': False, 'NODE_2': False, 'NODE_3': None,
+        }
+
+        self.hm._poll_cluster('CLUSTER_ID')
+
+        # only the active node known to be unhealthy is recovered
+        mock_service_ctx.assert_called_once_with(project='PROJECT',
+                                                 user='USER')
+        mock_recover.assert_called_once_with(call_ctx, 'NODE_1', mock.ANY)
+        params = mock_recover.call_args[0][2]
+        self.assertEqual('POLLING', params['event'])
+        self.assertEqual({'CLUSTER_ID': {'NODE_1'}}, self.hm.rt['unhealthy'])
+
+        # the recovery is not requested again until it starts
+        self.hm._poll_cluster('CLUSTER_ID')
+        self.assertEqual(1, mock_recover.call_count)
+
+        nodes[1].status = 'RECOVERING'
+        self.hm._poll_cluster('CLUSTER_ID')
+        self.assertEqual(1, mock_recover.call_count)
+        self.assertEqual({}, self.hm.rt['unhealthy'])
+
+        # the node failing again after its recovery is recovered again
+        nodes[1].status = 'ACTIVE'
         self.hm._poll_cluster('CLUSTER_ID')
-        mock_check.assert_called_once_with(self.hm.ctx, 'CLUSTER_ID')
+        self.assertEqual(2, mock_recover.call_count)
+        self.assertEqual(2, self.hm.poll_stats['recoveries'])
+        self.assertEqual(4, self.hm.poll_stats['ticks'])
+
+    @mock.patch.object(node_mod.Node, 'load_all')
+    def test__poll_cluster_failed(self, mock_load):
+        mock_load.side_effect = Exception('boom')
+
+        res = self.hm._poll_cluster('CLUSTER_ID')
+
+        self.assertIsNone(res)
+        self.assertEqual(1, self.hm.poll_stats['ticks'])
+        self.assertEqual(1, self.hm.poll_stats['failures'])
+        self.assertEqual(0, self.hm.poll_stats['nodes'])
+
+    def test_stats(self):
+        self.hm.poll_stats.update(ticks=4, nodes=100, recoveries=2,
+                                  failures=1, time=2.0)
+
+        res = self.hm.stats()
+
+        self.assertEqual(25.0, res['nodes_per_tick'])
+        self.assertEqual(0.5, res['time_per_tick'])
+        self.assertEqual(2, res['recoveries'])
+
+    def test_stats_no_tick(self):
+        res = self.hm.stats()
+
+        self.assertEqual(0, res['ticks'])
+        self.assertEqual(0, res['nodes_per_tick'])
+        self.assertEqual(0, res['time_per_tick'])
+
+    @mock.patch.object(health_manager, 'ListenerProc')
+    @mock.patch.object(health_manager, 'NotificationEndpoint')
+    def test__get_endpoint(self, mock_endpoint, mock_proc):
+        x_endpoint = mock_endpoint.return_value
+        x_listener = mock_proc.return_value
+
+        res = self.hm._get_endpoint('nova')
+
+        self.assertEqual(x_endpoint, res)
+        mock_proc.assert_called_once_with('nova', x_endpoint)
+        self.assertEqual({'nova': x_endpoint}, self.hm.rt['endpoints'])
+        self.assertEqual({'nova': x_listener}, self.hm.rt['listeners'])
+
+        # the endpoint and its listener are reused
+        res = self.hm._get_endpoint('nova')
+
+        self.assertEqual(x_endpoint, res)
+        self.assertEqual(1, mock_endpoint.call_count)
+        self.assertEqual(1, mock_proc.call_count)
 
     @mock.patch.object(obj_cluster.Cluster, 'get')
     def test__add_listener(self, mock_get):
-        x_listener = mock.Mock()
-        mock_add_thread = self.patchobject(self.hm.TG, 'add_thread',
-                                           return_value=x_listener)
+        x_endpoint = mock.Mock()
+        mock_get_endpoint = self.patchobject(self.hm, '_get_endpoint',
+                                             return_value=x_endpoint)
         x_cluster = mock.Mock(project='PROJECT_ID')
         mock_get.return_value = x_cluster
 
@@ -313,16 +703,44 @@ class TestHealthManager(base.SenlinTestCase):
         res = self.hm._add_listener('CLUSTER_ID')
 
         # assertions
-        self.assertEqual(x_listener, res)
+        self.assertEqual(x_endpoint, res)
         mock_get.assert_called_once_with(self.hm.ctx, 'CLUSTER_ID')
-        mock_add_thread.assert_called_once_with(health_manager.ListenerProc,
-                                                'nova', 'PROJECT_ID',
-                                                'CLUSTER_ID')
+        mock_get_endpoint.assert_called_once_with('nova')
+        x_endpoint.add_cluster.assert_called_once_with('CLUSTER_ID',
+                                                       'PROJECT_ID')
+
+    @mock.patch.object(health_manager, 'ListenerProc')
+    @mock.patch('senlin.rpc.client.EngineClient')
+    @mock.patch.object(obj_cluster.Cluster, 'get')
+    def test__add_listener_shared(self, mock_get, mock_rpc, mock_proc):
+        mock_get.side_effect = [mock.Mock(project='PROJECT_%s' % i)
+                                for i in range(200)]
+
+        for i in range(200):
+            entry = {
+                'cluster_id': 'CLUSTER_%s' % i,
+                'check_type': consts.VM_LIFECYCLE_EVENTS,
+            }
+            self.hm._start_check(entry)
+            self.hm.rt['registries'].append(entry)
+
+        # one listener for all the clusters
+        mock_proc.assert_called_once_with('nova', mock.ANY)
+        endpoint = self.hm.rt['endpoints']['nova']
+        self.assertEqual(200, len(endpoint.clusters))
+
+        for entry in self.hm.rt['registries'][:100]:
+            self.hm._stop_check(entry)
+
+        self.assertEqual(100, len(endpoint.clusters))
+        self.assertNotIn('CLUSTER_0', endpoint.clusters)
+        self.assertEqual('PROJECT_100', endpoint.clusters['CLUSTER_100'])
+        self.assertFalse(mock_proc.return_value.stop.called)
 
     @mock.patch.object(obj_cluster.Cluster, 'get')
     def test__add_listener_cluster_not_found(self, mock_get):
         mock_get.return_value = None
-        mock_add_thread = self.patchobject(self.hm.TG, 'add_thread')
+        mock_get_endpoint = self.patchobject(self.hm, '_get_endpoint')
 
         # do it
         res = self.hm._add_listener('CLUSTER_ID')
@@ -330,9 +748,11 @@ class TestHealthManager(base.SenlinTestCase):
         # assertions
         self.assertIsNone(res)
         mock_get.assert_called_once_with(self.hm.ctx, 'CLUSTER_ID')
-        self.assertEqual(0, mock_add_thread.call_count)
+        self.assertEqual(0, mock_get_endpoint.call_count)
 
-    def test__start_check_for_polling(self):
+    @mock.patch.object(random, 'uniform')
+    def test__start_check_for_polling(self, mock_uniform):
+        mock_uniform.return_value = 5.5
         x_timer = mock.Mock()
         mock_add_timer = self.patchobject(self.hm.TG, 'add_timer',
                                           return_value=x_timer)
@@ -347,7 +767,23 @@ class TestHealthManager(base.SenlinTestCase):
         expected = copy.deepcopy(entry)
         expected['timer'] = x_timer
         self.assertEqual(expected, res)
-        mock_add_timer.assert_called_once_with(12, self.hm._poll_cluster, None,
+        mock_uniform.assert_called_once_with(0, 12.0)
+        mock_add_timer.assert_called_once_with(12, self.hm._poll_cluster, 5.5,
+                                               'CCID')
+
+    def test__start_check_for_polling_no_jitter(self):
+        cfg.CONF.set_override('polling_jitter', 0, group='health_manager',
+                              enforce_type=True)
+        mock_add_timer = self.patchobject(self.hm.TG, 'add_timer')
+
+        entry = {
+            'cluster_id': 'CCID',
+            'interval': 12,
+            'check_type': consts.NODE_STATUS_POLLING,
+        }
+        self.hm._start_check(entry)
+
+        mock_add_timer.assert_called_once_with(12, self.hm._poll_cluster, 0,
                                                'CCID')
 
     def test__start_check_for_listening(self):
@@ -390,7 +826,8 @@ class TestHealthManager(base.SenlinTestCase):
 
     def test__stop_check_with_timer(self):
         x_timer = mock.Mock()
-        entry = {'timer': x_timer}
+        entry = {'cluster_id': 'CCID', 'timer': x_timer}
+        self.hm.rt['unhealthy']['CCID'] = {'NODE_ID'}
         mock_timer_done = self.patchobject(self.hm.TG, 'timer_done')
 
         # do it
@@ -399,18 +836,17 @@ class TestHealthManager(base.SenlinTestCase):
         self.assertIsNone(res)
         x_timer.stop.assert_called_once_with()
         mock_timer_done.assert_called_once_with(x_timer)
+        self.assertEqual({}, self.hm.rt['unhealthy'])
 
     def test__stop_check_with_listener(self):
-        x_thread = mock.Mock()
-        entry = {'listener': x_thread}
-        mock_thread_done = self.patchobject(self.hm.TG, 'thread_done')
+        x_endpoint = mock.Mock()
+        entry = {'cluster_id': 'CLUSTER_ID', 'listener': x_endpoint}
 
         # do it
         res = self.hm._stop_check(entry)
 
         self.assertIsNone(res)
-        x_thread.stop.assert_called_once_with()
-        mock_thread_done.assert_called_once_with(x_thread)
+        x_endpoint.remove_cluster.assert_called_once_with('CLUSTER_ID')
 
     @mock.patch('oslo_messaging.Target')
     def test_start(self, mock_target):
@@ -434,9 +870,30 @@ class TestHealthManager(base.SenlinTestCase):
                                             version=consts.RPC_API_VERSION)
         mock_get_rpc.assert_called_once_with(target, self.hm)
         x_rpc_server.start.assert_called_once_with()
-        mock_add_timer.assert_called_once_with(cfg.CONF.periodic_interval,
-                                               self.hm._dummy_task)
+        mock_add_timer.assert_has_calls([
+            mock.call(cfg.CONF.periodic_interval, self.hm._dummy_task),
+            mock.call(cfg.CONF.periodic_interval, self.hm._rebalance,
+                      cfg.CONF.periodic_interval),
+        ])
         mock_load.assert_called_once_with()
+        self.assertIn(self.hm._on_membership_change,
+                      membership.view._listeners)
+
+    def test_stop(self):
+        self.hm.TG = mock.Mock()
+        membership.view.subscribe(self.hm._on_membership_change)
+        x_listener = mock.Mock()
+        self.hm.rt['endpoints']['nova'] = mock.Mock()
+        self.hm.rt['listeners']['nova'] = x_listener
+
+        self.hm.stop()
+
+        self.hm.TG.stop_timers.assert_called_once_with()
+        x_listener.stop.assert_called_once_with()
+        x_listener.wait.assert_called_once_with()
+        self.assertEqual({}, self.hm.rt['endpoints'])
+        self.assertEqual({}, self.hm.rt['listeners'])
+        self.assertEqual([], membership.view._listeners)
 
     @mock.patch.object(hr.HealthRegistry, 'create')
     def test_register_cluster(self, mock_reg_create):
@@ -507,3 +964,111 @@ class TestHealthManager(base.SenlinTestCase):
         mock_stop.assert_called_once_with(entry1)
         self.assertIn({'cluster_id': 'FAKE_ID', 'enabled': False},
                       self.hm.rt['registries'])
+
+
+class TestHealthRegistrySharding(base.SenlinTestCase):
+    """Simulate engines joining and leaving with the registries in DB."""
+
+    def setUp(self):
+        super(TestHealthRegistrySharding, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.hms = {}
+
+    def _start_engine(self, engine_id):
+        db_api.service_create(self.ctx, engine_id)
+        membership.view.refresh(self.ctx)
+        engine = mock.Mock(engine_id=engine_id)
+        hm = health_manager.HealthManager(
+            engine, consts.ENGINE_HEALTH_MGR_TOPIC, consts.RPC_API_VERSION)
+        hm.TG = mock.Mock()
+        hm._load_runtime_registry()
+        self.hms[engine_id] = hm
+        return hm
+
+    def _kill_engine(self, engine_id):
+        # the engine stops reporting and is removed from the service table
+        self.hms.pop(engine_id)
+        db_api.service_delete(self.ctx, engine_id)
+        membership.view.refresh(self.ctx)
+
+    def _checked(self):
+        """Get the engines checking each cluster, asserting no overlap."""
+        checked = {}
+        for engine_id, hm in self.hms.items():
+            for entry in hm.registries:
+                self.assertNotIn(entry['cluster_id'], checked)
+                checked[entry['cluster_id']] = engine_id
+        return checked
+
+    def _rebalance(self, rounds=2):
+        for i in range(rounds):
+            for hm in list(self.hms.values()):
+                hm._rebalance()
+                # never checked by two engines, even while moving
+                self._checked()
+
+    def _assert_balanced(self):
+        checked = self._checked()
+        # every cluster is checked by the engine owning it in DB
+        self.assertEqual(sorted(self.cluster_ids), sorted(checked.keys()))
+        for engine_id in self.hms:
+            registries = hr.HealthRegistry.get_by_engine(self.ctx, engine_id)
+            self.assertEqual(
+                sorted(c for c, e in checked.items() if e == engine_id),
+                sorted(r.cluster_id for r in registries))
+        return checked
+
+    def test_churn(self):
+        hm1 = self._start_engine('ENGINE_1')
+        self.cluster_ids = ['CLUSTER_%s' % i for i in range(300)]
+        for cluster_id in self.cluster_ids:
+            hm1.register_cluster(self.ctx, cluster_id,
+                                 consts.NODE_STATUS_POLLING, 60)
+        checked = self._assert_balanced()
+
+        # two engines join, the clusters are spread over the three engines
+        self._start_engine('ENGINE_2')
+        self._start_engine('ENGINE_3')
+        self._rebalance()
+        new_checked = self._assert_balanced()
+        counts = dict((e, list(new_checked.values()).count(e))
+                      for e in self.hms)
+        for count in counts.values():
+            self.assertTrue(50 < count < 150, counts)
+        checked = new_checked
+
+        # an engine dies, only its clusters move
+        self._kill_engine('ENGINE_2')
+        self._rebalance()
+        new_checked = self._assert_balanced()
+        for cluster_id in self.cluster_ids:
+            if checked[cluster_id] != 'ENGINE_2':
+                self.assertEqual(checked[cluster_id], new_checked[cluster_id])
+        checked = new_checked
+
+        # an engine joins, only the clusters it takes over move
+        self._start_engine('ENGINE_4')
+        self._rebalance()
+        new_checked = self._assert_balanced()
+        for cluster_id in self.cluster_ids:
+            if new_checked[cluster_id] != 'ENGINE_4':
+                self.assertEqual(checked[cluster_id], new_checked[cluster_id])
+        self.assertIn('ENGINE_4', new_checked.values())
+
+    def test_unregister(self):
+        hm1 = self._start_engine('ENGINE_1')
+        self.cluster_ids = ['CLUSTER_%s' % i for i in range(20)]
+        for cluster_id in self.cluster_ids:
+            hm1.register_cluster(self.ctx, cluster_id,
+                                 consts.NODE_STATUS_POLLING, 60)
+        self._start_engine('ENGINE_2')
+        self._rebalance()
+        checked = self._assert_balanced()
+
+        # unregistered through the engine not checking the cluster
+        cluster_id = [c for c, e in checked.items() if e == 'ENGINE_2'][0]
+        hm1.unregister_cluster(self.ctx, cluster_id)
+        self.cluster_ids.remove(cluster_id)
+        self._rebalance(rounds=1)
+
+        self._assert_balanced()
@@ -65,6 +65,39 @@ class TestNode(base.SenlinTestCase):
         self.assertIsNotNone(node.name)
         self.assertEqual(13, len(node.name))
 
+    @mock.patch.object(pb.Profile, 'load')
+    def test_node_init_with_context(self, mock_load):
+        node = nodem.Node('node1', PROFILE_ID, CLUSTER_ID, self.context)
+
+        # The profile is not loaded until it is accessed
+        self.assertFalse(mock_load.called)
+        self.assertEqual(mock_load.return_value, node.rt['profile'])
+        self.assertEqual(mock_load.return_value, node.rt['profile'])
+        mock_load.assert_called_once_with(self.context, profile_id=PROFILE_ID,
+                                          project_safe=False)
+
+    @mock.patch.object(pb.Profile, 'load')
+    def test_node_load_profile_not_found(self, mock_load):
+        mock_load.side_effect = exception.ResourceNotFound(type='profile',
+                                                           id=PROFILE_ID)
+        node = nodem.Node('node1', PROFILE_ID, CLUSTER_ID, self.context)
+
+        self.assertIsNone(node.rt['profile'])
+
+    @mock.patch.object(pb.Profile, 'load')
+    def test_node_refresh(self, mock_load):
+        mock_load.side_effect = ['PROFILE1', 'PROFILE2']
+        node = nodem.Node('node1', PROFILE_ID, CLUSTER_ID, self.context)
+        self.assertEqual('PROFILE1', node.rt['profile'])
+
+        new_context = utils.dummy_context()
+        node.refresh(new_context)
+
+        self.assertEqual('PROFILE2', node.rt['profile'])
+        mock_load.assert_has_calls([
+            mock.call(self.context, profile_id=PROFILE_ID, project_safe=False),
+            mock.call(new_context, profile_id=PROFILE_ID, project_safe=False)])
+
     def test_node_store_init(self):
         node = nodem.Node('node1', PROFILE_ID, CLUSTER_ID, self.context,
                           role='first_node', index=1)
@@ -102,6 +135,37 @@ class TestNode(base.SenlinTestCase):
 
         self.assertEqual(node_id, new_node_id)
 
+    @mock.patch.object(nodem, 'copy')
+    @mock.patch.object(pb.Profile, 'load')
+    def test_node_store_all(self, mock_load, mock_copy):
+        copies = [mock.Mock(), mock.Mock()]
+        mock_copy.copy.side_effect = copies
+        nodes = [nodem.Node('node%s' % i, PROFILE_ID, CLUSTER_ID,
+                            user='USER', project='PROJECT', domain='DOMAIN',
+                            index=i)
+                 for i in range(3)]
+
+        res = nodem.Node.store_all(self.context, nodes)
+
+        self.assertEqual(3, len(res))
+        self.assertEqual(res, [n.id for n in nodes])
+        # profile is loaded only once for all nodes
+        mock_load.assert_called_once_with(self.context, profile_id=PROFILE_ID,
+                                          project_safe=False)
+        # each node gets its own copy of the profile
+        mock_copy.copy.assert_has_calls(
+            [mock.call(mock_load.return_value)] * 2)
+        profiles = [mock_load.return_value] + copies
+        for i, node_id in enumerate(res):
+            self.assertEqual({'profile': profiles[i]}, nodes[i].rt)
+            node_info = node_obj.Node.get(self.context, node_id)
+            self.assertEqual('node%s' % i, node_info.name)
+            self.assertEqual(CLUSTER_ID, node_info.cluster_id)
+            self.assertEqual('USER', node_info.user)
+            self.assertEqual(i, node_info.index)
+            self.assertEqual('INIT', node_info.status)
+            self.assertIsNotNone(node_info.init_at)
+
     def test_node_load(self):
         ex = self.assertRaises(exception.ResourceNotFound,
                                nodem.Node.load,
@@ -293,6 +357,28 @@ class TestNode(base.SenlinTestCase):
         mock_details.assert_called_once_with(self.context, node)
         self.assertEqual({'foo': 'bar'}, res)
 
+    @mock.patch.object(pb.Profile, 'get_details_many')
+    def test_node_get_details_many(self, mock_details):
+        self.assertEqual({}, nodem.Node.get_details_many(self.context, []))
+        self.assertEqual(0, mock_details.call_count)
+
+        nodes = [mock.Mock(), mock.Mock()]
+        mock_details.return_value = {'N1': {'foo': 'bar'}}
+        res = nodem.Node.get_details_many(self.context, nodes)
+        mock_details.assert_called_once_with(self.context, nodes)
+        self.assertEqual({'N1': {'foo': 'bar'}}, res)
+
+    @mock.patch.object(pb.Profile, 'check_objects')
+    def test_node_check_many(self, mock_check):
+        self.assertEqual({}, nodem.Node.check_many(self.context, []))
+        self.assertEqual(0, mock_check.call_count)
+
+        nodes = [mock.Mock(), mock.Mock()]
+        mock_check.return_value = {'N1': True}
+        res = nodem.Node.check_many(self.context, nodes)
+        mock_check.assert_called_once_with(self.context, nodes)
+        self.assertEqual({'N1': True}, res)
+
     @mock.patch.object(node_obj.Node, 'update')
     def test_update_dependents(self, mock_update):
         node = nodem.Node('node1', PROFILE_ID, CLUSTER_ID, self.context)
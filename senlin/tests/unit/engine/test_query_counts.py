@@ -0,0 +1,134 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.db import api as db_api
+from senlin.engine import cluster as cm
+from senlin.engine import node as nodem
+from senlin.policies import base as pcb
+from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
+
+PROFILE_ID = 'aa5f86b8-e52b-4f2b-828a-4c14c770938d'
+CLUSTER_ID = '60efdaa1-06c2-4fcf-ae44-17a2d85ff3ea'
+POLICY_ID = '2c5139a6-24ba-4a6f-bd53-a268f61536de'
+NODE_IDS = ['ee96c490-2dee-40c8-8919-4c64b89e326c',
+            '9f1883a7-6837-4fe4-b621-6ec6ba6d3e0b',
+            '4d5e2a6b-8c1f-4f3e-9a7d-0b2c3e4f5a6b']
+
+
+class TestQueryCounts(base.SenlinTestCase):
+    """Pin the number of SQL statements issued by common engine operations.
+
+    A change in these numbers is most likely a performance regression, e.g.
+    runtime data loaded eagerly again, or a query issued per node.
+    """
+
+    def setUp(self):
+        super(TestQueryCounts, self).setUp()
+        self.context = utils.dummy_context()
+        utils.create_profile(self.context, PROFILE_ID)
+        utils.create_cluster(self.context, CLUSTER_ID, PROFILE_ID)
+        for node_id in NODE_IDS:
+            utils.create_node(self.context, node_id, PROFILE_ID, CLUSTER_ID)
+        utils.create_policy(self.context, POLICY_ID)
+        db_api.cluster_policy_attach(self.context, CLUSTER_ID, POLICY_ID,
+                                     {'enabled': True})
+
+        self.counter = self.useFixture(utils.QueryCounter())
+
+    def test_cluster_init(self):
+        cm.Cluster('test-cluster', 0, PROFILE_ID, id=CLUSTER_ID,
+                   context=self.context)
+
+        self.assertEqual(0, self.counter.count)
+
+    def test_node_init(self):
+        nodem.Node('node1', PROFILE_ID, CLUSTER_ID, context=self.context,
+                   id=NODE_IDS[0])
+
+        self.assertEqual(0, self.counter.count)
+
+    def test_cluster_load(self):
+        cm.Cluster.load(self.context, cluster_id=CLUSTER_ID)
+
+        self.assertEqual(1, self.counter.count)
+
+    def test_cluster_load_all(self):
+        utils.create_cluster(self.context, 'ANOTHER_CLUSTER', PROFILE_ID)
+        self.counter.reset()
+
+        clusters = cm.Cluster.load_all(self.context)
+
+        self.assertEqual(2, len(list(clusters)))
+        self.assertEqual(1, self.counter.count)
+
+    def test_node_load(self):
+        nodem.Node.load(self.context, node_id=NODE_IDS[0])
+
+        self.assertEqual(1, self.counter.count)
+
+    def test_node_load_all(self):
+        nodes = nodem.Node.load_all(self.context, cluster_id=CLUSTER_ID)
+
+        self.assertEqual(3, len(list(nodes)))
+        self.assertEqual(1, self.counter.count)
+
+    def test_cluster_nodes(self):
+        cluster = cm.Cluster.load(self.context, cluster_id=CLUSTER_ID)
+        self.counter.reset()
+
+        self.assertEqual(3, len(cluster.nodes))
+        self.assertEqual(1, self.counter.count)
+
+        # The nodes are memoized until the cluster is refreshed
+        self.assertEqual(3, len(cluster.nodes))
+        self.assertEqual(1, self.counter.count)
+
+        cluster.refresh()
+        self.assertEqual(3, len(cluster.nodes))
+        self.assertEqual(2, self.counter.count)
+
+    def test_cluster_profile(self):
+        cluster = cm.Cluster.load(self.context, cluster_id=CLUSTER_ID)
+        self.counter.reset()
+
+        self.assertEqual(PROFILE_ID, cluster.rt['profile'].id)
+        self.assertEqual(1, self.counter.count)
+
+    @mock.patch.object(pcb.Policy, '_from_object')
+    def test_cluster_policies(self, mock_policy):
+        cluster = cm.Cluster.load(self.context, cluster_id=CLUSTER_ID)
+        self.counter.reset()
+
+        # One query for the bindings and one per policy bound
+        self.assertEqual(1, len(cluster.policies))
+        self.assertEqual(2, self.counter.count)
+
+    def test_node_to_dict(self):
+        node = nodem.Node.load(self.context, node_id=NODE_IDS[0])
+        self.counter.reset()
+
+        self.assertEqual('test-profile', node.to_dict()['profile_name'])
+        self.assertEqual(1, self.counter.count)
+
+    def test_cluster_load_projection(self):
+        cluster = cm.Cluster.load(self.context, cluster_id=CLUSTER_ID,
+                                  projection=True)
+        res = cluster.to_dict()
+
+        self.assertEqual(sorted(NODE_IDS), sorted(res['nodes']))
+        self.assertEqual([POLICY_ID], res['policies'])
+        # One query for the cluster and one for each of the node IDs, the
+        # policy IDs and the profile names
+        self.assertEqual(4, self.counter.count)
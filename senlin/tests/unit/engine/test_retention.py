@@ -0,0 +1,144 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import logging
+
+import mock
+from oslo_config import cfg
+from oslo_utils import timeutils
+
+from senlin.engine import retention
+from senlin.objects import action as ao
+from senlin.objects import dependency as dobj
+from senlin.objects import event as eo
+from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
+
+
+class TestRetention(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestRetention, self).setUp()
+        self.ctx = utils.dummy_context(is_admin=True)
+        self.now = timeutils.utcnow(True)
+        self.patchobject(timeutils, 'utcnow', return_value=self.now)
+
+    def test_event_ages(self):
+        res = retention._event_ages(30, {'debug': '1', 'ERROR': '0',
+                                         'UNKNOWN': '5'})
+
+        self.assertEqual([logging.DEBUG], res[1])
+        self.assertEqual(sorted([logging.CRITICAL, logging.WARNING,
+                                 logging.INFO]), sorted(res[30]))
+        self.assertEqual([1, 30], sorted(res.keys()))
+
+    def test_event_ages_keep_forever(self):
+        res = retention._event_ages(0, {})
+
+        self.assertEqual({}, res)
+
+    @mock.patch.object(eo.Event, 'purge_by_cluster')
+    @mock.patch.object(eo.Event, 'purge')
+    def test_purge_events_configured(self, mock_purge, mock_by_cluster):
+        cfg.CONF.set_override('event_max_age', 30, group='retention',
+                              enforce_type=True)
+        cfg.CONF.set_override('event_level_max_age', {'DEBUG': '1'},
+                              group='retention', enforce_type=True)
+        cfg.CONF.set_override('event_max_per_cluster', 100,
+                              group='retention', enforce_type=True)
+        cfg.CONF.set_override('chunk_size', 10, group='retention',
+                              enforce_type=True)
+        mock_purge.side_effect = [1, 2]
+        mock_by_cluster.return_value = 3
+
+        res = retention.purge_events(self.ctx)
+
+        self.assertEqual(6, res)
+        self.assertEqual(2, mock_purge.call_count)
+        calls = dict((c[0][1], c[1]) for c in mock_purge.call_args_list)
+        debug = calls[self.now - datetime.timedelta(days=1)]
+        self.assertEqual([logging.DEBUG], debug['levels'])
+        self.assertEqual(10, debug['chunk_size'])
+        self.assertFalse(debug['dry_run'])
+        others = calls[self.now - datetime.timedelta(days=30)]
+        self.assertEqual(4, len(others['levels']))
+        mock_by_cluster.assert_called_once_with(self.ctx, 100, chunk_size=10,
+                                                dry_run=False)
+
+    @mock.patch.object(eo.Event, 'purge_by_cluster')
+    @mock.patch.object(eo.Event, 'purge')
+    def test_purge_events_nothing_configured(self, mock_purge,
+                                             mock_by_cluster):
+        res = retention.purge_events(self.ctx)
+
+        self.assertEqual(0, res)
+        self.assertFalse(mock_purge.called)
+        self.assertFalse(mock_by_cluster.called)
+
+    @mock.patch.object(eo.Event, 'purge_by_cluster')
+    @mock.patch.object(eo.Event, 'purge')
+    def test_purge_events_overridden(self, mock_purge, mock_by_cluster):
+        cfg.CONF.set_override('event_max_age', 30, group='retention',
+                              enforce_type=True)
+        mock_purge.return_value = 5
+
+        res = retention.purge_events(self.ctx, max_age=0,
+                                     level_max_age={'INFO': 7},
+                                     dry_run=True)
+
+        self.assertEqual(5, res)
+        mock_purge.assert_called_once_with(
+            self.ctx, self.now - datetime.timedelta(days=7),
+            levels=[logging.INFO], chunk_size=1000, dry_run=True)
+        self.assertFalse(mock_by_cluster.called)
+
+    @mock.patch.object(dobj.Dependency, 'purge')
+    @mock.patch.object(ao.Action, 'purge')
+    @mock.patch.object(retention.time, 'time')
+    def test_purge_actions(self, mock_time, mock_purge, mock_dep_purge):
+        cfg.CONF.set_override('action_max_age', 2, group='retention',
+                              enforce_type=True)
+        mock_time.return_value = 1000000
+        mock_purge.return_value = 3
+        mock_dep_purge.return_value = 4
+
+        res = retention.purge_actions(self.ctx, dry_run=True)
+
+        self.assertEqual((3, 4), res)
+        mock_purge.assert_called_once_with(self.ctx, 1000000 - 2 * 86400,
+                                           chunk_size=1000, dry_run=True)
+        mock_dep_purge.assert_called_once_with(self.ctx, chunk_size=1000,
+                                               dry_run=True)
+
+    @mock.patch.object(dobj.Dependency, 'purge')
+    @mock.patch.object(ao.Action, 'purge')
+    def test_purge_actions_keep_forever(self, mock_purge, mock_dep_purge):
+        mock_dep_purge.return_value = 0
+
+        res = retention.purge_actions(self.ctx)
+
+        self.assertEqual((0, 0), res)
+        self.assertFalse(mock_purge.called)
+        mock_dep_purge.assert_called_once_with(self.ctx, chunk_size=1000,
+                                               dry_run=False)
+
+    @mock.patch.object(retention, 'purge_actions')
+    @mock.patch.object(retention, 'purge_events')
+    def test_purge(self, mock_events, mock_actions):
+        mock_events.return_value = 1
+        mock_actions.return_value = (2, 3)
+
+        retention.purge(self.ctx)
+
+        mock_events.assert_called_once_with(self.ctx)
+        mock_actions.assert_called_once_with(self.ctx)
@@ -16,7 +16,9 @@ from oslo_config import cfg
 from oslo_service import threadgroup
 
 from senlin.db import api as db_api
+from senlin.engine import action_graph
 from senlin.engine.actions import base as actionm
+from senlin.engine import retention
 from senlin.engine import scheduler
 from senlin.tests.unit.common import base
 
@@ -74,6 +76,40 @@ class SchedulerTest(base.SenlinTestCase):
             cfg.CONF.periodic_interval,
             tgm._service_task)
 
+    @mock.patch.object(retention, 'purge')
+    @mock.patch.object(scheduler, 'wallclock')
+    def test_service_task(self, mock_time, mock_purge):
+        cfg.CONF.set_override('interval', 100, group='retention',
+                              enforce_type=True)
+        tgm = scheduler.ThreadGroupManager()
+
+        mock_time.return_value = 1000
+        tgm._service_task()
+        mock_purge.assert_called_once_with(tgm.db_session)
+
+        mock_purge.reset_mock()
+        mock_time.return_value = 1099
+        tgm._service_task()
+        self.assertFalse(mock_purge.called)
+
+        mock_time.return_value = 1100
+        mock_purge.side_effect = Exception('boom')
+        tgm._service_task()
+        mock_purge.assert_called_once_with(tgm.db_session)
+
+    @mock.patch.object(action_graph.graph, 'flush')
+    @mock.patch.object(retention, 'purge')
+    def test_service_task_disabled(self, mock_purge, mock_flush):
+        cfg.CONF.set_override('interval', 0, group='retention',
+                              enforce_type=True)
+        tgm = scheduler.ThreadGroupManager()
+
+        tgm._service_task()
+
+        self.assertFalse(mock_purge.called)
+        # dependencies on completed actions are always deleted
+        mock_flush.assert_called_once_with(tgm.db_session)
+
     def test_start(self):
         def f():
             pass
@@ -86,16 +122,16 @@ class SchedulerTest(base.SenlinTestCase):
 
         mock_group.add_thread.assert_called_once_with(f)
 
-    @mock.patch.object(db_api, 'action_acquire_1st_ready')
+    @mock.patch.object(db_api, 'action_acquire_batch')
     @mock.patch.object(db_api, 'action_acquire')
     def test_start_action(self, mock_action_acquire,
-                          mock_action_acquire_1st):
+                          mock_action_acquire_batch):
         mock_group = mock.Mock()
         self.mock_tg.return_value = mock_group
         action = mock.Mock()
         action.id = '0123'
         mock_action_acquire.return_value = action
-        mock_action_acquire_1st.return_value = None
+        mock_action_acquire_batch.return_value = []
 
         tgm = scheduler.ThreadGroupManager()
         tgm.start_action('4567', '0123')
@@ -106,18 +142,21 @@ class SchedulerTest(base.SenlinTestCase):
         self.assertEqual(mock_thread, tgm.workers['0123'])
         mock_thread.link.assert_called_once_with(mock.ANY, '0123')
 
-    @mock.patch.object(db_api, 'action_acquire_1st_ready')
+    @mock.patch.object(db_api, 'action_acquire_batch')
     def test_start_action_no_action_id(self, mock_acquire_action):
         mock_action = mock.Mock()
         mock_action.id = '0123'
         mock_action.action = 'CLUSTER_CREATE'
-        mock_acquire_action.side_effect = [mock_action, None]
+        mock_acquire_action.side_effect = [[mock_action], []]
         mock_group = mock.Mock()
         self.mock_tg.return_value = mock_group
 
         tgm = scheduler.ThreadGroupManager()
         tgm.start_action('4567')
 
+        mock_acquire_action.assert_called_with(tgm.db_session, '4567',
+                                               mock.ANY, 10)
+
         mock_group.add_thread.assert_called_once_with(actionm.ActionProc,
                                                       tgm.db_session, '0123')
         mock_thread = mock_group.add_thread.return_value
@@ -125,7 +164,7 @@ class SchedulerTest(base.SenlinTestCase):
         mock_thread.link.assert_called_once_with(mock.ANY, '0123')
 
     @mock.patch.object(scheduler, 'sleep')
-    @mock.patch.object(db_api, 'action_acquire_1st_ready')
+    @mock.patch.object(db_api, 'action_acquire_batch')
     def test_start_action_batch_control(self, mock_acquire_action, mock_sleep):
         mock_action1 = mock.Mock()
         mock_action1.id = 'ID1'
@@ -136,8 +175,8 @@ class SchedulerTest(base.SenlinTestCase):
         mock_action3 = mock.Mock()
         mock_action3.id = 'ID3'
         mock_action3.action = 'NODE_DELETE'
-        mock_acquire_action.side_effect = [mock_action1, mock_action2,
-                                           mock_action3, None]
+        mock_acquire_action.side_effect = [[mock_action1], [mock_action2],
+                                           [mock_action3], []]
         mock_group = mock.Mock()
         self.mock_tg.return_value = mock_group
         cfg.CONF.set_override('max_actions_per_batch', 1, enforce_type=True)
@@ -147,13 +186,41 @@ class SchedulerTest(base.SenlinTestCase):
         tgm.start_action('4567')
 
         mock_sleep.assert_called_once_with(3)
+        # never acquire more actions than a batch can launch
+        mock_acquire_action.assert_called_with(tgm.db_session, '4567',
+                                               mock.ANY, 1)
 
-    @mock.patch.object(db_api, 'action_acquire_1st_ready')
+    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(db_api, 'action_acquire_batch')
+    def test_start_action_multiple_per_acquire(self, mock_acquire_action,
+                                               mock_sleep):
+        actions = []
+        for i in range(5):
+            action = mock.Mock(id='ID%s' % i, action='NODE_CREATE')
+            actions.append(action)
+        mock_acquire_action.side_effect = [actions[:3], actions[3:], []]
+        mock_group = mock.Mock()
+        self.mock_tg.return_value = mock_group
+        cfg.CONF.set_override('max_actions_per_acquire', 3, enforce_type=True)
+        cfg.CONF.set_override('max_actions_per_batch', 4, enforce_type=True)
+        cfg.CONF.set_override('batch_interval', 3, enforce_type=True)
+
+        tgm = scheduler.ThreadGroupManager()
+        tgm.start_action('4567')
+
+        self.assertEqual(3, mock_acquire_action.call_count)
+        mock_acquire_action.assert_called_with(tgm.db_session, '4567',
+                                               mock.ANY, 3)
+        self.assertEqual(5, mock_group.add_thread.call_count)
+        # the fifth node action exceeds the batch size
+        mock_sleep.assert_called_once_with(3)
+
+    @mock.patch.object(db_api, 'action_acquire_batch')
     @mock.patch.object(db_api, 'action_acquire')
     def test_start_action_failed_locking_action(self, mock_acquire_action,
-                                                mock_acquire_action_1st):
+                                                mock_acquire_action_batch):
         mock_acquire_action.return_value = None
-        mock_acquire_action_1st.return_value = None
+        mock_acquire_action_batch.return_value = []
         mock_group = mock.Mock()
         self.mock_tg.return_value = mock_group
 
@@ -161,9 +228,9 @@ class SchedulerTest(base.SenlinTestCase):
         res = tgm.start_action('4567', '0123')
         self.assertIsNone(res)
 
-    @mock.patch.object(db_api, 'action_acquire_1st_ready')
+    @mock.patch.object(db_api, 'action_acquire_batch')
     def test_start_action_no_action_ready(self, mock_acquire_action):
-        mock_acquire_action.return_value = None
+        mock_acquire_action.return_value = []
         mock_group = mock.Mock()
         self.mock_tg.return_value = mock_group
 
@@ -181,6 +248,35 @@ class SchedulerTest(base.SenlinTestCase):
         mock_load.assert_called_once_with(tgm.db_session, 'action0123')
         mock_action.signal.assert_called_once_with(mock_action.SIG_CANCEL)
 
+    @mock.patch.object(scheduler, 'wakeup')
+    def test_cancel_action_wakeup(self, mock_wakeup):
+        self.patchobject(actionm.Action, 'load')
+        tgm = scheduler.ThreadGroupManager()
+        tgm.cancel_action('action0123')
+
+        mock_wakeup.assert_called_once_with('action0123')
+
+    @mock.patch.object(scheduler, 'wakeup_dependent')
+    def test_wakeup_action(self, mock_wakeup):
+        tgm = scheduler.ThreadGroupManager()
+        tgm.wakeup_action('action0123', 'action4567')
+
+        mock_wakeup.assert_called_once_with('action0123', 'action4567')
+
+    @mock.patch.object(scheduler, 'wakeup_lock')
+    def test_wakeup_lock(self, mock_wakeup):
+        tgm = scheduler.ThreadGroupManager()
+        tgm.wakeup_lock('cluster:C')
+
+        mock_wakeup.assert_called_once_with('cluster:C')
+
+    @mock.patch.object(scheduler, 'add_remote_lock_waiter')
+    def test_add_remote_lock_waiter(self, mock_add):
+        tgm = scheduler.ThreadGroupManager()
+        tgm.add_remote_lock_waiter('cluster:C', 'E2')
+
+        mock_add.assert_called_once_with('cluster:C', 'E2')
+
     def test_suspend_action(self):
         mock_action = mock.Mock()
         mock_load = self.patchobject(actionm.Action, 'load',
@@ -254,3 +350,160 @@ class SchedulerTest(base.SenlinTestCase):
         mock_sleep = self.patchobject(eventlet, 'sleep')
         scheduler.sleep(1)
         mock_sleep.assert_called_once_with(1)
+
+
+class WaiterTest(base.SenlinTestCase):
+
+    def setUp(self):
+        super(WaiterTest, self).setUp()
+        self.addCleanup(scheduler._waiters.clear)
+
+    def test_add_remove_waiter(self):
+        scheduler.add_waiter('A1')
+        self.assertIn('A1', scheduler._waiters)
+
+        scheduler.remove_waiter('A1')
+        self.assertNotIn('A1', scheduler._waiters)
+
+        # removing again is fine
+        scheduler.remove_waiter('A1')
+
+    def test_wakeup_not_waiting(self):
+        self.assertFalse(scheduler.wakeup('A1'))
+
+    def test_wakeup_before_wait(self):
+        scheduler.add_waiter('A1')
+
+        self.assertTrue(scheduler.wakeup('A1'))
+        # a second wakeup is harmless
+        self.assertTrue(scheduler.wakeup('A1'))
+
+        self.assertTrue(scheduler.wait_for_wakeup('A1', 10))
+        # a fresh event is armed for the next wait
+        self.assertFalse(scheduler._waiters['A1'].ready())
+
+    def test_wakeup_while_waiting(self):
+        scheduler.add_waiter('A1')
+        eventlet.spawn_after(0.01, scheduler.wakeup, 'A1')
+
+        self.assertTrue(scheduler.wait_for_wakeup('A1', 10))
+
+    def test_wait_for_wakeup_timeout(self):
+        scheduler.add_waiter('A1')
+
+        self.assertFalse(scheduler.wait_for_wakeup('A1', 0.01))
+        self.assertIn('A1', scheduler._waiters)
+
+    @mock.patch.object(scheduler, 'reschedule')
+    def test_wait_for_wakeup_not_registered(self, mock_reschedule):
+        self.assertFalse(scheduler.wait_for_wakeup('A1', 5))
+
+        mock_reschedule.assert_called_once_with('A1', 5)
+
+    def test_wakeup_dependent(self):
+        scheduler.add_waiter('A1')
+        action_graph.graph.track('A1', ['C1', 'C2'])
+
+        self.assertFalse(scheduler.wakeup_dependent('A1', 'C1'))
+        self.assertFalse(scheduler._waiters['A1'].ready())
+
+        # the last dependent wakes up the action
+        self.assertTrue(scheduler.wakeup_dependent('A1', 'C2'))
+        self.assertTrue(scheduler._waiters['A1'].ready())
+
+    def test_wakeup_dependent_not_tracked(self):
+        scheduler.add_waiter('A1')
+
+        self.assertTrue(scheduler.wakeup_dependent('A1', 'C1'))
+
+    def test_wakeup_dependent_check_database(self):
+        scheduler.add_waiter('A1')
+        action_graph.graph.track('A1', ['C1', 'C2'])
+
+        self.assertTrue(scheduler.wakeup_dependent('A1'))
+        self.assertIsNone(action_graph.graph.pending('A1'))
+
+
+class LockWaiterTest(base.SenlinTestCase):
+
+    def setUp(self):
+        super(LockWaiterTest, self).setUp()
+        self.addCleanup(scheduler._lock_waiters.clear)
+        self.addCleanup(scheduler._remote_lock_waiters.clear)
+
+    def test_add_remove_lock_waiter(self):
+        self.assertFalse(scheduler.has_lock_waiters('K'))
+
+        scheduler.add_lock_waiter('K', 'A1')
+        scheduler.add_lock_waiter('K', 'A2')
+        self.assertTrue(scheduler.has_lock_waiters('K'))
+        self.assertTrue(scheduler.is_first_lock_waiter('K', 'A1'))
+        self.assertFalse(scheduler.is_first_lock_waiter('K', 'A2'))
+
+        scheduler.remove_lock_waiter('K', 'A1')
+        self.assertTrue(scheduler.is_first_lock_waiter('K', 'A2'))
+        self.assertFalse(scheduler._lock_waiters['K']['A2'].ready())
+
+        scheduler.remove_lock_waiter('K', 'A2')
+        self.assertFalse(scheduler.has_lock_waiters('K'))
+        self.assertNotIn('K', scheduler._lock_waiters)
+
+        # removing again is fine
+        scheduler.remove_lock_waiter('K', 'A2')
+
+    def test_remove_lock_waiter_wake_next(self):
+        scheduler.add_lock_waiter('K', 'A1')
+        scheduler.add_lock_waiter('K', 'A2')
+
+        scheduler.remove_lock_waiter('K', 'A1', wake_next=True)
+
+        self.assertTrue(scheduler._lock_waiters['K']['A2'].ready())
+
+    def test_wakeup_lock_fair(self):
+        scheduler.add_lock_waiter('K', 'A1')
+        scheduler.add_lock_waiter('K', 'A2')
+
+        self.assertTrue(scheduler.wakeup_lock('K'))
+
+        self.assertTrue(scheduler._lock_waiters['K']['A1'].ready())
+        self.assertFalse(scheduler._lock_waiters['K']['A2'].ready())
+
+    def test_wakeup_lock_not_fair(self):
+        cfg.CONF.set_override('lock_wait_fair', False, enforce_type=True)
+        scheduler.add_lock_waiter('K', 'A1')
+        scheduler.add_lock_waiter('K', 'A2')
+
+        self.assertTrue(scheduler.wakeup_lock('K'))
+
+        self.assertTrue(scheduler._lock_waiters['K']['A1'].ready())
+        self.assertTrue(scheduler._lock_waiters['K']['A2'].ready())
+
+    def test_wakeup_lock_no_waiters(self):
+        self.assertFalse(scheduler.wakeup_lock('K'))
+
+    def test_wait_for_lock(self):
+        scheduler.add_lock_waiter('K', 'A1')
+        eventlet.spawn_after(0.01, scheduler.wakeup_lock, 'K')
+
+        self.assertTrue(scheduler.wait_for_lock('K', 'A1', 10))
+        # a fresh event is armed for the next wait
+        self.assertFalse(scheduler._lock_waiters['K']['A1'].ready())
+
+    def test_wait_for_lock_timeout(self):
+        scheduler.add_lock_waiter('K', 'A1')
+
+        self.assertFalse(scheduler.wait_for_lock('K', 'A1', 0.01))
+
+    @mock.patch.object(scheduler, 'sleep')
+    def test_wait_for_lock_not_registered(self, mock_sleep):
+        self.assertFalse(scheduler.wait_for_lock('K', 'A1', 5))
+
+        mock_sleep.assert_called_once_with(5)
+
+    def test_remote_lock_waiters(self):
+        scheduler.add_remote_lock_waiter('K', 'E1')
+        scheduler.add_remote_lock_waiter('K', 'E2')
+        scheduler.add_remote_lock_waiter('K', 'E1')
+
+        self.assertEqual({'E1', 'E2'}, scheduler.pop_remote_lock_waiters('K'))
+        self.assertEqual(set(), scheduler.pop_remote_lock_waiters('K'))
@@ -10,10 +10,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import eventlet
 import mock
 from oslo_config import cfg
 
 from senlin.common import utils as common_utils
+from senlin.engine import dispatcher
 from senlin.engine import scheduler
 from senlin.engine import senlin_lock as lockm
 from senlin.objects import action as ao
@@ -32,6 +34,9 @@ class SenlinLockTest(base.SenlinTestCase):
 
         ret = mock.Mock(owner='ENGINE', id='ACTION_ABC')
         self.stub_get = self.patchobject(ao.Action, 'get', return_value=ret)
+        self.patchobject(scheduler, 'wait_for_lock', return_value=False)
+        self.mock_wait_lock = self.patchobject(dispatcher, 'wait_lock')
+        self.mock_wakeup_lock = self.patchobject(dispatcher, 'wakeup_lock')
 
     @mock.patch.object(clo.ClusterLock, "acquire")
     def test_cluster_lock_acquire_already_owner(self, mock_acquire):
@@ -44,16 +49,16 @@ class SenlinLockTest(base.SenlinTestCase):
                                              lockm.CLUSTER_SCOPE)
 
     @mock.patch.object(common_utils, 'is_engine_dead')
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(ao.Action, 'mark_failed')
     @mock.patch.object(clo.ClusterLock, "acquire")
     @mock.patch.object(clo.ClusterLock, "steal")
     def test_cluster_lock_acquire_dead_owner(self, mock_steal, mock_acquire,
-                                             mock_action_fail, mock_sleep,
+                                             mock_action_fail, mock_wait,
                                              mock_dead):
         mock_dead.return_value = True
-        mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC',
-                                    'ACTION_ABC', 'ACTION_ABC']
+        mock_acquire.side_effect = [['ACTION_ABC'], ['ACTION_ABC'],
+                                    ['ACTION_ABC'], ['ACTION_ABC']]
         mock_steal.side_effect = ['ACTION_XYZ']
 
         res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER_A', 'ACTION_XYZ',
@@ -61,66 +66,73 @@ class SenlinLockTest(base.SenlinTestCase):
 
         self.assertTrue(res)
         self.assertEqual(4, mock_acquire.call_count)
-        self.assertEqual(3, mock_sleep.call_count)
+        self.assertEqual(3, mock_wait.call_count)
+        self.mock_wait_lock.assert_called_once_with(
+            'ENGINE', key='cluster:CLUSTER_A', engine_id='NEW_ENGINE')
         mock_steal.assert_called_once_with('CLUSTER_A', 'ACTION_XYZ')
         mock_action_fail.assert_called_once_with(
             self.ctx, 'ACTION_ABC', mock.ANY,
             'Engine died when executing this action.')
 
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(clo.ClusterLock, "acquire")
-    def test_cluster_lock_acquire_with_retry(self, mock_acquire, mock_sleep):
+    def test_cluster_lock_acquire_with_retry(self, mock_acquire, mock_wait):
         cfg.CONF.set_override('lock_retry_times', 5, enforce_type=True)
-        mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC', 'ACTION_XYZ']
+        mock_acquire.side_effect = [['ACTION_ABC'], ['ACTION_ABC'],
+                                    ['ACTION_XYZ']]
 
         res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER_A', 'ACTION_XYZ')
 
         self.assertTrue(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
+        wait_calls = [mock.call('cluster:CLUSTER_A', 'ACTION_XYZ',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
         acquire_calls = [
             mock.call('CLUSTER_A', 'ACTION_XYZ', lockm.CLUSTER_SCOPE)
         ]
         mock_acquire.assert_has_calls(acquire_calls * 3)
 
     @mock.patch.object(common_utils, 'is_engine_dead')
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(clo.ClusterLock, "acquire")
-    def test_cluster_lock_acquire_max_retries(self, mock_acquire, mock_sleep,
+    def test_cluster_lock_acquire_max_retries(self, mock_acquire, mock_wait,
                                               mock_dead):
         cfg.CONF.set_override('lock_retry_times', 2, enforce_type=True)
         mock_dead.return_value = False
         mock_acquire.side_effect = [
-            'ACTION_ABC', 'ACTION_ABC', 'ACTION_ABC', 'ACTION_XYZ'
+            ['ACTION_ABC'], ['ACTION_ABC'], ['ACTION_ABC'], ['ACTION_XYZ']
         ]
 
         res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER_A', 'ACTION_XYZ')
 
         self.assertFalse(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
-        self.assertEqual(2, mock_sleep.call_count)
+        wait_calls = [mock.call('cluster:CLUSTER_A', 'ACTION_XYZ',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
+        self.assertEqual(2, mock_wait.call_count)
         acquire_calls = [
             mock.call('CLUSTER_A', 'ACTION_XYZ', lockm.CLUSTER_SCOPE)
         ]
         mock_acquire.assert_has_calls(acquire_calls * 3)
 
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(clo.ClusterLock, "acquire")
     @mock.patch.object(clo.ClusterLock, "steal")
     def test_cluster_lock_acquire_forced(self, mock_steal, mock_acquire,
-                                         mock_sleep):
+                                         mock_wait):
         cfg.CONF.set_override('lock_retry_times', 2, enforce_type=True)
-        mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC', 'ACTION_ABC']
+        mock_acquire.side_effect = [['ACTION_ABC'], ['ACTION_ABC'],
+                                    ['ACTION_ABC']]
         mock_steal.return_value = ['ACTION_XY']
 
         res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER_A',
                                          'ACTION_XY', forced=True)
 
         self.assertTrue(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
-        self.assertEqual(2, mock_sleep.call_count)
+        wait_calls = [mock.call('cluster:CLUSTER_A', 'ACTION_XY',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
+        self.assertEqual(2, mock_wait.call_count)
         acquire_calls = [
             mock.call('CLUSTER_A', 'ACTION_XY', lockm.CLUSTER_SCOPE)
         ]
@@ -128,35 +140,44 @@ class SenlinLockTest(base.SenlinTestCase):
         mock_steal.assert_called_once_with('CLUSTER_A', 'ACTION_XY')
 
     @mock.patch.object(common_utils, 'is_engine_dead')
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(clo.ClusterLock, "acquire")
     @mock.patch.object(clo.ClusterLock, "steal")
     def test_cluster_lock_acquire_steal_failed(self, mock_steal, mock_acquire,
-                                               mock_sleep, mock_dead):
+                                               mock_wait, mock_dead):
         cfg.CONF.set_override('lock_retry_times', 2, enforce_type=True)
         mock_dead.return_value = False
-        mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC', 'ACTION_ABC']
+        mock_acquire.side_effect = [['ACTION_ABC'], ['ACTION_ABC'],
+                                    ['ACTION_ABC']]
         mock_steal.return_value = []
 
         res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER_A',
                                          'ACTION_XY', forced=True)
 
         self.assertFalse(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
-        self.assertEqual(2, mock_sleep.call_count)
+        wait_calls = [mock.call('cluster:CLUSTER_A', 'ACTION_XY',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
+        self.assertEqual(2, mock_wait.call_count)
         acquire_calls = [
             mock.call('CLUSTER_A', 'ACTION_XY', lockm.CLUSTER_SCOPE)
         ]
         mock_acquire.assert_has_calls(acquire_calls * 3)
         mock_steal.assert_called_once_with('CLUSTER_A', 'ACTION_XY')
 
+    @mock.patch.object(scheduler, 'wakeup_lock')
     @mock.patch.object(clo.ClusterLock, "release")
-    def test_cluster_lock_release(self, mock_release):
+    def test_cluster_lock_release(self, mock_release, mock_wakeup):
+        scheduler.add_remote_lock_waiter('cluster:C', 'ENGINE_2')
+
         actual = lockm.cluster_lock_release('C', 'A', 'S')
 
         self.assertEqual(mock_release.return_value, actual)
         mock_release.assert_called_once_with('C', 'A', 'S')
+        mock_wakeup.assert_called_once_with('cluster:C')
+        self.mock_wakeup_lock.assert_called_once_with('ENGINE_2',
+                                                      key='cluster:C')
+        self.assertEqual(set(), scheduler.pop_remote_lock_waiters('cluster:C'))
 
     @mock.patch.object(nlo.NodeLock, "acquire")
     def test_node_lock_acquire_already_owner(self, mock_acquire):
@@ -188,23 +209,24 @@ class SenlinLockTest(base.SenlinTestCase):
             self.ctx, 'ACTION_ABC', mock.ANY,
             'Engine died when executing this action.')
 
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(nlo.NodeLock, "acquire")
-    def test_node_lock_acquire_with_retry(self, mock_acquire, mock_sleep):
+    def test_node_lock_acquire_with_retry(self, mock_acquire, mock_wait):
         cfg.CONF.set_override('lock_retry_times', 5, enforce_type=True)
         mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC', 'ACTION_XYZ']
 
         res = lockm.node_lock_acquire(self.ctx, 'NODE_A', 'ACTION_XYZ')
         self.assertTrue(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
+        wait_calls = [mock.call('node:NODE_A', 'ACTION_XYZ',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
         acquire_calls = [mock.call('NODE_A', 'ACTION_XYZ')]
         mock_acquire.assert_has_calls(acquire_calls * 3)
 
     @mock.patch.object(common_utils, 'is_engine_dead')
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(nlo.NodeLock, "acquire")
-    def test_node_lock_acquire_max_retries(self, mock_acquire, mock_sleep,
+    def test_node_lock_acquire_max_retries(self, mock_acquire, mock_wait,
                                            mock_dead):
         cfg.CONF.set_override('lock_retry_times', 2, enforce_type=True)
         mock_dead.return_value = False
@@ -215,17 +237,18 @@ class SenlinLockTest(base.SenlinTestCase):
         res = lockm.node_lock_acquire(self.ctx, 'NODE_A', 'ACTION_XYZ')
 
         self.assertFalse(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
-        self.assertEqual(2, mock_sleep.call_count)
+        wait_calls = [mock.call('node:NODE_A', 'ACTION_XYZ',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
+        self.assertEqual(2, mock_wait.call_count)
         acquire_calls = [mock.call('NODE_A', 'ACTION_XYZ')]
         mock_acquire.assert_has_calls(acquire_calls * 3)
 
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(nlo.NodeLock, "acquire")
     @mock.patch.object(nlo.NodeLock, "steal")
     def test_node_lock_acquire_forced(self, mock_steal, mock_acquire,
-                                      mock_sleep):
+                                      mock_wait):
         cfg.CONF.set_override('lock_retry_times', 2, enforce_type=True)
         mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC', 'ACTION_ABC']
         mock_steal.return_value = 'ACTION_XY'
@@ -234,19 +257,20 @@ class SenlinLockTest(base.SenlinTestCase):
                                       'ACTION_XY', forced=True)
 
         self.assertTrue(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
-        self.assertEqual(2, mock_sleep.call_count)
+        wait_calls = [mock.call('node:NODE_A', 'ACTION_XY',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
+        self.assertEqual(2, mock_wait.call_count)
         acquire_calls = [mock.call('NODE_A', 'ACTION_XY')]
         mock_acquire.assert_has_calls(acquire_calls * 3)
         mock_steal.assert_called_once_with('NODE_A', 'ACTION_XY')
 
     @mock.patch.object(ao.Action, 'get')
-    @mock.patch.object(scheduler, 'sleep')
+    @mock.patch.object(scheduler, 'wait_for_lock', return_value=False)
     @mock.patch.object(nlo.NodeLock, "acquire")
     @mock.patch.object(nlo.NodeLock, "steal")
     def test_node_lock_acquire_steal_failed(self, mock_steal, mock_acquire,
-                                            mock_sleep, mock_get):
+                                            mock_wait, mock_get):
         cfg.CONF.set_override('lock_retry_times', 2, enforce_type=True)
         mock_get.return_value = mock.Mock(owner='ENGINE')
         mock_acquire.side_effect = ['ACTION_ABC', 'ACTION_ABC', 'ACTION_ABC']
@@ -256,15 +280,134 @@ class SenlinLockTest(base.SenlinTestCase):
                                       'ACTION_XY', forced=True)
 
         self.assertFalse(res)
-        sleep_calls = [mock.call(cfg.CONF.lock_retry_interval)]
-        mock_sleep.assert_has_calls(sleep_calls * 2)
-        self.assertEqual(2, mock_sleep.call_count)
+        wait_calls = [mock.call('node:NODE_A', 'ACTION_XY',
+                                mock.ANY)]
+        mock_wait.assert_has_calls(wait_calls * 2)
+        self.assertEqual(2, mock_wait.call_count)
         acquire_calls = [mock.call('NODE_A', 'ACTION_XY')]
         mock_acquire.assert_has_calls(acquire_calls * 3)
         mock_steal.assert_called_once_with('NODE_A', 'ACTION_XY')
 
+    @mock.patch.object(scheduler, 'wakeup_lock')
     @mock.patch.object(nlo.NodeLock, "release")
-    def test_node_lock_release(self, mock_release):
+    def test_node_lock_release(self, mock_release, mock_wakeup):
         actual = lockm.node_lock_release('C', 'A')
         self.assertEqual(mock_release.return_value, actual)
         mock_release.assert_called_once_with('C', 'A')
+        mock_wakeup.assert_called_once_with('node:C')
+        self.assertEqual(0, self.mock_wakeup_lock.call_count)
+
+
+class SenlinLockWaitTest(base.SenlinTestCase):
+
+    def setUp(self):
+        super(SenlinLockWaitTest, self).setUp()
+
+        self.ctx = utils.dummy_context()
+        self.addCleanup(scheduler._lock_waiters.clear)
+        self.addCleanup(scheduler._remote_lock_waiters.clear)
+        # all lock owners are running in this engine
+        ret = mock.Mock(owner='ENGINE')
+        self.patchobject(ao.Action, 'get', return_value=ret)
+        self.mock_wait_lock = self.patchobject(dispatcher, 'wait_lock')
+        self.mock_wakeup_lock = self.patchobject(dispatcher, 'wakeup_lock')
+
+        # an in-memory cluster lock
+        self.owners = []
+        self.acquire_calls = 0
+
+        def fake_acquire(cluster_id, action_id, scope):
+            self.acquire_calls += 1
+            if not self.owners:
+                self.owners.append(action_id)
+            return list(self.owners)
+
+        def fake_release(cluster_id, action_id, scope):
+            if action_id in self.owners:
+                self.owners.remove(action_id)
+            return True
+
+        self.patchobject(clo.ClusterLock, 'acquire', side_effect=fake_acquire)
+        self.patchobject(clo.ClusterLock, 'release', side_effect=fake_release)
+
+    def _run(self, action_id, order):
+        res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER', action_id,
+                                         'ENGINE')
+        if res:
+            order.append(action_id)
+            # hold the lock for a while
+            eventlet.sleep(0)
+            lockm.cluster_lock_release('CLUSTER', action_id,
+                                       lockm.CLUSTER_SCOPE)
+        return res
+
+    def test_contention(self):
+        # Waiters never time out, so they are only woken by lock releases
+        cfg.CONF.set_override('lock_retry_interval', 600, enforce_type=True)
+        actions = ['ACTION_%03d' % i for i in range(100)]
+        order = []
+
+        threads = [eventlet.spawn(self._run, a, order) for a in actions]
+        results = [t.wait() for t in threads]
+
+        self.assertTrue(all(results))
+        # the lock is granted in the order the actions started waiting
+        self.assertEqual(actions, order)
+        # every action tries to grab the lock about once instead of polling
+        self.assertEqual(101, self.acquire_calls)
+        self.assertEqual({}, scheduler._lock_waiters)
+        self.assertEqual(0, self.mock_wait_lock.call_count)
+
+    def test_contention_not_fair(self):
+        cfg.CONF.set_override('lock_retry_interval', 600, enforce_type=True)
+        cfg.CONF.set_override('lock_wait_fair', False, enforce_type=True)
+        actions = ['ACTION_%03d' % i for i in range(10)]
+        order = []
+
+        threads = [eventlet.spawn(self._run, a, order) for a in actions]
+        results = [t.wait() for t in threads]
+
+        self.assertTrue(all(results))
+        self.assertEqual(sorted(actions), sorted(order))
+        self.assertEqual({}, scheduler._lock_waiters)
+
+    def test_stuck_head(self):
+        # The first waiter never gets the lock nor leaves the line
+        self.owners.append('ACTION_HOLDER')
+        scheduler.add_lock_waiter('cluster:CLUSTER', 'ACTION_HEAD')
+        clock = [0]
+
+        def fake_wait(key, action_id, timeout):
+            # woken up by every release, never timing out
+            clock[0] += timeout
+            return True
+
+        self.patchobject(lockm, 'wallclock', side_effect=lambda: clock[0])
+        self.patchobject(lockm.random, 'uniform', return_value=1.0)
+        self.patchobject(scheduler, 'wait_for_lock', side_effect=fake_wait)
+
+        res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER', 'ACTION',
+                                         'ENGINE')
+
+        self.assertFalse(res)
+        # bounded by lock_retry_times * lock_retry_interval
+        self.assertEqual(30, clock[0])
+        # a single attempt once the wait in line is over
+        self.assertEqual(1, self.acquire_calls)
+        self.assertEqual(['ACTION_HEAD'],
+                         list(scheduler._lock_waiters['cluster:CLUSTER']))
+
+    def test_owner_in_other_engine(self):
+        cfg.CONF.set_override('lock_retry_times', 1, enforce_type=True)
+        self.owners.append('ACTION_OTHER')
+        self.patchobject(ao.Action, 'get',
+                         return_value=mock.Mock(owner='ENGINE_2'))
+        self.patchobject(scheduler, 'wait_for_lock', return_value=False)
+        self.patchobject(common_utils, 'is_engine_dead', return_value=False)
+
+        res = lockm.cluster_lock_acquire(self.ctx, 'CLUSTER', 'ACTION',
+                                         'ENGINE')
+
+        self.assertFalse(res)
+        self.mock_wait_lock.assert_called_once_with(
+            'ENGINE_2', key='cluster:CLUSTER', engine_id='ENGINE')
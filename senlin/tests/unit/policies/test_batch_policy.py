@@ -0,0 +1,150 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from senlin.common import consts
+from senlin.objects import node as no
+from senlin.policies import batch_policy as bp
+from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
+
+
+class TestBatchPolicy(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestBatchPolicy, self).setUp()
+        self.context = utils.dummy_context()
+        self.spec = {
+            'type': 'senlin.policy.batch',
+            'version': '1.0',
+            'properties': {
+                'min_in_service': 2,
+                'max_batch_size': 3,
+                'pause_time': 30,
+            }
+        }
+
+    def _create_nodes(self, statuses):
+        return [mock.Mock(id='NODE_%s' % i, index=i, status=status)
+                for i, status in enumerate(statuses)]
+
+    def test_policy_init(self):
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        self.assertIsNone(policy.id)
+        self.assertEqual('test-policy', policy.name)
+        self.assertEqual('senlin.policy.batch-1.0', policy.type)
+        self.assertEqual(2, policy.min_in_service)
+        self.assertEqual(3, policy.max_batch_size)
+        self.assertEqual(30, policy.pause_time)
+
+    def test__get_batch_size(self):
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        self.assertEqual(3, policy._get_batch_size(10, 2))
+        self.assertEqual(2, policy._get_batch_size(4, 2))
+        self.assertEqual(1, policy._get_batch_size(3, 2))
+        self.assertEqual(0, policy._get_batch_size(2, 2))
+        self.assertEqual(0, policy._get_batch_size(0, 2))
+
+    def test__get_batch_size_no_max(self):
+        self.spec['properties']['max_batch_size'] = -1
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        self.assertEqual(8, policy._get_batch_size(10, 2))
+
+    def test__plan(self):
+        policy = bp.BatchPolicy('test-policy', self.spec)
+        nodes = self._create_nodes(['ACTIVE', 'ERROR', 'ACTIVE', 'WARNING',
+                                    'ACTIVE'])
+
+        res = policy._plan(nodes, 2)
+
+        # the nodes not in service come first
+        self.assertEqual([['NODE_1', 'NODE_3'], ['NODE_0', 'NODE_2'],
+                          ['NODE_4']], res)
+
+    @mock.patch.object(no.Node, 'get_all_by_cluster')
+    def test_pre_op_update(self, mock_nodes):
+        mock_nodes.return_value = self._create_nodes(['ACTIVE'] * 5)
+        action = mock.Mock(action=consts.CLUSTER_UPDATE, context=self.context,
+                           inputs={'new_profile_id': 'NEW_PROFILE'}, data={})
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        policy.pre_op('CLUSTER_ID', action)
+
+        mock_nodes.assert_called_once_with(self.context, 'CLUSTER_ID')
+        self.assertEqual('OK', action.data['status'])
+        self.assertEqual({
+            'batch_size': 3,
+            'pause_time': 30,
+            'plan': [['NODE_0', 'NODE_1', 'NODE_2'], ['NODE_3', 'NODE_4']],
+        }, action.data['batch'])
+        action.store.assert_called_once_with(self.context)
+
+    @mock.patch.object(no.Node, 'get_all_by_cluster')
+    def test_pre_op_update_no_spare_capacity(self, mock_nodes):
+        mock_nodes.return_value = self._create_nodes(['ACTIVE', 'ACTIVE',
+                                                      'ERROR'])
+        action = mock.Mock(action=consts.CLUSTER_UPDATE, context=self.context,
+                           inputs={'new_profile_id': 'NEW_PROFILE'}, data={})
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        policy.pre_op('CLUSTER_ID', action)
+
+        # in_service == min_in_service, no batch of any size is possible
+        self.assertEqual('ERROR', action.data['status'])
+        self.assertEqual('No node can be taken out of service, 2 nodes are '
+                         'in service and min_in_service is 2.',
+                         action.data['reason'])
+        self.assertNotIn('batch', action.data)
+        action.store.assert_called_once_with(self.context)
+
+    @mock.patch.object(no.Node, 'get_all_by_cluster')
+    def test_pre_op_update_no_node(self, mock_nodes):
+        mock_nodes.return_value = []
+        action = mock.Mock(action=consts.CLUSTER_UPDATE, context=self.context,
+                           inputs={'new_profile_id': 'NEW_PROFILE'}, data={})
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        policy.pre_op('CLUSTER_ID', action)
+
+        self.assertEqual('OK', action.data['status'])
+        self.assertEqual([], action.data['batch']['plan'])
+
+    @mock.patch.object(no.Node, 'get_all_by_cluster')
+    def test_pre_op_update_no_profile(self, mock_nodes):
+        action = mock.Mock(action=consts.CLUSTER_UPDATE, context=self.context,
+                           inputs={'name': 'new-name'}, data={})
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        policy.pre_op('CLUSTER_ID', action)
+
+        self.assertFalse(mock_nodes.called)
+        self.assertEqual({}, action.data)
+
+    @mock.patch.object(no.Node, 'get_all_by_cluster')
+    def test_pre_op_delete(self, mock_nodes):
+        mock_nodes.return_value = self._create_nodes(['ACTIVE'] * 2)
+        action = mock.Mock(action=consts.CLUSTER_DELETE, context=self.context,
+                           inputs={}, data={})
+        policy = bp.BatchPolicy('test-policy', self.spec)
+
+        policy.pre_op('CLUSTER_ID', action)
+
+        # min_in_service doesn't apply to nodes being deleted
+        self.assertEqual({
+            'batch_size': 2,
+            'pause_time': 30,
+            'plan': [['NODE_0', 'NODE_1']],
+        }, action.data['batch'])
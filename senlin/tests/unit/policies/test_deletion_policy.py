@@ -55,9 +55,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_region.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'R1': [node1], 'R2': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['2', '3']]
 
@@ -70,8 +70,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
             mock.call([node1], 1),
             mock.call([node2, node3], 2)
         ])
-        cluster.nodes_by_region.assert_has_calls([
-            mock.call('R1'), mock.call('R2')])
+        cluster.nodes_by_placement.assert_called_once_with('region_name')
 
     @mock.patch.object(su, 'nodes_by_profile_age')
     def test__victims_by_regions_profile_age(self, mock_select):
@@ -79,9 +78,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_region.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'R1': [node1], 'R2': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['2', '3']]
 
@@ -94,8 +93,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
             mock.call([node1], 1),
             mock.call([node2, node3], 2)
         ])
-        cluster.nodes_by_region.assert_has_calls([
-            mock.call('R1'), mock.call('R2')])
+        cluster.nodes_by_placement.assert_called_once_with('region_name')
 
     @mock.patch.object(su, 'nodes_by_age')
     def test__victims_by_regions_age_oldest(self, mock_select):
@@ -103,9 +101,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_region.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'R1': [node1], 'R2': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['2', '3']]
 
@@ -118,8 +116,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
             mock.call([node1], 1, True),
             mock.call([node2, node3], 2, True)
         ])
-        cluster.nodes_by_region.assert_has_calls([
-            mock.call('R1'), mock.call('R2')])
+        cluster.nodes_by_placement.assert_called_once_with('region_name')
 
     @mock.patch.object(su, 'nodes_by_age')
     def test__victims_by_regions_age_youngest(self, mock_select):
@@ -127,9 +124,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_region.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'R1': [node1], 'R2': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['2', '3']]
 
@@ -142,8 +139,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
             mock.call([node1], 1, False),
             mock.call([node2, node3], 2, False)
         ])
-        cluster.nodes_by_region.assert_has_calls([
-            mock.call('R1'), mock.call('R2')])
+        cluster.nodes_by_placement.assert_called_once_with('region_name')
 
     @mock.patch.object(su, 'nodes_by_random')
     def test__victims_by_zones_random(self, mock_select):
@@ -151,9 +147,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_zone.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'AZ1': [node1], 'AZ2': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['3']]
 
@@ -166,9 +162,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
             mock.call([node1], 1),
             mock.call([node2, node3], 1)
         ])
-        cluster.nodes_by_zone.assert_has_calls(
-            [mock.call('AZ1'), mock.call('AZ2')],
-        )
+        cluster.nodes_by_placement.assert_called_once_with('zone')
 
     @mock.patch.object(su, 'nodes_by_profile_age')
     def test__victims_by_zones_profile_age(self, mock_select):
@@ -176,9 +170,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_zone.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'AZ1': [node1], 'AZ2': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['2']]
 
@@ -193,9 +187,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
                 mock.call([node2, node3], 1)
             ],
         )
-        cluster.nodes_by_zone.assert_has_calls(
-            [mock.call('AZ1'), mock.call('AZ2')],
-        )
+        cluster.nodes_by_placement.assert_called_once_with('zone')
 
     @mock.patch.object(su, 'nodes_by_age')
     def test__victims_by_zones_age_oldest(self, mock_select):
@@ -203,9 +195,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=2)
         node3 = mock.Mock(id=3)
-        cluster.nodes_by_zone.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'AZ1': [node1], 'AZ8': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['3']]
 
@@ -218,9 +210,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
             mock.call([node1], 1, True),
             mock.call([node2, node3], 1, True)
         ])
-        cluster.nodes_by_zone.assert_has_calls(
-            [mock.call('AZ1'), mock.call('AZ8')],
-        )
+        cluster.nodes_by_placement.assert_called_once_with('zone')
 
     @mock.patch.object(su, 'nodes_by_age')
     def test__victims_by_zones_age_youngest(self, mock_select):
@@ -228,9 +218,9 @@ class TestDeletionPolicy(base.SenlinTestCase):
         node1 = mock.Mock(id=1)
         node2 = mock.Mock(id=3)
         node3 = mock.Mock(id=5)
-        cluster.nodes_by_zone.side_effect = [
-            [node1], [node2, node3]
-        ]
+        cluster.nodes_by_placement.return_value = {
+            'AZ5': [node1], 'AZ6': [node2, node3]
+        }
 
         mock_select.side_effect = [['1'], ['3', '5']]
 
@@ -245,9 +235,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
                 mock.call([node2, node3], 2, False)
             ],
         )
-        cluster.nodes_by_zone.assert_has_calls(
-            [mock.call('AZ5'), mock.call('AZ6')],
-        )
+        cluster.nodes_by_placement.assert_called_once_with('zone')
 
     def test__update_action_clean(self):
         action = mock.Mock()
@@ -325,7 +313,7 @@ class TestDeletionPolicy(base.SenlinTestCase):
         mock_update.assert_called_once_with(action, ['NODE_ID'])
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_age')
+    @mock.patch.object(no.Node, 'ids_for_deletion')
     @mock.patch.object(cm.Cluster, 'load')
     def test_pre_op_with_count_decisions(self, mock_load, mock_select,
                                          mock_update):
@@ -334,17 +322,16 @@ class TestDeletionPolicy(base.SenlinTestCase):
         action.inputs = {}
         action.data = {'deletion': {'count': 2}}
 
-        cluster = mock.Mock(nodes=['a', 'b', 'c'])
-        mock_load.return_value = cluster
         mock_select.return_value = ['NODE1', 'NODE2']
 
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
         mock_update.assert_called_once_with(action, ['NODE1', 'NODE2'])
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
-        mock_select.assert_called_once_with(cluster.nodes, 2, True)
+        # nodes are not loaded
+        self.assertEqual(0, mock_load.call_count)
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            'created_at')
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
     @mock.patch.object(dp.DeletionPolicy, '_victims_by_regions')
@@ -407,54 +394,43 @@ class TestDeletionPolicy(base.SenlinTestCase):
         mock_select.assert_called_once_with(cluster, {'AZ1': 1, 'AZ2': 1})
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_age')
-    @mock.patch.object(cm.Cluster, 'load')
-    def test_pre_op_scale_in_with_count(self, mock_load, mock_select,
-                                        mock_update):
+    @mock.patch.object(no.Node, 'ids_for_deletion')
+    def test_pre_op_scale_in_with_count(self, mock_select, mock_update):
         action = mock.Mock()
         action.action = consts.CLUSTER_SCALE_IN
         action.context = self.context
         action.data = {}
         action.inputs = {'count': 2}
 
-        cluster = mock.Mock(nodes=[mock.Mock()])
-        mock_load.return_value = cluster
+        # the input count is greater than the cluster size
         mock_select.return_value = ['NODE_ID']
 
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            'created_at')
         mock_update.assert_called_once_with(action, ['NODE_ID'])
-        # the following was invoked with 1 because the input count is
-        # greater than the cluster size
-        mock_select.assert_called_once_with(cluster.nodes, 1, True)
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_age')
-    @mock.patch.object(cm.Cluster, 'load')
-    def test_pre_op_scale_in_without_count(self, mock_load, mock_select,
-                                           mock_update):
+    @mock.patch.object(no.Node, 'ids_for_deletion')
+    def test_pre_op_scale_in_without_count(self, mock_select, mock_update):
         action = mock.Mock()
         action.context = self.context
         action.action = consts.CLUSTER_SCALE_IN
         action.data = {}
         action.inputs = {}
 
-        cluster = mock.Mock(nodes=[mock.Mock()])
-        mock_load.return_value = cluster
         mock_select.return_value = ['NODE_ID']
 
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
         mock_update.assert_called_once_with(action, ['NODE_ID'])
         # the following was invoked with 1 because the input count is
         # not specified so 1 becomes the default
-        mock_select.assert_called_once_with(cluster.nodes, 1, True)
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 1,
+                                            'created_at')
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
     @mock.patch.object(su, 'parse_resize_params')
@@ -518,12 +494,10 @@ class TestDeletionPolicy(base.SenlinTestCase):
     @mock.patch.object(su, 'parse_resize_params')
     @mock.patch.object(no.Node, 'count_by_cluster')
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_age')
-    @mock.patch.object(cm.Cluster, 'load')
+    @mock.patch.object(no.Node, 'ids_for_deletion')
     @mock.patch.object(co.Cluster, 'get')
-    def test_pre_op_resize_with_count(self, mock_get, mock_load,
-                                      mock_select, mock_update, mock_count,
-                                      mock_parse):
+    def test_pre_op_resize_with_count(self, mock_get, mock_select,
+                                      mock_update, mock_count, mock_parse):
         def fake_parse(a, cluster, current):
             a.data = {
                 'deletion': {
@@ -542,54 +516,40 @@ class TestDeletionPolicy(base.SenlinTestCase):
         mock_get.return_value = db_cluster
         mock_count.return_value = 2
         mock_parse.side_effect = fake_parse
-
-        cluster = mock.Mock(nodes=[mock.Mock(), mock.Mock()])
-        mock_load.return_value = cluster
-
         mock_select.return_value = ['NID']
 
         policy = dp.DeletionPolicy('test-policy', self.spec)
 
-        # mock_parse = self.patchobject(su, 'parse_resize_params',
-        #                              side_effect=fake_parse)
-
         policy.pre_op('FAKE_ID', action)
 
         mock_get.assert_called_once_with(action.context, 'FAKE_ID')
         mock_count.assert_called_once_with(action.context, 'FAKE_ID')
         mock_parse.assert_called_once_with(action, db_cluster, 2)
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=db_cluster,
-                                          cluster_id='FAKE_ID')
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            'created_at')
         mock_update.assert_called_once_with(action, ['NID'])
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_random')
-    @mock.patch.object(cm.Cluster, 'load')
-    def test_pre_op_do_random(self, mock_load, mock_select, mock_update):
+    @mock.patch.object(no.Node, 'ids_for_deletion')
+    def test_pre_op_do_random(self, mock_select, mock_update):
         action = mock.Mock()
         action.context = self.context
         action.inputs = {}
         action.data = {'deletion': {'count': 2}}
 
-        cluster = mock.Mock(nodes=['a', 'b', 'c'])
         mock_select.return_value = ['NODE1', 'NODE2']
-        mock_load.return_value = cluster
 
         self.spec['properties']['criteria'] = 'RANDOM'
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
-        mock_select.assert_called_once_with(cluster.nodes, 2)
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            'random')
         mock_update.assert_called_once_with(action, ['NODE1', 'NODE2'])
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_profile_age')
-    @mock.patch.object(cm.Cluster, 'load')
-    def test_pre_op_do_oldest_profile(self, mock_load, mock_select,
-                                      mock_update):
+    @mock.patch.object(no.Node, 'ids_for_deletion')
+    def test_pre_op_do_oldest_profile(self, mock_select, mock_update):
         action = mock.Mock()
         action.context = self.context
         action.inputs = {}
@@ -597,59 +557,46 @@ class TestDeletionPolicy(base.SenlinTestCase):
 
         mock_select.return_value = ['NODE1', 'NODE2']
 
-        cluster = mock.Mock(nodes=['a', 'b', 'c'])
-        mock_load.return_value = cluster
-
         self.spec['properties']['criteria'] = 'OLDEST_PROFILE_FIRST'
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
-        mock_select.assert_called_once_with(cluster.nodes, 2)
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            'profile_created_at')
         mock_update.assert_called_once_with(action, ['NODE1', 'NODE2'])
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_age')
-    @mock.patch.object(cm.Cluster, 'load')
-    def test_pre_op_do_oldest_first(self, mock_load, mock_select, mock_update):
+    @mock.patch.object(no.Node, 'ids_for_deletion')
+    def test_pre_op_do_oldest_first(self, mock_select, mock_update):
         action = mock.Mock()
         action.context = self.context
         action.inputs = {}
         action.data = {'deletion': {'count': 2}}
 
-        cluster = mock.Mock(nodes=['a', 'b', 'c'])
         mock_select.return_value = ['NODE1', 'NODE2']
-        mock_load.return_value = cluster
 
         self.spec['properties']['criteria'] = 'OLDEST_FIRST'
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
-        mock_select.assert_called_once_with(cluster.nodes, 2, True)
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            'created_at')
         mock_update.assert_called_once_with(action, ['NODE1', 'NODE2'])
 
     @mock.patch.object(dp.DeletionPolicy, '_update_action')
-    @mock.patch.object(su, 'nodes_by_age')
-    @mock.patch.object(cm.Cluster, 'load')
-    def test_pre_op_do_youngest_first(self, mock_load, mock_select,
-                                      mock_update):
+    @mock.patch.object(no.Node, 'ids_for_deletion')
+    def test_pre_op_do_youngest_first(self, mock_select, mock_update):
         action = mock.Mock()
         action.context = self.context
         action.inputs = {}
         action.data = {'deletion': {'count': 2}}
 
-        cluster = mock.Mock(nodes=['a', 'b', 'c'])
         mock_select.return_value = ['NODE1', 'NODE2']
-        mock_load.return_value = cluster
 
         self.spec['properties']['criteria'] = 'YOUNGEST_FIRST'
         policy = dp.DeletionPolicy('test-policy', self.spec)
         policy.pre_op('FAKE_ID', action)
 
-        mock_load.assert_called_once_with(action.context,
-                                          dbcluster=None, cluster_id='FAKE_ID')
-        mock_select.assert_called_once_with(cluster.nodes, 2, False)
+        mock_select.assert_called_once_with(action.context, 'FAKE_ID', 2,
+                                            '-created_at')
         mock_update.assert_called_once_with(action, ['NODE1', 'NODE2'])
@@ -10,11 +10,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
 import mock
 from oslo_context import context as oslo_ctx
 from oslo_utils import timeutils
 import six
 
+from senlin.common import cache
 from senlin.common import consts
 from senlin.common import context as senlin_ctx
 from senlin.common import exception
@@ -150,6 +153,54 @@ class TestPolicyBase(base.SenlinTestCase):
         self.assertIsNotNone(res)
         self.assertEqual(expected.id, res.id)
 
+    def test_load_cached(self):
+        policy = utils.create_policy(self.ctx, UUID1)
+        res1 = pb.Policy.load(self.ctx, policy.id)
+
+        res2 = pb.Policy.load(self.ctx, policy.id)
+
+        self.assertIsNot(res1, res2)
+        self.assertEqual(res1.id, res2.id)
+        self.assertEqual(res1.properties, res2.properties)
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1},
+                         cache.policies.stats())
+
+    def test_load_cached_clients(self):
+        policy = utils.create_policy(self.ctx, UUID1)
+        res1 = pb.Policy.load(self.ctx, policy.id)
+        res1._novaclient = mock.Mock()
+        res1._lbaasclient = mock.Mock()
+
+        res2 = pb.Policy.load(self.ctx, policy.id)
+
+        # the clients built by one caller are never handed to another
+        self.assertIsNone(res2._novaclient)
+        self.assertIsNone(res2._keystoneclient)
+        self.assertIsNone(res2._networkclient)
+        self.assertIsNone(res2._lbaasclient)
+
+    def test_copy(self):
+        policy = self._create_policy('test-policy')
+        policy._novaclient = mock.Mock()
+        policy._keystoneclient = mock.Mock()
+        policy._networkclient = mock.Mock()
+        policy._lbaasclient = mock.Mock()
+
+        policy.data = {'k': 'v'}
+
+        res = copy.copy(policy)
+        res.data['k'] = 'new'
+
+        self.assertIsInstance(res, DummyPolicy)
+        self.assertEqual({'k': 'v'}, policy.data)
+        self.assertEqual(policy.name, res.name)
+        self.assertIs(policy.properties, res.properties)
+        self.assertIsNone(res._novaclient)
+        self.assertIsNone(res._keystoneclient)
+        self.assertIsNone(res._networkclient)
+        self.assertIsNone(res._lbaasclient)
+        self.assertIsNotNone(policy._novaclient)
+
     def test_load_diff_project(self):
         policy = utils.create_policy(self.ctx, UUID1)
 
@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
 import mock
 
 from senlin.common import context
@@ -50,6 +52,15 @@ class TestContainerDockerProfile(base.SenlinTestCase):
         self.assertIsNone(profile.container_id)
         self.assertIsNone(profile.host)
 
+    def test_copy(self):
+        profile = docker_profile.DockerProfile('t', self.spec)
+        profile._dockerclient = mock.Mock()
+
+        res = copy.copy(profile)
+
+        self.assertIsNone(res._dockerclient)
+        self.assertIsNotNone(profile._dockerclient)
+
     @mock.patch('senlin.drivers.container.docker_v1.DockerClient')
     @mock.patch.object(docker_profile.DockerProfile, '_get_host_ip')
     @mock.patch.object(docker_profile.DockerProfile, '_get_host')
@@ -11,6 +11,7 @@
 # under the License.
 
 import base64
+import copy
 
 import mock
 from oslo_utils import encodeutils
@@ -739,6 +740,171 @@ class TestNovaServerBasic(base.SenlinTestCase):
         self.assertEqual(expected, res)
         cc.server_get.assert_called_once_with('FAKE_ID')
 
+    def _fake_server(self, sid):
+        nova_server = mock.Mock(id=sid)
+        nova_server.to_dict.return_value = {
+            'addresses': {},
+            'flavor': {'id': 'FAKE_FLAVOR'},
+            'id': sid,
+            'image': {'id': 'FAKE_IMAGE'},
+            'security_groups': [],
+        }
+        return nova_server
+
+    def test_do_get_details_many(self):
+        cc = mock.Mock()
+        cc.server_list.return_value = [
+            self._fake_server('PHY1'),
+            self._fake_server('PHY2'),
+            self._fake_server('OTHER'),
+        ]
+        profile = server.ServerProfile('t', self.spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+
+        res = profile.do_get_details_many([n1, n2])
+
+        self.assertEqual(['N1', 'N2'], sorted(res.keys()))
+        self.assertEqual('PHY1', res['N1']['id'])
+        self.assertEqual('FAKE_FLAVOR', res['N1']['flavor'])
+        self.assertEqual('PHY2', res['N2']['id'])
+        cc.server_list.assert_called_once_with(name='^FAKE_SERVER_NAME$')
+        self.assertEqual(0, cc.server_get.call_count)
+
+    def test__list_servers_by_node_names(self):
+        cc = mock.Mock()
+        cc.server_list.return_value = [self._fake_server('PHY1'),
+                                       self._fake_server('OTHER')]
+        spec = copy.deepcopy(self.spec)
+        del spec['properties']['name']
+        profile = server.ServerProfile('t', spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n1.name = 'node-CLUSTER-001'
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+        n2.name = 'node-CLUSTER-012'
+
+        res = profile._list_servers([n1, n2])
+
+        self.assertEqual(['PHY1'], list(res.keys()))
+        cc.server_list.assert_called_once_with(name='^node-CLUSTER-0')
+
+    def test__list_servers_no_common_name(self):
+        cc = mock.Mock()
+        cc.server_list.return_value = []
+        spec = copy.deepcopy(self.spec)
+        del spec['properties']['name']
+        profile = server.ServerProfile('t', spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n1.name = 'web.1'
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+        n2.name = 'db.1'
+
+        res = profile._list_servers([n1, n2])
+
+        self.assertEqual({}, res)
+        # all the servers of the project are listed
+        cc.server_list.assert_called_once_with()
+
+    def test_do_get_details_many_server_missing(self):
+        cc = mock.Mock()
+        cc.server_list.return_value = [self._fake_server('PHY1')]
+        err = exc.InternalError(code=404, message='No Server found for ID')
+        cc.server_get.side_effect = err
+        profile = server.ServerProfile('t', self.spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+
+        res = profile.do_get_details_many([n1, n2])
+
+        self.assertEqual('PHY1', res['N1']['id'])
+        expected = {
+            'Error': {
+                'message': 'No Server found for ID',
+                'code': 404
+            }
+        }
+        self.assertEqual(expected, res['N2'])
+        cc.server_list.assert_called_once_with(name='^FAKE_SERVER_NAME$')
+        cc.server_get.assert_called_once_with('PHY2')
+
+    def test_do_get_details_many_list_failed(self):
+        cc = mock.Mock()
+        cc.server_list.side_effect = exc.InternalError(code=500,
+                                                       message='Boom')
+        cc.server_get.side_effect = [self._fake_server('PHY1'),
+                                     self._fake_server('PHY2')]
+        profile = server.ServerProfile('t', self.spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+
+        res = profile.do_get_details_many([n1, n2])
+
+        self.assertEqual('PHY1', res['N1']['id'])
+        self.assertEqual('PHY2', res['N2']['id'])
+        cc.server_list.assert_called_once_with(name='^FAKE_SERVER_NAME$')
+        cc.server_get.assert_has_calls([mock.call('PHY1'),
+                                        mock.call('PHY2')])
+
+    def test_do_get_details_many_single(self):
+        cc = mock.Mock()
+        cc.server_get.return_value = self._fake_server('PHY1')
+        profile = server.ServerProfile('t', self.spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n2 = mock.Mock(id='N2', physical_id=None)
+
+        res = profile.do_get_details_many([n1, n2])
+
+        self.assertEqual(['N1'], list(res.keys()))
+        self.assertEqual(0, cc.server_list.call_count)
+        cc.server_get.assert_called_once_with('PHY1')
+
+    def test_do_check_many(self):
+        cc = mock.Mock()
+        cc.server_list.return_value = [
+            mock.Mock(id='PHY1', status='ACTIVE'),
+            mock.Mock(id='PHY2', status='SHUTOFF'),
+            mock.Mock(id='OTHER', status='ACTIVE'),
+        ]
+        cc.server_get.return_value = None
+        profile = server.ServerProfile('t', self.spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+        n3 = mock.Mock(id='N3', physical_id='PHY3')
+        n4 = mock.Mock(id='N4', physical_id=None)
+
+        res = profile.do_check_many([n1, n2, n3, n4])
+
+        self.assertEqual({'N1': True, 'N2': False, 'N3': False, 'N4': False},
+                         res)
+        cc.server_list.assert_called_once_with(name='^FAKE_SERVER_NAME$')
+        # only the server not listed is checked on its own
+        cc.server_get.assert_called_once_with('PHY3')
+
+    def test_do_check_many_list_failed(self):
+        cc = mock.Mock()
+        cc.server_list.side_effect = exc.InternalError(code=500,
+                                                       message='Boom')
+        cc.server_get.side_effect = [mock.Mock(status='ACTIVE'),
+                                     exc.InternalError(code=500,
+                                                       message='Boom')]
+        profile = server.ServerProfile('t', self.spec)
+        profile._computeclient = cc
+        n1 = mock.Mock(id='N1', physical_id='PHY1')
+        n2 = mock.Mock(id='N2', physical_id='PHY2')
+
+        res = profile.do_check_many([n1, n2])
+
+        self.assertEqual({'N1': True, 'N2': None}, res)
+        cc.server_get.assert_has_calls([mock.call('PHY1'),
+                                        mock.call('PHY2')])
+
     def test_do_join_successful(self):
         profile = server.ServerProfile('t', self.spec)
 
@@ -13,10 +13,13 @@
 import copy
 from types import GeneratorType
 
+import eventlet
 import mock
+from oslo_config import cfg
 from oslo_context import context as oslo_ctx
 import six
 
+from senlin.common import cache
 from senlin.common import context as senlin_ctx
 from senlin.common import exception
 from senlin.common import schema
@@ -196,6 +199,70 @@ class TestProfileBase(base.SenlinTestCase):
 
         self.assertEqual(profile.id, res.id)
 
+    @mock.patch.object(pb.Profile, 'from_object')
+    def test_load_cached(self, mock_from):
+        profile = self._create_profile('test-profile-dd')
+        profile_id = profile.store(self.ctx)
+        mock_from.return_value = profile
+
+        res1 = pb.Profile.load(self.ctx, profile_id=profile_id)
+        res2 = pb.Profile.load(self.ctx, profile_id=profile_id)
+
+        self.assertEqual(profile_id, res1.id)
+        self.assertEqual(profile_id, res2.id)
+        self.assertIsNot(res1, res2)
+        mock_from.assert_called_once_with(mock.ANY)
+        self.assertEqual(1, cache.profiles.stats()['hits'])
+
+    def test_load_cached_clients(self):
+        profile = self._create_profile('test-profile-ff')
+        profile_id = profile.store(self.ctx)
+
+        res1 = pb.Profile.load(self.ctx, profile_id=profile_id)
+        res1._computeclient = mock.Mock()
+        res1._networkclient = mock.Mock()
+        res2 = pb.Profile.load(self.ctx, profile_id=profile_id)
+
+        # the clients built by one caller are never handed to another
+        self.assertIsNone(res2._computeclient)
+        self.assertIsNone(res2._networkclient)
+        self.assertIsNone(res2._orchestrationclient)
+        self.assertEqual(res1.properties, res2.properties)
+
+    def test_copy(self):
+        profile = self._create_profile('test-profile-gg')
+        profile._computeclient = mock.Mock()
+        profile._networkclient = mock.Mock()
+        profile._orchestrationclient = mock.Mock()
+
+        profile.metadata = {'k': 'v'}
+
+        res = copy.copy(profile)
+        res.metadata['k'] = 'new'
+
+        self.assertIsInstance(res, DummyProfile)
+        self.assertEqual({'k': 'v'}, profile.metadata)
+        self.assertEqual(profile.name, res.name)
+        self.assertIs(profile.properties, res.properties)
+        self.assertIsNone(res._computeclient)
+        self.assertIsNone(res._networkclient)
+        self.assertIsNone(res._orchestrationclient)
+        self.assertIsNotNone(profile._computeclient)
+
+    @mock.patch.object(pb.Profile, 'from_object')
+    def test_load_cached_updated(self, mock_from):
+        profile = self._create_profile('test-profile-ee')
+        profile_id = profile.store(self.ctx)
+        mock_from.return_value = profile
+        pb.Profile.load(self.ctx, profile_id=profile_id)
+
+        # updated_at changes when profile is updated
+        profile.name = 'new-name'
+        profile.store(self.ctx)
+        pb.Profile.load(self.ctx, profile_id=profile_id)
+
+        self.assertEqual(2, mock_from.call_count)
+
     @mock.patch.object(po.Profile, 'get')
     def test_load_not_found(self, mock_get):
         mock_get.return_value = None
@@ -434,6 +501,83 @@ class TestProfileBase(base.SenlinTestCase):
         res_obj = profile.do_get_details.return_value
         self.assertEqual(res_obj, res)
 
+    @mock.patch.object(pb.Profile, 'load')
+    def test_get_details_many(self, mock_load):
+        profile1 = mock.Mock()
+        profile1.do_get_details_many.return_value = {
+            'N1': {'status': 'ACTIVE'},
+            'N2': {'Error': {'message': 'Boom'}},
+        }
+        profile2 = mock.Mock()
+        profile2.do_get_details_many.return_value = {
+            'N3': {'status': 'ERROR'},
+        }
+        mock_load.side_effect = [profile1, profile2]
+        n1 = mock.Mock(id='N1', physical_id='P1', profile_id='PF1',
+                       user='U', project='J')
+        n2 = mock.Mock(id='N2', physical_id='P2', profile_id='PF1',
+                       user='U', project='J')
+        n3 = mock.Mock(id='N3', physical_id='P3', profile_id='PF2',
+                       user='U', project='J')
+        n4 = mock.Mock(id='N4', physical_id=None)
+
+        res = pb.Profile.get_details_many(self.ctx, [n1, n2, n3, n4])
+
+        self.assertEqual({
+            'N1': {'status': 'ACTIVE'},
+            'N2': {'Error': {'message': 'Boom'}},
+            'N3': {'status': 'ERROR'},
+            'N4': {},
+        }, res)
+        mock_load.assert_has_calls([
+            mock.call(self.ctx, profile_id='PF1'),
+            mock.call(self.ctx, profile_id='PF2'),
+        ], any_order=True)
+        profile1.do_get_details_many.assert_called_once_with([n1, n2])
+        profile2.do_get_details_many.assert_called_once_with([n3])
+
+        # errors are not cached
+        self.assertEqual({'status': 'ACTIVE'}, cache.details.get('P1'))
+        self.assertIsNone(cache.details.get('P2'))
+        self.assertEqual({'status': 'ERROR'}, cache.details.get('P3'))
+
+    @mock.patch.object(pb.Profile, 'load')
+    def test_get_details_many_cached(self, mock_load):
+        cache.details.put('P1', {'status': 'ACTIVE'})
+        n1 = mock.Mock(id='N1', physical_id='P1', profile_id='PF1',
+                       user='U', project='J')
+
+        res = pb.Profile.get_details_many(self.ctx, [n1])
+
+        self.assertEqual({'N1': {'status': 'ACTIVE'}}, res)
+        self.assertEqual(0, mock_load.call_count)
+
+    @mock.patch.object(pb.Profile, 'load')
+    def test_check_objects(self, mock_load):
+        profile1 = mock.Mock()
+        profile1.do_check_many.return_value = {'N1': True, 'N2': False}
+        profile2 = mock.Mock()
+        profile2.do_check_many.return_value = {'N3': None}
+        mock_load.side_effect = [profile1, profile2]
+        n1 = mock.Mock(id='N1', physical_id='P1', profile_id='PF1',
+                       user='U', project='J')
+        n2 = mock.Mock(id='N2', physical_id='P2', profile_id='PF1',
+                       user='U', project='J')
+        n3 = mock.Mock(id='N3', physical_id='P3', profile_id='PF2',
+                       user='U', project='J')
+        n4 = mock.Mock(id='N4', physical_id=None)
+
+        res = pb.Profile.check_objects(self.ctx, [n1, n2, n3, n4])
+
+        self.assertEqual({'N1': True, 'N2': False, 'N3': None, 'N4': False},
+                         res)
+        mock_load.assert_has_calls([
+            mock.call(self.ctx, profile_id='PF1'),
+            mock.call(self.ctx, profile_id='PF2'),
+        ], any_order=True)
+        profile1.do_check_many.assert_called_once_with([n1, n2])
+        profile2.do_check_many.assert_called_once_with([n3])
+
     def test_get_schema(self):
         expected = {
             'context': {
@@ -679,6 +823,55 @@ class TestProfileBase(base.SenlinTestCase):
         self.assertEqual(True, profile.do_rebuild(mock.Mock()))
         self.assertEqual(True, profile.do_validate(mock.Mock()))
 
+    def test_do_get_details_many(self):
+        cfg.CONF.set_override('max_details_fetches', 3, enforce_type=True)
+        profile = self._create_profile('test-profile')
+        stats = {'running': 0, 'max': 0}
+
+        def fake_get_details(obj):
+            # simulate a backend service with some latency
+            stats['running'] += 1
+            stats['max'] = max(stats['max'], stats['running'])
+            eventlet.sleep(0.01)
+            stats['running'] -= 1
+            return {'id': obj.physical_id}
+
+        objs = [mock.Mock(id='N%s' % i, physical_id='P%s' % i)
+                for i in range(10)]
+        with mock.patch.object(profile, 'do_get_details',
+                               side_effect=fake_get_details):
+            res = profile.do_get_details_many(objs)
+
+        self.assertEqual(10, len(res))
+        for i in range(10):
+            self.assertEqual({'id': 'P%s' % i}, res['N%s' % i])
+        # calls are made concurrently but bounded by the pool size
+        self.assertEqual(3, stats['max'])
+
+    def test_do_check_many(self):
+        profile = self._create_profile('test-profile')
+        objs = [mock.Mock(id='N%s' % i, physical_id='P%s' % i)
+                for i in range(3)]
+        results = {
+            'P0': True,
+            'P1': False,
+            'P2': exception.EResourceOperation(op='checking',
+                                               type='server', id='P2',
+                                               message='Boom'),
+        }
+
+        def fake_check(obj):
+            res = results[obj.physical_id]
+            if isinstance(res, Exception):
+                raise res
+            return res
+
+        with mock.patch.object(profile, 'do_check', side_effect=fake_check):
+            res = profile.do_check_many(objs)
+
+        # objects failed to be checked are neither healthy nor unhealthy
+        self.assertEqual({'N0': True, 'N1': False, 'N2': None}, res)
+
     def test_do_recover_default(self):
         profile = self._create_profile('test-profile')
         self.patchobject(profile, 'do_create', return_value=True)
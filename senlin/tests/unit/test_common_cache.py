@@ -0,0 +1,259 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+from oslo_config import cfg
+
+from senlin.common import cache
+from senlin.tests.unit.common import base
+
+
+class FakeObject(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class TestObjectCache(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestObjectCache, self).setUp()
+        self.cache = cache.ObjectCache('fake')
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get('ID', 'V1'))
+        self.assertEqual({'hits': 0, 'misses': 1, 'size': 0},
+                         self.cache.stats())
+
+    def test_get_hit(self):
+        obj = FakeObject('foo')
+        self.cache.put('ID', 'V1', obj)
+
+        res = self.cache.get('ID', 'V1')
+
+        self.assertIsInstance(res, FakeObject)
+        self.assertEqual('foo', res.name)
+        # a copy is returned so attribute changes are not shared
+        self.assertIsNot(obj, res)
+        res.name = 'bar'
+        self.assertEqual('foo', self.cache.get('ID', 'V1').name)
+        self.assertEqual({'hits': 2, 'misses': 0, 'size': 1},
+                         self.cache.stats())
+
+    def test_get_version_mismatch(self):
+        self.cache.put('ID', 'V1', FakeObject('foo'))
+
+        self.assertIsNone(self.cache.get('ID', 'V2'))
+        # stale entry is dropped
+        self.assertIsNone(self.cache.get('ID', 'V1'))
+        self.assertEqual({'hits': 0, 'misses': 2, 'size': 0},
+                         self.cache.stats())
+
+    def test_put_evicts_least_recently_used(self):
+        cfg.CONF.set_override('object_cache_size', 2, enforce_type=True)
+        self.cache.put('ID1', None, FakeObject('1'))
+        self.cache.put('ID2', None, FakeObject('2'))
+        # touch ID1 so that ID2 becomes the least recently used
+        self.cache.get('ID1', None)
+
+        self.cache.put('ID3', None, FakeObject('3'))
+
+        self.assertIsNotNone(self.cache.get('ID1', None))
+        self.assertIsNone(self.cache.get('ID2', None))
+        self.assertIsNotNone(self.cache.get('ID3', None))
+        self.assertEqual(2, self.cache.stats()['size'])
+
+    def test_put_disabled(self):
+        cfg.CONF.set_override('object_cache_size', 0, enforce_type=True)
+        self.cache.put('ID', None, FakeObject('foo'))
+
+        self.assertIsNone(self.cache.get('ID', None))
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_invalidate(self):
+        self.cache.put('ID', 'V1', FakeObject('foo'))
+
+        self.cache.invalidate('ID')
+        self.cache.invalidate('NON_EXISTENT')
+
+        self.assertIsNone(self.cache.get('ID', 'V1'))
+
+    def test_clear(self):
+        self.cache.put('ID', 'V1', FakeObject('foo'))
+        self.cache.get('ID', 'V1')
+
+        self.cache.clear()
+
+        self.assertEqual({'hits': 0, 'misses': 0, 'size': 0},
+                         self.cache.stats())
+
+
+class TestExpiringCache(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestExpiringCache, self).setUp()
+        self.cache = cache.ExpiringCache('fake')
+        cfg.CONF.set_override('details_cache_ttl', 10, enforce_type=True)
+
+    @mock.patch('time.time')
+    def test_get_hit(self, mock_time):
+        mock_time.return_value = 100
+        value = {'foo': 'bar'}
+        self.cache.put('KEY', value)
+
+        mock_time.return_value = 109
+        res = self.cache.get('KEY')
+
+        self.assertEqual(value, res)
+        self.assertIsNot(value, res)
+        self.assertEqual({'hits': 1, 'misses': 0, 'size': 1},
+                         self.cache.stats())
+
+    @mock.patch('time.time')
+    def test_get_expired(self, mock_time):
+        mock_time.return_value = 100
+        self.cache.put('KEY', {'foo': 'bar'})
+
+        mock_time.return_value = 110
+        self.assertIsNone(self.cache.get('KEY'))
+        self.assertEqual({'hits': 0, 'misses': 1, 'size': 0},
+                         self.cache.stats())
+
+    @mock.patch('time.time')
+    def test_put_purge_expired(self, mock_time):
+        mock_time.return_value = 100
+        self.cache.put('K1', 'V1')
+        mock_time.return_value = 105
+        self.cache.put('K2', 'V2')
+        self.assertEqual(2, self.cache.stats()['size'])
+
+        mock_time.return_value = 111
+        self.cache.put('K3', 'V3')
+
+        self.assertEqual(2, self.cache.stats()['size'])
+        self.assertIsNone(self.cache.get('K1'))
+        self.assertEqual('V2', self.cache.get('K2'))
+
+    def test_put_disabled(self):
+        cfg.CONF.set_override('details_cache_ttl', 0, enforce_type=True)
+        self.cache.put('KEY', 'VALUE')
+
+        self.assertIsNone(self.cache.get('KEY'))
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_invalidate_and_clear(self):
+        self.cache.put('K1', 'V1')
+        self.cache.put('K2', 'V2')
+
+        self.cache.invalidate('K1')
+        self.assertIsNone(self.cache.get('K1'))
+        self.assertEqual('V2', self.cache.get('K2'))
+
+        self.cache.clear()
+        self.assertEqual({'hits': 0, 'misses': 0, 'size': 0},
+                         self.cache.stats())
+
+
+class TestPlacementCache(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestPlacementCache, self).setUp()
+        self.cache = cache.PlacementCache('fake')
+
+    def _node(self, node_id, **placement):
+        data = {'placement': placement} if placement else {}
+        return mock.Mock(id=node_id, data=data)
+
+    def test_count(self):
+        nodes = [self._node('N1', zone='AZ1', region_name='R1'),
+                 self._node('N2', zone='AZ1'),
+                 self._node('N3', region_name='R1')]
+
+        counts, missing = self.cache.count('CLUSTER', nodes, 'zone')
+
+        self.assertEqual({'AZ1': 2}, counts)
+        self.assertEqual([nodes[2]], missing)
+        counts, missing = self.cache.count('CLUSTER', nodes, 'region_name')
+        self.assertEqual({'R1': 2}, counts)
+        self.assertEqual([nodes[1]], missing)
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1},
+                         self.cache.stats())
+
+    def test_count_reconcile(self):
+        nodes = [self._node('N1', zone='AZ1'), self._node('N2', zone='AZ2')]
+        self.cache.count('CLUSTER', nodes, 'zone')
+
+        # N2 deleted and N3 created by another engine
+        nodes = [nodes[0], self._node('N3', zone='AZ3')]
+        counts, missing = self.cache.count('CLUSTER', nodes, 'zone')
+
+        self.assertEqual({'AZ1': 1, 'AZ3': 1}, counts)
+        self.assertEqual([], missing)
+
+    def test_count_placement_changed(self):
+        nodes = [self._node('N1', zone='AZ1'), self._node('N2')]
+        self.cache.add('CLUSTER', 'N2', {'zone': 'AZ1'})
+        self.cache.count('CLUSTER', nodes, 'zone')
+
+        # N1 moved, the zone of N2 retrieved from the backend is kept
+        nodes[0].data['placement']['zone'] = 'AZ2'
+        counts, missing = self.cache.count('CLUSTER', nodes, 'zone')
+        self.assertEqual({'AZ1': 1, 'AZ2': 1}, counts)
+
+        # the values of a node are all read again once its data changed
+        nodes[1].data = {'placement': {'region_name': 'R1'}}
+        counts, missing = self.cache.count('CLUSTER', nodes, 'zone')
+        self.assertEqual({'AZ2': 1}, counts)
+        self.assertEqual([nodes[1]], missing)
+
+    def test_add_and_remove(self):
+        self.cache.add('CLUSTER', 'N1', {'zone': 'AZ1'})
+        self.cache.add('CLUSTER', 'N2', {'zone': 'AZ1', 'servergroup': None})
+        self.cache.add('CLUSTER', 'N2', {'zone': 'AZ2'})
+        self.cache.remove('CLUSTER', 'N1')
+        self.cache.remove('CLUSTER', 'BOGUS')
+        self.cache.remove('BOGUS', 'N1')
+
+        node = self._node('N2')
+        counts, missing = self.cache.count('CLUSTER', [node], 'zone')
+
+        self.assertEqual({'AZ2': 1}, counts)
+        self.assertEqual([], missing)
+
+    def test_count_no_cluster_id(self):
+        nodes = [self._node('N1', zone='AZ1')]
+
+        counts, missing = self.cache.count(None, nodes, 'zone')
+
+        self.assertEqual({'AZ1': 1}, counts)
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_count_disabled(self):
+        cfg.CONF.set_override('placement_cache_size', 0, enforce_type=True)
+        nodes = [self._node('N1', zone='AZ1')]
+
+        counts, missing = self.cache.count('CLUSTER', nodes, 'zone')
+
+        self.assertEqual({'AZ1': 1}, counts)
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_evict_least_recently_used(self):
+        cfg.CONF.set_override('placement_cache_size', 2, enforce_type=True)
+        self.cache.add('C1', 'N1', {'zone': 'AZ1'})
+        self.cache.add('C2', 'N2', {'zone': 'AZ1'})
+        self.cache.count('C1', [], 'zone')
+        self.cache.add('C3', 'N3', {'zone': 'AZ1'})
+
+        self.cache.invalidate('C1')
+        self.assertEqual(1, self.cache.stats()['size'])
+        self.cache.clear()
+        self.assertEqual({'hits': 0, 'misses': 0, 'size': 0},
+                         self.cache.stats())
@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from senlin.common import hash_ring
+from senlin.tests.unit.common import base
+
+
+class TestHashRing(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestHashRing, self).setUp()
+        self.keys = ['CLUSTER_%s' % i for i in range(3000)]
+
+    def _owners(self, members):
+        ring = hash_ring.HashRing(members)
+        return dict((key, ring.get_member(key)) for key in self.keys)
+
+    def test_get_member(self):
+        ring = hash_ring.HashRing(['E1', 'E2', 'E3'])
+
+        member = ring.get_member('CLUSTER_ID')
+
+        self.assertIn(member, ['E1', 'E2', 'E3'])
+        # The same for any ring of the same members
+        self.assertEqual(member,
+                         hash_ring.HashRing(['E3', 'E2', 'E1']).get_member(
+                             'CLUSTER_ID'))
+
+    def test_get_member_empty(self):
+        ring = hash_ring.HashRing([])
+
+        self.assertIsNone(ring.get_member('CLUSTER_ID'))
+        self.assertEqual({}, ring.distribute(self.keys))
+
+    def test_distribute(self):
+        ring = hash_ring.HashRing(['E1', 'E2', 'E3'])
+
+        res = ring.distribute(self.keys)
+
+        self.assertEqual(['E1', 'E2', 'E3'], sorted(res.keys()))
+        self.assertEqual(sorted(self.keys),
+                         sorted(k for keys in res.values() for k in keys))
+        for keys in res.values():
+            # roughly 1000 keys each
+            self.assertTrue(700 < len(keys) < 1300, len(keys))
+
+    def test_member_join(self):
+        before = self._owners(['E1', 'E2', 'E3'])
+        after = self._owners(['E1', 'E2', 'E3', 'E4'])
+
+        moved = [k for k in self.keys if before[k] != after[k]]
+
+        # Only the keys taken over by the new member move, about 1/4 of them
+        self.assertEqual(set(['E4']), set(after[k] for k in moved))
+        self.assertTrue(500 < len(moved) < 1000, len(moved))
+
+    def test_member_leave(self):
+        before = self._owners(['E1', 'E2', 'E3'])
+        after = self._owners(['E1', 'E3'])
+
+        moved = [k for k in self.keys if before[k] != after[k]]
+
+        # Only the keys of the member leaving move
+        self.assertEqual(sorted(k for k in self.keys if before[k] == 'E2'),
+                         sorted(moved))
+
+    def test_churn(self):
+        members = ['E%s' % i for i in range(5)]
+        owners = self._owners(members)
+        for i in range(5, 15):
+            # one engine joins, the oldest leaves
+            members.append('E%s' % i)
+            gone = members.pop(0)
+            new_owners = self._owners(members)
+            for key in self.keys:
+                if new_owners[key] != owners[key]:
+                    self.assertTrue(owners[key] == gone or
+                                    new_owners[key] == 'E%s' % i)
+            owners = new_owners
@@ -0,0 +1,130 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import time
+
+import mock
+from oslo_config import cfg
+from oslo_utils import timeutils
+
+from senlin.common import membership
+from senlin.objects import service as service_obj
+from senlin.tests.unit.common import base
+from senlin.tests.unit.common import utils
+
+
+class TestMembershipView(base.SenlinTestCase):
+
+    def setUp(self):
+        super(TestMembershipView, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.now = timeutils.utcnow(True)
+        self.services = [self._service('E1'), self._service('E2')]
+        self.mock_get = self.patchobject(service_obj.Service, 'get_all',
+                                         side_effect=lambda c: self.services)
+        self.view = membership.MembershipView()
+
+    def _service(self, engine_id, age=0):
+        updated_at = self.now - datetime.timedelta(seconds=age)
+        return mock.Mock(id=engine_id, updated_at=updated_at)
+
+    def test_refresh(self):
+        self.services.append(
+            self._service('DEAD', age=3 * cfg.CONF.periodic_interval))
+
+        self.view.refresh(self.ctx)
+
+        self.mock_get.assert_called_once_with(self.ctx)
+        self.assertEqual(set(['E1', 'E2']), self.view.get_engine_ids())
+        self.assertEqual(['E1', 'E2'],
+                         [s.id for s in self.view.get_engines()])
+        self.assertEqual(1, self.view.version)
+
+    def test_is_alive(self):
+        self.assertTrue(self.view.is_alive(self.ctx, 'E1', 10))
+        self.assertFalse(self.view.is_alive(self.ctx, 'E3', 10))
+
+        # answered from memory until the view expires
+        self.mock_get.assert_called_once_with(self.ctx)
+
+    def test_is_alive_stale(self):
+        self.services[0].updated_at -= datetime.timedelta(seconds=20)
+
+        # E1 hasn't reported within the duration, though read as alive
+        self.assertEqual(set(['E1', 'E2']),
+                         self.view.get_engine_ids(self.ctx))
+        self.assertFalse(self.view.is_alive(self.ctx, 'E1', 10))
+        self.assertTrue(self.view.is_alive(self.ctx, 'E2', 10))
+
+    def test_expired(self):
+        self.view.get_engine_ids(self.ctx)
+        self.view._refreshed_at = time.time() - cfg.CONF.periodic_interval
+
+        self.view.get_engine_ids(self.ctx)
+
+        self.assertEqual(2, self.mock_get.call_count)
+
+    def test_ttl(self):
+        cfg.CONF.set_override('engine_membership_ttl', 5, enforce_type=True)
+        self.view.get_engine_ids(self.ctx)
+        self.view._refreshed_at = time.time() - 4
+
+        self.view.get_engine_ids(self.ctx)
+        self.assertEqual(1, self.mock_get.call_count)
+
+        self.view._refreshed_at = time.time() - 5
+        self.view.get_engine_ids(self.ctx)
+        self.assertEqual(2, self.mock_get.call_count)
+
+    def test_subscribe(self):
+        callback = mock.Mock()
+        self.view.subscribe(callback)
+
+        # nothing notified at the first read
+        self.view.refresh(self.ctx)
+        self.view.refresh(self.ctx)
+        self.assertFalse(callback.called)
+
+        self.services = [self._service('E2'), self._service('E3')]
+        self.view.refresh(self.ctx)
+        callback.assert_called_once_with(set(['E3']), set(['E1']))
+
+        self.view.unsubscribe(callback)
+        self.services = [self._service('E2')]
+        self.view.refresh(self.ctx)
+        self.assertEqual(1, callback.call_count)
+
+    def test_subscriber_failed(self):
+        failed = mock.Mock(side_effect=Exception('boom'))
+        callback = mock.Mock()
+        self.view.subscribe(failed)
+        self.view.subscribe(callback)
+        self.view.refresh(self.ctx)
+
+        self.services = []
+        self.view.refresh(self.ctx)
+
+        failed.assert_called_once_with(set(), set(['E1', 'E2']))
+        callback.assert_called_once_with(set(), set(['E1', 'E2']))
+        self.assertEqual(set(), self.view.get_engine_ids())
+
+    def test_clear(self):
+        self.view.subscribe(mock.Mock())
+        self.view.refresh(self.ctx)
+
+        self.view.clear()
+
+        self.assertEqual([], self.view._listeners)
+        self.assertEqual(0, self.view.version)
+        self.assertEqual(set(['E1', 'E2']), self.view.get_engine_ids())
+        self.assertEqual(2, self.mock_get.call_count)
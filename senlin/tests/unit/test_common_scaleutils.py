@@ -10,6 +10,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+import math
+import random
+
 import mock
 
 from senlin.common import consts
@@ -403,3 +407,170 @@ class CheckSizeParamsTest(base.SenlinTestCase):
 
         actual = su.check_size_params(cluster, desired, min_size, max_size)
         self.assertIsNone(actual)
+
+
+def _reference_nodes_by_age(nodes, count, old_first):
+    # The selection by age done by sorting all the nodes, kept to check that
+    # the same victims are selected.
+    selected, candidates = su.filter_error_nodes(nodes)
+    if count <= len(selected):
+        return selected[:count]
+
+    count -= len(selected)
+    sorted_list = sorted(candidates, key=lambda r: r.created_at)
+    for i in range(count):
+        if old_first:
+            selected.append(sorted_list[i].id)
+        else:
+            selected.append(sorted_list[-1 - i].id)
+    return selected
+
+
+FakeNode = collections.namedtuple('FakeNode',
+                                  ['id', 'status', 'created_at', 'rt'])
+FakeProfile = collections.namedtuple('FakeProfile', ['created_at'])
+
+
+class VictimSelectionTest(base.SenlinTestCase):
+
+    def _nodes(self, count, rand):
+        # A scaled in cluster with some failed nodes and many nodes created
+        # at the same time
+        nodes = []
+        for i in range(count):
+            status = 'ERROR' if rand.random() < 0.01 else 'ACTIVE'
+            created_at = rand.randint(0, count // 10)
+            if rand.random() < 0.01:
+                created_at = None
+            profile = FakeProfile(rand.randint(0, 5))
+            nodes.append(FakeNode('N%s' % i, status, created_at,
+                                  {'profile': profile}))
+        return nodes
+
+    def test_nodes_by_age_same_as_sorting(self):
+        rand = random.Random(20160901)
+        nodes = self._nodes(20000, rand)
+
+        for count in [1, 100, 300, 1000, 20000]:
+            for old_first in [True, False]:
+                self.assertEqual(
+                    _reference_nodes_by_age(nodes, count, old_first),
+                    su.nodes_by_age(nodes, count, old_first))
+
+    def test_nodes_by_profile_age_same_as_sorting(self):
+        rand = random.Random(20160901)
+        nodes = self._nodes(20000, rand)
+        selected, good = su.filter_error_nodes(nodes)
+        ordered = sorted(good, key=lambda n: n.rt['profile'].created_at)
+
+        res = su.nodes_by_profile_age(nodes, 1000)
+
+        self.assertEqual(selected + [n.id for n in ordered][:1000 - len(
+            selected)], res)
+
+    def test_nodes_by_random_large(self):
+        rand = random.Random(20160901)
+        nodes = self._nodes(20000, rand)
+        selected, good = su.filter_error_nodes(nodes)
+
+        res = su.nodes_by_random(nodes, 1000)
+
+        self.assertEqual(1000, len(res))
+        self.assertEqual(1000, len(set(res)))
+        self.assertEqual(selected, res[:len(selected)])
+
+        # all the nodes are selected when too many are requested
+        res = su.nodes_by_random(nodes[:10], 20)
+        self.assertEqual(set(n.id for n in nodes[:10]), set(res))
+
+
+def _reference_plan(current, weights, count, expand, caps=None):
+    # The planner used by the placement policies before it was shared,
+    # kept to check that the plans computed are still the same.
+    candidates = sorted(weights.items(), key=lambda x: x[1], reverse=expand)
+    sum_weight = sum(weights.values())
+    if expand:
+        total = count + sum(current.values())
+    else:
+        total = sum(current.values()) - count
+
+    remain = count
+    plan = dict.fromkeys(weights.keys(), 0)
+    for name, weight in candidates:
+        q = total * weight / float(sum_weight)
+        if expand:
+            quota = int(math.ceil(q))
+            if caps is not None and caps[name] >= 0:
+                quota = min(quota, caps[name])
+            headroom = quota - current[name]
+        else:
+            quota = int(math.floor(q))
+            headroom = current[name] - quota
+
+        if headroom <= 0:
+            continue
+
+        if headroom < remain:
+            plan[name] = headroom
+            remain -= headroom
+        else:
+            plan[name] = remain if remain > 0 else 0
+            remain = 0
+            break
+
+    if remain > 0:
+        return None
+
+    return dict((n, c) for n, c in plan.items() if c > 0)
+
+
+class WeightedPlanTest(base.SenlinTestCase):
+
+    def test_expand(self):
+        current = {'AZ1': 0, 'AZ2': 0, 'AZ3': 0}
+        weights = {'AZ1': 100, 'AZ2': 50, 'AZ3': 10}
+
+        res = su.weighted_plan(current, weights, 7, True)
+
+        self.assertEqual({'AZ1': 5, 'AZ2': 2}, res)
+
+    def test_shrink(self):
+        current = {'AZ1': 5, 'AZ2': 3, 'AZ3': 2}
+        weights = {'AZ1': 100, 'AZ2': 50, 'AZ3': 10}
+
+        res = su.weighted_plan(current, weights, 4, False)
+
+        self.assertEqual({'AZ3': 2, 'AZ2': 2}, res)
+
+    def test_expand_with_caps(self):
+        current = {'R1': 2, 'R2': 0}
+        weights = {'R1': 100, 'R2': 100}
+
+        res = su.weighted_plan(current, weights, 4, True,
+                               caps={'R1': 3, 'R2': -1})
+        self.assertEqual({'R1': 1, 'R2': 3}, res)
+
+        res = su.weighted_plan(current, weights, 4, True,
+                               caps={'R1': 2, 'R2': 2})
+        self.assertIsNone(res)
+
+    def test_same_as_reference(self):
+        rand = random.Random(20160901)
+        for i in range(2000):
+            names = ['C%s' % n for n in range(rand.randint(1, 50))]
+            weights = dict((n, rand.randint(1, 1000)) for n in names)
+            current = dict((n, rand.randint(0, 400)) for n in names)
+            caps = dict((n, rand.choice([-1, rand.randint(0, 500)]))
+                        for n in names)
+            expand = rand.random() < 0.5
+            if expand:
+                count = rand.randint(1, 1000)
+            else:
+                count = rand.randint(1, max(sum(current.values()), 1))
+
+            self.assertEqual(
+                _reference_plan(current, weights, count, expand),
+                su.weighted_plan(current, weights, count, expand))
+            self.assertEqual(
+                _reference_plan(current, weights, count, expand, caps),
+                su.weighted_plan(current, weights, count, expand, caps))
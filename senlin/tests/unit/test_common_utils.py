@@ -273,11 +273,44 @@ class TestGetPathParser(base.SenlinTestCase):
                          six.text_type(err))
 
 
+class TestLazyDict(base.SenlinTestCase):
+
+    def test_load_once(self):
+        loader = mock.Mock(return_value='VALUE')
+        d = utils.LazyDict({'key': loader})
+
+        self.assertEqual({}, d)
+        self.assertEqual('VALUE', d['key'])
+        self.assertEqual('VALUE', d.get('key'))
+        self.assertEqual({'key': 'VALUE'}, d)
+        loader.assert_called_once_with()
+
+    def test_unknown_key(self):
+        d = utils.LazyDict({})
+
+        self.assertRaises(KeyError, d.__getitem__, 'key')
+        self.assertEqual('DEFAULT', d.get('key', 'DEFAULT'))
+
+    def test_assign_and_clear(self):
+        loader = mock.Mock(return_value='VALUE')
+        d = utils.LazyDict({'key': loader})
+
+        d['key'] = 'ASSIGNED'
+        self.assertEqual('ASSIGNED', d['key'])
+        self.assertFalse(loader.called)
+
+        d.clear()
+        self.assertEqual('VALUE', d['key'])
+        loader.assert_called_once_with()
+
+
 class EngineDeathTest(base.SenlinTestCase):
 
     def setUp(self):
         super(EngineDeathTest, self).setUp()
         self.ctx = mock.Mock()
+        self.mock_get_all = self.patchobject(service_obj.Service, 'get_all',
+                                             return_value=[])
 
     @mock.patch.object(service_obj.Service, 'get')
     def test_engine_is_none(self, mock_service):
@@ -305,6 +338,37 @@ class EngineDeathTest(base.SenlinTestCase):
         self.assertFalse(res)
         mock_svc.assert_called_once_with(self.ctx, 'fake_engine_id')
 
+    @mock.patch.object(service_obj.Service, 'get')
+    def test_engine_is_alive_from_view(self, mock_svc):
+        self.mock_get_all.return_value = [
+            mock.Mock(id='fake_engine_id', updated_at=timeutils.utcnow(True))]
+
+        for i in range(3):
+            res = utils.is_engine_dead(self.ctx, 'fake_engine_id')
+            self.assertFalse(res)
+
+        # the engines alive are read once, none is read alone
+        self.mock_get_all.assert_called_once_with(self.ctx)
+        self.assertFalse(mock_svc.called)
+
+    @mock.patch.object(service_obj.Service, 'get')
+    def test_engine_is_dead_view_stale(self, mock_svc):
+        delta = datetime.timedelta(seconds=3 * cfg.CONF.periodic_interval)
+        svc = mock.Mock(id='fake_engine_id',
+                        updated_at=timeutils.utcnow(True))
+        self.mock_get_all.return_value = [svc]
+        self.assertFalse(utils.is_engine_dead(self.ctx, 'fake_engine_id'))
+
+        # the engine stopped reporting since the view was read
+        svc.updated_at -= delta
+        mock_svc.return_value = mock.Mock(updated_at=svc.updated_at)
+
+        res = utils.is_engine_dead(self.ctx, 'fake_engine_id')
+
+        self.assertTrue(res)
+        self.mock_get_all.assert_called_once_with(self.ctx)
+        mock_svc.assert_called_once_with(self.ctx, 'fake_engine_id')
+
     @mock.patch.object(service_obj.Service, 'get')
     def test_use_specified_duration(self, mock_svc):
         mock_svc.return_value = mock.Mock(updated_at=timeutils.utcnow(True))